@@ -0,0 +1,59 @@
+from .backends import BACKENDS, build, build_identity, command
+from .runner import (DATASET_LABELS, load_matrix, expand, config_label, run_once,
+                     run_config, run_matrix, add_speedups, regressions, format_table)
+from .counters import (PERF_EVENTS, parse_perf, perf_available, build_wrapper, run_measured,
+                       summarize_counters, counter_fields, describe_counters)
+from .roofline import (TRAFFIC, build_probe, run_probe, traffic, roofline_points, format_roofline,
+                       plot_roofline, roofline_report)
+from .scaling import fit_series, fit_records, format_fits, generate_weak_datasets, plot_fits
+from .report import FIGURES, render_figures, format_report
+from .stats import bootstrap_ci, summarize, mann_whitney_greater, regression_check
+from .store import DEFAULT_STORE, ResultStore, host_fingerprint
+
+__all__ = [
+    'BACKENDS',
+    'build',
+    'build_identity',
+    'command',
+    'DATASET_LABELS',
+    'load_matrix',
+    'expand',
+    'config_label',
+    'run_once',
+    'run_config',
+    'run_matrix',
+    'add_speedups',
+    'regressions',
+    'format_table',
+    'PERF_EVENTS',
+    'parse_perf',
+    'perf_available',
+    'build_wrapper',
+    'run_measured',
+    'summarize_counters',
+    'counter_fields',
+    'describe_counters',
+    'TRAFFIC',
+    'build_probe',
+    'run_probe',
+    'traffic',
+    'roofline_points',
+    'format_roofline',
+    'plot_roofline',
+    'roofline_report',
+    'fit_series',
+    'fit_records',
+    'format_fits',
+    'generate_weak_datasets',
+    'plot_fits',
+    'FIGURES',
+    'render_figures',
+    'format_report',
+    'bootstrap_ci',
+    'summarize',
+    'mann_whitney_greater',
+    'regression_check',
+    'DEFAULT_STORE',
+    'ResultStore',
+    'host_fingerprint',
+]
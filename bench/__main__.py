@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+
+from . import report, roofline, scaling
+from .backends import BACKENDS
+from .runner import format_table, load_matrix, precision_failures, regressions, run_matrix
+from .store import DEFAULT_STORE, ResultStore
+
+DEFAULT_MATRIX = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'matrix.json')
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python3 -m bench',
+        description="Executa uma matriz declarativa (backend x dataset x threads/processos x "
+                    "schedule) com aquecimento e repetições, usando a saída --json dos binários.")
+    parser.add_argument('matriz', nargs='?', default=DEFAULT_MATRIX,
+                        help="arquivo JSON da matriz (padrão: bench/matrix.json)")
+    parser.add_argument('--saida', default='bench_results.jsonl',
+                        help="arquivo JSON Lines onde cada configuração é acrescentada")
+    parser.add_argument('--repeticoes', type=int, help="sobrescreve \"repetitions\" da matriz")
+    parser.add_argument('--warmup', type=int, help="sobrescreve \"warmup\" da matriz")
+    parser.add_argument('--datasets', nargs='+', help="sobrescreve \"datasets\" da matriz")
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS),
+                        help="executa só as entradas destes backends")
+    parser.add_argument('--cc', help="compilador C para os backends não-MPI (padrão: gcc)")
+    parser.add_argument('--timeout', type=float, help="limite em segundos por execução")
+    parser.add_argument('--store', default=DEFAULT_STORE,
+                        help="banco SQLite de resultados (padrão: bench_results.sqlite na raiz)")
+    parser.add_argument('--sem-store', action='store_true',
+                        help="não lê nem grava o banco de resultados")
+    parser.add_argument('--forcar', action='store_true',
+                        help="executa mesmo as configurações com resultado recente no banco")
+    parser.add_argument('--sem-perf', action='store_true',
+                        help="não envolve as execuções com `perf stat` (getrusage continua)")
+    parser.add_argument('--max-idade', type=float,
+                        help="idade máxima (horas) de um resultado reaproveitado; sobrescreve \"max_age_hours\"")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['roofline']:
+        return roofline.main(argv[1:])
+    if argv[:1] == ['scaling']:
+        return scaling.main(argv[1:])
+    if argv[:1] == ['report']:
+        return report.main(argv[1:])
+    args = parse_args(argv)
+    matrix = load_matrix(args.matriz)
+    if args.repeticoes is not None:
+        matrix['repetitions'] = args.repeticoes
+    if args.warmup is not None:
+        matrix['warmup'] = args.warmup
+    if args.datasets:
+        matrix['datasets'] = args.datasets
+        for run in matrix.get('runs', []):
+            run.pop('datasets', None)
+    if args.max_idade is not None:
+        matrix['max_age_hours'] = args.max_idade
+    if args.sem_perf:
+        matrix['perf'] = False
+    if args.backends:
+        matrix['runs'] = [r for r in matrix.get('runs', []) if r['backend'] in args.backends]
+
+    if matrix.get('repetitions', 1) <= 0 or matrix.get('warmup', 0) < 0:
+        print("Parâmetros inválidos: repetições>0 e warmup>=0", file=sys.stderr)
+        return 1
+
+    store = None if args.sem_store else ResultStore(args.store)
+    try:
+        records = run_matrix(matrix, out=args.saida, cc=args.cc, timeout=args.timeout,
+                             store=store, force=args.forcar)
+    except (RuntimeError, FileNotFoundError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if store:
+            store.close()
+
+    print()
+    print(format_table(records))
+    print(f"\nResultados acrescentados em {args.saida}" + ("" if args.sem_store else f" e {args.store}"))
+    # Código de saída 2 quando há regressão ou SSE fora da tolerância, para
+    # servir de gate em scripts.
+    return 2 if regressions(records) or precision_failures(records) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
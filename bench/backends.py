@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+import glob
+import hashlib
+import os
+import platform
+import subprocess
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMON = os.path.join(ROOT, 'common')
+
+# Como compilar e executar cada backend. Todos aceitam os mesmos argumentos
+# posicionais (dados, centróides, max_iter, eps) e a opção --json; 'args'
+# são opções extras fixas do backend.
+BACKENDS = {
+    'serial': {
+        'dir': 'serial', 'source': 'method_means_1d_serial.c', 'binary': 'kmeans_1d_serial',
+        'cc': 'gcc', 'flags': ['-O2', '-std=c99'],
+    },
+    'serial_ooc': {
+        'dir': 'serial', 'source': 'method_means_1d_serial.c', 'binary': 'kmeans_1d_serial',
+        'cc': 'gcc', 'flags': ['-O2', '-std=c99'], 'args': ['--chunk', '1048576'],
+    },
+    'serial_hamerly': {
+        'dir': 'serial', 'source': 'method_means_1d_serial.c', 'binary': 'kmeans_1d_serial',
+        'cc': 'gcc', 'flags': ['-O2', '-std=c99'], 'args': ['--hamerly'],
+    },
+    'serial_incremental': {
+        'dir': 'serial', 'source': 'method_means_1d_serial.c', 'binary': 'kmeans_1d_serial',
+        'cc': 'gcc', 'flags': ['-O2', '-std=c99'], 'args': ['--incremental'],
+    },
+    'serial_dedup': {
+        'dir': 'serial', 'source': 'method_means_1d_serial.c', 'binary': 'kmeans_1d_serial',
+        'cc': 'gcc', 'flags': ['-O2', '-std=c99'], 'args': ['--dedup'],
+    },
+    'serial_f32': {
+        'dir': 'serial', 'source': 'method_means_1d_serial.c', 'binary': 'kmeans_1d_serial',
+        'cc': 'gcc', 'flags': ['-O2', '-std=c99'], 'args': ['--float32'],
+    },
+    'sorted': {
+        'dir': 'serial', 'source': 'method_means_1d_sorted.c', 'binary': 'kmeans_1d_sorted',
+        'cc': 'gcc', 'flags': ['-O2', '-std=c99'],
+    },
+    'optimal': {
+        'dir': 'serial', 'source': 'method_means_1d_optimal.c', 'binary': 'kmeans_1d_optimal',
+        'cc': 'gcc', 'flags': ['-O2', '-std=c99'],
+    },
+    'minibatch': {
+        'dir': 'serial', 'source': 'method_means_1d_minibatch.c', 'binary': 'kmeans_1d_minibatch',
+        'cc': 'gcc', 'flags': ['-O2', '-std=c99'],
+    },
+    'histogram': {
+        'dir': 'serial', 'source': 'method_means_1d_histogram.c', 'binary': 'kmeans_1d_histogram',
+        'cc': 'gcc', 'flags': ['-O2', '-std=c99'],
+    },
+    'openmp': {
+        'dir': 'openMp', 'source': 'method_means_1d_omp.c', 'binary': 'kmeans_1d_omp',
+        'cc': 'gcc', 'flags': ['-O2', '-fopenmp', '-std=c99'],
+    },
+    'openmp_hamerly': {
+        'dir': 'openMp', 'source': 'method_means_1d_omp.c', 'binary': 'kmeans_1d_omp',
+        'cc': 'gcc', 'flags': ['-O2', '-fopenmp', '-std=c99'], 'args': ['--hamerly'],
+    },
+    'openmp_dedup': {
+        'dir': 'openMp', 'source': 'method_means_1d_omp.c', 'binary': 'kmeans_1d_omp',
+        'cc': 'gcc', 'flags': ['-O2', '-fopenmp', '-std=c99'], 'args': ['--dedup'],
+    },
+    'openmp_f32': {
+        'dir': 'openMp', 'source': 'method_means_1d_omp.c', 'binary': 'kmeans_1d_omp',
+        'cc': 'gcc', 'flags': ['-O2', '-fopenmp', '-std=c99'], 'args': ['--float32'],
+    },
+    'openmp_schedule': {
+        'dir': 'openMp', 'source': 'method_means_1d_omp_schedule.c', 'binary': 'kmeans_schedule',
+        'cc': 'gcc', 'flags': ['-O2', '-fopenmp', '-std=c99'],
+    },
+    'mpi': {
+        'dir': 'mpi', 'source': 'method_means_1d_mpi.c', 'binary': 'kmeans_1d_mpi',
+        'cc': 'mpicc', 'flags': ['-O2', '-std=c99'],
+    },
+    'mpi_incremental': {
+        'dir': 'mpi', 'source': 'method_means_1d_mpi.c', 'binary': 'kmeans_1d_mpi',
+        'cc': 'mpicc', 'flags': ['-O2', '-std=c99'], 'args': ['--incremental'],
+    },
+    'python': {},
+    'python_shm': {},
+    'python_threads': {},
+    'python_dedup': {},
+    'python_f32': {},
+}
+
+# Backends executados com `python3 -m kmeans1d` (sem compilação).
+PYTHON_BACKENDS = ('python', 'python_shm', 'python_threads', 'python_dedup', 'python_f32')
+
+# Backends conferidos contra um caminho de referência medido no mesmo host,
+# dataset e parâmetros. Chave: backend ou "backend:solver"; valor:
+# (referência, desvio relativo máximo do SSE, exige as mesmas iterações).
+# Uma referência fora do serial é procurada com os mesmos threads/processos.
+#   precisão reduzida  X em float32 erra no máximo 2^-24 relativo por ponto;
+#                      1e-5 deixa margem para iterações que terminam em outro
+#                      ponto do critério de parada
+#   paridade exata     mesmo caminho de cálculo que o Lloyd da referência:
+#                      mesmas iterações e o mesmo SSE bit a bit (0.0)
+#   mesmas iterações   mesmos rótulos, mas as somas saem em outra ordem
+#                      (atualização incremental, pesos): SSE até 1e-12
+SSE_TOLERANCE = {
+    'serial_f32': ('serial', 1e-5, False),
+    'openmp_f32': ('serial', 1e-5, False),
+    'python_f32': ('serial', 1e-5, False),
+    'serial_ooc': ('serial', 0.0, True),
+    'serial_hamerly': ('serial', 0.0, True),
+    'openmp_hamerly': ('openmp', 0.0, True),
+    'python:hamerly': ('python:lloyd', 0.0, True),
+    'serial_incremental': ('serial', 1e-12, True),
+    'serial_dedup': ('serial', 1e-12, True),
+    'openmp_dedup': ('serial', 1e-12, True),
+    'python_dedup': ('serial', 1e-12, True),
+}
+
+# Backends executados com mpirun (exigem "processes" na matriz).
+MPI_BACKENDS = ('mpi', 'mpi_incremental')
+
+
+def binary_path(name):
+    spec = BACKENDS[name]
+    return os.path.join(ROOT, spec['dir'], spec['binary'])
+
+
+def compile_command(name, cc=None):
+    spec = BACKENDS[name]
+    compiler = cc if cc and spec['cc'] == 'gcc' else spec['cc']
+    return [compiler] + spec['flags']
+
+
+def file_hash(*paths):
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+    return h.hexdigest()
+
+
+def build_identity(name, cc=None):
+    # (hash do binário, flags) de um backend já compilado. Para o backend
+    # Python, o "binário" são os fontes de kmeans1d/ e as flags as versões
+    # do interpretador e do NumPy.
+    if name in PYTHON_BACKENDS:
+        sources = sorted(glob.glob(os.path.join(ROOT, 'kmeans1d', '*.py')))
+        return file_hash(*sources), f"python {platform.python_version()} numpy {np.__version__}"
+    return file_hash(binary_path(name)), ' '.join(compile_command(name, cc))
+
+
+def build(name, cc=None, log=print):
+    # Compila o backend quando o binário não existe ou é mais antigo que o
+    # fonte ou que os headers compartilhados em common/.
+    spec = BACKENDS[name]
+    if not spec:
+        return None
+    source = os.path.join(ROOT, spec['dir'], spec['source'])
+    binary = binary_path(name)
+    deps = [source] + [os.path.join(COMMON, h) for h in os.listdir(COMMON) if h.endswith('.h')]
+    if os.path.exists(binary) and os.path.getmtime(binary) >= max(map(os.path.getmtime, deps)):
+        return binary
+
+    cmd = compile_command(name, cc) + [source, '-o', binary, '-lm']
+    log(f"Compilando {name}: {' '.join(cmd)}")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Erro ao compilar {name}:\n{result.stderr}")
+    return binary
+
+
+def command(config, data, centroids, max_iter, eps, mpirun=('mpirun',)):
+    # Linha de comando e ambiente de uma execução da matriz.
+    name = config['backend']
+    env = dict(os.environ)
+    args = [data, centroids, str(max_iter), repr(float(eps)), '--json']
+
+    if name in PYTHON_BACKENDS:
+        argv = [sys.executable, '-m', 'kmeans1d'] + args + ['--solver', config.get('solver') or 'lloyd']
+        if name == 'python_shm':
+            argv += ['--processos', str(config['processes'])]
+        if name == 'python_dedup':
+            argv += ['--dedup']
+        if name == 'python_f32':
+            argv += ['--float32']
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    elif name in MPI_BACKENDS:
+        argv = list(mpirun) + ['-np', str(config['processes']), binary_path(name)] + args
+        argv += BACKENDS[name].get('args', [])
+    else:
+        argv = [binary_path(name)] + args + BACKENDS[name].get('args', [])
+
+    # O engine Python com threads lê KMEANS_*, com o mesmo formato das OMP_*.
+    prefix = 'KMEANS' if name == 'python_threads' else 'OMP'
+    if config.get('threads'):
+        env[f'{prefix}_NUM_THREADS'] = str(config['threads'])
+    if config.get('schedule'):
+        env[f'{prefix}_SCHEDULE'] = config['schedule']
+    return argv, env
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Eventos pedidos ao `perf stat` e o campo de cada um no registro. Os
+# eventos genéricos do perf são mapeados pelo kernel para os contadores da
+# CPU; LLC-load-misses são leituras que saíram do último nível de cache.
+PERF_EVENTS = (
+    ('cycles', 'cycles'),
+    ('instructions', 'instructions'),
+    ('LLC-load-misses', 'llc_misses'),
+    ('context-switches', 'context_switches'),
+)
+
+# Bytes trazidos da memória por falta no LLC (uma linha de cache).
+CACHE_LINE = 64
+
+# Processo intermediário que faz o fork do comando medido e grava o
+# getrusage dele (ver o comentário em rusage_exec.c). RSS_CHECK_KB é o
+# pico aceito para `true` na verificação feita ao compilá-lo.
+WRAPPER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rusage_exec.c')
+WRAPPER_BINARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rusage_exec')
+WRAPPER_FLAGS = ['-O2', '-std=c99']
+RSS_CHECK_KB = 16 * 1024
+
+_PERF = {}
+_WRAPPER = {}
+
+
+def parse_perf(text):
+    # Saída de `perf stat -x,`: valor,unidade,evento,... por linha. Eventos
+    # sem suporte ou não contados (<not supported>, <not counted>) ficam None.
+    events = dict(PERF_EVENTS)
+    values = {field: None for _, field in PERF_EVENTS}
+    for line in text.splitlines():
+        parts = line.strip().split(',')
+        if len(parts) < 3 or line.startswith('#'):
+            continue
+        field = events.get(parts[2].split(':')[0])
+        if field is None:
+            continue
+        try:
+            values[field] = int(float(parts[0]))
+        except ValueError:
+            values[field] = None
+    return values
+
+
+def perf_available():
+    # `perf stat` utilizável: binário no PATH e contadores liberados pelo
+    # kernel (perf_event_paranoid e contêineres costumam bloqueá-los).
+    # Testado uma vez por processo.
+    if 'ok' not in _PERF:
+        exe = shutil.which('perf')
+        ok = False
+        if exe:
+            try:
+                result = subprocess.run([exe, 'stat', '-x', ',', '-e', 'instructions', 'true'],
+                                        capture_output=True, text=True, timeout=30)
+                ok = result.returncode == 0 and parse_perf(result.stderr)['instructions'] is not None
+            except (OSError, subprocess.TimeoutExpired):
+                ok = False
+        _PERF['ok'] = ok
+    return _PERF['ok']
+
+
+def build_wrapper(cc=None):
+    # Compila rusage_exec quando o binário não existe ou é mais antigo que
+    # o fonte e confere, uma vez por processo, que `true` medido por ele tem
+    # só alguns MB de pico de RSS: acima de RSS_CHECK_KB a medida estaria
+    # contando a memória deste processo e não a do comando.
+    if 'path' in _WRAPPER:
+        return _WRAPPER['path']
+    if not os.path.exists(WRAPPER_BINARY) or os.path.getmtime(WRAPPER_BINARY) < os.path.getmtime(WRAPPER_SOURCE):
+        cmd = [cc or 'gcc'] + WRAPPER_FLAGS + [WRAPPER_SOURCE, '-o', WRAPPER_BINARY]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Erro ao compilar {WRAPPER_SOURCE}:\n{result.stderr}")
+    _WRAPPER['path'] = WRAPPER_BINARY
+    rss = run_measured(['true'], dict(os.environ), perf=False)[3]['max_rss_kb']
+    if rss > RSS_CHECK_KB:
+        del _WRAPPER['path']
+        raise RuntimeError(f"Pico de RSS de `true` medido em {rss} KB (limite {RSS_CHECK_KB} KB): "
+                           f"a medida inclui a memória do bench")
+    return WRAPPER_BINARY
+
+
+def _read_usage(path):
+    # Linha gravada pelo rusage_exec, ou None se o comando não chegou a
+    # ser esperado por ele.
+    try:
+        with open(path) as f:
+            fields = [int(v) for v in f.read().split()]
+    except (OSError, ValueError):
+        return None
+    return fields if len(fields) == 7 else None
+
+
+def run_measured(argv, env, timeout=None, perf=True):
+    # Executa argv e devolve (returncode, stdout, stderr, medidas). As
+    # medidas vêm do getrusage do comando, feito pelo rusage_exec (que soma
+    # os descendentes que ele esperou, como os ranks sob o mpirun; sem o
+    # wrapper, do os.wait4 do próprio filho) e, com perf=True e perf
+    # disponível, do `perf stat` em volta do comando:
+    #   wall_ms                 tempo de parede (relógio monotônico)
+    #   user_ms, sys_ms         tempo de CPU
+    #   max_rss_kb              pico de memória residente do maior processo
+    #   voluntary_switches, involuntary_switches, minor_faults, major_faults
+    #   perf                    {cycles, instructions, llc_misses, context_switches} ou None
+    perf_out = None
+    fd, usage_out = tempfile.mkstemp(suffix='.rusage')
+    os.close(fd)
+    if 'path' in _WRAPPER:
+        argv = [_WRAPPER['path'], usage_out] + list(argv)
+    if perf and perf_available():
+        fd, perf_out = tempfile.mkstemp(suffix='.perf')
+        os.close(fd)
+        argv = ['perf', 'stat', '-x', ',', '-o', perf_out,
+                '-e', ','.join(event for event, _ in PERF_EVENTS), '--'] + list(argv)
+    try:
+        with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+            killed = []
+            t0 = time.monotonic_ns()
+            proc = subprocess.Popen(argv, env=env, stdout=out, stderr=err)
+            timer = None
+            if timeout:
+                # SIGTERM: o rusage_exec repassa ao comando.
+                timer = threading.Timer(timeout, lambda: (killed.append(True), proc.terminate()))
+                timer.start()
+            try:
+                _, status, usage = os.wait4(proc.pid, 0)
+            finally:
+                if timer:
+                    timer.cancel()
+            wall_ms = (time.monotonic_ns() - t0) / 1e6
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            if killed:
+                raise subprocess.TimeoutExpired(argv, timeout)
+            out.seek(0)
+            err.seek(0)
+            stdout = out.read().decode(errors='replace')
+            stderr = err.read().decode(errors='replace')
+        measured = _read_usage(usage_out)
+        if measured:
+            rss, user_us, sys_us, nvcsw, nivcsw, minflt, majflt = measured
+            user_ms, sys_ms = user_us / 1e3, sys_us / 1e3
+        else:
+            rss, nvcsw, nivcsw = usage.ru_maxrss, usage.ru_nvcsw, usage.ru_nivcsw
+            minflt, majflt = usage.ru_minflt, usage.ru_majflt
+            user_ms, sys_ms = usage.ru_utime * 1e3, usage.ru_stime * 1e3
+        counters = {
+            'wall_ms': wall_ms,
+            'user_ms': user_ms,
+            'sys_ms': sys_ms,
+            'max_rss_kb': rss,
+            'voluntary_switches': nvcsw,
+            'involuntary_switches': nivcsw,
+            'minor_faults': minflt,
+            'major_faults': majflt,
+            'perf': None,
+        }
+        if perf_out:
+            with open(perf_out) as f:
+                counters['perf'] = parse_perf(f.read())
+        return proc.returncode, stdout, stderr, counters
+    finally:
+        os.unlink(usage_out)
+        if perf_out:
+            os.unlink(perf_out)
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return float(np.median(values)) if values else None
+
+
+def summarize_counters(runs, n, iterations):
+    # Medianas por configuração das medidas de cada execução (run['counters'])
+    # e as grandezas derivadas:
+    #   ipc              instruções por ciclo
+    #   bytes_per_point  tráfego de memória por ponto e iteração, estimado
+    #                    pelas faltas no LLC (CACHE_LINE bytes cada)
+    #   rss_per_point    pico de RSS dividido por N
+    #   cpu_util         (user + sys) / parede: ~1 por thread ocupada
+    # Sem perf, os campos de contador ficam None e as trocas de contexto vêm
+    # do getrusage.
+    measured = [r['counters'] for r in runs if r.get('counters')]
+    if not measured:
+        return None
+    perf = [c['perf'] for c in measured if c.get('perf')]
+
+    def perf_median(field):
+        return _median([p[field] for p in perf])
+
+    ipcs = [p['instructions'] / p['cycles'] for p in perf if p['instructions'] and p['cycles']]
+    llc = perf_median('llc_misses')
+    switches = perf_median('context_switches')
+    if switches is None:
+        switches = _median([c['voluntary_switches'] + c['involuntary_switches'] for c in measured])
+    max_rss = max(c['max_rss_kb'] for c in measured)
+    wall = _median([c['wall_ms'] for c in measured])
+    cpu = _median([c['user_ms'] + c['sys_ms'] for c in measured])
+    points = n * max(iterations, 1)
+    return {
+        'wall_ms': wall,
+        'user_ms': _median([c['user_ms'] for c in measured]),
+        'sys_ms': _median([c['sys_ms'] for c in measured]),
+        'cpu_util': cpu / wall if wall else None,
+        'max_rss_kb': max_rss,
+        'context_switches': switches,
+        'cycles': perf_median('cycles'),
+        'instructions': perf_median('instructions'),
+        'llc_misses': llc,
+        'ipc': _median(ipcs),
+        'bytes_per_point': llc * CACHE_LINE / points if llc is not None else None,
+        'rss_per_point': max_rss * 1024.0 / n if n else None,
+        'perf': bool(perf),
+    }
+
+
+def counter_fields(record):
+    # Campos de contador que os scripts de análise guardam por configuração
+    # (None quando o registro é antigo ou foi medido sem perf).
+    counters = record.get('counters') or {}
+    return {
+        'ipc': counters.get('ipc'),
+        'bytes_per_point': counters.get('bytes_per_point'),
+        'max_rss_kb': counters.get('max_rss_kb'),
+    }
+
+
+def describe_counters(fields):
+    # "IPC 1.85, 3.2 B/pt, RSS 37.3 MB", omitindo o que não foi medido.
+    parts = []
+    if fields.get('ipc') is not None:
+        parts.append(f"IPC {fields['ipc']:.2f}")
+    if fields.get('bytes_per_point') is not None:
+        parts.append(f"{fields['bytes_per_point']:.1f} B/pt")
+    if fields.get('max_rss_kb') is not None:
+        parts.append(f"RSS {fields['max_rss_kb'] / 1024.0:.1f} MB")
+    return ', '.join(parts) if parts else 'sem contadores'
@@ -0,0 +1,199 @@
+#define _POSIX_C_SOURCE 200809L
+/* Sondas da máquina para o modelo roofline (python3 -m bench roofline).
+
+   Banda de memória, no estilo do STREAM (McCalpin): três vetores de n
+   doubles, bem maiores que o último nível de cache, e três kernels:
+     read   s += a[i]                 8 bytes/elemento (a passada de X do k-means;
+                                      READ_LANES somas parciais vetorizadas, para
+                                      a latência da soma não limitar a leitura)
+     copy   c[i] = a[i]              16 bytes/elemento
+     triad  a[i] = b[i] + q*c[i]     24 bytes/elemento
+   Como no STREAM, o write-allocate das escritas não é contado. Cada kernel
+   roda --reps vezes e vale o melhor tempo.
+
+   Banda por nível de cache: o kernel read sobre os primeiros bytes de a,
+   de LEVEL_MIN em diante, dobrando até a metade de n; cada thread relê a
+   sua fatia até somar LEVEL_TRAFFIC bytes por medição. Um conjunto de
+   trabalho que cabe no cache é lido mais rápido que o teto da DRAM, e o
+   roofline usa a banda do tamanho do X de cada resultado.
+
+   Pico de ponto flutuante: cada thread avança FLOP_CHAINS cadeias
+   independentes de a = a*m + q (2 FLOPs), em vetores (omp simd) e com FMA
+   (-O3 -march=native -ffp-contract=fast, PROBE_FLAGS em bench/roofline.py).
+   São registradores SIMD suficientes para esconder a latência do FMA nas
+   duas portas; assim o pico é um teto para qualquer backend, não o do
+   código escalar compilado com -O2.
+
+   Uso: machine_probe [--n ELEMENTOS] [--reps R] [--json]
+   Threads por OMP_NUM_THREADS. */
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#include "../common/kmeans_cli.h"
+
+#define FLOP_CHAINS 64
+#define FLOP_STEPS (1L << 24)
+#define READ_LANES 32
+#define LEVEL_MIN (16L << 10)
+#define LEVEL_TRAFFIC (256L << 20)
+#define MAX_LEVELS 48
+
+static double now(void){
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (double)ts.tv_sec + (double)ts.tv_nsec * 1e-9;
+}
+
+static int max_threads(void){
+#ifdef _OPENMP
+    return omp_get_max_threads();
+#else
+    return 1;
+#endif
+}
+
+static int thread_num(void){
+#ifdef _OPENMP
+    return omp_get_thread_num();
+#else
+    return 0;
+#endif
+}
+
+static int num_threads(void){
+#ifdef _OPENMP
+    return omp_get_num_threads();
+#else
+    return 1;
+#endif
+}
+
+/* Kernel read repetido sweeps vezes sobre os m primeiros elementos de a,
+   cada thread na sua fatia (sem barreira entre as passadas). */
+static double read_sweeps(const double *a, long m, long sweeps){
+    double s = 0.0;
+    #pragma omp parallel reduction(+:s)
+    {
+        long lo = m * thread_num() / num_threads();
+        long hi = m * (thread_num() + 1) / num_threads();
+        for(long r=0;r<sweeps;r++){
+            double p[READ_LANES] = {0.0};
+            long i = lo;
+            for(;i + READ_LANES <= hi;i+=READ_LANES){
+                #pragma omp simd
+                for(int j=0;j<READ_LANES;j++) p[j] += a[i + j];
+            }
+            for(;i<hi;i++) p[0] += a[i];
+            for(int j=0;j<READ_LANES;j++) s += p[j];
+        }
+    }
+    return s;
+}
+
+/* Cadeias de multiplica-soma em registradores vetoriais; devolve a soma
+   para o compilador não descartar o laço. */
+static double flop_chains(long steps, double m, double q){
+    double acc[FLOP_CHAINS];
+    for(int j=0;j<FLOP_CHAINS;j++) acc[j] = 1.0 + j * 1e-3;
+    for(long s=0;s<steps;s++){
+        #pragma omp simd
+        for(int j=0;j<FLOP_CHAINS;j++) acc[j] = acc[j] * m + q;
+    }
+    double total = 0.0;
+    for(int j=0;j<FLOP_CHAINS;j++) total += acc[j];
+    return total;
+}
+
+int main(int argc, char **argv){
+    int json = take_flag(&argc, argv, "--json");
+    const char *opt_n = take_option(&argc, argv, "--n");
+    const char *opt_reps = take_option(&argc, argv, "--reps");
+    long n = opt_n ? atol(opt_n) : (1L << 23);
+    int reps = opt_reps ? atoi(opt_reps) : 5;
+    if(argc != 1 || n <= 0 || reps <= 0){
+        fprintf(stderr,"Uso: %s [--n ELEMENTOS] [--reps R] [--json]\n", argv[0]);
+        return 1;
+    }
+
+    double *a = (double*)malloc((size_t)n * sizeof(double));
+    double *b = (double*)malloc((size_t)n * sizeof(double));
+    double *c = (double*)malloc((size_t)n * sizeof(double));
+    if(!a || !b || !c){ fprintf(stderr,"Sem memoria para %ld elementos\n", n); return 1; }
+
+    /* Primeiro toque com a mesma divisão dos kernels (páginas no nó NUMA
+       da thread que as usa). */
+    #pragma omp parallel for schedule(static)
+    for(long i=0;i<n;i++){ a[i] = 1.0; b[i] = 2.0; c[i] = 0.0; }
+
+    const double q = 3.0;
+    double best_read = 1e300, best_copy = 1e300, best_triad = 1e300, best_flop = 1e300;
+    double check = 0.0;
+    for(int r=0;r<reps;r++){
+        double t0 = now();
+        double s = read_sweeps(a, n, 1);
+        double t1 = now();
+        #pragma omp parallel for schedule(static)
+        for(long i=0;i<n;i++) c[i] = a[i];
+        double t2 = now();
+        #pragma omp parallel for schedule(static)
+        for(long i=0;i<n;i++) a[i] = b[i] + q * c[i];
+        double t3 = now();
+        double f = 0.0;
+        #pragma omp parallel reduction(+:f)
+        f += flop_chains(FLOP_STEPS, 0.999999, 1e-6);
+        double t4 = now();
+        check += s + a[n / 2] + f;
+        if(t1 - t0 < best_read) best_read = t1 - t0;
+        if(t2 - t1 < best_copy) best_copy = t2 - t1;
+        if(t3 - t2 < best_triad) best_triad = t3 - t2;
+        if(t4 - t3 < best_flop) best_flop = t4 - t3;
+    }
+
+    /* Banda por tamanho do conjunto de trabalho (bytes lidos). */
+    long level_bytes[MAX_LEVELS];
+    double level_gbs[MAX_LEVELS];
+    int levels = 0;
+    for(long bytes=LEVEL_MIN; bytes <= 4 * n && levels < MAX_LEVELS; bytes *= 2){
+        long m = bytes / 8;
+        long sweeps = LEVEL_TRAFFIC / bytes > 0 ? LEVEL_TRAFFIC / bytes : 1;
+        double best = 1e300;
+        for(int r=0;r<reps;r++){
+            double t0 = now();
+            check += read_sweeps(a, m, sweeps);
+            double t1 = now();
+            if(t1 - t0 < best) best = t1 - t0;
+        }
+        level_bytes[levels] = bytes;
+        level_gbs[levels] = 8.0 * m * sweeps / best / 1e9;
+        levels++;
+    }
+
+    int threads = max_threads();
+    double read_gbs = 8.0 * n / best_read / 1e9;
+    double copy_gbs = 16.0 * n / best_copy / 1e9;
+    double triad_gbs = 24.0 * n / best_triad / 1e9;
+    double gflops = 2.0 * FLOP_CHAINS * FLOP_STEPS * threads / best_flop / 1e9;
+    if(json){
+        printf("{\"probe\": \"machine\", \"threads\": %d, \"n\": %ld, \"reps\": %d, "
+               "\"read_gbs\": %.6f, \"copy_gbs\": %.6f, \"triad_gbs\": %.6f, \"gflops\": %.6f, "
+               "\"read_levels\": [",
+               threads, n, reps, read_gbs, copy_gbs, triad_gbs, gflops);
+        for(int l=0;l<levels;l++)
+            printf("%s[%ld, %.6f]", l ? ", " : "", level_bytes[l], level_gbs[l]);
+        printf("], \"check\": %.17g}\n", check);
+    } else {
+        printf("Sondas da maquina (%d threads, n=%ld, melhor de %d)\n", threads, n, reps);
+        printf("Banda read:  %8.2f GB/s\n", read_gbs);
+        printf("Banda copy:  %8.2f GB/s\n", copy_gbs);
+        printf("Banda triad: %8.2f GB/s\n", triad_gbs);
+        printf("Pico FLOP:   %8.2f GFLOP/s (FMA, %d cadeias)\n", gflops, FLOP_CHAINS);
+        for(int l=0;l<levels;l++)
+            printf("Read %8ld KiB: %8.2f GB/s\n", level_bytes[l] >> 10, level_gbs[l]);
+    }
+    free(a); free(b); free(c);
+    return 0;
+}
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+
+import argparse
+import collections
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .backends import file_hash
+from .roofline import RooflinePoint, format_roofline, parallelism, plot_roofline, roofline_points, traffic
+from .runner import DATASET_LABELS, add_speedups, format_table
+from .scaling import Fit, fit_records, format_fits, plot_fits
+from .store import DEFAULT_STORE, ResultStore, host_fingerprint
+
+# Figuras do relatório, lidas do banco de resultados (sem executar nada):
+#   name      nome usado em --figuras
+#   filename  arquivo gerado no diretório de saída
+#   data      (registros, sondas) -> dados da figura (JSON) ou None
+#   render    (dados, caminho, dpi) -> grava o PNG; roda num processo
+#             separado, com o matplotlib no backend Agg
+#   hint      comando que produz os resultados que faltam
+# Cada figura é redesenhada só quando o hash dos seus dados (mais dpi e o
+# código dos módulos que desenham) muda em relação ao manifesto do
+# diretório de saída.
+Figure = collections.namedtuple('Figure', 'name filename data render hint')
+
+MANIFEST = '.report_manifest.json'
+DEFAULT_DPI = 150
+DATASETS = list(DATASET_LABELS)
+SHORT_LABELS = {'pequeno': 'Pequeno (N=10K)', 'medio': 'Médio (N=100K)', 'grande': 'Grande (N=1M)'}
+COLORS = ['#2E86AB', '#A23B72', '#F18F01']
+MARKERS = ['o', 's', '^']
+# Backends com eixo de processos do gráfico do MPI.
+PROCESS_BACKENDS = {'mpi': 'MPI', 'python_shm': 'Python shm'}
+
+_SOURCES = {}
+
+
+def _pyplot():
+    # pyplot no backend Agg (sem janela), importado só por quem desenha.
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _serial_times(records):
+    return {r['dataset']: r for r in records if r['backend'] == 'serial'}
+
+
+def _series(records, backend, axis):
+    # {dataset: (workers, medianas)} de um backend, em ordem de workers.
+    series = collections.defaultdict(list)
+    for r in records:
+        if r['backend'] == backend and r.get(axis):
+            series[r['dataset']].append((r[axis], r['stats']['median']))
+    return {d: tuple(map(list, zip(*sorted(points)))) for d, points in series.items()}
+
+
+def serial_data(records, probes):
+    serial = _serial_times(records)
+    rows = [[d, serial[d]['stats']['median'], serial[d]['iterations']] for d in DATASETS if d in serial]
+    return {'rows': rows} if rows else None
+
+
+def render_serial(data, path, dpi):
+    plt = _pyplot()
+    labels = [SHORT_LABELS[d].replace(' (', '\n(') for d, _, _ in data['rows']]
+    colors = [COLORS[DATASETS.index(d)] for d, _, _ in data['rows']]
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    panels = ((1, 'Tempo de Execução (ms)', 'Tempo de Execução - Versão Serial', '{:.1f} ms'),
+              (2, 'Número de Iterações', 'Iterações até Convergência', '{:.0f}'))
+    for ax, (col, ylabel, title, fmt) in zip(axes, panels):
+        values = [row[col] for row in data['rows']]
+        bars = ax.bar(range(len(labels)), values, color=colors, alpha=0.8, edgecolor='black', linewidth=1.5)
+        ax.set_xlabel('Dataset', fontsize=12, fontweight='bold')
+        ax.set_ylabel(ylabel, fontsize=12, fontweight='bold')
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        ax.set_xticks(range(len(labels)))
+        ax.set_xticklabels(labels)
+        ax.grid(True, alpha=0.3, axis='y')
+        for bar, value in zip(bars, values):
+            ax.text(bar.get_x() + bar.get_width() / 2., bar.get_height(), fmt.format(value),
+                    ha='center', va='bottom', fontweight='bold')
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def openmp_data(records, probes):
+    series = _series(records, 'openmp', 'threads')
+    rows = [[d, *series[d]] for d in DATASETS if d in series]
+    return {'rows': rows} if rows else None
+
+
+def render_openmp(data, path, dpi):
+    # Tempo e speedup contra a própria execução com 1 thread.
+    plt = _pyplot()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    all_threads = sorted({t for _, threads, _ in data['rows'] for t in threads})
+    for dataset, threads, times in data['rows']:
+        i = DATASETS.index(dataset)
+        base = dict(zip(threads, times)).get(1)
+        ax1.plot(threads, times, marker='o', linewidth=2, markersize=8,
+                 label=DATASET_LABELS[dataset], color=COLORS[i])
+        if base:
+            ax2.plot(threads, [base / t for t in times], marker='s', linewidth=2, markersize=8,
+                     label=DATASET_LABELS[dataset], color=COLORS[i])
+    ax2.plot(all_threads, all_threads, 'k--', linewidth=2, label='Speedup Ideal (Linear)', alpha=0.5)
+    ax1.set_ylabel('Tempo de Execução (ms)', fontsize=12, fontweight='bold')
+    ax1.set_title('Tempo de Execução vs. Número de Threads', fontsize=14, fontweight='bold')
+    ax1.set_yscale('log')
+    ax2.set_ylabel('Speedup', fontsize=12, fontweight='bold')
+    ax2.set_title('Speedup vs. Número de Threads', fontsize=14, fontweight='bold')
+    for ax in (ax1, ax2):
+        ax.set_xlabel('Número de Threads', fontsize=12, fontweight='bold')
+        ax.set_xticks(all_threads)
+        ax.legend(fontsize=10)
+        ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def mpi_data(records, probes):
+    serial = _serial_times(records)
+    rows = []
+    for backend in PROCESS_BACKENDS:
+        series = _series(records, backend, 'processes')
+        rows += [[backend, d, *series[d], serial[d]['stats']['median'] if d in serial else None]
+                 for d in DATASETS if d in series]
+    return {'rows': rows} if rows else None
+
+
+def render_mpi(data, path, dpi):
+    # Um painel de tempo por dataset e o speedup contra o serial no quarto.
+    plt = _pyplot()
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    all_processes = sorted({p for row in data['rows'] for p in row[2]})
+    for backend, dataset, processes, times, serial in data['rows']:
+        i = DATASETS.index(dataset)
+        style = '-' if backend == 'mpi' else '--'
+        ax = axes[i // 2, i % 2]
+        ax.plot(processes, times, marker='o', linestyle=style, linewidth=2, markersize=8,
+                label=f'{PROCESS_BACKENDS[backend]} (ms)', color=COLORS[i])
+        ax.set_title(DATASET_LABELS[dataset])
+        ax.set_ylabel('Tempo (ms)')
+        if serial:
+            axes[1, 1].plot(processes, [serial / t for t in times], marker='s', linestyle=style,
+                            linewidth=2, markersize=8, label=f'{PROCESS_BACKENDS[backend]} - {dataset}',
+                            color=COLORS[i])
+    axes[1, 1].axhline(y=1, color='black', linestyle='--', alpha=0.5)
+    axes[1, 1].set_title('Speedup vs Processos')
+    axes[1, 1].set_ylabel('Speedup')
+    for ax in axes.flat:
+        ax.set_xlabel('Número de Processos')
+        ax.set_xticks(all_processes)
+        ax.grid(True, alpha=0.3)
+        if ax.get_legend_handles_labels()[0]:
+            ax.legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def relatorio_data(records, probes):
+    # Tempo do OpenMP por threads com o serial do mesmo dataset como
+    # referência (os gráficos do relatório).
+    serial = _serial_times(records)
+    series = _series(records, 'openmp', 'threads')
+    rows = [[d, *series[d], serial[d]['stats']['median']] for d in DATASETS if d in series and d in serial]
+    return {'rows': rows} if rows else None
+
+
+def _relatorio_axes(plt, ylabel, title, threads):
+    plt.xlabel('Número de Threads', fontweight='bold', fontsize=16)
+    plt.ylabel(ylabel, fontweight='bold', fontsize=16)
+    plt.title(title, fontweight='bold', fontsize=18, pad=20)
+    plt.xticks(threads)
+    plt.legend(fontsize=14, loc='best', frameon=True, shadow=True)
+    plt.grid(True, alpha=0.3, linestyle='--')
+
+
+def render_tempo(data, path, dpi):
+    plt = _pyplot()
+    plt.figure(figsize=(12, 8))
+    for dataset, threads, times, serial in data['rows']:
+        i = DATASETS.index(dataset)
+        plt.plot(threads, times, marker=MARKERS[i], linewidth=3, markersize=10,
+                 label=SHORT_LABELS[dataset], color=COLORS[i])
+        plt.axhline(y=serial, color=COLORS[i], linestyle='--', linewidth=2, alpha=0.5)
+    threads = sorted({t for row in data['rows'] for t in row[1]})
+    _relatorio_axes(plt, 'Tempo de Execução (ms)', 'Tempo de Execução vs. Número de Threads', threads)
+    plt.yscale('log')
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+def render_speedup(data, path, dpi):
+    plt = _pyplot()
+    plt.figure(figsize=(12, 8))
+    for dataset, threads, times, serial in data['rows']:
+        i = DATASETS.index(dataset)
+        plt.plot(threads, [serial / t for t in times], marker=MARKERS[i], linewidth=3, markersize=10,
+                 label=SHORT_LABELS[dataset], color=COLORS[i])
+    threads = sorted({t for row in data['rows'] for t in row[1]})
+    plt.plot(threads, threads, 'k--', linewidth=3, label='Speedup Ideal (Linear)', alpha=0.6)
+    # Valores do maior dataset com 4 e 8 threads.
+    _, largest, times, serial = data['rows'][-1]
+    for t, time_ms in zip(largest, times):
+        if t in (4, 8):
+            plt.annotate(f'{serial / time_ms:.2f}x', (t, serial / time_ms), textcoords="offset points",
+                         xytext=(0, 10), ha='center', fontsize=11, fontweight='bold')
+    _relatorio_axes(plt, 'Speedup', 'Speedup vs. Número de Threads', threads)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+def roofline_data(records, probes):
+    # Só os registros com sonda guardada para o mesmo número de threads; o
+    # relatório não sonda a máquina (python3 -m bench roofline sonda).
+    records = [r for r in records if traffic(r) is not None and parallelism(r) in probes]
+    points = roofline_points(records, probes)
+    if not points:
+        return None
+    used = {t: probes[t] for t in sorted({p.threads for p in points})}
+    return {'points': [list(p) for p in points], 'probes': used}
+
+
+def render_roofline(data, path, dpi):
+    _pyplot()
+    probes = {int(t): p for t, p in data['probes'].items()}
+    plot_roofline([RooflinePoint(*p) for p in data['points']], probes, path, dpi=dpi)
+
+
+def scaling_data(records, probes):
+    fits = fit_records(records)
+    return {'fits': [list(f) for f in fits]} if fits else None
+
+
+def render_scaling(data, path, dpi):
+    _pyplot()
+    plot_fits([Fit(*f) for f in data['fits']], path, dpi=dpi)
+
+
+FIGURES = collections.OrderedDict((f.name, f) for f in (
+    Figure('serial', 'performance_analysis_serial.png', serial_data, render_serial,
+           'python3 -m bench --backends serial'),
+    Figure('openmp', 'performance_analysis_openmp.png', openmp_data, render_openmp,
+           'python3 -m bench --backends openmp'),
+    Figure('mpi', 'performance_analysis_mpi.png', mpi_data, render_mpi,
+           'python3 -m bench --backends serial mpi python_shm'),
+    Figure('tempo', 'grafico_tempo.png', relatorio_data, render_tempo,
+           'python3 -m bench --backends serial openmp'),
+    Figure('speedup', 'grafico_speedup.png', relatorio_data, render_speedup,
+           'python3 -m bench --backends serial openmp'),
+    Figure('roofline', 'roofline.png', roofline_data, render_roofline,
+           'python3 -m bench roofline'),
+    Figure('escalabilidade', 'escalabilidade.png', scaling_data, render_scaling,
+           'python3 -m bench scaling'),
+))
+
+
+def _plain(value):
+    return value.tolist() if hasattr(value, 'tolist') else str(value)
+
+
+def _sources_hash():
+    # Código que desenha as figuras: mudá-lo invalida todas.
+    if 'hash' not in _SOURCES:
+        here = os.path.dirname(os.path.abspath(__file__))
+        _SOURCES['hash'] = file_hash(*(os.path.join(here, m) for m in ('report.py', 'roofline.py', 'scaling.py')))
+    return _SOURCES['hash']
+
+
+def figure_hash(figure, data, dpi):
+    payload = json.dumps([figure.name, data, dpi, _sources_hash()], sort_keys=True, default=_plain)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(path, manifest):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _render(name, data, path, dpi):
+    # Executado nos processos de trabalho.
+    FIGURES[name].render(data, path, dpi)
+    return path
+
+
+def render_figures(records, probes=None, names=None, out_dir='.', dpi=DEFAULT_DPI, force=False,
+                   jobs=None, log=print):
+    # Gera as figuras `names` (padrão: todas) em out_dir e devolve
+    # {nome: estado}, com estado 'gerada', 'inalterada', 'sem dados' ou
+    # 'falhou: ...'. As figuras a redesenhar são distribuídas entre `jobs`
+    # processos (padrão: uma por CPU); com uma só, desenha neste processo.
+    probes = probes or {}
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    manifest = _load_manifest(manifest_path)
+    names = list(names or FIGURES)
+    status, todo = {}, []
+    for name in names:
+        figure = FIGURES[name]
+        data = figure.data(records, probes)
+        if data is None:
+            status[name] = 'sem dados'
+            continue
+        digest = figure_hash(figure, data, dpi)
+        path = os.path.join(out_dir, figure.filename)
+        if not force and manifest.get(figure.filename) == digest and os.path.exists(path):
+            status[name] = 'inalterada'
+            continue
+        todo.append((name, data, path, digest))
+    if not todo:
+        return {name: status[name] for name in names}
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    def finish(name, path, digest, error):
+        if error is None:
+            manifest[FIGURES[name].filename] = digest
+            status[name] = 'gerada'
+            log(f"Gráfico salvo: {path}")
+        else:
+            status[name] = f"falhou: {error}"
+            log(f"Falha ao gerar {path}: {error}")
+
+    jobs = min(jobs or os.cpu_count() or 1, len(todo))
+    if jobs <= 1:
+        for name, data, path, digest in todo:
+            try:
+                _render(name, data, path, dpi)
+                finish(name, path, digest, None)
+            except Exception as e:
+                finish(name, path, digest, e)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(_render, name, data, path, dpi): (name, path, digest)
+                       for name, data, path, digest in todo}
+            for future in as_completed(futures):
+                finish(*futures[future], future.exception())
+    _save_manifest(manifest_path, manifest)
+    return {name: status[name] for name in names}
+
+
+def format_report(records, probes):
+    # Relatório só em texto (não importa o matplotlib): tabela de
+    # resultados, roofline com as sondas guardadas e ajustes de
+    # escalabilidade.
+    add_speedups(records)
+    sections = ["RESULTADOS (último registro de cada configuração neste host)", format_table(records)]
+    roofline = roofline_data(records, probes)
+    if roofline:
+        sections += ["", "ROOFLINE (sondas guardadas no banco)",
+                     format_roofline([RooflinePoint(*p) for p in roofline['points']], roofline['probes'])]
+    fits = fit_records(records)
+    if fits:
+        sections += ["", "ESCALABILIDADE", format_fits(fits)]
+    return '\n'.join(sections)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python3 -m bench report',
+        description="Relatório a partir do banco de resultados, sem executar benchmarks: redesenha "
+                    "só as figuras cujos dados mudaram, em paralelo, com o matplotlib sem janela (Agg).")
+    parser.add_argument('--figuras', nargs='+', choices=list(FIGURES),
+                        help="figuras a gerar (padrão: todas com dados)")
+    parser.add_argument('--saida', default='.', help="diretório dos PNG e do manifesto (padrão: .)")
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--forcar', action='store_true', help="redesenha mesmo as figuras inalteradas")
+    parser.add_argument('--jobs', type=int, help="processos de desenho (padrão: um por CPU)")
+    parser.add_argument('--texto', action='store_true',
+                        help="só as tabelas em texto; não importa o matplotlib")
+    parser.add_argument('--store', default=DEFAULT_STORE, help="banco SQLite de resultados")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    # Chamado por `python3 -m bench report ...` (ver __main__.py).
+    args = parse_args(argv)
+    host, _ = host_fingerprint()
+    with ResultStore(args.store) as store:
+        records = store.latest_per_config(host)
+        probes = store.latest_probes(host)
+    if not records:
+        print(f"Nenhum resultado deste host em {args.store}. Execute: python3 -m bench", file=sys.stderr)
+        return 1
+    if args.texto:
+        print(format_report(records, probes))
+        return 0
+
+    status = render_figures(records, probes, args.figuras, args.saida, args.dpi, args.forcar, args.jobs)
+    print()
+    missing = False
+    for name, state in status.items():
+        figure = FIGURES[name]
+        if state == 'sem dados':
+            state += f" (execute: {figure.hint})"
+            missing = missing or bool(args.figuras)
+        print(f"{figure.filename:<34} {state}")
+    # Código 1 quando alguma figura falhou ou uma figura pedida em
+    # --figuras ficou sem dados.
+    return 1 if missing or any(s.startswith('falhou') for s in status.values()) else 0
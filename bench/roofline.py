@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+
+import argparse
+import collections
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+
+from .backends import COMMON, PYTHON_BACKENDS, ROOT, file_hash
+from .runner import config_label
+from .store import DEFAULT_STORE, ResultStore, host_fingerprint
+
+PROBE_SOURCE = os.path.join(ROOT, 'bench', 'machine_probe.c')
+PROBE_BINARY = os.path.join(ROOT, 'bench', 'machine_probe')
+# Vetorizada para esta CPU e com FMA: o pico medido é um teto de verdade para
+# qualquer backend, não o do código escalar compilado com -O2.
+PROBE_FLAGS = ['-O3', '-march=native', '-ffp-contract=fast', '-fopenmp', '-std=c99']
+
+# Tráfego de memória e trabalho por ponto e por iteração de cada backend,
+# no caminho medido pelo bench (sem arquivo de rótulos):
+#   x_passes, x_bytes          passadas sobre X e bytes por valor (dtype)
+#   label_passes, label_bytes  passadas sobre os rótulos (None: o menor
+#                              inteiro que guarda K, como em label_dtype)
+#   other_bytes                demais vetores de tamanho N (limites,
+#                              temporários do NumPy, pesos, cópias); número
+#                              ou (K, fração podada) -> bytes
+#   flops                      (K, fração podada) -> operações aritméticas
+#                              de ponto flutuante por ponto: subtrações,
+#                              multiplicações e somas (comparações, fabs,
+#                              min/max e buscas não contam, como na sonda)
+#   unique                     percorre os valores distintos, não os N pontos
+# Vetores de tamanho K (centróides, somas) ficam no cache e não contam, nem
+# o write-allocate das escritas (como no STREAM). A chave é (backend,
+# solver): o solver só varia no backend python (os demais python_* exigem
+# lloyd; os C não têm solver). Solvers sem passada por ponto a cada
+# iteração (sorted, optimal, histogram, minibatch) ficam fora.
+Model = collections.namedtuple(
+    'Model', 'x_passes x_bytes label_passes label_bytes other_bytes flops unique')
+
+
+def _lloyd_flops(K, pruned):
+    # Por centróide: diff e diff*diff; por ponto: SSE e soma.
+    return 2 * K + 2
+
+
+def _hamerly_flops(K, pruned):
+    # Todo ponto: limites, deslocamentos, tol e a distância ao próprio
+    # centróide, SSE e soma (~11); varrido: mais diff e diff*diff por
+    # centróide e os novos limites.
+    return 11 + (1.0 - pruned) * (2 * K + 2)
+
+
+def _search_flops(K, pruned):
+    # Busca nas fronteiras (searchsorted ou comparações, em python_threads)
+    # só compara; diff, quadrado, SSE e bincount com pesos.
+    return 4
+
+
+def _numpy_hamerly_flops(K, pruned):
+    # Todo ponto: limite inferior, z - tol, diff, |d| + tol, quadrado, SSE e
+    # bincount (7); varrido: distâncias ao vencedor e aos vizinhos, tol e a
+    # nova diferença (6).
+    return 7 + (1.0 - pruned) * 6
+
+
+def _numpy_hamerly_bytes(K, pruned):
+    # lower, z, d e upper lidos e escritos nas passadas vetorizadas, mais a
+    # máscara (~146 B); os varridos passam por _full_assign com índices,
+    # gathers e scatters de volta (~300 B). Estimativa das passadas do NumPy.
+    return 146 + (1.0 - pruned) * 300
+
+
+LLOYD = Model(1, 8, 0, 4, 0, _lloyd_flops, False)
+INCREMENTAL = Model(1, 8, 1, 4, 0, _lloyd_flops, False)
+HAMERLY = Model(1, 8, 1, 4, 32, _hamerly_flops, False)
+# w*bestd e w*u: duas multiplicações a mais por valor distinto.
+DEDUP = Model(1, 8, 0, 4, 8, lambda K, p: 2 * K + 4, True)
+F32 = Model(1, 4, 0, 4, 0, _lloyd_flops, False)
+# Vetorizado: searchsorted (X, best), Cu[best], X - Cu[best], quadrado no
+# lugar, take para os rótulos, soma, e os dois bincount do update.
+NUMPY = Model(3, 8, 3, 4, 72, _search_flops, False)
+
+TRAFFIC = {
+    ('serial', None): LLOYD,
+    # Cada bloco é copiado do page cache para o buffer (8 lidos, 8 escritos).
+    ('serial_ooc', None): Model(1, 8, 0, 4, 16, _lloyd_flops, False),
+    ('serial_hamerly', None): HAMERLY,
+    ('serial_incremental', None): INCREMENTAL,
+    ('serial_dedup', None): DEDUP,
+    ('serial_f32', None): F32,
+    ('openmp', None): LLOYD,
+    ('openmp_hamerly', None): HAMERLY,
+    ('openmp_dedup', None): DEDUP,
+    ('openmp_f32', None): F32,
+    ('openmp_schedule', None): LLOYD,
+    ('mpi', None): LLOYD,
+    ('mpi_incremental', None): INCREMENTAL,
+    ('python', 'lloyd'): NUMPY,
+    # X na diferença e no bincount; rótulos (intp) nos gathers de shift, half
+    # e C e nos dois bincount.
+    ('python', 'hamerly'): Model(2, 8, 5, 8, _numpy_hamerly_bytes, _numpy_hamerly_flops, False),
+    ('python_shm', 'lloyd'): NUMPY,
+    # Blocos de DEFAULT_CHUNK pontos: os temporários ficam no cache.
+    ('python_threads', 'lloyd'): Model(1, 8, 1, 4, 0, _search_flops, False),
+    # Blocos promovidos a float64 no cache; X e rótulos lidos no assign e no update.
+    ('python_f32', 'lloyd'): Model(2, 4, 2, None, 0, _search_flops, False),
+    # Como NUMPY sobre os valores distintos, mais os pesos (dot e bincount).
+    ('python_dedup', 'lloyd'): Model(3, 8, 3, 4, 88, lambda K, p: _search_flops(K, p) + 2, True),
+}
+
+RooflinePoint = collections.namedtuple(
+    'RooflinePoint', 'label dataset threads n k points iterations time_ms bytes_per_point '
+                     'flops_per_point intensity gbs gflops bandwidth peak attainable bound efficiency')
+
+
+def _label_bytes(K):
+    return 1 if K <= 256 else 2 if K <= 65536 else 4
+
+
+def traffic_key(record):
+    # Chave de TRAFFIC do registro: (backend, solver), com o solver padrão
+    # (lloyd) nos backends Python e None nos demais.
+    backend = record['backend']
+    return (backend, record.get('solver') or 'lloyd') if backend in PYTHON_BACKENDS else (backend, None)
+
+
+def traffic(record):
+    # (pontos percorridos, bytes por ponto, FLOPs por ponto) de uma
+    # iteração do registro, ou None se o backend/solver não tem modelo.
+    model = TRAFFIC.get(traffic_key(record))
+    if model is None:
+        return None
+    K = record['k']
+    last = record['runs'][-1] if record.get('runs') else {}
+    points = last.get('unique', record['n']) if model.unique else record['n']
+    pruned = last.get('pruned') or []
+    p = sum(pruned) / len(pruned) if pruned else 0.0
+    label = model.label_bytes if model.label_bytes is not None else _label_bytes(K)
+    other = model.other_bytes(K, p) if callable(model.other_bytes) else model.other_bytes
+    per_point = model.x_passes * model.x_bytes + model.label_passes * label + other
+    return points, per_point, model.flops(K, p)
+
+
+def working_set(record):
+    # Bytes de X (ou dos valores distintos) percorridos por iteração: o menor
+    # conjunto de trabalho do registro, que decide o nível de cache da banda.
+    model = TRAFFIC.get(traffic_key(record))
+    points = traffic(record)[0]
+    return points * model.x_bytes
+
+
+def read_bandwidth(probe, size):
+    # Teto de leitura (GB/s) para um conjunto de trabalho de `size` bytes:
+    # a banda do maior nível da sonda que cabe nele, e nunca menos que a de
+    # um nível maior (uma queda de ruído não abaixa o teto). Sondas sem
+    # read_levels só têm a banda da DRAM.
+    levels = sorted(probe.get('read_levels') or [])
+    best = probe['read_gbs']
+    for level, gbs in reversed(levels):
+        best = max(best, gbs)
+        if level <= size:
+            break
+    return best
+
+
+def parallelism(record):
+    # Threads ou processos da configuração (1 nos backends sequenciais).
+    return record.get('threads') or record.get('processes') or 1
+
+
+def build_probe(cc=None, log=print):
+    # Compila a sonda quando o binário não existe ou é mais antigo que o fonte.
+    deps = [PROBE_SOURCE, os.path.join(COMMON, 'kmeans_cli.h')]
+    if os.path.exists(PROBE_BINARY) and os.path.getmtime(PROBE_BINARY) >= max(map(os.path.getmtime, deps)):
+        return PROBE_BINARY
+    cmd = [cc or 'gcc'] + PROBE_FLAGS + [PROBE_SOURCE, '-o', PROBE_BINARY, '-lm']
+    log(f"Compilando a sonda: {' '.join(cmd)}")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Erro ao compilar a sonda:\n{result.stderr}")
+    return PROBE_BINARY
+
+
+def run_probe(threads, store=None, max_age=7 * 24 * 3600, cc=None, n=None, log=print):
+    # Banda (read/copy/triad, GB/s) e pico de FLOPs (GFLOP/s) com `threads`
+    # threads neste host. Com store, reaproveita uma medição do mesmo build
+    # da sonda com idade <= max_age segundos.
+    binary = build_probe(cc, log)
+    host, _ = host_fingerprint()
+    binary_hash = file_hash(binary)
+    if store is not None:
+        cached = store.probe(host, binary_hash, threads, max_age)
+        if cached:
+            return cached
+    env = dict(os.environ, OMP_NUM_THREADS=str(threads))
+    argv = [binary, '--json'] + (['--n', str(n)] if n else [])
+    log(f"Sondando a máquina com {threads} thread(s)...")
+    result = subprocess.run(argv, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha na sonda:\n{result.stderr.strip()}")
+    record = json.loads(result.stdout.strip().splitlines()[-1])
+    record.update({'created': time.time(), 'host': host, 'binary_hash': binary_hash})
+    if store is not None:
+        store.save_probe(record)
+    return record
+
+
+def roofline_points(records, probes):
+    # Um ponto por registro com modelo de tráfego: GB/s e GFLOP/s
+    # alcançados e o teto do roofline com as sondas do mesmo número de
+    # threads (probes: threads -> registro de run_probe). O teto de banda
+    # é o do kernel read, o padrão de acesso do k-means, no nível de cache
+    # em que X cabe (read_bandwidth).
+    points = []
+    for r in records:
+        t = traffic(r)
+        if t is None or not r['iterations']:
+            continue
+        count, per_point, flops = t
+        time_ms = r['stats']['median'] - (r['runs'][-1].get('dedup_ms', 0.0) if r.get('runs') else 0.0)
+        seconds = max(time_ms, 1e-6) / 1e3
+        work = count * r['iterations']
+        probe = probes[parallelism(r)]
+        bandwidth = read_bandwidth(probe, working_set(r))
+        intensity = flops / per_point
+        gbs = work * per_point / seconds / 1e9
+        gflops = work * flops / seconds / 1e9
+        attainable = min(probe['gflops'], bandwidth * intensity)
+        points.append(RooflinePoint(
+            config_label(r), r['dataset'], parallelism(r), r['n'], r['k'], count, r['iterations'],
+            time_ms, per_point, flops, intensity, gbs, gflops, bandwidth, probe['gflops'],
+            attainable, 'memória' if bandwidth * intensity < probe['gflops'] else 'cálculo',
+            gflops / attainable if attainable > 0 else None))
+    return points
+
+
+def format_roofline(points, probes):
+    lines = [f"{'Threads':>7} {'read GB/s':>10} {'triad GB/s':>11} {'GFLOP/s':>8} {'inflexão (FLOP/B)':>18}"]
+    for threads in sorted(probes):
+        p = probes[threads]
+        lines.append(f"{threads:>7} {p['read_gbs']:>10.2f} {p['triad_gbs']:>11.2f} {p['gflops']:>8.2f} "
+                     f"{p['gflops'] / p['read_gbs']:>18.2f}")
+    for threads in sorted(probes):
+        levels = probes[threads].get('read_levels') or []
+        if levels:
+            lines.append(f"read por tamanho, {threads} thread(s): "
+                         + ', '.join(f"{size >> 10} KiB {gbs:.1f}" for size, gbs in levels))
+    lines.append('')
+    header = (f"{'Configuração':<34} {'Dataset':<8} {'B/pt':>6} {'FLOP/pt':>8} {'FLOP/B':>7} "
+              f"{'GB/s':>7} {'Banda':>7} {'GFLOP/s':>8} {'Teto':>7} {'% teto':>7} {'Limite':<8}")
+    lines += [header, '-' * len(header)]
+    for p in points:
+        eff = f"{100.0 * p.efficiency:.1f}" if p.efficiency is not None else '-'
+        lines.append(f"{p.label:<34} {p.dataset:<8} {p.bytes_per_point:>6.0f} {p.flops_per_point:>8.1f} "
+                     f"{p.intensity:>7.2f} {p.gbs:>7.2f} {p.bandwidth:>7.2f} {p.gflops:>8.2f} "
+                     f"{p.attainable:>7.2f} {eff:>7} {p.bound:<8}")
+    return '\n'.join(lines)
+
+
+def plot_roofline(points, probes, path, title='Roofline - K-means 1D', dpi=150):
+    # Gráfico log-log: intensidade aritmética (FLOP/byte) x GFLOP/s, um teto
+    # por número de threads e um marcador por configuração.
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    cmap = plt.get_cmap('tab10')
+    lo = min([p.intensity for p in points] + [0.05]) / 2
+    hi = max([p.intensity for p in points] + [p['gflops'] / p['read_gbs'] for p in probes.values()]) * 4
+    xs = [lo * (hi / lo) ** (i / 200.0) for i in range(201)]
+    for j, threads in enumerate(sorted(probes)):
+        p = probes[threads]
+        ax.plot(xs, [min(p['gflops'], p['read_gbs'] * x) for x in xs], color=cmap(j % 10),
+                label=f"teto {threads}t: {p['read_gbs']:.1f} GB/s, {p['gflops']:.1f} GFLOP/s")
+        # Tetos de cache usados pelos pontos com esse número de threads.
+        caches = {q.bandwidth for q in points if q.threads == threads and q.bandwidth > p['read_gbs']}
+        for bandwidth in sorted(caches):
+            ax.plot(xs, [min(p['gflops'], bandwidth * x) for x in xs], color=cmap(j % 10),
+                    linestyle='--', linewidth=0.8)
+    markers = 'osD^v<>Ph*X'
+    labels = sorted({p.label.split(' ')[0] for p in points})
+    # Rótulos de pontos quase coincidentes (mesmo kernel, threads
+    # diferentes) são empilhados em vez de sobrepostos.
+    stacked = collections.Counter()
+    for p in points:
+        j = sorted(probes).index(p.threads)
+        ax.scatter(p.intensity, p.gflops, color=cmap(j % 10), edgecolors='black', zorder=3,
+                   marker=markers[labels.index(p.label.split(' ')[0]) % len(markers)])
+        spot = (round(math.log10(p.intensity), 1), round(math.log10(p.gflops), 1))
+        ax.annotate(f"{p.label} ({p.dataset})", (p.intensity, p.gflops), fontsize=7,
+                    xytext=(4, 4 + 9 * stacked[spot]), textcoords='offset points')
+        stacked[spot] += 1
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlabel('Intensidade aritmética (FLOP/byte)')
+    ax.set_ylabel('GFLOP/s')
+    ax.set_title(title)
+    ax.grid(True, which='both', alpha=0.3)
+    ax.legend(fontsize=8, loc='lower right')
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+    plt.close(fig)
+
+
+def roofline_report(records, store=None, path=None, cc=None, log=print, dpi=150):
+    # Sonda a máquina com cada número de threads dos registros, imprime a
+    # tabela e, com path, grava o gráfico. Devolve (pontos, sondas).
+    records = [r for r in records if traffic(r) is not None]
+    probes = {t: run_probe(t, store, cc=cc, log=log) for t in sorted({parallelism(r) for r in records})}
+    points = roofline_points(records, probes)
+    log(format_roofline(points, probes))
+    if path and points:
+        plot_roofline(points, probes, path, dpi=dpi)
+        log(f"Roofline salvo: {path}")
+    return points, probes
+
+
+def latest_records(path):
+    # Último registro de cada configuração num JSON Lines de `python3 -m bench`.
+    latest = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                r = json.loads(line)
+                key = (config_label(r), r['dataset'])
+                latest[key] = r
+    return list(latest.values())
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python3 -m bench roofline',
+        description="Converte resultados do bench em GB/s e GFLOP/s alcançados e os compara com "
+                    "a banda (STREAM) e o pico de FLOPs medidos nesta máquina.")
+    parser.add_argument('resultados', nargs='?', default='bench_results.jsonl',
+                        help="JSON Lines gravado por `python3 -m bench` (padrão: bench_results.jsonl)")
+    parser.add_argument('--grafico', default='roofline.png', help="arquivo do gráfico (requer matplotlib)")
+    parser.add_argument('--sem-grafico', action='store_true', help="só a tabela")
+    parser.add_argument('--store', default=DEFAULT_STORE,
+                        help="banco SQLite onde as sondas ficam guardadas (padrão: bench_results.sqlite)")
+    parser.add_argument('--sem-store', action='store_true', help="sonda de novo e não grava")
+    parser.add_argument('--cc', help="compilador C da sonda (padrão: gcc)")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    # Chamado por `python3 -m bench roofline ...` (ver __main__.py).
+    args = parse_args(argv)
+    try:
+        records = latest_records(args.resultados)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Resultados inválidos: {args.resultados}: {e}", file=sys.stderr)
+        return 1
+    store = None if args.sem_store else ResultStore(args.store)
+    try:
+        points, _ = roofline_report(records, store, None if args.sem_grafico else args.grafico, args.cc)
+    except RuntimeError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    except ImportError:
+        print("O gráfico requer matplotlib (use --sem-grafico)", file=sys.stderr)
+        return 1
+    finally:
+        if store:
+            store.close()
+    if not points:
+        print("Nenhum resultado com modelo de tráfego (solvers sorted/optimal/histogram/minibatch "
+              "não percorrem os pontos a cada iteração)", file=sys.stderr)
+        return 1
+    return 0
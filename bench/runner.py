@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+
+import itertools
+import json
+import os
+import time
+
+from .backends import (BACKENDS, MPI_BACKENDS, ROOT, SSE_TOLERANCE, build, build_identity, command,
+                       file_hash)
+from .counters import build_wrapper, run_measured, summarize_counters
+from .stats import regression_check, summarize
+from .store import host_fingerprint, identity
+
+# Rótulos usados nos relatórios (mesmos datasets de generate_datasets.py).
+DATASET_LABELS = {
+    'pequeno': 'Pequeno (N=10,000, K=4)',
+    'medio': 'Médio (N=100,000, K=8)',
+    'grande': 'Grande (N=1,000,000, K=16)',
+}
+
+DEFAULTS = {
+    'max_iter': 50,
+    'eps': 1e-6,
+    'warmup': 1,
+    'repetitions': 5,
+    'data_dir': '.',
+    'format': 'auto',
+    'datasets': ['pequeno', 'medio', 'grande'],
+    'mpirun': ['mpirun'],
+    'baseline': 'serial',
+    'max_age_hours': 24,
+    'alpha': 0.01,
+    'threshold': 0.05,
+    'perf': True,
+    'runs': [],
+}
+
+# Eixos da matriz: chave da lista na entrada -> campo de cada configuração.
+AXES = (('threads', 'threads'), ('schedules', 'schedule'),
+        ('processes', 'processes'), ('solvers', 'solver'))
+
+
+def load_matrix(path):
+    with open(path) as f:
+        matrix = json.load(f)
+    unknown = set(matrix) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Chaves desconhecidas na matriz {path}: {', '.join(sorted(unknown))}")
+    return matrix
+
+
+def expand(matrix):
+    # Produto cartesiano de cada entrada de "runs" pelos datasets e pelos
+    # eixos que ela declara; eixos ausentes ficam None.
+    configs = []
+    for run in matrix['runs']:
+        if run.get('backend') not in BACKENDS:
+            raise ValueError(f"Backend desconhecido: {run.get('backend')}")
+        datasets = run.get('datasets', matrix['datasets'])
+        axes = [run.get(key, [None]) for key, _ in AXES]
+        if run['backend'] in MPI_BACKENDS + ('python_shm',) and axes[2] == [None]:
+            raise ValueError(f"Entrada {run['backend']} precisa de \"processes\"")
+        for dataset, *values in itertools.product(datasets, *axes):
+            config = {'backend': run['backend'], 'dataset': dataset}
+            config.update({field: v for (_, field), v in zip(AXES, values)})
+            configs.append(config)
+    return configs
+
+
+def config_label(config):
+    parts = [config['backend']]
+    if config.get('solver'):
+        parts.append(config['solver'])
+    if config.get('threads'):
+        parts.append(f"t={config['threads']}")
+    if config.get('processes'):
+        parts.append(f"p={config['processes']}")
+    if config.get('schedule'):
+        parts.append(config['schedule'])
+    return ' '.join(parts)
+
+
+def dataset_paths(matrix, dataset):
+    # Prefere o binário KM1D quando existir (format "auto").
+    base = os.path.join(ROOT, matrix['data_dir'])
+    fmt = matrix['format']
+    if fmt == 'auto':
+        fmt = 'bin' if os.path.exists(os.path.join(base, f'dados_{dataset}.bin')) else 'csv'
+    data = os.path.join(base, f'dados_{dataset}.{fmt}')
+    centroids = os.path.join(base, f'centroides_{dataset}.{fmt}')
+    for path in (data, centroids):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Dataset não encontrado: {path} (execute python3 generate_datasets.py)")
+    return data, centroids
+
+
+def run_once(argv, env, timeout=None, perf=True):
+    # Executa uma vez e devolve a linha JSON impressa pelo backend, com as
+    # medidas do processo (getrusage e, se disponível, perf stat) em
+    # 'counters' (ver counters.run_measured).
+    returncode, stdout, stderr, counters = run_measured(argv, env, timeout, perf)
+    if returncode != 0:
+        raise RuntimeError(f"Falha ao executar {' '.join(argv)}:\n{stderr.strip()}")
+    for line in reversed(stdout.splitlines()):
+        line = line.strip()
+        if line.startswith('{'):
+            result = json.loads(line)
+            result['counters'] = counters
+            return result
+    raise RuntimeError(f"Saída sem linha JSON de {' '.join(argv)}:\n{stdout.strip()}")
+
+
+def run_params(config, matrix):
+    # Parâmetros que entram na identidade do resultado.
+    params = {'max_iter': matrix['max_iter'], 'eps': matrix['eps']}
+    if config['backend'] in MPI_BACKENDS:
+        params['mpirun'] = list(matrix['mpirun'])
+    return params
+
+
+def run_config(config, matrix, data, centroids, timeout=None):
+    argv, env = command(config, data, centroids, matrix['max_iter'], matrix['eps'], matrix['mpirun'])
+
+    for _ in range(matrix['warmup']):
+        run_once(argv, env, timeout, perf=False)
+    runs = [run_once(argv, env, timeout, matrix['perf']) for _ in range(matrix['repetitions'])]
+
+    last = runs[-1]
+    record = dict(config)
+    record.update({
+        'n': last['n'],
+        'k': last['k'],
+        'max_iter': last['max_iter'],
+        'eps': last['eps'],
+        'iterations': last['iterations'],
+        'sse': last['sse'],
+        # Backends determinísticos devem repetir o mesmo SSE em todas as execuções.
+        'sse_stable': all(r['sse'] == last['sse'] for r in runs),
+        'samples_ms': [r['time_ms'] for r in runs],
+        'runs': runs,
+    })
+    record['stats'] = summarize(record['samples_ms'])
+    record['counters'] = summarize_counters(runs, last['n'], last['iterations'])
+    return record
+
+
+def find_baseline(r, records, store=None, baseline='serial', **axes):
+    # O baseline medido para o registro r: o do próprio lote quando houver,
+    # senão o mais recente do store com mesmo host, dataset e parâmetros.
+    # `axes` exige também threads, processes ou solver iguais.
+    ident = r['identity']
+    params = {k: ident['params'][k] for k in ('max_iter', 'eps')}
+    base = next((b for b in records
+                 if b['backend'] == baseline and b['dataset'] == r['dataset']
+                 and b['identity']['host'] == ident['host']
+                 and b['identity']['dataset_hash'] == ident['dataset_hash']
+                 and b['identity']['params'] == params
+                 and all(b.get(k) == v for k, v in axes.items())), None)
+    if base is None and store is not None:
+        base = store.latest(baseline, r['dataset'], host=ident['host'],
+                            dataset_hash=ident['dataset_hash'], params=params, **axes)
+    return base
+
+
+def find_reference(r, records, store, reference):
+    # Registro de referência de SSE_TOLERANCE ("backend" ou
+    # "backend:solver"); fora do serial, com os mesmos threads/processos.
+    backend, _, solver = reference.partition(':')
+    axes = {'solver': solver} if solver else {}
+    if backend != 'serial':
+        axes.update({f: r[f] for f in ('threads', 'processes') if r.get(f)})
+    return find_baseline(r, records, store, backend, **axes)
+
+
+def sse_tolerance(r):
+    # Entrada de SSE_TOLERANCE do registro: (referência, tolerância, mesmas
+    # iterações) ou None.
+    return SSE_TOLERANCE.get(f"{r['backend']}:{r.get('solver')}") or SSE_TOLERANCE.get(r['backend'])
+
+
+def check_reference(r, ref, tolerance, same_iterations):
+    # Desvio relativo do SSE de r contra a referência e se ele (e, quando
+    # exigido, o número de iterações) confere.
+    if ref is None:
+        r['sse_drift'] = r['sse_ok'] = r['reference_iterations'] = None
+        return
+    r['sse_drift'] = abs(r['sse'] - ref['sse']) / max(abs(ref['sse']), 1e-300)
+    r['reference_iterations'] = ref['iterations']
+    r['sse_ok'] = r['sse_drift'] <= tolerance and (not same_iterations or r['iterations'] == ref['iterations'])
+
+
+def add_speedups(records, store=None, baseline='serial'):
+    # Speedup e eficiência contra o baseline (find_baseline). Backends de
+    # SSE_TOLERANCE recebem também o desvio relativo do SSE contra a
+    # referência e se ele ficou dentro da tolerância.
+    for r in records:
+        base = find_baseline(r, records, store, baseline)
+        entry = sse_tolerance(r)
+        if entry is not None:
+            reference, tolerance, same_iterations = entry
+            ref = base if reference == baseline else find_reference(r, records, store, reference)
+            check_reference(r, ref, tolerance, same_iterations)
+        if base is None:
+            r['baseline_ms'] = r['speedup'] = r['efficiency'] = None
+            continue
+        workers = r.get('threads') or r.get('processes') or 1
+        r['baseline_ms'] = base['stats']['median']
+        r['speedup'] = r['baseline_ms'] / r['stats']['median']
+        r['efficiency'] = r['speedup'] / workers
+    return records
+
+
+def run_matrix(matrix, out=None, cc=None, build_binaries=True, timeout=None,
+               store=None, force=False, log=print):
+    # Executa a matriz inteira. Cada registro é gravado em `out` (JSON Lines)
+    # e no `store` assim que a configuração termina; configurações com
+    # resultado recente no store (mesmo build, dataset, parâmetros e host)
+    # são reaproveitadas em vez de executadas, a menos que force=True.
+    matrix = dict(DEFAULTS, **matrix)
+    configs = expand(matrix)
+    backends = sorted({c['backend'] for c in configs})
+
+    if build_binaries:
+        for name in backends:
+            build(name, cc=cc, log=log)
+    build_wrapper(cc)
+    builds = {name: build_identity(name, cc) for name in backends}
+    host, host_info = host_fingerprint()
+    dataset_hashes = {}
+    max_age = matrix['max_age_hours'] * 3600.0
+
+    records = []
+    f = open(out, 'a') if out else None
+    try:
+        for i, config in enumerate(configs, 1):
+            data, centroids = dataset_paths(matrix, config['dataset'])
+            if data not in dataset_hashes:
+                dataset_hashes[data] = file_hash(data, centroids)
+            ident = identity(config, *builds[config['backend']], dataset_hashes[data],
+                             run_params(config, matrix), host)
+
+            label = f"[{i}/{len(configs)}] {config_label(config)} | {config['dataset']}"
+            record = store.fresh(ident['config_key'], max_age) if store and not force else None
+            if record is not None:
+                log(f"{label} (resultado recente reaproveitado)")
+                record['cached'] = True
+                records.append(record)
+                continue
+
+            log(label)
+            record = run_config(config, matrix, data, centroids, timeout)
+            record.update({'created': time.time(), 'identity': ident,
+                           'host_info': host_info, 'cached': False, 'regression': None})
+            if store:
+                history = store.history(ident['series_key'], record['created'])
+                if len(history) >= 3:
+                    record['regression'] = regression_check(
+                        record['samples_ms'], history, matrix['alpha'], matrix['threshold'])
+                store.save(record)
+            records.append(record)
+            if f:
+                f.write(json.dumps(record) + '\n')
+                f.flush()
+    finally:
+        if f:
+            f.close()
+    return add_speedups(records, store, matrix['baseline'])
+
+
+def regressions(records):
+    return [r for r in records if r.get('regression') and r['regression']['regression']]
+
+
+def precision_failures(records):
+    return [r for r in records if r.get('sse_ok') is False]
+
+
+def format_table(records):
+    header = (f"{'Configuração':<34} {'Dataset':<8} {'Mediana (ms)':>13} {'IQR (ms)':>10} "
+              f"{'IC95% (ms)':>21} {'Speedup':>8} {'Efic.':>6} {'IPC':>5} {'B/pt':>6} {'RSS MB':>7} "
+              f"{'Iter':>5} {'SSE':>16}")
+    lines = [header, '-' * len(header)]
+    for r in records:
+        s = r['stats']
+        ci = f"[{s['ci_low']:.2f}, {s['ci_high']:.2f}]"
+        speedup = f"{r['speedup']:.2f}x" if r.get('speedup') is not None else '-'
+        eff = f"{r['efficiency']:.2f}" if r.get('efficiency') is not None else '-'
+        c = r.get('counters') or {}
+        ipc = f"{c['ipc']:.2f}" if c.get('ipc') is not None else '-'
+        bpp = f"{c['bytes_per_point']:.2f}" if c.get('bytes_per_point') is not None else '-'
+        rss = f"{c['max_rss_kb'] / 1024.0:.1f}" if c.get('max_rss_kb') is not None else '-'
+        flags = ''
+        if not r['sse_stable']:
+            flags += ' *'
+        if r.get('regression') and r['regression']['regression']:
+            flags += ' !'
+        if r.get('sse_ok') is False:
+            flags += ' ~'
+        if r.get('cached'):
+            flags += ' (store)'
+        lines.append(f"{config_label(r):<34} {r['dataset']:<8} {s['median']:>13.2f} {s['iqr']:>10.2f} "
+                     f"{ci:>21} {speedup:>8} {eff:>6} {ipc:>5} {bpp:>6} {rss:>7} "
+                     f"{r['iterations']:>5} {r['sse']:>16.6f}{flags}")
+    if not all(r['sse_stable'] for r in records):
+        lines.append("* SSE variou entre as repetições")
+    if any(r.get('counters') and not r['counters']['perf'] for r in records):
+        lines.append("IPC e B/pt (faltas no LLC x 64 B por ponto e iteração) exigem `perf stat`; "
+                     "sem ele, só RSS e trocas de contexto (getrusage)")
+    for r in precision_failures(records):
+        reference, tolerance, same_iterations = sse_tolerance(r)
+        line = (f"~ SSE de {config_label(r)} | {r['dataset']} desvia {r['sse_drift']:.2e} de {reference} "
+                f"(tolerância {tolerance:.0e})")
+        if same_iterations and r['iterations'] != r['reference_iterations']:
+            line += f"; {r['iterations']} iterações contra {r['reference_iterations']}"
+        lines.append(line)
+    for r in regressions(records):
+        reg = r['regression']
+        lines.append(f"! Regressão em {config_label(r)} | {r['dataset']}: mediana {reg['slowdown']:+.1%} "
+                     f"vs histórico ({reg['history_samples']} amostras, p={reg['p_value']:.4f})")
+    return '\n'.join(lines)
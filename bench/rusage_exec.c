@@ -0,0 +1,76 @@
+#define _POSIX_C_SOURCE 200809L
+/* Executa um comando e grava o getrusage(RUSAGE_CHILDREN) dele
+   (bench/counters.py, run_measured).
+
+   O pico de RSS (ru_maxrss) sobrevive ao execve: um filho criado direto
+   pelo Python herda como piso a memória do processo que o criou. Este
+   processo pequeno faz o fork no lugar do Python, então o pico medido é o
+   do comando (e dos descendentes que ele esperou, como os ranks sob o
+   mpirun).
+
+   Uso: rusage_exec SAIDA COMANDO [ARGS...]
+   SAIDA recebe uma linha com maxrss_kb, user_us, sys_us, nvcsw, nivcsw,
+   minflt e majflt. SIGTERM, SIGINT e SIGHUP são repassados ao comando (o
+   timeout do bench termina este processo). O código de saída é o do
+   comando; se ele morreu por sinal, este processo morre pelo mesmo sinal. */
+#include <errno.h>
+#include <signal.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <sys/resource.h>
+#include <sys/time.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+static volatile pid_t child = 0;
+
+static void forward(int sig){
+    if(child > 0) kill(child, sig);
+}
+
+static long long micros(struct timeval tv){
+    return (long long)tv.tv_sec * 1000000LL + tv.tv_usec;
+}
+
+int main(int argc, char **argv){
+    if(argc < 3){
+        fprintf(stderr, "Uso: %s SAIDA COMANDO [ARGS...]\n", argv[0]);
+        return 2;
+    }
+    struct sigaction sa;
+    sa.sa_handler = forward;
+    sigemptyset(&sa.sa_mask);
+    sa.sa_flags = SA_RESTART;
+    sigaction(SIGTERM, &sa, NULL);
+    sigaction(SIGINT, &sa, NULL);
+    sigaction(SIGHUP, &sa, NULL);
+    pid_t pid = fork();
+    if(pid < 0){ perror("fork"); return 2; }
+    if(pid == 0){
+        signal(SIGTERM, SIG_DFL);
+        signal(SIGINT, SIG_DFL);
+        signal(SIGHUP, SIG_DFL);
+        execvp(argv[2], argv + 2);
+        fprintf(stderr, "rusage_exec: %s: ", argv[2]);
+        perror("execvp");
+        _exit(127);
+    }
+    child = pid;
+    int status;
+    while(waitpid(pid, &status, 0) < 0){
+        if(errno != EINTR){ perror("waitpid"); return 2; }
+    }
+    struct rusage ru;
+    getrusage(RUSAGE_CHILDREN, &ru);
+    FILE *out = fopen(argv[1], "w");
+    if(!out){ perror(argv[1]); return 2; }
+    fprintf(out, "%ld %lld %lld %ld %ld %ld %ld\n", ru.ru_maxrss, micros(ru.ru_utime), micros(ru.ru_stime),
+            ru.ru_nvcsw, ru.ru_nivcsw, ru.ru_minflt, ru.ru_majflt);
+    fclose(out);
+    if(WIFSIGNALED(status)){
+        signal(WTERMSIG(status), SIG_DFL);
+        raise(WTERMSIG(status));
+    }
+    return WIFEXITED(status) ? WEXITSTATUS(status) : 2;
+}
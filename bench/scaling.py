@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+
+import argparse
+import collections
+import itertools
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+
+from .backends import MPI_BACKENDS, ROOT
+from .runner import run_matrix
+from .store import DEFAULT_STORE, ResultStore
+
+# Backends com eixo de workers: threads no OpenMP, processos no MPI.
+WORKER_AXIS = {'openmp': 'threads', 'mpi': 'processes'}
+
+# Ajuste dos tempos por iteração T(p) (ms) de uma série:
+#   forte  T(p) = serial + parallel/p [+ comm·log2 p]        (Amdahl)
+#   fraca  T(p) = serial·p/(s + (1-s)·p) [+ comm·log2 p]     (Gustafson, N = p·N0)
+# O termo de comunicação (Allreduce em árvore) só entra no MPI e os
+# coeficientes são >= 0. serial_fraction é a fração de Amdahl,
+# serial/(serial + parallel), na série forte, e o s de Gustafson, ajustado
+# ao speedup escalado S(p) = p·T(1)/T(p) = s + (1-s)·p, na fraca (serial é
+# então T(1)). optimal é o maior p <= max_workers com eficiência prevista
+# >= min_efficiency (forte: antes de T(p) voltar a subir) e speedup o
+# previsto nesse p (escalado, na fraca).
+Fit = collections.namedtuple(
+    'Fit', 'backend kind dataset n0 workers time_ms serial parallel comm serial_fraction '
+           'rmse optimal speedup')
+
+
+def weak_name(n0, workers):
+    return f"fraco{n0}x{workers}"
+
+
+def generate_weak_datasets(n0, k, workers, data_dir, seed=42, log=print):
+    # dados_fraco<N0>x<p>.bin com N = p·N0 pontos, gerados por
+    # generate_datasets.py no modo em blocos: mesma semente, mesmos K
+    # centros e mesmo desvio, então a estrutura dos clusters só depende de
+    # K. Todos recebem os centróides iniciais do menor (mesmo ponto de
+    # partida, iterações comparáveis). Arquivos existentes são mantidos.
+    base = os.path.join(ROOT, data_dir)
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    first = None
+    for p in sorted(workers):
+        name = weak_name(n0, p)
+        if not os.path.exists(os.path.join(base, f'dados_{name}.bin')):
+            log(f"Gerando {name} (N={n0 * p:,}, K={k})")
+            cmd = [sys.executable, os.path.join(ROOT, 'generate_datasets.py'), '--n', str(n0 * p),
+                   '--k', str(k), '--nome', name, '--formato', 'bin', '--seed', str(seed)]
+            result = subprocess.run(cmd, cwd=base, env=env, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"Erro ao gerar {name}:\n{result.stderr.strip()}")
+        if first is None:
+            first = name
+        else:
+            for ext in ('csv', 'bin'):
+                shutil.copyfile(os.path.join(base, f'centroides_{first}.{ext}'),
+                                os.path.join(base, f'centroides_{name}.{ext}'))
+    return [weak_name(n0, p) for p in sorted(workers)]
+
+
+def scaling_matrix(backends, workers, strong, weak_n0, repetitions, warmup, data_dir, mpirun):
+    # Série forte: cada dataset de `strong` com todos os workers. Série
+    # fraca: o dataset fraco<N0>x<p> só com p workers.
+    runs = []
+    for backend in backends:
+        axis = WORKER_AXIS[backend]
+        if strong:
+            runs.append({'backend': backend, 'datasets': list(strong), axis: list(workers)})
+        if weak_n0:
+            runs += [{'backend': backend, 'datasets': [weak_name(weak_n0, p)], axis: [p]}
+                     for p in workers]
+    return {'repetitions': repetitions, 'warmup': warmup, 'data_dir': data_dir,
+            'mpirun': list(mpirun), 'runs': runs}
+
+
+def _nonnegative_lstsq(A, y):
+    # Mínimos quadrados com coeficientes >= 0 para poucas colunas: testa
+    # todos os subconjuntos de termos e fica com o menor resíduo viável.
+    best, best_res = np.zeros(A.shape[1]), float(np.sum(y ** 2))
+    for size in range(1, A.shape[1] + 1):
+        for cols in itertools.combinations(range(A.shape[1]), size):
+            coef, *_ = np.linalg.lstsq(A[:, cols], y, rcond=None)
+            if np.any(coef < 0):
+                continue
+            res = float(np.sum((A[:, cols] @ coef - y) ** 2))
+            if res < best_res:
+                best = np.zeros(A.shape[1])
+                best[list(cols)] = coef
+                best_res = res
+    return best
+
+
+def model_time(fit, p):
+    if fit.kind == 'strong':
+        return fit.serial + fit.parallel / p + fit.comm * math.log2(p)
+    s = fit.serial_fraction
+    return fit.serial * p / (s + (1.0 - s) * p) + fit.comm * math.log2(p)
+
+
+def optimal_workers(fit, min_efficiency, max_workers):
+    # (p, speedup previsto) pelo critério descrito em Fit.
+    t1 = model_time(fit, 1)
+    best = 1
+    for p in range(2, max_workers + 1):
+        t = model_time(fit, p)
+        if fit.kind == 'strong':
+            if t > model_time(fit, p - 1):
+                break
+            efficiency = t1 / (p * t)
+        else:
+            efficiency = t1 / t
+        if efficiency < min_efficiency:
+            break
+        best = p
+    t = model_time(fit, best)
+    return best, (t1 / t if fit.kind == 'strong' else best * t1 / t)
+
+
+def fit_series(backend, kind, dataset, n0, ps, ts, min_efficiency=0.5, max_workers=1024):
+    # Ajusta uma série (forte ou fraca) de tempos por iteração ts medidos
+    # com ps workers (ps inclui 1).
+    order = np.argsort(ps)
+    ps = np.asarray(ps, dtype=float)[order]
+    ts = np.asarray(ts, dtype=float)[order]
+    comm = backend in MPI_BACKENDS
+    cols = [np.ones_like(ps)]
+    if kind == 'strong':
+        cols.append(1.0 / ps)
+    if comm:
+        cols.append(np.log2(ps))
+    # Resíduo relativo: pesa igualmente tempos grandes e pequenos.
+    coef = _nonnegative_lstsq(np.column_stack(cols) / ts[:, None], np.ones_like(ts))
+    c = float(coef[-1]) if comm else 0.0
+    if kind == 'strong':
+        serial, parallel = float(coef[0]), float(coef[1])
+        fraction = serial / (serial + parallel) if serial + parallel > 0 else 1.0
+    else:
+        # Gustafson sobre os tempos sem o termo de comunicação.
+        serial, parallel = (float(coef[0]) if comm else float(ts[0])), 0.0
+        scaled = ps * serial / np.maximum(ts - c * np.log2(ps), 1e-300)
+        fraction = float(np.clip(np.sum((ps - scaled) * (ps - 1)) / max(np.sum((ps - 1) ** 2), 1e-300),
+                                 0.0, 1.0))
+    fit = Fit(backend, kind, dataset, n0, [int(p) for p in ps], [float(t) for t in ts],
+              serial, parallel, c, fraction, 0.0, 1, 1.0)
+    predicted = np.array([model_time(fit, p) for p in ps])
+    rmse = float(np.sqrt(np.mean(((predicted - ts) / ts) ** 2)))
+    p_opt, speedup = optimal_workers(fit, min_efficiency, max_workers)
+    return fit._replace(rmse=rmse, optimal=p_opt, speedup=float(speedup))
+
+
+def fit_records(records, min_efficiency=0.5, max_workers=1024):
+    # Agrupa os registros em séries (backend, dataset forte ou N0 fraco) e
+    # ajusta cada uma com pelo menos dois números de workers.
+    series = collections.defaultdict(dict)
+    for r in records:
+        axis = WORKER_AXIS.get(r['backend'])
+        if axis is None or not r['iterations']:
+            continue
+        p = r[axis]
+        per_iter = r['stats']['median'] / r['iterations']
+        if r['dataset'].startswith('fraco'):
+            n0 = r['n'] // p
+            series[(r['backend'], 'weak', f"fraco{n0}", n0)][p] = per_iter
+        else:
+            series[(r['backend'], 'strong', r['dataset'], r['n'])][p] = per_iter
+    fits = []
+    for (backend, kind, dataset, n0), points in sorted(series.items()):
+        if len(points) < 2 or 1 not in points:
+            continue
+        ps = sorted(points)
+        fits.append(fit_series(backend, kind, dataset, n0, ps, [points[p] for p in ps],
+                               min_efficiency, max_workers))
+    return fits
+
+
+def format_fits(fits):
+    header = (f"{'Backend':<8} {'Série':<6} {'Dataset':<16} {'N':>10} {'serial':>9} {'paralelo':>9} "
+              f"{'comm·log2p':>10} {'fração s':>9} {'erro':>6} {'p ótimo':>8} {'speedup':>8}")
+    lines = [header, '-' * len(header)]
+    for f in fits:
+        lines.append(f"{f.backend:<8} {'forte' if f.kind == 'strong' else 'fraca':<6} {f.dataset:<16} "
+                     f"{f.n0:>10} {f.serial:>9.3f} {f.parallel:>9.3f} {f.comm:>10.3f} "
+                     f"{f.serial_fraction:>9.4f} {100.0 * f.rmse:>5.1f}% {f.optimal:>8} {f.speedup:>7.2f}x")
+    lines.append("Tempos em ms por iteração. Forte: fração serial de Amdahl; fraca (N = p·N0, N0 na "
+                 "coluna N): fração de Gustafson e speedup escalado. p ótimo: maior p com eficiência "
+                 "prevista acima do mínimo, antes de T(p) voltar a subir.")
+    return '\n'.join(lines)
+
+
+def plot_fits(fits, path, dpi=150):
+    # Speedup medido (marcadores) e previsto (linhas) da série forte e
+    # eficiência escalada da série fraca.
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(13, 5))
+    cmap = plt.get_cmap('tab10')
+    for j, f in enumerate(fits):
+        color = cmap(j % 10)
+        ps = np.asarray(f.workers, dtype=float)
+        ts = np.asarray(f.time_ms)
+        grid = np.unique(np.geomspace(1, max(4 * ps[-1], f.optimal), 60).round())
+        model = np.array([model_time(f, p) for p in grid])
+        label = f"{f.backend} {f.dataset}"
+        if f.kind == 'strong':
+            ax1.plot(ps, ts[0] / ts, 'o', color=color)
+            ax1.plot(grid, model_time(f, 1) / model, '-', color=color,
+                     label=f"{label} (s={f.serial_fraction:.3f}, p*={f.optimal})")
+        else:
+            ax2.plot(ps, ts[0] / ts, 'o', color=color)
+            ax2.plot(grid, model_time(f, 1) / model, '-', color=color,
+                     label=f"{label} (s={f.serial_fraction:.3f}, p*={f.optimal})")
+    top = max([max(f.workers) for f in fits if f.kind == 'strong'] + [1]) * 4
+    ax1.plot([1, top], [1, top], 'k--', alpha=0.4, label='ideal')
+    ax1.set_xscale('log', base=2)
+    ax1.set_yscale('log', base=2)
+    ax1.set_xlabel('Workers (threads ou processos)')
+    ax1.set_ylabel('Speedup')
+    ax1.set_title('Escalabilidade forte (Amdahl)')
+    ax2.axhline(1.0, color='black', linestyle='--', alpha=0.4)
+    ax2.set_xscale('log', base=2)
+    ax2.set_ylim(0, 1.1)
+    ax2.set_xlabel('Workers (N = p·N0)')
+    ax2.set_ylabel('Eficiência escalada T(1)/T(p)')
+    ax2.set_title('Escalabilidade fraca (Gustafson)')
+    for ax in (ax1, ax2):
+        ax.grid(True, which='both', alpha=0.3)
+        if ax.get_legend_handles_labels()[0]:
+            ax.legend(fontsize=7)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+    plt.close(fig)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python3 -m bench scaling',
+        description="Escalabilidade forte e fraca do OpenMP e do MPI, com ajuste de Amdahl, "
+                    "Gustafson e de um termo de comunicação (MPI).")
+    parser.add_argument('--backends', nargs='+', choices=sorted(WORKER_AXIS), default=['openmp', 'mpi'])
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4, 8, 16],
+                        help="threads (OpenMP) ou processos (MPI); precisa incluir 1")
+    parser.add_argument('--fortes', nargs='*', default=['medio', 'grande'],
+                        help="datasets da série forte (dados_<nome>.*)")
+    parser.add_argument('--fraco-n', type=int, default=250_000,
+                        help="pontos por worker da série fraca (0 desliga)")
+    parser.add_argument('--k', type=int, default=16, help="clusters dos datasets fracos")
+    parser.add_argument('--data-dir', default='.', help="diretório dos datasets (relativo à raiz)")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--mpirun', default='mpirun', help="comando do lançador, ex.: 'mpirun --oversubscribe'")
+    parser.add_argument('--eficiencia-min', type=float, default=0.5,
+                        help="eficiência mínima que define o p ótimo (padrão: 0.5)")
+    parser.add_argument('--max-workers', type=int, default=1024, help="maior p considerado na previsão")
+    parser.add_argument('--saida', default='bench_results.jsonl',
+                        help="JSON Lines onde cada configuração é acrescentada")
+    parser.add_argument('--store', default=DEFAULT_STORE, help="banco SQLite de resultados")
+    parser.add_argument('--sem-store', action='store_true', help="não lê nem grava o banco")
+    parser.add_argument('--forcar', action='store_true', help="executa mesmo com resultado recente no banco")
+    parser.add_argument('--grafico', help="grava speedup e eficiência medidos e previstos (requer matplotlib)")
+    parser.add_argument('--json', action='store_true', help="imprime os ajustes como JSON Lines")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    # Chamado por `python3 -m bench scaling ...` (ver __main__.py).
+    args = parse_args(argv)
+    if 1 not in args.workers or min(args.workers) <= 0:
+        print("--workers precisa incluir 1 (a referência dos ajustes) e só valores positivos", file=sys.stderr)
+        return 1
+    workers = sorted(set(args.workers))
+    log = (lambda *a, **k: print(*a, file=sys.stderr, **k)) if args.json else print
+    store = None if args.sem_store else ResultStore(args.store)
+    try:
+        if args.fraco_n:
+            generate_weak_datasets(args.fraco_n, args.k, workers, args.data_dir, log=log)
+        matrix = scaling_matrix(args.backends, workers, args.fortes, args.fraco_n, args.repeticoes,
+                                args.warmup, args.data_dir, args.mpirun.split())
+        records = run_matrix(matrix, out=args.saida, store=store, force=args.forcar, log=log)
+    except (RuntimeError, FileNotFoundError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if store:
+            store.close()
+
+    fits = fit_records(records, args.eficiencia_min, args.max_workers)
+    if args.json:
+        for f in fits:
+            print(json.dumps(f._asdict()), flush=True)
+    else:
+        print()
+        print(format_fits(fits))
+    if args.grafico and fits:
+        try:
+            plot_fits(fits, args.grafico)
+        except ImportError:
+            print("--grafico requer matplotlib", file=sys.stderr)
+            return 1
+        log(f"Gráfico: {args.grafico}")
+    return 0
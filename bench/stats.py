@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import math
+
+import numpy as np
+
+
+def bootstrap_ci(samples, statistic=np.median, confidence=0.95, resamples=2000, seed=0):
+    # Intervalo de confiança por bootstrap percentil; a semente fixa deixa o
+    # relatório reprodutível para as mesmas amostras.
+    x = np.asarray(samples, dtype=np.float64)
+    if len(x) < 2:
+        return float(x[0]), float(x[0])
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(x), size=(resamples, len(x)))
+    stats = statistic(x[idx], axis=1)
+    alpha = (1.0 - confidence) / 2.0
+    lo, hi = np.quantile(stats, [alpha, 1.0 - alpha])
+    return float(lo), float(hi)
+
+
+def summarize(samples, confidence=0.95):
+    # Resumo robusto de tempos repetidos: mediana e IQR para a tendência e
+    # a dispersão, IC da mediana para comparar configurações.
+    x = np.asarray(samples, dtype=np.float64)
+    if len(x) == 0:
+        raise ValueError("Nenhuma amostra para resumir")
+    q1, median, q3 = np.quantile(x, [0.25, 0.5, 0.75])
+    ci_low, ci_high = bootstrap_ci(x, confidence=confidence)
+    return {
+        'n': int(len(x)),
+        'median': float(median),
+        'q1': float(q1),
+        'q3': float(q3),
+        'iqr': float(q3 - q1),
+        'mean': float(x.mean()),
+        'std': float(x.std(ddof=1)) if len(x) > 1 else 0.0,
+        'min': float(x.min()),
+        'max': float(x.max()),
+        'confidence': confidence,
+        'ci_low': ci_low,
+        'ci_high': ci_high,
+    }
+
+
+def rankdata(a):
+    # Postos 1..N com média nos empates.
+    _, inv, counts = np.unique(a, return_inverse=True, return_counts=True)
+    avg = np.cumsum(counts) - (counts - 1) / 2.0
+    return avg[inv]
+
+
+def mann_whitney_greater(x, y):
+    # Teste U de Mann-Whitney unilateral (H1: x tende a ser maior que y),
+    # aproximação normal com correção de empates e de continuidade.
+    # Não assume normalidade dos tempos, que costumam ter cauda à direita.
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n1, n2 = len(x), len(y)
+    if n1 == 0 or n2 == 0:
+        raise ValueError("Amostras vazias no teste de Mann-Whitney")
+    both = np.concatenate((x, y))
+    u = float(rankdata(both)[:n1].sum() - n1 * (n1 + 1) / 2.0)
+
+    n = n1 + n2
+    _, counts = np.unique(both, return_counts=True)
+    ties = float((counts ** 3 - counts).sum())
+    var = n1 * n2 / 12.0 * ((n + 1) - ties / (n * (n - 1)))
+    if var <= 0.0:
+        return u, 1.0
+    z = (u - n1 * n2 / 2.0 - 0.5) / math.sqrt(var)
+    return u, 0.5 * math.erfc(z / math.sqrt(2.0))
+
+
+def regression_check(samples, history, alpha=0.01, threshold=0.05):
+    # Regressão = amostras novas significativamente mais lentas que o
+    # histórico (Mann-Whitney, p < alpha) E mediana pelo menos `threshold`
+    # acima da histórica, para não acusar diferenças irrelevantes.
+    base = float(np.median(history))
+    slowdown = float(np.median(samples)) / base - 1.0 if base > 0.0 else 0.0
+    _, p = mann_whitney_greater(samples, history)
+    return {
+        'history_samples': int(len(history)),
+        'baseline_median': base,
+        'slowdown': slowdown,
+        'p_value': p,
+        'regression': bool(p < alpha and slowdown > threshold),
+    }
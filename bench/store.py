@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import platform
+import sqlite3
+import time
+
+from .backends import ROOT
+
+DEFAULT_STORE = os.path.join(ROOT, 'bench_results.sqlite')
+
+# Campos que definem uma configuração da matriz.
+CONFIG_FIELDS = ('backend', 'dataset', 'threads', 'processes', 'schedule', 'solver')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    config_key TEXT NOT NULL,
+    series_key TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    threads INTEGER,
+    processes INTEGER,
+    schedule TEXT,
+    solver TEXT,
+    binary_hash TEXT NOT NULL,
+    flags TEXT NOT NULL,
+    dataset_hash TEXT NOT NULL,
+    params TEXT NOT NULL,
+    host TEXT NOT NULL,
+    iterations INTEGER,
+    sse REAL,
+    median_ms REAL NOT NULL,
+    samples_ms TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_config ON results (config_key, created);
+CREATE INDEX IF NOT EXISTS results_series ON results (series_key, created);
+CREATE TABLE IF NOT EXISTS probes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    host TEXT NOT NULL,
+    binary_hash TEXT NOT NULL,
+    threads INTEGER NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS probes_host ON probes (host, binary_hash, threads, created);
+"""
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def host_fingerprint():
+    # Identifica a máquina: nome, arquitetura, modelo de CPU, núcleos e SO.
+    # Resultados de hosts diferentes nunca são comparados entre si.
+    cpu = platform.processor()
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    cpu = line.split(':', 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    info = {
+        'node': platform.node(),
+        'machine': platform.machine(),
+        'cpu': cpu,
+        'cpus': os.cpu_count(),
+        'system': f"{platform.system()} {platform.release()}",
+    }
+    return _digest(info)[:16], info
+
+
+def identity(config, binary_hash, flags, dataset_hash, params, host):
+    # config_key identifica a medição inteira (inclui o build); series_key
+    # agrupa builds diferentes da mesma configuração, para o histórico.
+    fields = {f: config.get(f) for f in CONFIG_FIELDS}
+    series = _digest(fields, flags, dataset_hash, params, host)
+    return {
+        'config_key': _digest(series, binary_hash),
+        'series_key': series,
+        'binary_hash': binary_hash,
+        'flags': flags,
+        'dataset_hash': dataset_hash,
+        'params': params,
+        'host': host,
+    }
+
+
+class ResultStore:
+    # Resultados de benchmark em SQLite: um registro por configuração
+    # executada, com todas as amostras e o registro completo em JSON.
+
+    def __init__(self, path=DEFAULT_STORE):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def save(self, record):
+        ident = record['identity']
+        self.db.execute(
+            "INSERT INTO results (created, config_key, series_key, backend, dataset, threads, "
+            "processes, schedule, solver, binary_hash, flags, dataset_hash, params, host, "
+            "iterations, sse, median_ms, samples_ms, record) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (record['created'], ident['config_key'], ident['series_key'],
+             *(record.get(f) for f in CONFIG_FIELDS),
+             ident['binary_hash'], ident['flags'], ident['dataset_hash'],
+             json.dumps(ident['params'], sort_keys=True), ident['host'],
+             record['iterations'], record['sse'], record['stats']['median'],
+             json.dumps(record['samples_ms']), json.dumps(record)))
+        self.db.commit()
+
+    def fresh(self, config_key, max_age):
+        # Registro mais recente desta configuração exata com idade <= max_age
+        # segundos, ou None.
+        row = self.db.execute(
+            "SELECT record FROM results WHERE config_key = ? AND created >= ? "
+            "ORDER BY created DESC LIMIT 1",
+            (config_key, time.time() - max_age)).fetchone()
+        return json.loads(row['record']) if row else None
+
+    def history(self, series_key, before, limit=5):
+        # Amostras dos `limit` registros anteriores da mesma série (builds
+        # anteriores ou medições anteriores do mesmo build).
+        rows = self.db.execute(
+            "SELECT samples_ms FROM results WHERE series_key = ? AND created < ? "
+            "ORDER BY created DESC LIMIT ?", (series_key, before, limit)).fetchall()
+        return [t for row in rows for t in json.loads(row['samples_ms'])]
+
+    def latest(self, backend, dataset, host=None, dataset_hash=None, params=None, **axes):
+        # Registro mais recente de um backend/dataset; `axes` filtra por
+        # threads, processes, schedule ou solver.
+        sql = "SELECT record FROM results WHERE backend = ? AND dataset = ?"
+        args = [backend, dataset]
+        for name, value in (('host', host), ('dataset_hash', dataset_hash)):
+            if value is not None:
+                sql += f" AND {name} = ?"
+                args.append(value)
+        if params is not None:
+            sql += " AND params = ?"
+            args.append(json.dumps(params, sort_keys=True))
+        for name, value in axes.items():
+            if name not in CONFIG_FIELDS:
+                raise ValueError(f"Campo desconhecido: {name}")
+            sql += f" AND {name} = ?"
+            args.append(value)
+        row = self.db.execute(sql + " ORDER BY created DESC LIMIT 1", args).fetchone()
+        return json.loads(row['record']) if row else None
+
+    def save_probe(self, record):
+        # Resultado das sondas de banda e de FLOPs (bench/roofline.py) de um
+        # número de threads neste host.
+        self.db.execute(
+            "INSERT INTO probes (created, host, binary_hash, threads, record) VALUES (?, ?, ?, ?, ?)",
+            (record['created'], record['host'], record['binary_hash'], record['threads'],
+             json.dumps(record)))
+        self.db.commit()
+
+    def probe(self, host, binary_hash, threads, max_age):
+        # Sondas mais recentes do mesmo host, build da sonda e threads com
+        # idade <= max_age segundos, ou None.
+        row = self.db.execute(
+            "SELECT record FROM probes WHERE host = ? AND binary_hash = ? AND threads = ? "
+            "AND created >= ? ORDER BY created DESC LIMIT 1",
+            (host, binary_hash, threads, time.time() - max_age)).fetchone()
+        return json.loads(row['record']) if row else None
+
+    def latest_per_config(self, host):
+        # Registro mais recente de cada configuração (CONFIG_FIELDS) medida
+        # neste host, para os relatórios. No SQLite, a coluna fora do GROUP
+        # BY vem da linha do MAX(created).
+        rows = self.db.execute(
+            "SELECT record, MAX(created) FROM results WHERE host = ? "
+            "GROUP BY backend, dataset, threads, processes, schedule, solver "
+            "ORDER BY backend, dataset, threads, processes", (host,)).fetchall()
+        return [json.loads(row['record']) for row in rows]
+
+    def latest_probes(self, host):
+        # Sondas mais recentes deste host por número de threads (qualquer
+        # build da sonda): threads -> registro.
+        rows = self.db.execute(
+            "SELECT threads, record, MAX(created) FROM probes WHERE host = ? GROUP BY threads",
+            (host,)).fetchall()
+        return {row['threads']: json.loads(row['record']) for row in rows}
@@ -0,0 +1,71 @@
+/* Opções de linha de comando comuns a serial, OpenMP e MPI.
+
+   --json (em qualquer posição) troca a saída textual por uma única linha
+   JSON com os parâmetros e o resultado da execução, lida pelo harness de
+   benchmark (bench/). Os argumentos posicionais continuam os mesmos. */
+#ifndef KMEANS_CLI_H
+#define KMEANS_CLI_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <math.h>
+
+/* Remove `flag` de argv (ajustando argc) e retorna 1 se ela estava presente. */
+static int take_flag(int *argc, char **argv, const char *flag){
+    int found = 0, j = 1;
+    for(int i=1;i<*argc;i++){
+        if(strcmp(argv[i], flag) == 0){ found = 1; continue; }
+        argv[j++] = argv[i];
+    }
+    argv[j] = NULL;
+    *argc = j;
+    return found;
+}
+
+/* Remove `--nome valor` ou `--nome=valor` de argv e retorna o valor
+   (NULL se a opção não estiver presente). */
+static inline const char *take_option(int *argc, char **argv, const char *name){
+    const char *value = NULL;
+    size_t len = strlen(name);
+    int j = 1;
+    for(int i=1;i<*argc;i++){
+        if(strcmp(argv[i], name) == 0 && i + 1 < *argc){ value = argv[++i]; continue; }
+        if(strncmp(argv[i], name, len) == 0 && argv[i][len] == '='){ value = argv[i] + len + 1; continue; }
+        argv[j++] = argv[i];
+    }
+    argv[j] = NULL;
+    *argc = j;
+    return value;
+}
+
+/* Linha JSON de resultado. `extra` são campos adicionais já formatados
+   (ex.: "\"threads\": 4"), ou NULL. Tempo em ms com precisão total; SSE
+   não finito (não calculado) sai como null. */
+static inline void print_json_result(const char *backend, long long N, int K, int max_iter, double eps,
+                                     int iters, double sse, double ms, const char *extra){
+    printf("{\"backend\": \"%s\", \"n\": %lld, \"k\": %d, \"max_iter\": %d, \"eps\": %.17g, "
+           "\"iterations\": %d, ", backend, N, K, max_iter, eps, iters);
+    if(isfinite(sse)) printf("\"sse\": %.17g", sse);
+    else printf("\"sse\": null");
+    printf(", \"time_ms\": %.6f", ms);
+    if(extra && extra[0]) printf(", %s", extra);
+    printf("}\n");
+    fflush(stdout);
+}
+
+/* Campo JSON com uma lista de números ("\"nome\": [0, 0.912345, 1532]")
+   para o `extra` de print_json_result. Devolve memória alocada (free). */
+static inline char *json_list_field(const char *name, const double *values, int n){
+    size_t size = strlen(name) + 16 + (size_t)n * 24;
+    char *out = (char*)malloc(size);
+    if(!out){ fprintf(stderr,"Sem memoria\n"); exit(1); }
+    size_t len = (size_t)snprintf(out, size, "\"%s\": [", name);
+    for(int i=0;i<n;i++){
+        len += (size_t)snprintf(out + len, size - len, "%s%.10g", i ? ", " : "", values[i]);
+    }
+    snprintf(out + len, size - len, "]");
+    return out;
+}
+
+#endif
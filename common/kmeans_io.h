@@ -0,0 +1,718 @@
+/* Leitura de datasets 1D e escrita de resultados, compartilhadas por
+   serial, OpenMP e MPI.
+
+   Formato binário (.bin), little-endian, cabeçalho de 32 bytes:
+     0  char     magic[4] = "KM1D"
+     4  uint16   versão   = 1
+     6  uint16   dtype    (1 = float64, 2 = float32)
+     8  uint64   N
+     16 uint32   CRC-32 (zlib) dos N valores
+     20 uint32   reservado (0)
+     24 uint64   reservado (0)
+     32 ...      N valores brutos
+
+   Arquivos binários float64 são mapeados com mmap e usados sem cópia.
+   CSV continua aceito: o arquivo é mapeado e lido numa única passada com
+   um parser de float rápido (mesmo resultado de atof).
+
+   Rótulos terminados em .bin/.rle saem em KM1L (ver "Saída" abaixo) e
+   centróides terminados em .bin saem em KM1D float64; o resto sai em CSV.
+
+   Quem inclui este header deve definir _POSIX_C_SOURCE >= 200809L antes
+   de qualquer #include. */
+#ifndef KMEANS_IO_H
+#define KMEANS_IO_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdint.h>
+#include <string.h>
+#include <stddef.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+
+#define KM1D_MAGIC "KM1D"
+#define KM1D_VERSION 1
+#define KM1D_HEADER_SIZE 32
+#define KM1D_FLOAT64 1
+#define KM1D_FLOAT32 2
+
+typedef struct {
+    double *data;       /* N valores em float64 */
+    int n;
+    void *map;          /* região mapeada (NULL se não houver) */
+    size_t map_len;
+    int owns_data;      /* data foi alocado com malloc */
+} dataset_1d;
+
+/* CRC-32 incremental, como zlib.crc32(dados, crc): comece com crc = 0. */
+static uint32_t km1d_crc32_update(uint32_t crc, const unsigned char *p, size_t len){
+    static uint32_t table[256];
+    static int ready = 0;
+    if(!ready){
+        for(uint32_t i=0;i<256;i++){
+            uint32_t c = i;
+            for(int k=0;k<8;k++) c = (c & 1) ? 0xEDB88320u ^ (c >> 1) : c >> 1;
+            table[i] = c;
+        }
+        ready = 1;
+    }
+    crc ^= 0xFFFFFFFFu;
+    for(size_t i=0;i<len;i++) crc = table[(crc ^ p[i]) & 0xFF] ^ (crc >> 8);
+    return crc ^ 0xFFFFFFFFu;
+}
+
+static uint32_t km1d_crc32(const unsigned char *p, size_t len){
+    return km1d_crc32_update(0, p, len);
+}
+
+static uint16_t km1d_u16(const unsigned char *p){ return (uint16_t)(p[0] | (p[1] << 8)); }
+static uint32_t km1d_u32(const unsigned char *p){
+    return (uint32_t)p[0] | ((uint32_t)p[1] << 8) | ((uint32_t)p[2] << 16) | ((uint32_t)p[3] << 24);
+}
+static uint64_t km1d_u64(const unsigned char *p){
+    return (uint64_t)km1d_u32(p) | ((uint64_t)km1d_u32(p + 4) << 32);
+}
+
+/* Parser de float para o caso comum ("-12.345678", "1e-3"): mantissa inteira
+   exata e potência de 10 exata dão o mesmo arredondamento de strtod (caminho
+   rápido de Clinger); qualquer outro caso cai em strtod. */
+static double km1d_parse_double(const char *p, const char *end, const char **next){
+    static const double pow10[] = {
+        1e0, 1e1, 1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10, 1e11,
+        1e12, 1e13, 1e14, 1e15, 1e16, 1e17, 1e18, 1e19, 1e20, 1e21, 1e22
+    };
+    const char *s = p;
+    int neg = 0;
+    if(s < end && (*s == '-' || *s == '+')){ neg = (*s == '-'); s++; }
+    uint64_t mant = 0;
+    int digits = 0, exp10 = 0, any = 0;
+    while(s < end && *s >= '0' && *s <= '9'){
+        if(digits < 19){ mant = mant*10 + (uint64_t)(*s - '0'); if(mant) digits++; }
+        else exp10++;
+        s++; any = 1;
+    }
+    if(s < end && *s == '.'){
+        s++;
+        while(s < end && *s >= '0' && *s <= '9'){
+            if(digits < 19){ mant = mant*10 + (uint64_t)(*s - '0'); if(mant) digits++; exp10--; }
+            s++; any = 1;
+        }
+    }
+    int ok = any;
+    if(ok && s < end && (*s == 'e' || *s == 'E')){
+        const char *e = s + 1;
+        int eneg = 0, ev = 0, edig = 0;
+        if(e < end && (*e == '-' || *e == '+')){ eneg = (*e == '-'); e++; }
+        while(e < end && *e >= '0' && *e <= '9'){ if(ev < 10000) ev = ev*10 + (*e - '0'); e++; edig++; }
+        if(edig){ exp10 += eneg ? -ev : ev; s = e; }
+    }
+    if(ok && mant <= (1ULL << 53) && exp10 >= -22 && exp10 <= 22){
+        double v = (double)mant;
+        v = exp10 < 0 ? v / pow10[-exp10] : v * pow10[exp10];
+        *next = s;
+        return neg ? -v : v;
+    }
+    /* caminho lento: copia o token (o mapeamento não termina em '\0') */
+    char buf[128];
+    size_t len = 0;
+    while(p + len < end && len < sizeof(buf) - 1 &&
+          p[len] != ',' && p[len] != ';' && p[len] != ' ' && p[len] != '\t' &&
+          p[len] != '\n' && p[len] != '\r') len++;
+    memcpy(buf, p, len); buf[len] = '\0';
+    char *stop;
+    double v = strtod(buf, &stop);
+    *next = p + (stop - buf);
+    return v;
+}
+
+static void km1d_parse_csv(const char *path, const char *p, const char *end, dataset_1d *ds){
+    size_t cap = 1024, n = 0;
+    double *A = (double*)malloc(cap * sizeof(double));
+    if(!A){ fprintf(stderr,"Sem memoria para %s\n", path); exit(1); }
+    size_t line = 0;
+    while(p < end){
+        /* uma linha: pula espaços iniciais; linhas em branco são ignoradas */
+        while(p < end && (*p == ' ' || *p == '\t' || *p == '\r')) p++;
+        if(p < end && *p == '\n'){ p++; continue; }
+        if(p >= end) break;
+        line++;
+        /* primeiro token da linha, como o strtok(",; \t") original */
+        while(p < end && (*p == ',' || *p == ';' || *p == ' ' || *p == '\t')) p++;
+        const char *next = p;
+        double v = km1d_parse_double(p, end, &next);
+        if(next == p && (p >= end || *p == '\n')){
+            fprintf(stderr,"Linha %zu sem valor em %s\n", line, path); exit(1);
+        }
+        if(n == cap){
+            cap *= 2;
+            double *B = (double*)realloc(A, cap * sizeof(double));
+            if(!B){ fprintf(stderr,"Sem memoria para %zu linhas\n", cap); exit(1); }
+            A = B;
+        }
+        A[n++] = v;
+        while(next < end && *next != '\n') next++;
+        p = next < end ? next + 1 : end;
+    }
+    if(n == 0){ fprintf(stderr,"Arquivo vazio: %s\n", path); exit(1); }
+    if(n > 0x7FFFFFFF){ fprintf(stderr,"Arquivo grande demais: %s\n", path); exit(1); }
+    ds->data = A;
+    ds->n = (int)n;
+    ds->owns_data = 1;
+}
+
+static void *km1d_map_file(const char *path, size_t *len_out){
+    int fd = open(path, O_RDONLY);
+    if(fd < 0){ fprintf(stderr,"Erro ao abrir %s\n", path); exit(1); }
+    struct stat st;
+    if(fstat(fd, &st) != 0){ fprintf(stderr,"Erro ao abrir %s\n", path); close(fd); exit(1); }
+    size_t len = (size_t)st.st_size;
+    if(len == 0){ fprintf(stderr,"Arquivo vazio: %s\n", path); close(fd); exit(1); }
+
+    void *map = mmap(NULL, len, PROT_READ, MAP_PRIVATE, fd, 0);
+    close(fd);
+    if(map == MAP_FAILED){ fprintf(stderr,"Erro ao mapear %s\n", path); exit(1); }
+    *len_out = len;
+    return map;
+}
+
+/* Valida o cabeçalho KM1D (e o CRC) de um arquivo mapeado. Retorna 0 se o
+   arquivo não tem o magic (CSV); 1 com dtype, N e o início dos valores. */
+static int km1d_parse_header(const char *path, const unsigned char *b, size_t len,
+                             uint16_t *dtype_out, uint64_t *n_out, const unsigned char **payload_out){
+    if(len < KM1D_HEADER_SIZE || memcmp(b, KM1D_MAGIC, 4) != 0) return 0;
+    uint16_t version = km1d_u16(b + 4);
+    uint16_t dtype = km1d_u16(b + 6);
+    uint64_t n = km1d_u64(b + 8);
+    uint32_t crc = km1d_u32(b + 16);
+    size_t item = dtype == KM1D_FLOAT64 ? 8 : dtype == KM1D_FLOAT32 ? 4 : 0;
+    if(version != KM1D_VERSION || item == 0){
+        fprintf(stderr,"Formato binário não suportado em %s (versão %u, dtype %u)\n", path, version, dtype); exit(1);
+    }
+    if(n == 0 || len < KM1D_HEADER_SIZE || (len - KM1D_HEADER_SIZE) / item < n){
+        fprintf(stderr,"Arquivo binário truncado: %s\n", path); exit(1);
+    }
+    const unsigned char *payload = b + KM1D_HEADER_SIZE;
+    if(km1d_crc32(payload, n * item) != crc){
+        fprintf(stderr,"Checksum inválido em %s\n", path); exit(1);
+    }
+    *dtype_out = dtype;
+    *n_out = n;
+    *payload_out = payload;
+    return 1;
+}
+
+/* Abre um dataset 1D (binário KM1D ou CSV de 1 coluna). Sai com erro em
+   qualquer falha, como o read_csv_1col original. */
+static void dataset_open(const char *path, dataset_1d *ds){
+    memset(ds, 0, sizeof(*ds));
+    size_t len;
+    void *map = km1d_map_file(path, &len);
+    const unsigned char *b = (const unsigned char*)map;
+
+    uint16_t dtype;
+    uint64_t n;
+    const unsigned char *payload;
+    if(km1d_parse_header(path, b, len, &dtype, &n, &payload)){
+        if(n > 0x7FFFFFFF){ fprintf(stderr,"Arquivo grande demais: %s\n", path); exit(1); }
+        ds->n = (int)n;
+        ds->map = map;
+        ds->map_len = len;
+        if(dtype == KM1D_FLOAT64){
+            ds->data = (double*)(void*)payload;     /* zero cópia */
+        } else {
+            double *A = (double*)malloc(n * sizeof(double));
+            if(!A){ fprintf(stderr,"Sem memoria para %d linhas\n", (int)n); exit(1); }
+            const float *F = (const float*)(const void*)payload;
+            for(uint64_t i=0;i<n;i++) A[i] = (double)F[i];
+            ds->data = A;
+            ds->owns_data = 1;
+        }
+        return;
+    }
+
+    km1d_parse_csv(path, (const char*)b, (const char*)b + len, ds);
+    munmap(map, len);
+}
+
+static void dataset_close(dataset_1d *ds){
+    if(ds->owns_data) free(ds->data);
+    if(ds->map) munmap(ds->map, ds->map_len);
+    memset(ds, 0, sizeof(*ds));
+}
+
+/* Cópia alocada com malloc (para vetores pequenos e mutáveis, como C). */
+static double *dataset_read_copy(const char *path, int *n_out){
+    dataset_1d ds;
+    dataset_open(path, &ds);
+    double *A = (double*)malloc((size_t)ds.n * sizeof(double));
+    if(!A){ fprintf(stderr,"Sem memoria para %d linhas\n", ds.n); exit(1); }
+    memcpy(A, ds.data, (size_t)ds.n * sizeof(double));
+    *n_out = ds.n;
+    dataset_close(&ds);
+    return A;
+}
+
+/* Precisão reduzida (--float32): X guardado em float32, metade dos bytes
+   lidos por iteração. Binários float32 são mapeados sem cópia; float64 e
+   CSV são convertidos uma vez na abertura. Quem usa acumula em double. */
+typedef struct {
+    float *data;
+    int n;
+    void *map;
+    size_t map_len;
+    int owns_data;
+} dataset_1d_f32;
+
+static inline void dataset_open_f32(const char *path, dataset_1d_f32 *ds){
+    memset(ds, 0, sizeof(*ds));
+    size_t len;
+    void *map = km1d_map_file(path, &len);
+    uint16_t dtype;
+    uint64_t n;
+    const unsigned char *payload;
+    if(km1d_parse_header(path, (const unsigned char*)map, len, &dtype, &n, &payload) && dtype == KM1D_FLOAT32){
+        if(n > 0x7FFFFFFF){ fprintf(stderr,"Arquivo grande demais: %s\n", path); exit(1); }
+        ds->data = (float*)(void*)payload;          /* zero cópia */
+        ds->n = (int)n;
+        ds->map = map;
+        ds->map_len = len;
+        return;
+    }
+    munmap(map, len);
+
+    dataset_1d d;
+    dataset_open(path, &d);
+    float *F = (float*)malloc((size_t)d.n * sizeof(float));
+    if(!F){ fprintf(stderr,"Sem memoria para %d linhas\n", d.n); exit(1); }
+    for(int i=0;i<d.n;i++) F[i] = (float)d.data[i];
+    ds->data = F;
+    ds->n = d.n;
+    ds->owns_data = 1;
+    dataset_close(&d);
+}
+
+static inline void dataset_close_f32(dataset_1d_f32 *ds){
+    if(ds->owns_data) free(ds->data);
+    if(ds->map) munmap(ds->map, ds->map_len);
+    memset(ds, 0, sizeof(*ds));
+}
+
+/* Rótulos compactos: o menor inteiro sem sinal que cabe K (1 byte para
+   K <= 256, 2 para K <= 65536, senão int de 4 bytes). */
+static inline int km1d_label_bytes(int K){
+    return K <= 256 ? 1 : K <= 65536 ? 2 : 4;
+}
+
+static inline void km1d_label_set(void *labels, int bytes, int64_t i, int c){
+    if(bytes == 1)      ((uint8_t*)labels)[i] = (uint8_t)c;
+    else if(bytes == 2) ((uint16_t*)labels)[i] = (uint16_t)c;
+    else                ((int*)labels)[i] = c;
+}
+
+static inline int km1d_label_get(const void *labels, int bytes, int64_t i){
+    if(bytes == 1) return ((const uint8_t*)labels)[i];
+    if(bytes == 2) return ((const uint16_t*)labels)[i];
+    return ((const int*)labels)[i];
+}
+
+/* Deduplicação: valores distintos de X em ordem crescente e quantas vezes
+   cada um aparece. Com 6 casas decimais, N grande repete muitos valores e
+   os laços podem rodar sobre os M distintos com pesos inteiros. */
+typedef struct {
+    double *values;     /* M valores distintos, crescentes */
+    int64_t *weights;   /* repetições de cada um (soma = N) */
+    int64_t m;
+} dataset_unique;
+
+static int km1d_compare_double(const void *a, const void *b){
+    double x = *(const double*)a, y = *(const double*)b;
+    return (x > y) - (x < y);
+}
+
+/* Posição de x em u->values (busca binária; x precisa estar lá). É o índice
+   inverso usado para expandir rótulos dos valores distintos para X. */
+static inline int64_t dataset_unique_index(const dataset_unique *u, double x){
+    int64_t lo = 0, hi = u->m - 1;
+    while(lo < hi){
+        int64_t mid = lo + (hi - lo) / 2;
+        if(u->values[mid] < x) lo = mid + 1;
+        else hi = mid;
+    }
+    return lo;
+}
+
+/* Ordena uma cópia de X (O(N log N)) e colapsa as repetições. */
+static inline void dataset_unique_build(const double *X, int64_t n, dataset_unique *u){
+    double *v = (double*)malloc((size_t)n * sizeof(double));
+    if(!v){ fprintf(stderr,"Sem memoria para deduplicar %lld valores\n", (long long)n); exit(1); }
+    memcpy(v, X, (size_t)n * sizeof(double));
+    qsort(v, (size_t)n, sizeof(double), km1d_compare_double);
+    int64_t m = 0;
+    for(int64_t i=0;i<n;i++) if(i == 0 || v[i] != v[i-1]) m++;
+    u->weights = (int64_t*)calloc((size_t)(m > 0 ? m : 1), sizeof(int64_t));
+    if(!u->weights){ fprintf(stderr,"Sem memoria para deduplicar\n"); exit(1); }
+    /* Compacta no próprio vetor ordenado, contando cada sequência. */
+    int64_t j = -1;
+    for(int64_t i=0;i<n;i++){
+        if(j < 0 || v[i] != v[j]) v[++j] = v[i];
+        u->weights[j] += 1;
+    }
+    double *shrunk = (double*)realloc(v, (size_t)(m > 0 ? m : 1) * sizeof(double));
+    u->values = shrunk ? shrunk : v;
+    u->m = m;
+}
+
+static inline void dataset_unique_free(dataset_unique *u){
+    free(u->values); free(u->weights);
+    memset(u, 0, sizeof(*u));
+}
+
+/* Acesso por índice sem materializar X em float64, para quem precisa de
+   memória limitada (mini-batch): binários KM1D são lidos direto do
+   mapeamento, em float64 ou float32, sem limite de 2^31 valores. CSV não
+   tem acesso aleatório e é carregado como em dataset_open. */
+typedef struct {
+    const void *values;
+    int dtype;          /* KM1D_FLOAT64 ou KM1D_FLOAT32 */
+    int64_t n;
+    void *map;
+    size_t map_len;
+    dataset_1d csv;     /* usado quando o arquivo é CSV */
+} dataset_view;
+
+static inline void dataset_open_view(const char *path, dataset_view *v){
+    memset(v, 0, sizeof(*v));
+    size_t len;
+    void *map = km1d_map_file(path, &len);
+    uint16_t dtype;
+    uint64_t n;
+    const unsigned char *payload;
+    if(km1d_parse_header(path, (const unsigned char*)map, len, &dtype, &n, &payload)){
+        v->values = payload;
+        v->dtype = dtype;
+        v->n = (int64_t)n;
+        v->map = map;
+        v->map_len = len;
+        return;
+    }
+    munmap(map, len);
+    dataset_open(path, &v->csv);
+    v->values = v->csv.data;
+    v->dtype = KM1D_FLOAT64;
+    v->n = v->csv.n;
+}
+
+static inline double dataset_at(const dataset_view *v, int64_t i){
+    return v->dtype == KM1D_FLOAT64 ? ((const double*)v->values)[i]
+                                    : (double)((const float*)v->values)[i];
+}
+
+/* Dica ao kernel sobre o padrão de acesso: aleatório (amostragem) ou
+   sequencial (passada completa), para ajustar o read-ahead. */
+static inline void dataset_advise(const dataset_view *v, int sequential){
+    if(v->map) posix_madvise(v->map, v->map_len, sequential ? POSIX_MADV_SEQUENTIAL : POSIX_MADV_RANDOM);
+}
+
+static inline void dataset_close_view(dataset_view *v){
+    if(v->map) munmap(v->map, v->map_len);
+    else dataset_close(&v->csv);
+    memset(v, 0, sizeof(*v));
+}
+
+/* Leitura em janelas de um binário KM1D, para memória fixa (out-of-core):
+   cada janela de até `chunk` valores é mapeada sozinha (mmap do trecho,
+   alinhado à página) e desmapeada depois do uso. Mapear a janela seguinte
+   antes de processar a atual dispara a leitura antecipada pelo kernel
+   (POSIX_MADV_WILLNEED) enquanto a CPU trabalha na atual. */
+typedef struct {
+    int fd;
+    int dtype;
+    size_t item;
+    int64_t n;
+    int64_t chunk;
+    uint32_t crc;       /* CRC-32 declarado no cabeçalho */
+    double first;       /* X[0] */
+} dataset_stream;
+
+typedef struct {
+    void *map;
+    size_t map_len;
+    const unsigned char *values;
+    int64_t start;
+    int64_t count;
+} dataset_window;
+
+static inline void dataset_window_map(const dataset_stream *s, int64_t start, dataset_window *w){
+    size_t page = (size_t)sysconf(_SC_PAGESIZE);
+    size_t byte = KM1D_HEADER_SIZE + (size_t)start * s->item;
+    size_t aligned = byte - byte % page;
+    w->start = start;
+    w->count = s->n - start < s->chunk ? s->n - start : s->chunk;
+    w->map_len = byte + (size_t)w->count * s->item - aligned;
+    w->map = mmap(NULL, w->map_len, PROT_READ, MAP_PRIVATE, s->fd, (off_t)aligned);
+    if(w->map == MAP_FAILED){ fprintf(stderr,"Erro ao mapear bloco em %lld\n", (long long)start); exit(1); }
+    posix_madvise(w->map, w->map_len, POSIX_MADV_WILLNEED);
+    w->values = (const unsigned char*)w->map + (byte - aligned);
+}
+
+static inline void dataset_window_unmap(dataset_window *w){
+    munmap(w->map, w->map_len);
+    memset(w, 0, sizeof(*w));
+}
+
+static inline double dataset_window_at(const dataset_stream *s, const dataset_window *w, int64_t i){
+    return s->dtype == KM1D_FLOAT64 ? ((const double*)(const void*)w->values)[i]
+                                    : (double)((const float*)(const void*)w->values)[i];
+}
+
+/* Abre só o cabeçalho; o CRC é conferido por quem percorre as janelas
+   (km1d_crc32_update sobre cada uma, ver dataset_window_crc). */
+static inline void dataset_stream_open(const char *path, int64_t chunk, dataset_stream *s){
+    memset(s, 0, sizeof(*s));
+    s->fd = open(path, O_RDONLY);
+    if(s->fd < 0){ fprintf(stderr,"Erro ao abrir %s\n", path); exit(1); }
+    unsigned char b[KM1D_HEADER_SIZE];
+    struct stat st;
+    if(fstat(s->fd, &st) != 0 || pread(s->fd, b, sizeof(b), 0) != (ssize_t)sizeof(b) ||
+       memcmp(b, KM1D_MAGIC, 4) != 0){
+        fprintf(stderr,"%s não é um arquivo KM1D (o modo em blocos exige o formato binário)\n", path); exit(1);
+    }
+    uint16_t version = km1d_u16(b + 4);
+    uint16_t dtype = km1d_u16(b + 6);
+    s->item = dtype == KM1D_FLOAT64 ? 8 : dtype == KM1D_FLOAT32 ? 4 : 0;
+    if(version != KM1D_VERSION || s->item == 0){
+        fprintf(stderr,"Formato binário não suportado em %s (versão %u, dtype %u)\n", path, version, dtype); exit(1);
+    }
+    uint64_t n = km1d_u64(b + 8);
+    if(n == 0 || ((uint64_t)st.st_size - KM1D_HEADER_SIZE) / s->item < n){
+        fprintf(stderr,"Arquivo binário truncado: %s\n", path); exit(1);
+    }
+    s->dtype = dtype;
+    s->n = (int64_t)n;
+    s->crc = km1d_u32(b + 16);
+    s->chunk = chunk < s->n ? chunk : s->n;
+
+    dataset_window w;
+    dataset_window_map(s, 0, &w);
+    s->first = dataset_window_at(s, &w, 0);
+    dataset_window_unmap(&w);
+}
+
+static inline uint32_t dataset_window_crc(const dataset_stream *s, const dataset_window *w, uint32_t crc){
+    return km1d_crc32_update(crc, w->values, (size_t)w->count * s->item);
+}
+
+static inline void dataset_stream_close(dataset_stream *s){
+    close(s->fd);
+    memset(s, 0, sizeof(*s));
+}
+
+/* ---------------------------------------------------------------------
+   Saída. Caminhos terminados em ".bin" ou ".rle" recebem binário; os
+   outros, CSV (1 valor por linha), como antes.
+
+   Centróides em ".bin": arquivo KM1D float64 (mesmo formato da entrada).
+
+   Rótulos em ".bin"/".rle": formato KM1L, little-endian, cabeçalho de 32
+   bytes:
+     0  char     magic[4] = "KM1L"
+     4  uint16   versão   = 1
+     6  uint16   codificação (1 = compacto, 2 = RLE)
+     8  uint64   N
+     16 uint32   CRC-32 (zlib) do conteúdo após o cabeçalho
+     20 uint32   K
+     24 uint64   R, número de sequências (0 no compacto)
+     32 ...      compacto: N rótulos de km1d_label_bytes(K) bytes
+                 RLE: R registros {uint32 comprimento, rótulo} de 4 +
+                 km1d_label_bytes(K) bytes, sem alinhamento
+   RLE vale quando rótulos iguais vêm em sequência (X ordenado).
+   --------------------------------------------------------------------- */
+#define KM1L_MAGIC "KM1L"
+#define KM1L_VERSION 1
+#define KM1L_PACKED 1
+#define KM1L_RLE 2
+
+static inline void km1d_put_u16(unsigned char *p, uint16_t v){ p[0] = (unsigned char)v; p[1] = (unsigned char)(v >> 8); }
+static inline void km1d_put_u32(unsigned char *p, uint32_t v){
+    for(int i=0;i<4;i++) p[i] = (unsigned char)(v >> (8*i));
+}
+static inline void km1d_put_u64(unsigned char *p, uint64_t v){
+    km1d_put_u32(p, (uint32_t)v); km1d_put_u32(p + 4, (uint32_t)(v >> 32));
+}
+
+/* Modo de saída pelo sufixo do caminho: 0 = CSV, senão KM1L_PACKED/KM1L_RLE. */
+static inline int km1d_output_mode(const char *path){
+    size_t len = strlen(path);
+    if(len >= 4 && strcmp(path + len - 4, ".bin") == 0) return KM1L_PACKED;
+    if(len >= 4 && strcmp(path + len - 4, ".rle") == 0) return KM1L_RLE;
+    return 0;
+}
+
+/* Produto de dois polinômios módulo o polinômio do CRC-32 (representação
+   refletida da zlib). */
+static inline uint32_t km1d_multmodp(uint32_t a, uint32_t b){
+    uint32_t m = (uint32_t)1 << 31, p = 0;
+    for(;;){
+        if(a & m){
+            p ^= b;
+            if((a & (m - 1)) == 0) break;
+        }
+        m >>= 1;
+        b = (b & 1) ? (b >> 1) ^ 0xEDB88320u : b >> 1;
+    }
+    return p;
+}
+
+/* CRC-32 de A||B a partir de crc(A), crc(B) e len(B), como crc32_combine
+   da zlib: crc1·x^(8·len2) mod P, por quadrados sucessivos. Permite que
+   cada processo calcule o CRC só da sua fatia. */
+static inline uint32_t km1d_crc32_combine(uint32_t crc1, uint32_t crc2, uint64_t len2){
+    uint32_t p = (uint32_t)1 << 31;      /* x^0 */
+    uint32_t sq = (uint32_t)1 << 30;     /* x^1 */
+    for(int k=0;k<3;k++) sq = km1d_multmodp(sq, sq);
+    for(uint64_t n = len2; n; n >>= 1){
+        if(n & 1) p = km1d_multmodp(sq, p);
+        sq = km1d_multmodp(sq, sq);
+    }
+    return km1d_multmodp(p, crc1) ^ crc2;
+}
+
+static inline void km1l_header(unsigned char *b, int encoding, int64_t n, uint32_t crc, int K, int64_t runs){
+    memset(b, 0, KM1D_HEADER_SIZE);
+    memcpy(b, KM1L_MAGIC, 4);
+    km1d_put_u16(b + 4, KM1L_VERSION);
+    km1d_put_u16(b + 6, (uint16_t)encoding);
+    km1d_put_u64(b + 8, (uint64_t)n);
+    km1d_put_u32(b + 16, crc);
+    km1d_put_u32(b + 20, (uint32_t)K);
+    km1d_put_u64(b + 24, (uint64_t)runs);
+}
+
+/* Escrita de rótulos em fluxo (um por vez, em ordem), em CSV ou KM1L
+   conforme o caminho. Tudo passa por um buffer de 64 KiB; no KM1L o CRC é
+   acumulado a cada descarga e o cabeçalho (N, CRC, R) é regravado no
+   fechamento. No CSV os inteiros são formatados à mão, sem um fprintf por
+   ponto. */
+typedef struct {
+    FILE *f;
+    int mode;               /* 0 = CSV, KM1L_PACKED ou KM1L_RLE */
+    int K, width;
+    int64_t n, runs;
+    uint32_t crc;
+    int run_label;          /* RLE: sequência corrente (-1 = nenhuma) */
+    uint32_t run_len;
+    size_t used;
+    unsigned char buf[1 << 16];
+} label_writer;
+
+/* Retorna 0 (com mensagem) se o arquivo não puder ser criado. */
+static inline int label_writer_open(label_writer *w, const char *path, int K){
+    memset(w, 0, offsetof(label_writer, buf));
+    w->f = fopen(path, "wb");
+    if(!w->f){ fprintf(stderr,"Erro ao abrir %s para escrita\n", path); return 0; }
+    w->mode = km1d_output_mode(path);
+    w->K = K;
+    w->width = km1d_label_bytes(K);
+    w->run_label = -1;
+    if(w->mode){
+        unsigned char b[KM1D_HEADER_SIZE];
+        km1l_header(b, w->mode, 0, 0, K, 0);
+        fwrite(b, 1, sizeof(b), w->f);
+    }
+    return 1;
+}
+
+static inline void label_writer_flush(label_writer *w){
+    if(w->mode) w->crc = km1d_crc32_update(w->crc, w->buf, w->used);
+    fwrite(w->buf, 1, w->used, w->f);
+    w->used = 0;
+}
+
+static inline void label_writer_bytes(label_writer *w, int c){
+    if(w->width == 1) w->buf[w->used] = (unsigned char)c;
+    else if(w->width == 2) km1d_put_u16(w->buf + w->used, (uint16_t)c);
+    else km1d_put_u32(w->buf + w->used, (uint32_t)c);
+    w->used += (size_t)w->width;
+}
+
+static inline void label_writer_end_run(label_writer *w){
+    if(w->run_label < 0) return;
+    if(w->used + 8 > sizeof(w->buf)) label_writer_flush(w);
+    km1d_put_u32(w->buf + w->used, w->run_len);
+    w->used += 4;
+    label_writer_bytes(w, w->run_label);
+    w->runs++;
+}
+
+static inline void label_writer_put(label_writer *w, int c){
+    w->n++;
+    if(w->mode == KM1L_RLE){
+        if(c == w->run_label && w->run_len < UINT32_MAX){ w->run_len++; return; }
+        label_writer_end_run(w);
+        w->run_label = c;
+        w->run_len = 1;
+        return;
+    }
+    if(w->used + 12 > sizeof(w->buf)) label_writer_flush(w);
+    if(w->mode == KM1L_PACKED){ label_writer_bytes(w, c); return; }
+    char tmp[12];
+    int len = 0;
+    unsigned int v = c < 0 ? (unsigned int)(-(long)c) : (unsigned int)c;
+    do { tmp[len++] = (char)('0' + v % 10); v /= 10; } while(v);
+    if(c < 0) w->buf[w->used++] = '-';
+    while(len) w->buf[w->used++] = (unsigned char)tmp[--len];
+    w->buf[w->used++] = '\n';
+}
+
+static inline void label_writer_close(label_writer *w){
+    if(w->mode == KM1L_RLE) label_writer_end_run(w);
+    label_writer_flush(w);
+    if(w->mode){
+        unsigned char b[KM1D_HEADER_SIZE];
+        km1l_header(b, w->mode, w->n, w->crc, w->K, w->runs);
+        fseek(w->f, 0, SEEK_SET);
+        fwrite(b, 1, sizeof(b), w->f);
+    }
+    fclose(w->f);
+    w->f = NULL;
+}
+
+/* Rótulos de um vetor (int, ou compactos com label_bytes bytes). */
+static inline void write_labels_file(const char *path, const void *labels, int label_bytes, int64_t n, int K){
+    if(!path) return;
+    label_writer *w = (label_writer*)malloc(sizeof(label_writer));
+    if(!w){ fprintf(stderr,"Sem memoria para escrever %s\n", path); return; }
+    if(label_writer_open(w, path, K)){
+        for(int64_t i=0;i<n;i++) label_writer_put(w, km1d_label_get(labels, label_bytes, i));
+        label_writer_close(w);
+    }
+    free(w);
+}
+
+/* Centróides: KM1D float64 em ".bin"/".rle", senão CSV com 6 casas. */
+static inline void write_centroids_file(const char *path, const double *C, int K){
+    if(!path) return;
+    FILE *f = fopen(path, km1d_output_mode(path) ? "wb" : "w");
+    if(!f){ fprintf(stderr,"Erro ao abrir %s para escrita\n", path); return; }
+    if(km1d_output_mode(path)){
+        unsigned char b[KM1D_HEADER_SIZE], v[8];
+        uint32_t crc = 0;
+        for(int c=0;c<K;c++){ memcpy(v, &C[c], 8); crc = km1d_crc32_update(crc, v, 8); }
+        memset(b, 0, sizeof(b));
+        memcpy(b, KM1D_MAGIC, 4);
+        km1d_put_u16(b + 4, KM1D_VERSION);
+        km1d_put_u16(b + 6, KM1D_FLOAT64);
+        km1d_put_u64(b + 8, (uint64_t)K);
+        km1d_put_u32(b + 16, crc);
+        fwrite(b, 1, sizeof(b), f);
+        fwrite(C, sizeof(double), (size_t)K, f);
+    } else {
+        for(int c=0;c<K;c++) fprintf(f, "%.6f\n", C[c]);
+    }
+    fclose(f);
+}
+
+#endif
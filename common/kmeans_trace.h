@@ -0,0 +1,197 @@
+/* Rastreamento por fase e por iteração compartilhado por serial, OpenMP e
+   MPI (--trace ARQUIVO).
+
+   Cada fase (leitura, atribuição, redução/comunicação, update, escrita...)
+   vira um intervalo com o tempo de parede de início e duração, e cada
+   iteração um registro com o SSE e o número de rótulos alterados. Os
+   eventos ficam em memória durante a execução (nenhuma E/S dentro do laço)
+   e são gravados no fim por trace_save:
+
+     ARQUIVO.json  formato Chrome trace-event (chrome://tracing, Perfetto),
+                   um processo por rank
+     outro sufixo  JSON Lines, um evento por linha:
+       {"type": "meta", "backend": "mpi", "n": 1000000, "k": 16, "ranks": 4, "threads": 1}
+       {"type": "span", "phase": "assign", "rank": 0, "iter": 3, "start_ms": 12.5, "dur_ms": 3.2}
+       {"type": "iter", "rank": 0, "iter": 3, "t_ms": 15.7, "sse": 52278.1, "changed": 120}
+
+   iter = -1 marca fases fora do laço; sse/changed saem como null quando
+   não foram calculados. `python3 -m kmeans1d trace ARQUIVO` lê os dois
+   formatos. Sem --trace todas as funções são no-ops (nem o relógio é
+   lido).
+
+   Quem inclui este header deve definir _POSIX_C_SOURCE >= 200809L antes
+   de qualquer #include (clock_gettime). */
+#ifndef KMEANS_TRACE_H
+#define KMEANS_TRACE_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <math.h>
+#include <time.h>
+
+enum {
+    TRACE_LOAD,      /* leitura de X e dos centróides */
+    TRACE_SCATTER,   /* distribuição de X e dos centróides (MPI) */
+    TRACE_ASSIGN,    /* passo fundido: atribuição + somas/contagens locais */
+    TRACE_REDUCE,    /* redução entre threads / MPI_Allreduce */
+    TRACE_UPDATE,    /* novos centróides a partir das somas */
+    TRACE_BCAST,     /* difusão do teste de convergência (MPI) */
+    TRACE_FINAL,     /* SSE final (MPI) */
+    TRACE_GATHER,    /* coleta dos rótulos (MPI) */
+    TRACE_WRITE,     /* escrita de rótulos e centróides */
+    TRACE_ITER       /* registro de iteração: SSE e trocas */
+};
+
+static const char *const trace_names[] = {
+    "load", "scatter", "assign", "reduce", "update", "bcast", "final", "gather", "write", "iter"
+};
+
+/* Evento de tamanho fixo, copiado como bytes entre processos MPI. Tempos
+   em segundos desde trace_open. */
+typedef struct {
+    int kind;          /* TRACE_* */
+    int rank;
+    int iter;          /* -1 fora do laço */
+    int reserved;
+    double start;
+    double dur;        /* 0 em TRACE_ITER */
+    double sse;        /* TRACE_ITER; NAN se não calculado */
+    double changed;    /* TRACE_ITER; -1 se não contado */
+} trace_event;
+
+typedef struct {
+    const char *path;  /* NULL: rastreamento desligado */
+    int rank;
+    double t0;
+    trace_event *ev;
+    size_t n, cap;
+} kmeans_trace;
+
+static inline double trace_now(void){
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (double)ts.tv_sec + (double)ts.tv_nsec * 1e-9;
+}
+
+/* path NULL deixa o rastreamento desligado. Com MPI, cada processo chama
+   logo depois de uma barreira, para os relógios partirem juntos. */
+static inline void trace_open(kmeans_trace *t, const char *path, int rank){
+    memset(t, 0, sizeof(*t));
+    t->path = path;
+    t->rank = rank;
+    if(path) t->t0 = trace_now();
+}
+
+static inline int trace_on(const kmeans_trace *t){
+    return t && t->path;
+}
+
+/* Instante atual (0 com o rastreamento desligado), início do próximo intervalo. */
+static inline double trace_mark(const kmeans_trace *t){
+    return trace_on(t) ? trace_now() : 0.0;
+}
+
+static inline void trace_push(kmeans_trace *t, trace_event e){
+    if(t->n == t->cap){
+        size_t cap = t->cap ? 2 * t->cap : 256;
+        trace_event *ev = (trace_event*)realloc(t->ev, cap * sizeof(trace_event));
+        if(!ev){ fprintf(stderr,"Sem memoria para o trace\n"); exit(1); }
+        t->ev = ev;
+        t->cap = cap;
+    }
+    t->ev[t->n++] = e;
+}
+
+/* Intervalo [start, end] da fase `kind`. */
+static inline void trace_span_at(kmeans_trace *t, int kind, int iter, double start, double end){
+    if(!trace_on(t)) return;
+    trace_event e = {kind, t->rank, iter, 0, start - t->t0, end - start, NAN, -1.0};
+    trace_push(t, e);
+}
+
+/* Fecha a fase iniciada em `start` agora e devolve o instante, que serve de
+   início da fase seguinte: t = trace_span(tr, TRACE_ASSIGN, it, t). */
+static inline double trace_span(kmeans_trace *t, int kind, int iter, double start){
+    if(!trace_on(t)) return 0.0;
+    double now = trace_now();
+    trace_span_at(t, kind, iter, start, now);
+    return now;
+}
+
+/* SSE (NAN se não calculado) e rótulos alterados (-1 se não contados) da iteração. */
+static inline void trace_iter(kmeans_trace *t, int iter, double sse, double changed){
+    if(!trace_on(t)) return;
+    trace_event e = {TRACE_ITER, t->rank, iter, 0, trace_now() - t->t0, 0.0, sse, changed};
+    trace_push(t, e);
+}
+
+static inline void trace_close(kmeans_trace *t){
+    free(t->ev);
+    t->ev = NULL;
+    t->n = t->cap = 0;
+}
+
+static inline void trace_json_number(FILE *f, double v, const char *fmt){
+    if(isfinite(v)) fprintf(f, fmt, v);
+    else fputs("null", f);
+}
+
+/* Grava os `n` eventos (de todos os processos, no MPI) em t->path, no
+   formato escolhido pelo sufixo. Retorna 0 se o arquivo não pôde ser
+   escrito. */
+static inline int trace_save(const kmeans_trace *t, const trace_event *ev, size_t n,
+                             const char *backend, long long N, int K, int ranks, int threads){
+    if(!trace_on(t)) return 1;
+    FILE *f = fopen(t->path, "w");
+    if(!f){ fprintf(stderr,"Erro ao abrir %s para escrita\n", t->path); return 0; }
+    size_t len = strlen(t->path);
+    int chrome = len >= 5 && strcmp(t->path + len - 5, ".json") == 0;
+    if(chrome){
+        fprintf(f, "{\"displayTimeUnit\": \"ms\", \"otherData\": {\"backend\": \"%s\", \"n\": %lld, "
+                   "\"k\": %d, \"ranks\": %d, \"threads\": %d},\n\"traceEvents\": [\n",
+                backend, N, K, ranks, threads);
+        for(int r=0;r<ranks;r++){
+            fprintf(f, "{\"name\": \"process_name\", \"ph\": \"M\", \"pid\": %d, \"args\": {\"name\": \"rank %d\"}},\n",
+                    r, r);
+        }
+        for(size_t i=0;i<n;i++){
+            const trace_event *e = &ev[i];
+            if(e->kind == TRACE_ITER){
+                fprintf(f, "{\"name\": \"iter\", \"ph\": \"C\", \"pid\": %d, \"tid\": 0, \"ts\": %.3f, "
+                           "\"args\": {\"iter\": %d, \"sse\": ", e->rank, e->start * 1e6, e->iter);
+                trace_json_number(f, e->sse, "%.17g");
+                fputs(", \"changed\": ", f);
+                trace_json_number(f, e->changed >= 0.0 ? e->changed : NAN, "%.0f");
+                fputs("}}", f);
+            } else {
+                fprintf(f, "{\"name\": \"%s\", \"cat\": \"kmeans\", \"ph\": \"X\", \"pid\": %d, \"tid\": 0, "
+                           "\"ts\": %.3f, \"dur\": %.3f, \"args\": {\"iter\": %d}}",
+                        trace_names[e->kind], e->rank, e->start * 1e6, e->dur * 1e6, e->iter);
+            }
+            fputs(i + 1 < n ? ",\n" : "\n", f);
+        }
+        fputs("]}\n", f);
+    } else {
+        fprintf(f, "{\"type\": \"meta\", \"backend\": \"%s\", \"n\": %lld, \"k\": %d, \"ranks\": %d, \"threads\": %d}\n",
+                backend, N, K, ranks, threads);
+        for(size_t i=0;i<n;i++){
+            const trace_event *e = &ev[i];
+            if(e->kind == TRACE_ITER){
+                fprintf(f, "{\"type\": \"iter\", \"rank\": %d, \"iter\": %d, \"t_ms\": %.6f, \"sse\": ",
+                        e->rank, e->iter, e->start * 1e3);
+                trace_json_number(f, e->sse, "%.17g");
+                fputs(", \"changed\": ", f);
+                trace_json_number(f, e->changed >= 0.0 ? e->changed : NAN, "%.0f");
+                fputs("}\n", f);
+            } else {
+                fprintf(f, "{\"type\": \"span\", \"phase\": \"%s\", \"rank\": %d, \"iter\": %d, "
+                           "\"start_ms\": %.6f, \"dur_ms\": %.6f}\n",
+                        trace_names[e->kind], e->rank, e->iter, e->start * 1e3, e->dur * 1e3);
+            }
+        }
+    }
+    return fclose(f) == 0;
+}
+
+#endif
@@ -2,7 +2,6 @@
 
 import sys
 import csv
-import matplotlib.pyplot as plt
 import numpy as np
 
 def read_results_file(filename):
@@ -24,6 +23,15 @@ def read_results_file(filename):
         return None
     return results
 
+def traffic_per_point(version, K):
+    # (bytes, FLOPs) por ponto e por iteração, como em bench/roofline.py.
+    # Serial: uma passada sobre X (double) e 2K+2 FLOPs. CUDA: X (float) é
+    # lido e o rótulo (int) escrito na GPU, o rótulo volta pela PCIe e o
+    # host relê X e os rótulos no SSE e no update (4 FLOPs a mais).
+    if version == 'serial':
+        return 8, 2 * K + 2
+    return 4 + 4 + 4 + 2 * (4 + 4), 2 * K + 6
+
 def calculate_speedup(results, baseline='serial'):
     baseline_time = None
     for r in results:
@@ -38,10 +46,19 @@ def calculate_speedup(results, baseline='serial'):
     for r in results:
         r['speedup'] = baseline_time / r['time_ms']
         r['throughput'] = r['N'] / r['time_ms']
+        nbytes, flops = traffic_per_point(r['version'], r['K'])
+        work = r['N'] * r['iterations'] / (r['time_ms'] * 1e6)
+        r['gbs'] = work * nbytes
+        r['gflops'] = work * flops
     
     return results
 
 def plot_comparison(results):
+    # Backend Agg: grava o PNG sem abrir janela (funciona sem display).
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
     versions = [r['version'] for r in results]
     times = [r['time_ms'] for r in results]
     speedups = [r.get('speedup', 1.0) for r in results]
@@ -66,22 +83,22 @@ def plot_comparison(results):
     axes[2].tick_params(axis='x', rotation=45)
 
     plt.tight_layout()
-    plt.savefig('cuda_comparison.png', dpi=300)
+    plt.savefig('cuda_comparison.png', dpi=150)
     print("Gráfico salvo: cuda_comparison.png")
-    plt.show()
+    plt.close(fig)
 
 def print_summary(results):
     print("\n" + "="*80)
     print("RESUMO DOS RESULTADOS - K-MEANS 1D")
     print("="*80)
-    print(f"{'Versão':<15} {'Tempo (ms)':<15} {'Speedup':<12} {'Throughput':<15} {'SSE':<12}")
+    print(f"{'Versão':<15} {'Tempo (ms)':<15} {'Speedup':<12} {'Throughput':<15} {'GB/s':<8} {'GFLOP/s':<9} {'SSE':<12}")
     print("-"*80)
     
     for r in results:
         speedup = r.get('speedup', 1.0)
         throughput = r.get('throughput', 0)
         print(f"{r['version']:<15} {r['time_ms']:<15.3f} {speedup:<12.2f}x "
-              f"{throughput:<15.2f} {r['sse']:<12.6f}")
+              f"{throughput:<15.2f} {r.get('gbs', 0):<8.2f} {r.get('gflops', 0):<9.2f} {r['sse']:<12.6f}")
     
     print("="*80)
     
@@ -115,11 +132,12 @@ def verify_correctness(results):
     print()
 
 def main():
-    if len(sys.argv) < 2:
-        print("Uso: python analyze_cuda_results.py <arquivo_resultados.csv>")
+    args = [a for a in sys.argv[1:] if a != '--sem-graficos']
+    if len(args) != 1:
+        print("Uso: python analyze_cuda_results.py <arquivo_resultados.csv> [--sem-graficos]")
         sys.exit(1)
     
-    results_file = sys.argv[1]
+    results_file = args[0]
     results = read_results_file(results_file)
     
     if not results:
@@ -129,7 +147,8 @@ def main():
     
     print_summary(results)
     verify_correctness(results)
-    plot_comparison(results)
+    if '--sem-graficos' not in sys.argv:
+        plot_comparison(results)
 
 if __name__ == "__main__":
     main()
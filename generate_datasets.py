@@ -1,7 +1,19 @@
 #!/usr/bin/env python3
 
+import argparse
+import collections
 import numpy as np
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+from kmeans1d.io import BinWriter, write_bin_1col
+
+CSV_FMT = '%.6f'
+
+def csv_values(data):
+    # Valores exatamente como serão lidos de volta do CSV (%.6f), para que o
+    # .bin dê os mesmos resultados que o .csv em todos os backends.
+    return np.char.mod(CSV_FMT, data).astype(np.float64)
 
 def generate_dataset(n_points, n_clusters, filename_prefix):
     print(f"Gerando dataset {filename_prefix} com {n_points:,} pontos e K={n_clusters}")
@@ -25,17 +37,103 @@ def generate_dataset(n_points, n_clusters, filename_prefix):
     np.random.shuffle(data)
     
     dados_filename = f"dados_{filename_prefix}.csv"
-    np.savetxt(dados_filename, data, delimiter=',', fmt='%.6f')
-    print(f"Dados salvos em: {dados_filename}")
+    np.savetxt(dados_filename, data, delimiter=',', fmt=CSV_FMT)
+    write_bin_1col(f"dados_{filename_prefix}.bin", csv_values(data))
+    print(f"Dados salvos em: {dados_filename} (+ .bin)")
     
     centroides_filename = f"centroides_{filename_prefix}.csv"
     initial_centroids = np.random.uniform(data.min(), data.max(), n_clusters)
-    np.savetxt(centroides_filename, initial_centroids, delimiter=',', fmt='%.6f')
-    print(f"Centroides salvos em: {centroides_filename}")
+    np.savetxt(centroides_filename, initial_centroids, delimiter=',', fmt=CSV_FMT)
+    write_bin_1col(f"centroides_{filename_prefix}.bin", csv_values(initial_centroids))
+    print(f"Centroides salvos em: {centroides_filename} (+ .bin)")
     
     return dados_filename, centroides_filename
 
+def generate_chunk(seed, chunk_index, size, n_clusters, want_csv, want_bin):
+    # Cada bloco usa o filho chunk_index da SeedSequence: o conteúdo depende
+    # só de (seed, chunk_index), nunca do número de workers.
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(0, chunk_index)))
+    cluster_std = 0.8
+    cluster_centers = np.linspace(-10, 10, n_clusters)
+
+    labels = rng.integers(0, n_clusters, size)
+    data = rng.normal(cluster_centers[labels], cluster_std)
+
+    text = np.char.mod(CSV_FMT, data)
+    values = text.astype(np.float64)
+    csv_bytes = ('\n'.join(text) + '\n').encode() if want_csv else None
+    bin_values = values if want_bin else None
+    return csv_bytes, bin_values, values.min(), values.max()
+
+def generate_dataset_streaming(n_points, n_clusters, filename_prefix, chunk_size=1_000_000,
+                               workers=None, formats=('csv', 'bin'), seed=42):
+    workers = workers or os.cpu_count() or 1
+    n_chunks = (n_points + chunk_size - 1) // chunk_size
+    print(f"Gerando dataset {filename_prefix} com {n_points:,} pontos e K={n_clusters} "
+          f"({n_chunks} blocos de até {chunk_size:,}, {workers} workers)")
+
+    want_csv = 'csv' in formats
+    want_bin = 'bin' in formats
+    dados_csv = open(f"dados_{filename_prefix}.csv", 'wb') if want_csv else None
+    dados_bin = BinWriter(f"dados_{filename_prefix}.bin") if want_bin else None
+    lo, hi = np.inf, -np.inf
+
+    # No máximo 2 blocos por worker em memória: os resultados são escritos na
+    # ordem dos blocos assim que ficam prontos.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        next_chunk = 0
+        while next_chunk < n_chunks or pending:
+            while next_chunk < n_chunks and len(pending) < 2 * workers:
+                start = next_chunk * chunk_size
+                size = min(chunk_size, n_points - start)
+                pending.append(pool.submit(generate_chunk, seed, next_chunk, size,
+                                           n_clusters, want_csv, want_bin))
+                next_chunk += 1
+            csv_bytes, bin_values, cmin, cmax = pending.popleft().result()
+            if dados_csv:
+                dados_csv.write(csv_bytes)
+            if dados_bin:
+                dados_bin.write(bin_values)
+            lo, hi = min(lo, cmin), max(hi, cmax)
+
+    if dados_csv:
+        dados_csv.close()
+    if dados_bin:
+        dados_bin.close()
+    print(f"Dados salvos em: dados_{filename_prefix}.{{{','.join(formats)}}}")
+
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(1,)))
+    initial_centroids = csv_values(rng.uniform(lo, hi, n_clusters))
+    centroides_filename = f"centroides_{filename_prefix}.csv"
+    np.savetxt(centroides_filename, initial_centroids, delimiter=',', fmt=CSV_FMT)
+    write_bin_1col(f"centroides_{filename_prefix}.bin", initial_centroids)
+    print(f"Centroides salvos em: {centroides_filename} (+ .bin)")
+
+    return f"dados_{filename_prefix}", centroides_filename
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Sem argumentos gera os datasets pequeno/medio/grande. Com --n, gera um "
+                    "dataset em blocos paralelos, gravados direto no disco (memória limitada "
+                    "pelo tamanho do bloco).")
+    parser.add_argument('--n', type=int, help="número de pontos (modo em blocos)")
+    parser.add_argument('--k', type=int, default=16, help="número de clusters")
+    parser.add_argument('--nome', default='enorme', help="sufixo dos arquivos (dados_<nome>.*)")
+    parser.add_argument('--bloco', type=int, default=1_000_000, help="pontos por bloco")
+    parser.add_argument('--workers', type=int, default=None, help="processos (padrão: todos os cores)")
+    parser.add_argument('--formato', choices=['csv', 'bin', 'ambos'], default='bin')
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    if args.n is not None:
+        formats = ('csv', 'bin') if args.formato == 'ambos' else (args.formato,)
+        generate_dataset_streaming(args.n, args.k, args.nome, args.bloco, args.workers,
+                                   formats, args.seed)
+        return
+
     print("=" * 60)
     print("GERADOR DE DATASETS PARA K-MEANS")
     print("=" * 60)
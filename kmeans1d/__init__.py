@@ -0,0 +1,76 @@
+from .engine import (KMeansResult, label_dtype, assignment_step_1d, update_step_1d, incremental_update_1d,
+                     kmeans_1d)
+from .hamerly import kmeans_1d_hamerly
+from .prefix import prepare_sorted, lloyd_step_sorted, kmeans_1d_sorted
+from .dedup import prepare_unique, assignment_step_weighted, update_step_weighted, kmeans_1d_dedup
+from .optimal import optimal_partition, kmeans_1d_optimal
+from .sweep import SweepReport, silhouette_1d, sweep_k
+from .seeding import kmeans_plusplus
+from .restarts import RestartResult, kmeans_1d_restarts
+from .minibatch import minibatch_step, assign_streaming, kmeans_1d_minibatch
+from .outofcore import kmeans_1d_outofcore
+from .histogram import HistogramResult, build_histogram, kmeans_1d_histogram
+from .shared import SharedKMeansPool, kmeans_1d_shared
+from .threaded import ThreadedKMeans, kmeans_1d_threaded
+from .trace import Trace, Tracer, read_trace, write_trace, phase_breakdown, rank_breakdown, iteration_table
+from .io import (read_csv_1col, read_bin_1col, write_bin_1col, load_1col,
+                 BinChunkReader, write_assign_csv, write_centroids_csv,
+                 LabelWriter, read_labels_header, read_labels_bin, read_label_runs, load_labels,
+                 write_labels, write_centroids)
+
+__all__ = [
+    'KMeansResult',
+    'label_dtype',
+    'assignment_step_1d',
+    'update_step_1d',
+    'incremental_update_1d',
+    'kmeans_1d',
+    'kmeans_1d_hamerly',
+    'prepare_sorted',
+    'lloyd_step_sorted',
+    'kmeans_1d_sorted',
+    'prepare_unique',
+    'assignment_step_weighted',
+    'update_step_weighted',
+    'kmeans_1d_dedup',
+    'optimal_partition',
+    'kmeans_1d_optimal',
+    'SweepReport',
+    'silhouette_1d',
+    'sweep_k',
+    'kmeans_plusplus',
+    'RestartResult',
+    'kmeans_1d_restarts',
+    'minibatch_step',
+    'assign_streaming',
+    'kmeans_1d_minibatch',
+    'kmeans_1d_outofcore',
+    'HistogramResult',
+    'build_histogram',
+    'kmeans_1d_histogram',
+    'SharedKMeansPool',
+    'kmeans_1d_shared',
+    'ThreadedKMeans',
+    'kmeans_1d_threaded',
+    'Trace',
+    'Tracer',
+    'read_trace',
+    'write_trace',
+    'phase_breakdown',
+    'rank_breakdown',
+    'iteration_table',
+    'read_csv_1col',
+    'read_bin_1col',
+    'write_bin_1col',
+    'load_1col',
+    'BinChunkReader',
+    'write_assign_csv',
+    'write_centroids_csv',
+    'LabelWriter',
+    'read_labels_header',
+    'read_labels_bin',
+    'read_label_runs',
+    'load_labels',
+    'write_labels',
+    'write_centroids',
+]
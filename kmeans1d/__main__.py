@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import sys
+import time
+
+from .dedup import kmeans_1d_dedup, prepare_unique
+from .engine import kmeans_1d, label_dtype
+from .hamerly import kmeans_1d_hamerly
+from .histogram import kmeans_1d_histogram
+from .io import is_bin_file, load_1col, read_bin_header, write_centroids, write_labels
+from .minibatch import kmeans_1d_minibatch
+from .optimal import kmeans_1d_optimal
+from .outofcore import kmeans_1d_outofcore
+from .prefix import kmeans_1d_sorted, prepare_sorted
+from .restarts import kmeans_1d_restarts
+from .seeding import kmeans_plusplus
+from .shared import SharedKMeansPool
+from . import sweep
+from .threaded import ThreadedKMeans
+from . import trace
+
+SOLVERS = {
+    'lloyd': 'Python/NumPy',
+    'hamerly': 'Python/NumPy, atribuição com limites de Hamerly',
+    'sorted': 'Python/NumPy, ordenado + somas prefixadas',
+    'optimal': 'Python/NumPy, ótimo por programação dinâmica',
+    'minibatch': 'Python/NumPy, mini-batch',
+    'histogram': 'Python/NumPy, histograma aproximado',
+}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python3 -m kmeans1d',
+        description="K-means 1D em Python (mesmos argumentos de kmeans_1d_serial). "
+                    "Arquivos CSV com 1 coluna (1 valor por linha), sem cabeçalho, "
+                    "ou binários KM1D (.bin).")
+    parser.add_argument('dados')
+    parser.add_argument('centroides')
+    parser.add_argument('max_iter', nargs='?', type=int, default=50)
+    parser.add_argument('eps', nargs='?', type=float, default=1e-4)
+    parser.add_argument('assign', nargs='?',
+                        help="rótulos: CSV, ou KM1L com sufixo .bin (compacto) ou .rle (em sequências)")
+    parser.add_argument('centroids', nargs='?', help="centróides: CSV, ou KM1D float64 com sufixo .bin")
+    parser.add_argument('--solver', choices=sorted(SOLVERS), default='lloyd',
+                        help="lloyd: iterações completas sobre X; "
+                             "hamerly: como lloyd, mas poda distâncias com limites por ponto (mesmo resultado); "
+                             "sorted: ordena X uma vez e itera com somas prefixadas; "
+                             "optimal: partição ótima exata (K vem do arquivo de centróides); "
+                             "minibatch: lotes sorteados com memória limitada (max_iter conta lotes "
+                             "e eps é o deslocamento máximo de centróide para parar); "
+                             "histogram: itera sobre um histograma de --bins faixas e faz uma passada "
+                             "exata final")
+    parser.add_argument('--batch', type=int, default=1024, help="tamanho do lote (minibatch)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="semente da amostragem (minibatch) e da inicialização (--init, --reinicios)")
+    parser.add_argument('--init', choices=['arquivo', 'kmeans++', 'guloso'], default='arquivo',
+                        help="centróides iniciais: os do arquivo, k-means++ ou k-means++ guloso "
+                             "(K continua vindo do arquivo)")
+    parser.add_argument('--reinicios', type=int,
+                        help="lloyd/sorted: roda este número de reinícios com k-means++ (sementes seed, "
+                             "seed+1, ...) em paralelo (--processos) e fica com o de menor SSE")
+    parser.add_argument('--sem-abandono', action='store_true',
+                        help="--reinicios: desliga o abandono heurístico (projeção da última queda de SSE, "
+                             "que pode descartar o reinício que venceria) e roda todos até o fim")
+    parser.add_argument('--bins', type=int, default=1 << 16, help="faixas do histograma (histogram)")
+    parser.add_argument('--sem-passo-final', action='store_true',
+                        help="minibatch: não faz a passada completa final (sem SSE e sem rótulos)")
+    parser.add_argument('--chunk', type=int,
+                        help="lloyd: lê o binário KM1D em blocos deste tamanho, com memória fixa "
+                             "(mesmo resultado de kmeans_1d_serial)")
+    parser.add_argument('--processos', type=int,
+                        help="lloyd: divide X entre este número de processos locais com memória "
+                             "compartilhada, no estilo do backend MPI")
+    parser.add_argument('--threads', type=int,
+                        help="lloyd: threads do engine em blocos (padrão: KMEANS_NUM_THREADS ou todos os núcleos)")
+    parser.add_argument('--schedule',
+                        help="lloyd com threads: static[,pontos] ou dynamic[,pontos], como OMP_SCHEDULE "
+                             "(padrão: KMEANS_SCHEDULE ou static,32768)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="lloyd: atualiza somas e contagens só com os pontos que trocaram de cluster")
+    parser.add_argument('--parar-sem-trocas', action='store_true',
+                        help="lloyd: para quando nenhum rótulo muda, em vez do teste do SSE")
+    parser.add_argument('--dedup', action='store_true',
+                        help="lloyd: itera sobre os valores distintos de X, com pesos (mesmos rótulos)")
+    parser.add_argument('--float32', action='store_true',
+                        help="lloyd: X em float32 e rótulos em uint8/uint16 (somas e SSE em float64)")
+    parser.add_argument('--trace', metavar='ARQUIVO',
+                        help="lloyd: grava o tempo de cada fase e o SSE/trocas por iteração "
+                             "(.json: formato Chrome; senão JSON Lines); ver `python3 -m kmeans1d trace`")
+    parser.add_argument('--json', action='store_true',
+                        help="imprime uma única linha JSON com o resultado (usado por bench/)")
+    return parser.parse_args(argv)
+
+
+def print_json(args, X, C, iterations, sse, ms, **extra):
+    record = {'backend': 'python', 'solver': args.solver, 'n': len(X), 'k': len(C),
+              'max_iter': args.max_iter, 'eps': args.eps, 'iterations': int(iterations),
+              'sse': float(sse) if sse is not None else None, 'time_ms': ms}
+    if args.init != 'arquivo':
+        record.update(init=args.init, seed=args.seed)
+    record.update(extra)
+    print(json.dumps(record), flush=True)
+
+
+def run_optimal(args, X, C):
+    t0 = time.perf_counter()
+    prepared = prepare_sorted(X)
+    result = kmeans_1d_optimal(X, len(C), labels=args.assign is not None, prepared=prepared)
+    t1 = time.perf_counter()
+    lloyd = kmeans_1d_sorted(X, C, args.max_iter, args.eps, labels=False, prepared=prepared)
+    t2 = time.perf_counter()
+    gap = 100.0 * (lloyd.sse - result.sse) / (result.sse if result.sse > 0.0 else 1.0)
+
+    if args.json:
+        print_json(args, X, C, result.iterations, result.sse, (t1 - t0) * 1000.0,
+                   lloyd_sse=lloyd.sse, lloyd_iterations=lloyd.iterations,
+                   lloyd_ms=(t2 - t1) * 1000.0)
+    else:
+        print(f"K-means 1D ({SOLVERS['optimal']})")
+        print(f"N={len(X)} K={len(C)} max_iter={args.max_iter} eps={args.eps:g}")
+        print(f"SSE ótimo: {result.sse:.6f} | Tempo: {(t1 - t0) * 1000.0:.1f} ms")
+        print(f"SSE Lloyd: {lloyd.sse:.6f} | Iterações: {lloyd.iterations} | "
+              f"Tempo: {(t2 - t1) * 1000.0:.1f} ms | Diferença: {gap:.4f}%")
+
+    write_labels(args.assign, result.assign, len(C))
+    write_centroids(args.centroids, result.centroids)
+    return 0
+
+
+def run_minibatch(args, X, C):
+    t0 = time.perf_counter()
+    result = kmeans_1d_minibatch(X, C, args.batch, args.max_iter, args.eps, args.seed,
+                                 final_pass=not args.sem_passo_final, labels_out=args.assign)
+    ms = (time.perf_counter() - t0) * 1000.0
+
+    if args.json:
+        print_json(args, X, C, result.iterations, result.sse, ms, batch=args.batch)
+    else:
+        print(f"K-means 1D ({SOLVERS['minibatch']})")
+        print(f"N={len(X)} K={len(C)} max_iter={args.max_iter} tol={args.eps:g} batch={args.batch}")
+        sse = f"{result.sse:.6f}" if result.sse is not None else "- (sem passo final)"
+        print(f"Iterações: {result.iterations} | SSE final: {sse} | Tempo: {ms:.1f} ms")
+
+    write_centroids(args.centroids, result.centroids)
+    return 0
+
+
+def run_histogram(args, X, C):
+    t0 = time.perf_counter()
+    result = kmeans_1d_histogram(X, C, args.bins, args.max_iter, args.eps, labels_out=args.assign)
+    ms = (time.perf_counter() - t0) * 1000.0
+    gap = 100.0 * (result.approx_sse - result.sse) / (result.sse if result.sse > 0.0 else 1.0)
+
+    if args.json:
+        print_json(args, X, C, result.iterations, result.sse, ms, bins=args.bins,
+                   bins_used=result.bins_used, bin_width=result.bin_width,
+                   approx_sse=result.approx_sse, gap_pct=gap, uncertain=result.uncertain)
+    else:
+        print(f"K-means 1D ({SOLVERS['histogram']})")
+        print(f"N={len(X)} K={len(C)} max_iter={args.max_iter} eps={args.eps:g} bins={args.bins} "
+              f"({result.bins_used} não vazias, largura {result.bin_width:g})")
+        print(f"Iterações: {result.iterations} | SSE final: {result.sse:.6f} | Tempo: {ms:.1f} ms")
+        print(f"SSE aproximado: {result.approx_sse:.6f} | Diferença: {gap:.3g}% | "
+              f"Pontos em faixas de fronteira: {result.uncertain:.0f} ({100.0 * result.uncertain / len(X):.3f}%)")
+
+    write_centroids(args.centroids, result.centroids)
+    return 0
+
+
+def run_outofcore(args):
+    C = load_1col(args.centroides)
+    t0 = time.perf_counter()
+    result = kmeans_1d_outofcore(args.dados, C, args.max_iter, args.eps, args.chunk, args.assign)
+    ms = (time.perf_counter() - t0) * 1000.0
+    n = read_bin_header(args.dados)[0]
+
+    if args.json:
+        record = {'backend': 'python', 'solver': 'outofcore', 'n': n, 'k': len(C),
+                  'max_iter': args.max_iter, 'eps': args.eps, 'iterations': int(result.iterations),
+                  'sse': float(result.sse), 'time_ms': ms, 'chunk': args.chunk}
+        print(json.dumps(record), flush=True)
+    else:
+        print(f"K-means 1D (Python/NumPy, fora da memória, blocos de {args.chunk} pontos)")
+        print(f"N={n} K={len(C)} max_iter={args.max_iter} eps={args.eps:g}")
+        print(f"Iterações: {result.iterations} | SSE final: {result.sse:.6f} | Tempo: {ms:.1f} ms")
+
+    write_centroids(args.centroids, result.centroids)
+    return 0
+
+
+def run_shared(args, X, C):
+    # Como no MPI, o tempo cobre só as iterações; a cópia de X para a memória
+    # compartilhada e o início dos processos saem em setup_ms.
+    t0 = time.perf_counter()
+    with SharedKMeansPool(X, len(C), args.processos) as pool:
+        t1 = time.perf_counter()
+        result = pool.run(C, args.max_iter, args.eps)
+        t2 = time.perf_counter()
+    ms = (t2 - t1) * 1000.0
+
+    if args.json:
+        record = {'backend': 'python_shm', 'n': len(X), 'k': len(C), 'max_iter': args.max_iter,
+                  'eps': args.eps, 'iterations': int(result.iterations), 'sse': float(result.sse),
+                  'time_ms': ms, 'processes': pool.processes, 'setup_ms': (t1 - t0) * 1000.0}
+        print(json.dumps(record), flush=True)
+    else:
+        print("K-means 1D (Python/NumPy, memória compartilhada)")
+        print(f"Processos: {pool.processes}")
+        print(f"N={len(X)} K={len(C)} max_iter={args.max_iter} eps={args.eps:g}")
+        print(f"Iterações: {result.iterations} | SSE final: {result.sse:.6f} | Tempo: {ms:.1f} ms "
+              f"(+ {(t1 - t0) * 1000.0:.1f} ms de preparação)")
+
+    write_labels(args.assign, result.assign, len(C))
+    write_centroids(args.centroids, result.centroids)
+    return 0
+
+
+def run_threaded(args, X, C):
+    t0 = time.perf_counter()
+    with ThreadedKMeans(X, args.threads, args.schedule) as engine:
+        result = engine.run(C, args.max_iter, args.eps)
+    ms = (time.perf_counter() - t0) * 1000.0
+
+    if args.json:
+        record = {'backend': 'python_threads', 'n': len(X), 'k': len(C), 'max_iter': args.max_iter,
+                  'eps': args.eps, 'iterations': int(result.iterations), 'sse': float(result.sse),
+                  'time_ms': ms, 'threads': engine.threads, 'schedule': engine.schedule}
+        print(json.dumps(record), flush=True)
+    else:
+        print("K-means 1D (Python/NumPy, threads em blocos)")
+        print(f"Threads: {engine.threads} | Schedule: {engine.schedule}")
+        print(f"N={len(X)} K={len(C)} max_iter={args.max_iter} eps={args.eps:g}")
+        print(f"Iterações: {result.iterations} | SSE final: {result.sse:.6f} | Tempo: {ms:.1f} ms")
+
+    write_labels(args.assign, result.assign, len(C))
+    write_centroids(args.centroids, result.centroids)
+    return 0
+
+
+def run_restarts(args, X, C):
+    t0 = time.perf_counter()
+    result = kmeans_1d_restarts(X, len(C), args.reinicios, args.seed, args.max_iter, args.eps,
+                                greedy=args.init == 'guloso', abandon=not args.sem_abandono,
+                                processes=args.processos, labels=args.assign is not None)
+    ms = (time.perf_counter() - t0) * 1000.0
+    abandoned = sum(run[3] for run in result.runs)
+
+    if args.json:
+        runs = [{'seed': s, 'sse': float(sse), 'iterations': int(it), 'abandoned': bool(ab)}
+                for s, sse, it, ab in result.runs]
+        # Os reinícios sempre rodam kmeans_1d_sorted, com --solver lloyd ou sorted.
+        print_json(args, X, C, result.iterations, result.sse, ms, solver='sorted', restarts=args.reinicios,
+                   best_seed=result.best_seed, abandoned=abandoned, runs=runs)
+    else:
+        kind = 'k-means++ guloso' if args.init == 'guloso' else 'k-means++'
+        print(f"K-means 1D (Python/NumPy, {args.reinicios} reinícios com {kind})")
+        print(f"N={len(X)} K={len(C)} max_iter={args.max_iter} eps={args.eps:g}")
+        print(f"Melhor semente: {result.best_seed} | SSE final: {result.sse:.6f} | "
+              f"Iterações (todas): {result.iterations} | Abandonados: {abandoned} | Tempo: {ms:.1f} ms")
+
+    write_labels(args.assign, result.assign, len(C))
+    write_centroids(args.centroids, result.centroids)
+    return 0
+
+
+def run_dedup(args, X, C):
+    t0 = time.perf_counter()
+    prepared = prepare_unique(X)
+    t_dedup = time.perf_counter()
+    result = kmeans_1d_dedup(X, C, args.max_iter, args.eps,
+                             labels=args.assign is not None, prepared=prepared)
+    ms = (time.perf_counter() - t0) * 1000.0
+    unique = len(prepared[0])
+    dedup_ms = (t_dedup - t0) * 1000.0
+
+    if args.json:
+        print_json(args, X, C, result.iterations, result.sse, ms, unique=unique,
+                   dup_ratio=len(X) / unique, dedup_ms=dedup_ms)
+    else:
+        print("K-means 1D (Python/NumPy, valores distintos com pesos)")
+        print(f"N={len(X)} K={len(C)} max_iter={args.max_iter} eps={args.eps:g}")
+        print(f"Valores distintos: {unique} (N/M = {len(X) / unique:.3f}) | Deduplicação: {dedup_ms:.1f} ms")
+        print(f"Iterações: {result.iterations} | SSE final: {result.sse:.6f} | Tempo: {ms:.1f} ms")
+
+    write_labels(args.assign, result.assign, len(C))
+    write_centroids(args.centroids, result.centroids)
+    return 0
+
+
+def run_float32(args, X, C):
+    # A conversão de X (se o arquivo não for um binário float32) fica fora
+    # do tempo, como a leitura nos outros modos.
+    X = X.astype('float32', copy=False)
+    t0 = time.perf_counter()
+    result = kmeans_1d(X, C, args.max_iter, args.eps, dtype='float32')
+    ms = (time.perf_counter() - t0) * 1000.0
+    label_bytes = label_dtype(len(C)).itemsize
+    nbytes = len(X) * (4 + label_bytes)
+    nbytes_f64 = len(X) * (8 + 4)
+
+    if args.json:
+        print_json(args, X, C, result.iterations, result.sse, ms, precision='float32',
+                   label_bytes=label_bytes, bytes=nbytes, bytes_f64=nbytes_f64)
+    else:
+        print("K-means 1D (Python/NumPy, float32)")
+        print(f"N={len(X)} K={len(C)} max_iter={args.max_iter} eps={args.eps:g}")
+        print(f"Memória de X e rótulos: {nbytes / 1e6:.1f} MB (float64: {nbytes_f64 / 1e6:.1f} MB, "
+              f"-{100.0 * (1.0 - nbytes / nbytes_f64):.0f}%) | rótulos de {label_bytes} byte(s)")
+        print(f"Iterações: {result.iterations} | SSE final: {result.sse:.6f} | Tempo: {ms:.1f} ms")
+
+    write_labels(args.assign, result.assign, len(C))
+    write_centroids(args.centroids, result.centroids)
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['sweep']:
+        return sweep.main(argv[1:])
+    if argv[:1] == ['trace']:
+        return trace.main(argv[1:])
+    args = parse_args(argv)
+
+    if args.max_iter <= 0 or args.eps <= 0.0 or args.batch <= 0 or args.bins <= 0:
+        print("Parâmetros inválidos: max_iter>0, eps>0, batch>0 e bins>0", file=sys.stderr)
+        return 1
+    tracking = args.incremental or args.parar_sem_trocas
+    if tracking and (args.solver != 'lloyd' or args.chunk is not None or args.processos is not None
+                     or args.threads is not None or args.schedule is not None):
+        print("--incremental/--parar-sem-trocas exigem --solver lloyd, sem --chunk, --processos ou --threads",
+              file=sys.stderr)
+        return 1
+    if args.dedup and (args.solver != 'lloyd' or tracking or args.chunk is not None
+                       or args.processos is not None or args.threads is not None or args.schedule is not None):
+        print("--dedup exige --solver lloyd, sem --incremental/--parar-sem-trocas, --chunk, --processos "
+              "ou --threads", file=sys.stderr)
+        return 1
+    if args.float32 and (args.solver != 'lloyd' or tracking or args.dedup or args.chunk is not None
+                         or args.processos is not None or args.threads is not None
+                         or args.schedule is not None or args.reinicios is not None):
+        print("--float32 exige --solver lloyd, sem --incremental/--parar-sem-trocas, --dedup, --chunk, "
+              "--processos, --threads ou --reinicios", file=sys.stderr)
+        return 1
+    if args.trace is not None and (args.solver != 'lloyd' or args.dedup or args.float32 or args.chunk is not None
+                                   or args.processos is not None or args.threads is not None
+                                   or args.schedule is not None or args.reinicios is not None):
+        print("--trace exige --solver lloyd, sem --dedup, --float32, --chunk, --processos, --threads "
+              "ou --reinicios", file=sys.stderr)
+        return 1
+    if args.init != 'arquivo' and args.chunk is not None:
+        print("--init exige X em memória (sem --chunk)", file=sys.stderr)
+        return 1
+    if args.reinicios is not None and (args.reinicios <= 0 or args.solver not in ('lloyd', 'sorted')
+                                       or tracking or args.dedup or args.chunk is not None
+                                       or args.threads is not None or args.schedule is not None
+                                       or (args.processos or 1) <= 0):
+        print("--reinicios exige reinicios>0, --solver lloyd ou sorted, sem --incremental/--parar-sem-trocas, "
+              "--dedup, --chunk ou --threads", file=sys.stderr)
+        return 1
+    if args.chunk is not None:
+        if args.chunk <= 0 or args.solver != 'lloyd' or not is_bin_file(args.dados):
+            print("--chunk exige --solver lloyd, um binário KM1D e chunk>0", file=sys.stderr)
+            return 1
+        return run_outofcore(args)
+    if args.processos is not None and args.reinicios is None and (args.processos <= 0 or args.solver != 'lloyd'):
+        print("--processos exige --solver lloyd e processos>0", file=sys.stderr)
+        return 1
+    threaded = args.threads is not None or args.schedule is not None
+    if threaded and (args.solver != 'lloyd' or args.processos is not None or (args.threads or 1) <= 0):
+        print("--threads/--schedule exigem --solver lloyd, sem --processos, e threads>0", file=sys.stderr)
+        return 1
+
+    tracer = trace.Tracer() if args.trace is not None else None
+    tm = tracer.mark() if tracer else 0.0
+    X = load_1col(args.dados)
+    C = load_1col(args.centroides)
+    if tracer:
+        tracer.span('load', -1, tm)
+    if args.reinicios is not None:
+        return run_restarts(args, X, C)
+    if args.init != 'arquivo':
+        C = kmeans_plusplus(X, len(C), args.seed, greedy=args.init == 'guloso')
+
+    if args.solver == 'optimal':
+        return run_optimal(args, X, C)
+    if args.solver == 'minibatch':
+        return run_minibatch(args, X, C)
+    if args.solver == 'histogram':
+        return run_histogram(args, X, C)
+    if args.processos is not None:
+        return run_shared(args, X, C)
+    if threaded:
+        try:
+            return run_threaded(args, X, C)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+
+    if args.dedup:
+        return run_dedup(args, X, C)
+    if args.float32:
+        return run_float32(args, X, C)
+
+    t0 = time.perf_counter()
+    if args.solver == 'sorted':
+        prepared = prepare_sorted(X)
+        t_sort = time.perf_counter()
+        result = kmeans_1d_sorted(X, C, args.max_iter, args.eps,
+                                  labels=args.assign is not None, prepared=prepared)
+    elif args.solver == 'hamerly':
+        pruned = []
+        result = kmeans_1d_hamerly(X, C, args.max_iter, args.eps, pruned)
+    else:
+        changed = [] if tracking else None
+        result = kmeans_1d(X, C, args.max_iter, args.eps, args.incremental, args.parar_sem_trocas, changed,
+                           trace=tracer)
+    ms = (time.perf_counter() - t0) * 1000.0
+
+    if args.json:
+        extra = {'sort_ms': (t_sort - t0) * 1000.0} if args.solver == 'sorted' else {}
+        if args.solver == 'hamerly':
+            extra['pruned'] = pruned
+        if tracking:
+            extra.update(incremental=args.incremental, changed=changed,
+                         stop='labels' if args.parar_sem_trocas else 'sse')
+        print_json(args, X, C, result.iterations, result.sse, ms, **extra)
+    else:
+        print(f"K-means 1D ({SOLVERS[args.solver]})")
+        print(f"N={len(X)} K={len(C)} max_iter={args.max_iter} eps={args.eps:g}")
+        if args.solver == 'sorted':
+            print(f"Ordenação: {(t_sort - t0) * 1000.0:.1f} ms")
+        print(f"Iterações: {result.iterations} | SSE final: {result.sse:.6f} | Tempo: {ms:.1f} ms")
+        if args.solver == 'hamerly':
+            print("Pontos podados por iteração: " + " ".join(f"{100.0 * p:.1f}%" for p in pruned))
+        if tracking:
+            print("Rótulos alterados por iteração: " + " ".join(map(str, changed)))
+
+    tm = tracer.mark() if tracer else 0.0
+    write_labels(args.assign, result.assign, len(C))
+    write_centroids(args.centroids, result.centroids)
+    if tracer:
+        tracer.span('write', -1, tm)
+        tracer.save(args.trace, 'python_incremental' if args.incremental else 'python', len(X), len(C))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from .engine import KMeansResult, _boundaries, _sorted_centroids
+
+
+def prepare_unique(X):
+    # Valores distintos de X (crescentes), quantas vezes cada um aparece e o
+    # índice inverso (X == U[inverse]). O inverso só é montado uma vez e
+    # serve para expandir os rótulos no fim.
+    U, inverse, W = np.unique(np.asarray(X, dtype=np.float64), return_inverse=True, return_counts=True)
+    return U, W, inverse.reshape(-1)
+
+
+def assignment_step_weighted(U, W, C, assign=None):
+    # Mesmas fronteiras de assignment_step_1d (mesmos rótulos); o SSE soma
+    # w·d² sobre os valores distintos.
+    C = np.asarray(C, dtype=np.float64)
+    Cu, idx = _sorted_centroids(C)
+    best = np.searchsorted(_boundaries(Cu, idx), U, side='right')
+    d = U - Cu[best]
+    np.square(d, out=d)
+
+    if assign is None:
+        assign = np.empty(len(U), dtype=np.int32)
+    np.take(idx, best, out=assign)
+    return float(np.dot(W, d)), assign
+
+
+def update_step_weighted(U, W, C, assign, x0):
+    # Médias ponderadas: Σ w·u / Σ w por cluster; clusters vazios recebem x0
+    # (o X[0] original, como em update_step_1d).
+    K = len(C)
+    cnt = np.bincount(assign, weights=W, minlength=K)
+    s = np.bincount(assign, weights=W * U, minlength=K)
+    empty = cnt == 0
+    C[:] = s / np.where(empty, 1, cnt)
+    C[empty] = x0
+    return C
+
+
+def kmeans_1d_dedup(X, C, max_iter=50, eps=1e-4, labels=True, prepared=None):
+    # Lloyd sobre os M valores distintos de X com pesos (O(M log K) por
+    # iteração em vez de O(N log K)). Rótulos e iterações são os de
+    # kmeans_1d; SSE e centróides diferem só no arredondamento (w·u em vez de
+    # w somas de u). Os rótulos por ponto só são expandidos com labels=True.
+    X = np.asarray(X, dtype=np.float64)
+    C = np.array(C, dtype=np.float64)
+    if len(X) == 0 or len(C) == 0:
+        raise ValueError("X e C não podem ser vazios")
+    if max_iter <= 0 or eps <= 0.0:
+        raise ValueError("Parâmetros inválidos: max_iter>0 e eps>0")
+
+    U, W, inverse = prepared if prepared is not None else prepare_unique(X)
+    x0 = float(X[0])
+    assign_u = np.empty(len(U), dtype=np.int32)
+    prev_sse = 1e300
+    sse = 0.0
+    it = 0
+    while it < max_iter:
+        sse, _ = assignment_step_weighted(U, W, C, assign_u)
+        rel = abs(sse - prev_sse) / (prev_sse if prev_sse > 0.0 else 1.0)
+        if rel < eps:
+            it += 1
+            break
+        update_step_weighted(U, W, C, assign_u, x0)
+        prev_sse = sse
+        it += 1
+
+    return KMeansResult(C, assign_u[inverse] if labels else None, it, sse)
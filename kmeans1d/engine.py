@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+KMeansResult = namedtuple('KMeansResult', ['centroids', 'assign', 'iterations', 'sse'])
+
+
+def _sorted_centroids(C):
+    # Ordena os centróides e colapsa valores repetidos, mantendo o menor
+    # índice original (mesmo desempate do laço `d < bestd` da versão em C).
+    order = np.argsort(C, kind='stable')
+    Cs = C[order]
+    keep = np.ones(len(Cs), dtype=bool)
+    keep[1:] = Cs[1:] != Cs[:-1]
+    return Cs[keep], order[keep]
+
+
+def _prefers_right(x, a, b, ia, ib):
+    da = (x - a) * (x - a)
+    db = (x - b) * (x - b)
+    return db < da or (db == da and ib < ia)
+
+
+def _float_key(x):
+    i = struct.unpack('<q', struct.pack('<d', x))[0]
+    return i if i >= 0 else -(i & 0x7FFFFFFFFFFFFFFF)
+
+
+def _key_float(k):
+    i = k if k >= 0 else (-k) | -0x8000000000000000
+    return struct.unpack('<d', struct.pack('<q', i))[0]
+
+
+def _boundaries(Cu, idx):
+    # Para cada par de centróides vizinhos (a < b) encontra o menor double x
+    # em que a versão em C escolheria b. Com arredondamento IEEE, (x-a)^2 é
+    # não decrescente e (x-b)^2 não crescente entre a e b, então a escolha é
+    # monotônica em x: busca binária na ordem dos doubles entre a e b.
+    T = np.empty(len(Cu) - 1, dtype=np.float64)
+    for j in range(len(Cu) - 1):
+        a, b = float(Cu[j]), float(Cu[j + 1])
+        ia, ib = idx[j], idx[j + 1]
+        lo, hi = _float_key(a), _float_key(b)
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if _prefers_right(_key_float(mid), a, b, ia, ib):
+                hi = mid
+            else:
+                lo = mid
+        T[j] = _key_float(hi)
+    return T
+
+
+# Pontos por bloco no modo compacto (X float32 e/ou rótulos estreitos):
+# 64 Ki pontos deixam os temporários float64 de cada bloco no cache.
+_BLOCK = 1 << 16
+
+
+def label_dtype(K):
+    # Menor inteiro sem sinal que guarda rótulos 0..K-1.
+    return np.dtype(np.uint8 if K <= 256 else np.uint16 if K <= 65536 else np.int32)
+
+
+def _compact(X, assign):
+    return X.dtype != np.float64 or assign.dtype != np.int32
+
+
+def assignment_step_1d(X, C, assign=None):
+    # X float64 e rótulos int32: uma passada vetorizada sobre X inteiro. No
+    # modo compacto (X float32 ou rótulos uint8/uint16) X é percorrido em
+    # blocos promovidos a float64 no cache, para que a memória veja só os 4
+    # bytes de X e os 1-2 bytes do rótulo por ponto. Os rótulos são os
+    # mesmos da versão em C para cada valor promovido.
+    C = np.asarray(C, dtype=np.float64)
+    Cu, idx = _sorted_centroids(C)
+    T = _boundaries(Cu, idx)
+
+    if assign is None:
+        assign = np.empty(len(X), dtype=np.int32)
+    if _compact(X, assign):
+        idx = idx.astype(assign.dtype)
+        sse = 0.0
+        for s in range(0, len(X), _BLOCK):
+            x = X[s:s + _BLOCK].astype(np.float64)
+            best = np.searchsorted(T, x, side='right')
+            np.take(idx, best, out=assign[s:s + _BLOCK])
+            x -= Cu[best]
+            sse += float(np.dot(x, x))
+        return sse, assign
+
+    best = np.searchsorted(T, X, side='right')
+    d = X - Cu[best]
+    np.square(d, out=d)
+    np.take(idx, best, out=assign)
+    return float(d.sum()), assign
+
+
+def update_step_1d(X, C, assign):
+    # No modo compacto, bincount converteria X e os rótulos inteiros para
+    # float64/intp; por blocos a conversão fica no cache. Somas em float64.
+    K = len(C)
+    if _compact(X, assign):
+        cnt = np.zeros(K, dtype=np.int64)
+        s = np.zeros(K, dtype=np.float64)
+        for i in range(0, len(X), _BLOCK):
+            a = assign[i:i + _BLOCK]
+            cnt += np.bincount(a, minlength=K)
+            s += np.bincount(a, weights=X[i:i + _BLOCK], minlength=K)
+    else:
+        cnt = np.bincount(assign, minlength=K)
+        s = np.bincount(assign, weights=X, minlength=K)
+    empty = cnt == 0
+    C[:] = s / np.where(empty, 1, cnt)
+    C[empty] = X[0]
+    return C
+
+
+def incremental_update_1d(X, C, sums, cnt, moved, old, new):
+    # Update incremental: sums/cnt são os totais correntes por cluster e só
+    # os pontos `moved` (que saíram de old e entraram em new) mexem neles.
+    # Só os clusters tocados têm o centróide recalculado; um cluster que
+    # esvazia tem a soma zerada (resíduo de arredondamento das subtrações).
+    K = len(C)
+    x = X[moved]
+    a, b = old[moved], new[moved]
+    sums -= np.bincount(a, weights=x, minlength=K)
+    sums += np.bincount(b, weights=x, minlength=K)
+    cnt -= np.bincount(a, minlength=K)
+    cnt += np.bincount(b, minlength=K)
+    touched = np.zeros(K, dtype=bool)
+    touched[a] = True
+    touched[b] = True
+    empty = touched & (cnt == 0)
+    sums[empty] = 0.0
+    full = touched & ~empty
+    C[full] = sums[full] / cnt[full]
+    C[empty] = X[0]
+    return C
+
+
+def kmeans_1d(X, C, max_iter=50, eps=1e-4, incremental=False, stop_on_labels=False, changed=None,
+              dtype=np.float64, trace=None):
+    # incremental: a partir da segunda iteração, somas e contagens são
+    # atualizadas só pelos pontos que trocaram de cluster (mesmos rótulos,
+    # centróides iguais até o arredondamento). stop_on_labels: para quando
+    # nenhum rótulo muda, em vez do teste do SSE. Se `changed` for uma lista,
+    # recebe o número de rótulos alterados por iteração.
+    # dtype=np.float32: X guardado em float32 e rótulos em label_dtype(K)
+    # (centróides, somas e SSE continuam em float64); não combina com os
+    # modos que acompanham trocas. trace (um trace.Tracer) recebe o tempo
+    # de atribuição e de update e o SSE e as trocas de cada iteração.
+    dtype = np.dtype(dtype)
+    tracking = incremental or stop_on_labels or changed is not None or trace is not None
+    if dtype not in (np.float64, np.float32):
+        raise ValueError("dtype deve ser float64 ou float32")
+    if dtype == np.float32 and tracking:
+        raise ValueError("float32 não pode ser combinado com incremental/stop_on_labels/changed/trace")
+    X = np.ascontiguousarray(X, dtype=dtype)
+    C = np.array(C, dtype=np.float64)
+    if len(X) == 0 or len(C) == 0:
+        raise ValueError("X e C não podem ser vazios")
+    if max_iter <= 0 or eps <= 0.0:
+        raise ValueError("Parâmetros inválidos: max_iter>0 e eps>0")
+
+    K = len(C)
+    assign = np.empty(len(X), dtype=label_dtype(K) if dtype == np.float32 else np.int32)
+    previous = np.full(len(X), -1, dtype=np.int32) if tracking else None
+    sums = cnt = None
+    prev_sse = 1e300
+    sse = 0.0
+    it = 0
+    while it < max_iter:
+        tm = trace.mark() if trace is not None else 0.0
+        sse, _ = assignment_step_1d(X, C, assign)
+        if tracking:
+            moved = np.flatnonzero(assign != previous)
+            if changed is not None:
+                changed.append(len(moved))
+        if trace is not None:
+            tm = trace.span('assign', it, tm)
+            trace.iteration(it, sse, len(moved))
+        rel = abs(sse - prev_sse) / (prev_sse if prev_sse > 0.0 else 1.0)
+        if (len(moved) == 0) if stop_on_labels else (rel < eps):
+            it += 1
+            break
+        if incremental and sums is not None:
+            incremental_update_1d(X, C, sums, cnt, moved, previous, assign)
+        elif incremental:
+            sums = np.bincount(assign, weights=X, minlength=K)
+            cnt = np.bincount(assign, minlength=K)
+            empty = cnt == 0
+            C[:] = sums / np.where(empty, 1, cnt)
+            C[empty] = X[0]
+        else:
+            update_step_1d(X, C, assign)
+        if tracking:
+            previous[moved] = assign[moved]
+        if trace is not None:
+            trace.span('update', it, tm)
+        prev_sse = sse
+        it += 1
+
+    return KMeansResult(C, assign, it, sse)
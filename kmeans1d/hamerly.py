@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from .engine import KMeansResult, _boundaries, _sorted_centroids
+
+
+def _tolerance(X, C):
+    # Folga dos limites: 16 ulps da escala |x| + |c| (mesma de serial/ e
+    # openMp/). Centróides ficam em [min X, max X] ou nos valores iniciais.
+    xmax = float(np.abs(X).max())
+    cmax = float(np.abs(C).max())
+    return 16.0 * np.finfo(np.float64).eps * (xmax + max(xmax, cmax))
+
+
+def _half_separation(C, tol):
+    # s[c] = metade da distância de c ao centróide mais próximo (menos tol):
+    # um ponto mais perto que isso do seu centróide não pode trocar de rótulo.
+    gap = np.abs(C[:, None] - C[None, :])
+    np.fill_diagonal(gap, np.inf)
+    return 0.5 * gap.min(axis=1) - tol if len(C) > 1 else np.full(1, np.inf)
+
+
+def _full_assign(x, C, Cu, idx, T, tol):
+    # Atribuição exata (mesmas fronteiras T de assignment_step_1d) e novos
+    # limites: distância ao centróide e ao segundo mais próximo, que em 1D é
+    # um dos vizinhos do vencedor na ordem dos centróides (ou um centróide
+    # repetido, à mesma distância). Cu ganha ±inf nas pontas, então o vizinho
+    # que não existe fica a distância infinita sem máscaras.
+    best = np.searchsorted(T, x, side='right')
+    near = np.abs(x - Cu[best])
+    ext = np.concatenate(([-np.inf], Cu, [np.inf]))
+    second = np.abs(x - ext[best])
+    np.minimum(second, np.abs(x - ext[best + 2]), out=second)
+    if len(Cu) < len(C):
+        Cs = np.sort(C)
+        repeated = np.searchsorted(Cs, Cu, 'right') - np.searchsorted(Cs, Cu, 'left') > 1
+        second[repeated[best]] = near[repeated[best]]
+    return idx[best], near + tol, second - tol
+
+
+def kmeans_1d_hamerly(X, C, max_iter=50, eps=1e-4, pruned=None):
+    # Lloyd com atribuição acelerada (Hamerly, 2010): cada ponto guarda um
+    # limite superior da distância ao seu centróide e um inferior da
+    # distância ao segundo mais próximo; o inferior é corrigido a cada
+    # iteração pelo deslocamento dos centróides. Só os pontos em que os
+    # limites não garantem o rótulo passam pela busca nas fronteiras. A poda
+    # exige margem de tol, então rótulos, SSE e centróides são os de
+    # kmeans_1d (bit a bit: SSE e somas são calculados sobre todos os
+    # pontos, na mesma ordem). Se `pruned` for uma lista, recebe a fração de
+    # pontos podados por iteração.
+    #
+    # O SSE já precisa de x - C[a] em todos os pontos, então o limite
+    # superior sai dessa diferença (|d| + tol, o mais apertado possível) em
+    # vez de ser corrigido pelo deslocamento. Por iteração ficam passadas
+    # baratas (gathers, somas e comparações) no lugar de np.searchsorted
+    # sobre X inteiro. Os rótulos ficam em intp (gathers e bincount sem
+    # conversão) e os vetores de tamanho N são alocados uma vez.
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    C = np.array(C, dtype=np.float64)
+    N, K = len(X), len(C)
+    if N == 0 or K == 0:
+        raise ValueError("X e C não podem ser vazios")
+    if max_iter <= 0 or eps <= 0.0:
+        raise ValueError("Parâmetros inválidos: max_iter>0 e eps>0")
+
+    tol = _tolerance(X, C)
+    assign = np.empty(N, dtype=np.intp)
+    upper = np.empty(N)
+    lower = np.empty(N)
+    d = np.empty(N)
+    z = np.empty(N)
+    prev = C.copy()
+    prev_sse = 1e300
+    sse = 0.0
+    it = 0
+    while it < max_iter:
+        Cu, idx = _sorted_centroids(C)
+        T = _boundaries(Cu, idx)
+        if it == 0:
+            assign[:], upper[:], lower[:] = _full_assign(X, C, Cu, idx, T, tol)
+            np.subtract(X, np.take(C, assign), out=d)
+            skipped = 0
+        else:
+            move = np.abs(C - prev)
+            order = np.argsort(move)
+            m1, imax = move[order[-1]], order[-1]
+            m2 = move[order[-2]] if K > 1 else 0.0
+            shift = np.full(K, m1 + tol)
+            shift[imax] = m2 + tol
+            half = _half_separation(C, tol)
+
+            # lower -= deslocamento do centróide mais rápido (fora o
+            # próprio) + tol; z = max(lower, half[a]) - tol.
+            np.take(shift, assign, out=z)
+            lower -= z
+            np.take(half, assign, out=z)
+            np.maximum(lower, z, out=z)
+            z -= tol
+            # upper = |x - C[a]| + tol, e poda se upper + tol < z.
+            np.subtract(X, np.take(C, assign), out=d)
+            np.abs(d, out=upper)
+            upper += tol
+            todo = np.flatnonzero(upper >= z)
+            skipped = N - len(todo)
+            if len(todo):
+                x = X[todo]
+                a, upper[todo], lower[todo] = _full_assign(x, C, Cu, idx, T, tol)
+                assign[todo] = a
+                d[todo] = x - C[a]
+
+        if pruned is not None:
+            pruned.append(skipped / N)
+        np.square(d, out=z)
+        sse = float(z.sum())
+        rel = abs(sse - prev_sse) / (prev_sse if prev_sse > 0.0 else 1.0)
+        if rel < eps:
+            it += 1
+            break
+        prev[:] = C
+        cnt = np.bincount(assign, minlength=K)
+        s = np.bincount(assign, weights=X, minlength=K)
+        empty = cnt == 0
+        C[:] = s / np.where(empty, 1, cnt)
+        C[empty] = X[0]
+        prev_sse = sse
+        it += 1
+
+    return KMeansResult(C, assign.astype(np.int32), it, sse)
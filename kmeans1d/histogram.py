@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+
+import numpy as np
+
+from .engine import assignment_step_1d
+from .minibatch import assign_streaming
+
+# KMeansResult com o diagnóstico da aproximação: SSE do histograma nos
+# centróides finais, faixas usadas, largura e pontos em faixas de fronteira.
+HistogramResult = namedtuple('HistogramResult', ['centroids', 'assign', 'iterations', 'sse', 'approx_sse',
+                                                 'bins_used', 'bin_width', 'uncertain'])
+
+
+def build_histogram(X, bins=1 << 16, chunk_size=1 << 20):
+    # Agrupa X em `bins` faixas de mesma largura sobre [min, max], lendo em
+    # blocos (X pode ser um np.memmap). Devolve só as faixas não vazias, em
+    # ordem crescente: índice da faixa, peso, média e dispersão interna
+    # Σ(x - média)², além de lo e da largura.
+    lo = min(float(np.min(X[s:s + chunk_size])) for s in range(0, len(X), chunk_size))
+    hi = max(float(np.max(X[s:s + chunk_size])) for s in range(0, len(X), chunk_size))
+    width = (hi - lo) / bins if hi > lo else 1.0
+
+    def bin_of(chunk):
+        return np.clip(((chunk - lo) / width).astype(np.intp), 0, bins - 1)
+
+    weight = np.zeros(bins)
+    total = np.zeros(bins)
+    for s in range(0, len(X), chunk_size):
+        chunk = np.asarray(X[s:s + chunk_size], dtype=np.float64)
+        j = bin_of(chunk)
+        weight += np.bincount(j, minlength=bins)
+        total += np.bincount(j, weights=chunk, minlength=bins)
+    mean = total / np.where(weight > 0, weight, 1)
+
+    # Segunda passada para a dispersão em torno da média de cada faixa
+    # (estável, sem a diferença Σx² - (Σx)²/n).
+    scatter = np.zeros(bins)
+    for s in range(0, len(X), chunk_size):
+        chunk = np.asarray(X[s:s + chunk_size], dtype=np.float64)
+        j = bin_of(chunk)
+        scatter += np.bincount(j, weights=(chunk - mean[j]) ** 2, minlength=bins)
+
+    used = np.flatnonzero(weight)
+    return used, weight[used], mean[used], scatter[used], lo, width
+
+
+def histogram_step(mean, weight, scatter, C):
+    # Lloyd sobre as faixas: cada faixa vai inteira para o centróide mais
+    # próximo da sua média (mesmo desempate da versão em C). O SSE é o exato
+    # dessa atribuição: Σ dispersão + peso·(média - c)². Custo O(B log K).
+    K = len(C)
+    labels = assignment_step_1d(mean, C)[1]
+    d = mean - C[labels]
+    sse = float(scatter.sum() + np.dot(weight, d * d))
+    sums = np.bincount(labels, weights=weight * mean, minlength=K)
+    cnt = np.bincount(labels, weights=weight, minlength=K)
+    return sse, sums, cnt
+
+
+def uncertain_weight(used, weight, lo, width, bins, C):
+    # Pontos em faixas que contêm uma fronteira de decisão (ponto médio entre
+    # centróides vizinhos): só eles podem mudar de rótulo na passada exata.
+    S = np.unique(C)
+    mids = 0.5 * (S[:-1] + S[1:])
+    j = np.unique(np.clip(((mids - lo) / width).astype(np.intp), 0, bins - 1))
+    pos = np.searchsorted(used, j)
+    hit = pos < len(used)
+    hit[hit] = used[pos[hit]] == j[hit]
+    return float(weight[pos[hit]].sum())
+
+
+def kmeans_1d_histogram(X, C, bins=1 << 16, max_iter=50, eps=1e-4, labels_out=None, chunk_size=1 << 20):
+    # K-means aproximado: X é agrupado uma vez em `bins` faixas e as
+    # iterações de Lloyd rodam sobre as médias ponderadas das faixas
+    # (O(B log K) cada, em vez de O(N log K)). Uma passada exata final calcula
+    # o SSE verdadeiro e os rótulos (em labels_out, ver assign_streaming), com memória
+    # O(bins + chunk_size); assign volta None. approx_sse - sse mede o erro
+    # da aproximação nos centróides finais.
+    C = np.array(C, dtype=np.float64)
+    K = len(C)
+    if len(X) == 0 or K == 0:
+        raise ValueError("X e C não podem ser vazios")
+    if max_iter <= 0 or eps <= 0.0 or bins <= 0:
+        raise ValueError("Parâmetros inválidos: max_iter>0, eps>0 e bins>0")
+
+    used, weight, mean, scatter, lo, width = build_histogram(X, bins, chunk_size)
+    x0 = float(X[0])
+    prev_sse = 1e300
+    it = 0
+    while it < max_iter:
+        sse, sums, cnt = histogram_step(mean, weight, scatter, C)
+        rel = abs(sse - prev_sse) / (prev_sse if prev_sse > 0.0 else 1.0)
+        if rel < eps:
+            it += 1
+            break
+        empty = cnt == 0
+        C[:] = sums / np.where(empty, 1, cnt)
+        C[empty] = x0
+        prev_sse = sse
+        it += 1
+
+    approx = histogram_step(mean, weight, scatter, C)[0]
+    uncertain = uncertain_weight(used, weight, lo, width, bins, C)
+    sse = assign_streaming(X, C, labels_out, chunk_size)
+    return HistogramResult(C, None, it, sse, approx, len(used), width, uncertain)
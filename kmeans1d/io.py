@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .engine import label_dtype
+
+# Formato binário KM1D (ver common/kmeans_io.h): cabeçalho little-endian de
+# 32 bytes (magic, versão, dtype, N, CRC-32 dos valores) seguido dos N valores.
+KM1D_MAGIC = b'KM1D'
+KM1D_VERSION = 1
+KM1D_HEADER = struct.Struct('<4sHHQII8x')
+KM1D_DTYPES = {1: np.dtype('<f8'), 2: np.dtype('<f4')}
+KM1D_CODES = {np.dtype('<f8'): 1, np.dtype('<f4'): 2}
+
+# Rótulos em binário (KM1L, ver common/kmeans_io.h): magic, versão,
+# codificação (1 = compacto, 2 = RLE), N, CRC-32 do conteúdo, K e o número
+# de sequências R. Compacto: N rótulos de label_dtype(K); RLE: R registros
+# {uint32 comprimento, rótulo}, sem alinhamento.
+KM1L_MAGIC = b'KM1L'
+KM1L_VERSION = 1
+KM1L_HEADER = struct.Struct('<4sHHQIIQ')
+KM1L_PACKED = 1
+KM1L_RLE = 2
+# Maior comprimento de uma sequência RLE (campo uint32); sequências maiores
+# são divididas, como em label_writer_put.
+KM1L_RUN_MAX = 0xFFFFFFFF
+
+
+def read_csv_1col(path):
+    A = np.loadtxt(path, delimiter=',', usecols=0, ndmin=1, dtype=np.float64)
+    if A.size == 0:
+        raise ValueError(f"Arquivo vazio: {path}")
+    return A
+
+
+def bin_header(n, dtype, crc):
+    return KM1D_HEADER.pack(KM1D_MAGIC, KM1D_VERSION, KM1D_CODES[np.dtype(dtype)], n, crc, 0)
+
+
+def write_bin_1col(path, A, dtype=np.float64):
+    A = np.ascontiguousarray(A, dtype=np.dtype(dtype).newbyteorder('<'))
+    with open(path, 'wb') as f:
+        f.write(bin_header(len(A), A.dtype, zlib.crc32(A)))
+        f.write(A)
+
+
+class BinWriter:
+    # Escrita incremental de um arquivo KM1D: os blocos vão direto para o
+    # disco e o cabeçalho (N e CRC-32) é preenchido no close().
+
+    def __init__(self, path, dtype=np.float64):
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self.n = 0
+        self.crc = 0
+        self.f = open(path, 'wb')
+        self.f.write(bytes(KM1D_HEADER.size))
+
+    def write(self, A):
+        A = np.ascontiguousarray(A, dtype=self.dtype)
+        self.crc = zlib.crc32(A, self.crc)
+        self.n += len(A)
+        self.f.write(A)
+
+    def close(self):
+        self.f.seek(0)
+        self.f.write(bin_header(self.n, self.dtype, self.crc))
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_bin_header(path):
+    with open(path, 'rb') as f:
+        raw = f.read(KM1D_HEADER.size)
+    if len(raw) < KM1D_HEADER.size:
+        raise ValueError(f"Arquivo binário truncado: {path}")
+    magic, version, code, n, crc, _ = KM1D_HEADER.unpack(raw)
+    if magic != KM1D_MAGIC:
+        raise ValueError(f"{path} não é um arquivo KM1D")
+    if version != KM1D_VERSION or code not in KM1D_DTYPES:
+        raise ValueError(f"Formato binário não suportado em {path} (versão {version}, dtype {code})")
+    return n, KM1D_DTYPES[code], crc
+
+
+def read_bin_1col(path, verify=True):
+    # Mapeia os valores com np.memmap, sem cópia; verify confere o CRC-32
+    # (uma leitura sequencial do arquivo).
+    n, dtype, crc = read_bin_header(path)
+    A = np.memmap(path, dtype=dtype, mode='r', offset=KM1D_HEADER.size, shape=(n,))
+    if verify and zlib.crc32(A) != crc:
+        raise ValueError(f"Checksum inválido em {path}")
+    return A
+
+
+class BinChunkReader:
+    # Leitura de um arquivo KM1D em blocos de até chunk_size valores, para
+    # memória fixa: cada bloco é mapeado sozinho (np.memmap), copiado para um
+    # de dois buffers float64 e desmapeado. Uma thread carrega o bloco
+    # seguinte enquanto o atual é processado. Cada iteração sobre o leitor é
+    # uma passada completa; o CRC-32 é conferido na primeira.
+
+    def __init__(self, path, chunk_size=1 << 20, verify=True):
+        self.path = path
+        self.n, self.dtype, self.crc = read_bin_header(path)
+        if self.n == 0 or chunk_size <= 0:
+            raise ValueError(f"Arquivo vazio ou bloco inválido: {path}")
+        self.chunk_size = min(chunk_size, self.n)
+        self.verify = verify
+        self.buffers = [np.empty(self.chunk_size), np.empty(self.chunk_size)]
+        self.pool = ThreadPoolExecutor(max_workers=1)
+        self._crc = 0
+        head = np.memmap(path, dtype=self.dtype, mode='r', offset=KM1D_HEADER.size, shape=(1,))
+        self.first = float(head[0])
+        del head
+
+    def _load(self, start, buf):
+        count = min(self.chunk_size, self.n - start)
+        window = np.memmap(self.path, dtype=self.dtype, mode='r',
+                           offset=KM1D_HEADER.size + start * self.dtype.itemsize, shape=(count,))
+        if self.verify:
+            self._crc = zlib.crc32(window, self._crc)
+        out = buf[:count]
+        out[:] = window
+        del window
+        return out
+
+    def __iter__(self):
+        self._crc = 0
+        future = self.pool.submit(self._load, 0, self.buffers[0])
+        for i, start in enumerate(range(0, self.n, self.chunk_size)):
+            chunk = future.result()
+            if start + self.chunk_size < self.n:
+                # O buffer do próximo bloco é o do anterior, já consumido.
+                future = self.pool.submit(self._load, start + self.chunk_size, self.buffers[(i + 1) % 2])
+            yield chunk
+        if self.verify:
+            if self._crc != self.crc:
+                raise ValueError(f"Checksum inválido em {self.path}")
+            self.verify = False
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_bin_file(path):
+    with open(path, 'rb') as f:
+        return f.read(4) == KM1D_MAGIC
+
+
+def load_1col(path, verify=True):
+    # Ponto de entrada único: binário KM1D quando o arquivo tiver o magic,
+    # CSV de 1 coluna caso contrário.
+    if is_bin_file(path):
+        return read_bin_1col(path, verify)
+    return read_csv_1col(path)
+
+
+def output_mode(path):
+    # Sufixo do caminho de saída: ".bin" binário compacto, ".rle" binário em
+    # sequências, qualquer outro CSV (0).
+    return KM1L_PACKED if path.endswith('.bin') else KM1L_RLE if path.endswith('.rle') else 0
+
+
+def _run_dtype(K):
+    return np.dtype([('length', '<u4'), ('label', label_dtype(K).newbyteorder('<'))])
+
+
+class LabelWriter:
+    # Escrita incremental de rótulos em CSV ou KM1L conforme o caminho
+    # (output_mode). No KM1L o cabeçalho (N, CRC-32, R) é preenchido no
+    # close(); no RLE a última sequência de cada bloco fica pendente até
+    # o bloco seguinte, então blocos podem cortar sequências em qualquer ponto.
+
+    def __init__(self, path, K):
+        self.mode = output_mode(path)
+        self.K = K
+        self.dtype = label_dtype(K).newbyteorder('<')
+        self.n = self.runs = self.crc = 0
+        self.pending = None
+        self.f = open(path, 'wb')
+        if self.mode:
+            self.f.write(bytes(KM1L_HEADER.size))
+
+    def _emit(self, raw):
+        self.crc = zlib.crc32(raw, self.crc)
+        self.f.write(raw)
+
+    def _emit_runs(self, labels, lengths):
+        # Sequências acima de KM1L_RUN_MAX viram várias de KM1L_RUN_MAX e uma
+        # com o resto, na mesma ordem do escritor em C.
+        labels = np.asarray(labels)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        pieces = (lengths + KM1L_RUN_MAX - 1) // KM1L_RUN_MAX
+        if len(pieces) and pieces.max() > 1:
+            labels = np.repeat(labels, pieces)
+            ends = np.cumsum(pieces) - 1
+            split = np.full(ends[-1] + 1, KM1L_RUN_MAX, dtype=np.int64)
+            split[ends] = lengths - (pieces - 1) * KM1L_RUN_MAX
+            lengths = split
+        rec = np.empty(len(labels), dtype=_run_dtype(self.K))
+        rec['label'] = labels
+        rec['length'] = lengths
+        self.runs += len(rec)
+        self._emit(rec.tobytes())
+
+    def write(self, assign):
+        a = np.asarray(assign)
+        if len(a) == 0:
+            return
+        self.n += len(a)
+        if self.mode == 0:
+            self.f.write(b'\n'.join(a.astype('S')))
+            self.f.write(b'\n')
+        elif self.mode == KM1L_PACKED:
+            self._emit(np.ascontiguousarray(a, dtype=self.dtype))
+        else:
+            starts = np.concatenate(([0], np.flatnonzero(a[1:] != a[:-1]) + 1))
+            lengths = np.diff(np.append(starts, len(a)))
+            labels = a[starts]
+            if self.pending is not None:
+                label, length = self.pending
+                if label == labels[0]:
+                    lengths[0] += length
+                else:
+                    self._emit_runs([label], [length])
+            self._emit_runs(labels[:-1], lengths[:-1])
+            self.pending = (labels[-1], lengths[-1])
+
+    def close(self):
+        if self.pending is not None:
+            self._emit_runs([self.pending[0]], [self.pending[1]])
+            self.pending = None
+        if self.mode:
+            self.f.seek(0)
+            self.f.write(KM1L_HEADER.pack(KM1L_MAGIC, KM1L_VERSION, self.mode, self.n, self.crc,
+                                          self.K, self.runs))
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_labels_header(path):
+    # (codificação, N, CRC-32, K, R) de um arquivo KM1L.
+    with open(path, 'rb') as f:
+        raw = f.read(KM1L_HEADER.size)
+    if len(raw) < KM1L_HEADER.size or raw[:4] != KM1L_MAGIC:
+        raise ValueError(f"{path} não é um arquivo KM1L")
+    _, version, encoding, n, crc, K, runs = KM1L_HEADER.unpack(raw)
+    if version != KM1L_VERSION or encoding not in (KM1L_PACKED, KM1L_RLE):
+        raise ValueError(f"Formato de rótulos não suportado em {path} (versão {version}, codificação {encoding})")
+    return encoding, n, crc, K, runs
+
+
+def _map_labels(path, verify):
+    encoding, n, crc, K, runs = read_labels_header(path)
+    if encoding == KM1L_PACKED:
+        A = np.memmap(path, dtype=label_dtype(K).newbyteorder('<'), mode='r',
+                      offset=KM1L_HEADER.size, shape=(n,))
+    else:
+        A = np.memmap(path, dtype=_run_dtype(K), mode='r', offset=KM1L_HEADER.size, shape=(runs,))
+    if verify and zlib.crc32(A) != crc:
+        raise ValueError(f"Checksum inválido em {path}")
+    return encoding, A
+
+
+def read_labels_bin(path, verify=True):
+    # Rótulos de um arquivo KM1L. Compacto: np.memmap sem cópia (uint8 ou
+    # uint16); RLE: as sequências expandidas com np.repeat.
+    encoding, A = _map_labels(path, verify)
+    if encoding == KM1L_PACKED:
+        return A
+    return np.repeat(A['label'], A['length'])
+
+
+def read_label_runs(path, verify=True):
+    # (rótulos, comprimentos) das sequências de um arquivo KM1L em RLE, como
+    # visões np.memmap sem cópia nem expansão.
+    encoding, A = _map_labels(path, verify)
+    if encoding != KM1L_RLE:
+        raise ValueError(f"{path} não está em RLE")
+    return A['label'], A['length']
+
+
+def load_labels(path, verify=True):
+    # KM1L quando o arquivo tiver o magic, CSV de inteiros caso contrário.
+    with open(path, 'rb') as f:
+        if f.read(4) == KM1L_MAGIC:
+            return read_labels_bin(path, verify)
+    return np.loadtxt(path, dtype=np.int64, ndmin=1)
+
+
+def write_labels(path, assign, K):
+    # Rótulos em CSV, KM1L compacto (.bin) ou RLE (.rle), pelo sufixo.
+    if not path:
+        return
+    with LabelWriter(path, K) as w:
+        w.write(assign)
+
+
+def write_centroids(path, C):
+    # Centróides em KM1D float64 (.bin/.rle) ou CSV com 6 casas.
+    if not path:
+        return
+    if output_mode(path):
+        write_bin_1col(path, C)
+    else:
+        write_centroids_csv(path, C)
+
+
+def write_assign_csv(path, assign):
+    if not path:
+        return
+    np.savetxt(path, assign, fmt='%d')
+
+
+def write_centroids_csv(path, C):
+    if not path:
+        return
+    np.savetxt(path, C, fmt='%.6f')
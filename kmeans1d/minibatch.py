@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from .engine import KMeansResult, assignment_step_1d
+from .io import LabelWriter
+
+
+def minibatch_step(xb, C, seen):
+    # Um passo de mini-batch (Sculley, 2010): atribui o lote aos centróides
+    # atuais e move cada centróide com taxa de aprendizado 1/seen[c], onde
+    # seen[c] conta os pontos que ele já recebeu. Equivale a aplicar
+    # c += (x - c) / seen[c] ponto a ponto com as atribuições do início do
+    # lote. Atualiza C e seen no lugar e retorna o maior deslocamento.
+    K = len(C)
+    assign = assignment_step_1d(xb, C)[1]
+    cnt = np.bincount(assign, minlength=K)
+    s = np.bincount(assign, weights=xb, minlength=K)
+    hit = cnt > 0
+    seen[hit] += cnt[hit]
+    step = (s[hit] - cnt[hit] * C[hit]) / seen[hit]
+    C[hit] += step
+    return float(np.abs(step).max()) if hit.any() else 0.0
+
+
+def assign_streaming(X, C, labels_out=None, chunk_size=1 << 20):
+    # Passada final sequencial em blocos: SSE exato com os centróides finais
+    # e rótulos gravados em fluxo (LabelWriter: CSV, .bin ou .rle), sem vetor
+    # de tamanho N.
+    w = LabelWriter(labels_out, len(C)) if labels_out else None
+    sse = 0.0
+    try:
+        for start in range(0, len(X), chunk_size):
+            chunk = np.asarray(X[start:start + chunk_size], dtype=np.float64)
+            part, assign = assignment_step_1d(chunk, C)
+            sse += part
+            if w:
+                w.write(assign)
+    finally:
+        if w:
+            w.close()
+    return sse
+
+
+def kmeans_1d_minibatch(X, C, batch_size=1024, max_iter=100, tol=1e-4, seed=0,
+                        final_pass=True, labels_out=None, chunk_size=1 << 20):
+    # X pode ser um np.memmap (read_bin_1col): só os lotes sorteados e os
+    # blocos da passada final são lidos, então a memória fica em
+    # O(batch_size + chunk_size) qualquer que seja N. max_iter conta lotes;
+    # para quando o maior deslocamento de centróide num lote fica < tol.
+    # assign volta None: os rótulos só existem em labels_out.
+    C = np.array(C, dtype=np.float64)
+    N = len(X)
+    if N == 0 or len(C) == 0:
+        raise ValueError("X e C não podem ser vazios")
+    if max_iter <= 0 or tol <= 0.0 or batch_size <= 0:
+        raise ValueError("Parâmetros inválidos: max_iter>0, tol>0 e batch_size>0")
+
+    rng = np.random.default_rng(seed)
+    seen = np.zeros(len(C), dtype=np.int64)
+    it = 0
+    while it < max_iter:
+        # Índices ordenados: leitura do memmap em ordem crescente de página.
+        idx = np.sort(rng.integers(0, N, size=batch_size))
+        move = minibatch_step(np.asarray(X[idx], dtype=np.float64), C, seen)
+        it += 1
+        if move < tol:
+            break
+
+    sse = assign_streaming(X, C, labels_out, chunk_size) if final_pass else None
+    return KMeansResult(C, None, it, sse)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from .engine import KMeansResult
+from .prefix import prepare_sorted
+
+
+def _segment_cost(S, Q, j, i):
+    # SSE de Xs[j:i] em forma fechada a partir das somas prefixadas.
+    n = i - j
+    s = S[i] - S[j]
+    return (Q[i] - Q[j]) - s * s / n
+
+
+def _centered_prefix(Xs):
+    # Somas prefixadas em float64 dos dados centrados na média: o SSE não
+    # muda com a translação e o cancelamento em Q[i] - Q[j] fica pequeno.
+    Z = Xs - Xs.mean()
+    S = np.zeros(len(Z) + 1)
+    Q = np.zeros(len(Z) + 1)
+    np.cumsum(Z, out=S[1:])
+    np.cumsum(Z * Z, out=Q[1:])
+    return S, Q
+
+
+def _dp_layer(S, Q, D_prev, k, N):
+    # Calcula D_k[i] = min_{k-1 <= j < i} D_{k-1}[j] + custo(j, i) para
+    # i em [k, N]. O argmin é monotônico em i (custo de Monge), então usamos
+    # a otimização dividir-e-conquistar, resolvendo cada nível da recursão de
+    # uma vez com operações vetorizadas: O(N) por nível, O(N log N) por camada.
+    D = np.full(N + 1, np.inf)
+    arg = np.zeros(N + 1, dtype=np.int64)
+    # D_{k-1}[j] + custo(j, i) = (D_{k-1}[j] - Q[j]) + Q[i] - (S[i]-S[j])^2/(i-j)
+    A = D_prev - Q
+
+    ilo = np.array([k], dtype=np.int64)
+    ihi = np.array([N], dtype=np.int64)
+    jlo = np.array([k - 1], dtype=np.int64)
+    jhi = np.array([N - 1], dtype=np.int64)
+
+    while len(ilo):
+        mid = (ilo + ihi) // 2
+        jl = np.maximum(jlo, k - 1)
+        jh = np.minimum(jhi, mid - 1)
+        counts = jh - jl + 1
+        offsets = np.zeros(len(counts), dtype=np.int64)
+        np.cumsum(counts[:-1], out=offsets[1:])
+
+        # Candidatos de todos os segmentos do nível, concatenados: j percorre
+        # [jl, jh] de cada segmento e i = mid fica constante no segmento.
+        pos = np.arange(int(counts.sum()), dtype=np.int64)
+        j = np.repeat(jl - offsets, counts)
+        j += pos
+        i = np.repeat(mid, counts)
+        s = np.repeat(S[mid], counts)
+        s -= S[j]
+        np.square(s, out=s)
+        i -= j
+        s /= i
+        val = A[j]
+        val += np.repeat(Q[mid], counts)
+        val -= s
+
+        best = np.minimum.reduceat(val, offsets)
+        first = np.where(val == np.repeat(best, counts), pos, len(pos))
+        opt = j[np.minimum.reduceat(first, offsets)]
+
+        D[mid] = best
+        arg[mid] = opt
+
+        left = ilo <= mid - 1
+        right = mid + 1 <= ihi
+        ilo, ihi, jlo, jhi = (
+            np.concatenate((ilo[left], mid[right] + 1)),
+            np.concatenate((mid[left] - 1, ihi[right])),
+            np.concatenate((jlo[left], opt[right])),
+            np.concatenate((opt[left], jhi[right])),
+        )
+    return D, arg
+
+
+def optimal_partition(Xs, K):
+    # Programação dinâmica exata sobre Xs ordenado. Retorna os K+1 limites
+    # (índices em Xs) dos intervalos da partição ótima.
+    N = len(Xs)
+    if K > N:
+        raise ValueError(f"K={K} maior que N={N}")
+
+    S, Q = _centered_prefix(Xs)
+    D = np.full(N + 1, np.inf)
+    idx = np.arange(1, N + 1)
+    D[1:] = _segment_cost(S, Q, np.zeros_like(idx), idx)
+
+    args = []
+    for k in range(2, K + 1):
+        D, arg = _dp_layer(S, Q, D, k, N)
+        args.append(arg)
+
+    bounds = [N]
+    i = N
+    for arg in reversed(args):
+        i = int(arg[i])
+        bounds.append(i)
+    bounds.append(0)
+    return np.array(bounds[::-1], dtype=np.int64)
+
+
+def kmeans_1d_optimal(X, K, labels=True, prepared=None):
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    if len(X) == 0 or K <= 0:
+        raise ValueError("X não pode ser vazio e K deve ser > 0")
+
+    Xs, S, Q = prepared if prepared is not None else prepare_sorted(X)
+    bounds = optimal_partition(Xs, K)
+    lo, hi = bounds[:-1], bounds[1:]
+
+    n = (hi - lo).astype(np.longdouble)
+    s = S[hi] - S[lo]
+    C = (s / n).astype(np.float64)
+    sse = float((Q[hi] - Q[lo] - s * s / n).sum())
+
+    assign = None
+    if labels:
+        # Cada cluster é o intervalo [Xs[lo], Xs[hi-1]]; valores repetidos
+        # nunca são divididos entre clusters vizinhos numa partição ótima.
+        assign = np.searchsorted(Xs[lo[1:]], X, side='right').astype(np.int32)
+    # "iterations" = camadas da programação dinâmica (uma por cluster).
+    return KMeansResult(C, assign, K, sse)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from .engine import KMeansResult, _boundaries, _sorted_centroids
+from .io import BinChunkReader, LabelWriter
+
+
+def _chunk_pass(reader, C, sums=None, cnt=None, labels=None):
+    # Uma passada sobre o arquivo. Devolve o SSE e, com `sums`, as somas e
+    # contagens por cluster. As somas seguem a ordem sequencial da versão em
+    # C (i crescente): cumsum e bincount acumulam elemento a elemento, e o
+    # total corrente entra como primeiro termo de cada bloco, então o SSE e os
+    # centróides saem idênticos bit a bit aos de kmeans_1d_serial.
+    K = len(C)
+    m = reader.chunk_size
+    Cu, idx = _sorted_centroids(C)
+    T = _boundaries(Cu, idx)
+
+    acc = np.empty(m + 1)
+    keys = np.empty(K + m, dtype=np.intp)
+    keys[:K] = np.arange(K)
+    weights = np.empty(K + m)
+    sse = 0.0
+    if sums is not None:
+        sums[:] = 0.0
+        cnt[:] = 0
+
+    for chunk in reader:
+        n = len(chunk)
+        best = np.searchsorted(T, chunk, side='right')
+        d = acc[1:n + 1]
+        np.subtract(chunk, Cu[best], out=d)
+        np.square(d, out=d)
+        acc[0] = sse
+        sse = float(np.cumsum(acc[:n + 1], out=acc[:n + 1])[n])
+
+        assign = keys[K:K + n]
+        np.take(idx, best, out=assign)
+        if sums is not None:
+            weights[:K] = sums
+            weights[K:K + n] = chunk
+            sums[:] = np.bincount(keys[:K + n], weights=weights[:K + n], minlength=K)
+            cnt += np.bincount(assign, minlength=K)
+        if labels is not None:
+            labels.write(assign)
+    return sse
+
+
+def kmeans_1d_outofcore(path, C, max_iter=50, eps=1e-4, chunk_size=1 << 20, labels_out=None):
+    # Lloyd exato sobre um binário KM1D lido em blocos: nem X nem o vetor de
+    # rótulos existem inteiros na memória, que fica em O(chunk_size + K).
+    # Mesmas iterações, SSE e centróides de kmeans_1d_serial. Os rótulos vão
+    # para labels_out (CSV, .bin ou .rle) numa passada extra com os centróides da última
+    # atribuição; assign volta None.
+    C = np.array(C, dtype=np.float64)
+    K = len(C)
+    if K == 0:
+        raise ValueError("C não pode ser vazio")
+    if max_iter <= 0 or eps <= 0.0 or chunk_size <= 0:
+        raise ValueError("Parâmetros inválidos: max_iter>0, eps>0 e chunk_size>0")
+
+    with BinChunkReader(path, chunk_size) as reader:
+        sums = np.zeros(K)
+        cnt = np.zeros(K, dtype=np.int64)
+        C_last = C.copy()
+        prev_sse = 1e300
+        sse = 0.0
+        it = 0
+        while it < max_iter:
+            C_last[:] = C
+            sse = _chunk_pass(reader, C, sums, cnt)
+            rel = abs(sse - prev_sse) / (prev_sse if prev_sse > 0.0 else 1.0)
+            if rel < eps:
+                it += 1
+                break
+            empty = cnt == 0
+            C[:] = sums / np.where(empty, 1, cnt)
+            C[empty] = reader.first
+            prev_sse = sse
+            it += 1
+
+        if labels_out:
+            with LabelWriter(labels_out, K) as w:
+                _chunk_pass(reader, C_last, labels=w)
+
+    return KMeansResult(C, None, it, sse)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from .engine import KMeansResult, _boundaries, _sorted_centroids, assignment_step_1d
+
+
+def prepare_sorted(X):
+    # Ordena X uma única vez e monta as somas prefixadas de x e x^2
+    # (em long double quando a plataforma oferece) com S[0] = Q[0] = 0.
+    Xs = np.sort(np.asarray(X, dtype=np.float64), kind='stable')
+    S = np.zeros(len(Xs) + 1, dtype=np.longdouble)
+    Q = np.zeros(len(Xs) + 1, dtype=np.longdouble)
+    np.cumsum(Xs, dtype=np.longdouble, out=S[1:])
+    np.cumsum(np.square(Xs, dtype=np.longdouble), out=Q[1:])
+    return Xs, S, Q
+
+
+def lloyd_step_sorted(Xs, S, Q, C, x0):
+    # Uma iteração de Lloyd em forma fechada: os clusters são intervalos
+    # contínuos de Xs delimitados pelas K-1 fronteiras entre centróides.
+    Cu, idx = _sorted_centroids(C)
+    r = np.searchsorted(Xs, _boundaries(Cu, idx), side='left')
+    lo = np.concatenate(([0], r))
+    hi = np.concatenate((r, [len(Xs)]))
+
+    n = (hi - lo).astype(np.longdouble)
+    s = S[hi] - S[lo]
+    q = Q[hi] - Q[lo]
+    c = Cu.astype(np.longdouble)
+    sse = float((q - 2.0 * c * s + n * c * c).sum())
+
+    newC = np.full(len(C), x0, dtype=np.float64)
+    full = n > 0
+    newC[idx[full]] = (s[full] / n[full]).astype(np.float64)
+    return sse, newC
+
+
+def kmeans_1d_sorted(X, C, max_iter=50, eps=1e-4, labels=True, prepared=None):
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    C = np.array(C, dtype=np.float64)
+    if len(X) == 0 or len(C) == 0:
+        raise ValueError("X e C não podem ser vazios")
+    if max_iter <= 0 or eps <= 0.0:
+        raise ValueError("Parâmetros inválidos: max_iter>0 e eps>0")
+
+    Xs, S, Q = prepared if prepared is not None else prepare_sorted(X)
+    x0 = float(X[0])
+
+    C_last = C.copy()
+    prev_sse = 1e300
+    sse = 0.0
+    it = 0
+    while it < max_iter:
+        sse, newC = lloyd_step_sorted(Xs, S, Q, C, x0)
+        C_last[:] = C
+        rel = abs(sse - prev_sse) / (prev_sse if prev_sse > 0.0 else 1.0)
+        if rel < eps:
+            it += 1
+            break
+        C[:] = newC
+        prev_sse = sse
+        it += 1
+
+    # Rótulos materializados uma única vez, com os centróides do último
+    # assignment (os mesmos que a versão serial deixa em assign).
+    assign = assignment_step_1d(X, C_last)[1] if labels else None
+    return KMeansResult(C, assign, it, sse)
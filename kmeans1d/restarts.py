@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import multiprocessing as mp
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .engine import assignment_step_1d
+from .prefix import lloyd_step_sorted, prepare_sorted
+from .seeding import kmeans_plusplus
+
+# KMeansResult do melhor reinício, com a semente dele e um registro por
+# reinício em `runs`: (seed, sse, iterations, abandoned).
+RestartResult = namedtuple('RestartResult', ['centroids', 'assign', 'iterations', 'sse', 'best_seed', 'runs'])
+
+# Estado de cada processo do pool: X, (Xs, S, Q) e o menor SSE final já
+# visto por qualquer reinício (multiprocessing.Value compartilhado).
+_STATE = {}
+
+
+def _init_worker(X, prepared, best):
+    _STATE.update(X=X, prepared=prepared, best=best)
+
+
+def projected_floor(sse, delta, remaining):
+    # Palpite (heurístico) do menor SSE final que uma trajetória de Lloyd
+    # ainda alcança: supondo que as quedas de SSE por iteração não crescem
+    # (comum na prática, não garantido), em `remaining` iterações o SSE cai
+    # no máximo remaining·delta, onde delta é a última queda. Não há limite
+    # inferior seguro barato: um reinício abandonado poderia ter vencido.
+    return sse - delta * remaining
+
+
+def _restart(job):
+    # Um reinício: k-means++ com a sua semente sobre X na ordem original
+    # (como --init kmeans++ --seed, para a melhor semente poder ser rodada
+    # sozinha) e Lloyd com somas prefixadas (mesmo critério de parada de
+    # kmeans_1d_sorted). Com abandon, para assim que projected_floor, com as
+    # iterações que restam de max_iter, passa do melhor SSE final conhecido
+    # por mais que a tolerância eps: diferenças menores que eps ficam abaixo
+    # do próprio critério de parada.
+    seed, K, max_iter, eps, greedy, abandon = job
+    X, (Xs, S, Q), best = _STATE['X'], _STATE['prepared'], _STATE['best']
+    x0 = float(X[0])
+    C = kmeans_plusplus(X, K, seed, greedy)
+    C_last = C.copy()
+    prev_sse = 1e300
+    sse = 0.0
+    abandoned = False
+    it = 0
+    while it < max_iter:
+        sse, newC = lloyd_step_sorted(Xs, S, Q, C, x0)
+        C_last[:] = C
+        rel = abs(sse - prev_sse) / (prev_sse if prev_sse > 0.0 else 1.0)
+        if rel < eps:
+            it += 1
+            break
+        if abandon and prev_sse < 1e300 and \
+                projected_floor(sse, prev_sse - sse, max_iter - it - 1) > best.value * (1.0 + eps):
+            it += 1
+            abandoned = True
+            break
+        C[:] = newC
+        prev_sse = sse
+        it += 1
+
+    if not abandoned:
+        with best.get_lock():
+            best.value = min(best.value, sse)
+    return seed, sse, it, abandoned, C, C_last
+
+
+def kmeans_1d_restarts(X, K, restarts=8, seed=0, max_iter=50, eps=1e-4, greedy=False,
+                       abandon=True, processes=None, labels=True):
+    # R reinícios de Lloyd com inicialização k-means++ (sementes seed,
+    # seed+1, ...), distribuídos entre `processes` processos; fica o de menor
+    # SSE. X é ordenado e preparado uma vez (prepare_sorted) e cada iteração
+    # custa O(K log N). O menor SSE final já obtido é compartilhado entre os
+    # processos, e um reinício é abandonado quando, mesmo caindo a última
+    # queda em cada iteração restante (projected_floor), não alcançaria esse
+    # valor. O abandono é heurístico e pode descartar o vencedor;
+    # abandon=False roda todos até o fim. `iterations` soma as
+    # iterações de todos os reinícios; os rótulos (labels=True) são os do
+    # melhor, calculados uma vez no fim.
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    if len(X) == 0 or K <= 0:
+        raise ValueError("X não pode ser vazio e K deve ser positivo")
+    if restarts <= 0 or max_iter <= 0 or eps <= 0.0:
+        raise ValueError("Parâmetros inválidos: reinicios>0, max_iter>0 e eps>0")
+
+    prepared = prepare_sorted(X)
+    ctx = mp.get_context()
+    best = ctx.Value('d', np.inf)
+    jobs = [(seed + r, K, max_iter, eps, greedy, abandon) for r in range(restarts)]
+    processes = max(1, min(processes or os.cpu_count() or 1, restarts))
+    if processes == 1:
+        _init_worker(X, prepared, best)
+        results = [_restart(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(processes, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(X, prepared, best)) as pool:
+            results = list(pool.map(_restart, jobs))
+
+    finished = [r for r in results if not r[3]]
+    s, sse, _, _, C, C_last = min(finished, key=lambda r: r[1])
+    runs = [(r[0], r[1], r[2], r[3]) for r in results]
+    assign = assignment_step_1d(X, C_last)[1] if labels else None
+    return RestartResult(C, assign, sum(r[2] for r in results), sse, s, runs)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+
+def _d2_sample(D, rng, count):
+    # `count` índices sorteados com probabilidade proporcional a D (D²
+    # sampling). O arredondamento de cumsum pode levar o sorteio além do
+    # último índice; fica no último.
+    cum = np.cumsum(D)
+    idx = np.searchsorted(cum, rng.random(count) * cum[-1], side='right')
+    return np.minimum(idx, len(D) - 1)
+
+
+def kmeans_plusplus(X, K, seed=None, greedy=False, trials=None):
+    # Inicialização k-means++ (Arthur e Vassilvitskii, 2007): o primeiro
+    # centróide é um ponto uniforme e cada próximo é sorteado com
+    # probabilidade proporcional a D(x)², a distância ao centróide mais
+    # próximo já escolhido. D é mantido num vetor de N posições e atualizado
+    # com np.minimum a cada centróide (O(N·K) no total, sem laço por ponto).
+    #
+    # greedy: em cada passo sorteia `trials` candidatos (padrão 2 + ln K,
+    # como no scikit-learn) e fica com o que mais reduz Σ D². Se todos os
+    # pontos já coincidem com algum centróide (menos de K valores distintos),
+    # os restantes são pontos uniformes.
+    X = np.asarray(X, dtype=np.float64)
+    N = len(X)
+    if N == 0 or K <= 0:
+        raise ValueError("X não pode ser vazio e K deve ser positivo")
+    rng = np.random.default_rng(seed)
+    trials = (trials or 2 + int(np.log(K))) if greedy else 1
+
+    C = np.empty(K, dtype=np.float64)
+    C[0] = X[rng.integers(N)]
+    D = np.square(X - C[0])
+    d = np.empty(N)
+
+    def potential(i):
+        np.subtract(X, X[i], out=d)
+        np.square(d, out=d)
+        np.minimum(d, D, out=d)
+        return float(d.sum())
+
+    for j in range(1, K):
+        if not D.sum() > 0.0:
+            C[j:] = X[rng.integers(N, size=K - j)]
+            break
+        cand = _d2_sample(D, rng, trials)
+        C[j] = X[min(cand, key=potential) if trials > 1 else cand[0]]
+        np.subtract(X, C[j], out=d)
+        np.square(d, out=d)
+        np.minimum(D, d, out=D)
+    return C
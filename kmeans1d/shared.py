@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+import multiprocessing as mp
+import os
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .engine import KMeansResult, assignment_step_1d
+
+# Comandos escritos em ctrl[0] antes da barreira de início.
+_RUN, _STOP = 1, 0
+
+
+def _slices(n, processes):
+    # Mesma divisão do MPI_Scatterv de mpi/method_means_1d_mpi.c: os
+    # primeiros n % p processos recebem um ponto a mais.
+    base, rem = divmod(n, processes)
+    bounds = [0]
+    for r in range(processes):
+        bounds.append(bounds[-1] + base + (1 if r < rem else 0))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _partial(X, C, assign, out):
+    # Parcial de um processo: out = [SSE, somas por cluster, contagens].
+    K = len(C)
+    out[0] = assignment_step_1d(X, C, assign)[0]
+    out[1:K + 1] = np.bincount(assign, weights=X, minlength=K)
+    out[K + 1:] = np.bincount(assign, minlength=K)
+
+
+def _serve(rank, shms, n, K, processes, start, done):
+    X, C, partial, assign, ctrl = (
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        for shm, dtype, shape in zip(shms, (np.float64, np.float64, np.float64, np.int32, np.int64),
+                                     ((n,), (K,), (processes, 2 * K + 1), (n,), (1,))))
+    lo, hi = _slices(n, processes)[rank]
+    while True:
+        start.wait()
+        if ctrl[0] == _STOP:
+            return
+        _partial(X[lo:hi], C, assign[lo:hi], partial[rank])
+        done.wait()
+
+
+def _worker(rank, names, n, K, processes, start, done):
+    # Processo do pool: espera a barreira de início, calcula o parcial da
+    # sua fatia sobre a cópia compartilhada de X e sinaliza na barreira de
+    # fim. Nada é serializado por iteração. Em caso de erro, quebra as
+    # barreiras para o pai não ficar esperando.
+    shms = [SharedMemory(name=name) for name in names]
+    try:
+        _serve(rank, shms, n, K, processes, start, done)
+    except BaseException:
+        start.abort()
+        done.abort()
+        raise
+    for shm in shms:
+        shm.close()
+
+
+class SharedKMeansPool:
+    # Pool persistente de processos no estilo do backend MPI, sem MPI: X é
+    # copiado uma vez para memória compartilhada e cada processo trabalha na
+    # sua fatia (mesma divisão do MPI_Scatterv). O processo pai faz o papel
+    # do rank 0: calcula a própria fatia e reduz os parciais (SSE, somas e
+    # contagens) de todos, como o MPI_Allreduce. Os processos se sincronizam
+    # por duas barreiras por iteração; centróides e parciais trafegam pela
+    # memória compartilhada.
+
+    def __init__(self, X, K, processes=None):
+        X = np.asarray(X)
+        self.n = len(X)
+        self.K = K
+        self.processes = max(1, min(processes or os.cpu_count() or 1, self.n))
+        if self.n == 0 or K <= 0:
+            raise ValueError("X e C não podem ser vazios")
+
+        self._shms = []
+        self.X = self._alloc(np.float64, (self.n,))
+        self.X[:] = X
+        self.C = self._alloc(np.float64, (K,))
+        self.partial = self._alloc(np.float64, (self.processes, 2 * K + 1))
+        self.assign = self._alloc(np.int32, (self.n,))
+        self.ctrl = self._alloc(np.int64, (1,))
+
+        ctx = mp.get_context()
+        self._start = ctx.Barrier(self.processes)
+        self._done = ctx.Barrier(self.processes)
+        names = [shm.name for shm in self._shms]
+        self._workers = [ctx.Process(target=_worker, daemon=True,
+                                     args=(rank, names, self.n, K, self.processes, self._start, self._done))
+                         for rank in range(1, self.processes)]
+        for w in self._workers:
+            w.start()
+        self._slice = _slices(self.n, self.processes)[0]
+
+    def _alloc(self, dtype, shape):
+        dtype = np.dtype(dtype)
+        shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self._shms.append(shm)
+        return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    def step(self, C):
+        # Uma atribuição distribuída com os centróides C; devolve o SSE e as
+        # somas e contagens globais por cluster. Os rótulos ficam em self.assign.
+        K = self.K
+        self.C[:] = C
+        self.ctrl[0] = _RUN
+        self._start.wait()
+        lo, hi = self._slice
+        _partial(self.X[lo:hi], self.C, self.assign[lo:hi], self.partial[0])
+        self._done.wait()
+        total = self.partial.sum(axis=0)
+        return float(total[0]), total[1:K + 1], total[K + 1:]
+
+    def run(self, C, max_iter=50, eps=1e-4):
+        # Lloyd com o critério de parada da versão serial (variação relativa
+        # do SSE); pode ser chamado várias vezes com o mesmo pool.
+        C = np.array(C, dtype=np.float64)
+        if len(C) != self.K:
+            raise ValueError(f"Pool criado para K={self.K}, recebeu {len(C)} centróides")
+        if max_iter <= 0 or eps <= 0.0:
+            raise ValueError("Parâmetros inválidos: max_iter>0 e eps>0")
+
+        prev_sse = 1e300
+        sse = 0.0
+        it = 0
+        while it < max_iter:
+            sse, sums, cnt = self.step(C)
+            rel = abs(sse - prev_sse) / (prev_sse if prev_sse > 0.0 else 1.0)
+            if rel < eps:
+                it += 1
+                break
+            empty = cnt == 0
+            C[:] = sums / np.where(empty, 1, cnt)
+            C[empty] = self.X[0]
+            prev_sse = sse
+            it += 1
+
+        return KMeansResult(C, np.array(self.assign), it, sse)
+
+    def close(self):
+        if self._workers:
+            self.ctrl[0] = _STOP
+            try:
+                self._start.wait()
+            except Exception:
+                pass
+            for w in self._workers:
+                w.join()
+            self._workers = []
+        self.X = self.C = self.partial = self.assign = self.ctrl = None
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        self._shms = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def kmeans_1d_shared(X, C, max_iter=50, eps=1e-4, processes=None):
+    # Atalho para uma única execução; para várias, reutilize SharedKMeansPool.
+    with SharedKMeansPool(X, len(C), processes) as pool:
+        return pool.run(C, max_iter, eps)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import sys
+import time
+import multiprocessing as mp
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .engine import _boundaries, _sorted_centroids
+from .io import load_1col
+from .prefix import kmeans_1d_sorted, prepare_sorted
+
+# Resultado da varredura: uma posição por K (na ordem de `k`) e o K escolhido
+# por cada critério em `best` ({'elbow', 'gap', 'silhouette'}).
+SweepReport = namedtuple('SweepReport', ['k', 'sse', 'iterations', 'silhouette', 'gap', 'gap_sd',
+                                         'centroids', 'best'])
+
+# Pontos por bloco no cálculo da silhueta (memória O(bloco), não O(N)).
+SILHOUETTE_CHUNK = 1 << 20
+
+# Conjuntos preparados de cada processo: [(X, (Xs, S, Q), S em float64)].
+# O primeiro é X; os outros, as referências uniformes do gap.
+_DATASETS = []
+
+
+def quantile_init(Xs, k):
+    # Centróides iniciais determinísticos: os quantis (j + 0.5)/k de X
+    # ordenado. Cada K da varredura parte do seu, sem sorteio.
+    pos = ((np.arange(k) + 0.5) / k * len(Xs)).astype(np.intp)
+    return Xs[np.minimum(pos, len(Xs) - 1)].copy()
+
+
+def silhouette_1d(Xs, S, C, chunk_size=SILHOUETTE_CHUNK):
+    # Silhueta média exata em O(N) (mais O(K log N)): em 1D cada cluster é
+    # um intervalo de Xs, e a soma das distâncias de x a um intervalo sai das
+    # somas prefixadas S (S[i] = Xs[0] + ... + Xs[i-1]). O cluster vizinho
+    # mais próximo em média é sempre um dos dois adjacentes. Pontos sozinhos
+    # no cluster valem 0; com menos de 2 clusters não vazios devolve nan.
+    N = len(Xs)
+    Cu, idx = _sorted_centroids(np.asarray(C, dtype=np.float64))
+    r = np.searchsorted(Xs, _boundaries(Cu, idx), side='left')
+    edges = np.unique(np.concatenate(([0], r, [N])))
+    m = len(edges) - 1
+    if m < 2:
+        return float('nan')
+
+    total = 0.0
+    for s in range(0, N, chunk_size):
+        i = np.arange(s, min(s + chunk_size, N))
+        x = Xs[i]
+        lab = np.searchsorted(edges, i, side='right') - 1
+        lo, hi = edges[lab], edges[lab + 1]
+        size = hi - lo
+        own = x * (i - lo) - (S[i] - S[lo]) + (S[hi] - S[i + 1]) - x * (hi - i - 1)
+        a = own / np.maximum(size - 1, 1)
+
+        b = np.full(len(i), np.inf)
+        left = lab > 0
+        l0, l1 = edges[lab[left] - 1], lo[left]
+        b[left] = (x[left] * (l1 - l0) - (S[l1] - S[l0])) / (l1 - l0)
+        right = lab < m - 1
+        r0, r1 = hi[right], edges[lab[right] + 2]
+        b[right] = np.minimum(b[right], ((S[r1] - S[r0]) - x[right] * (r1 - r0)) / (r1 - r0))
+
+        den = np.maximum(a, b)
+        sil = np.where((size > 1) & (den > 0), (b - a) / np.where(den > 0, den, 1.0), 0.0)
+        total += float(sil.sum())
+    return total / N
+
+
+def elbow_k(k, sse):
+    # Cotovelo: com K e SSE normalizados para [0, 1], o K mais abaixo da reta
+    # entre o primeiro e o último ponto da curva.
+    k = np.asarray(k, dtype=np.float64)
+    sse = np.asarray(sse, dtype=np.float64)
+    if len(k) < 3 or sse[0] <= sse[-1]:
+        return int(k[np.argmin(sse)])
+    x = (k - k[0]) / (k[-1] - k[0])
+    y = (sse - sse[-1]) / (sse[0] - sse[-1])
+    return int(k[np.argmax((1.0 - x) - y)])
+
+
+def gap_k(k, gap, gap_sd):
+    # Regra de Tibshirani et al. (2001): o menor K com
+    # Gap(K) >= Gap(K') - s(K'), onde K' é o próximo K da varredura.
+    for j in range(len(k) - 1):
+        if gap[j] >= gap[j + 1] - gap_sd[j + 1]:
+            return int(k[j])
+    return int(k[int(np.nanargmax(gap))])
+
+
+def _init_worker(datasets):
+    _DATASETS[:] = datasets
+
+
+def _solve(job):
+    # Um K sobre um dos conjuntos preparados: Lloyd com somas prefixadas a
+    # partir dos quantis e, para X, a silhueta da partição final.
+    d, k, max_iter, eps, silhouette = job
+    X, prepared, S64 = _DATASETS[d]
+    Xs = prepared[0]
+    res = kmeans_1d_sorted(X, quantile_init(Xs, k), max_iter, eps, labels=False, prepared=prepared)
+    sil = silhouette_1d(Xs, S64, res.centroids) if silhouette else None
+    return d, k, res.sse, res.iterations, sil, res.centroids
+
+
+def _prepare(X):
+    prepared = prepare_sorted(X)
+    return X, prepared, prepared[1].astype(np.float64)
+
+
+def sweep_k(X, k_values, max_iter=50, eps=1e-4, processes=None, references=5,
+            reference_size=200_000, seed=0, silhouette=True):
+    # Resolve todos os K de k_values com uma única leitura e preparação de X:
+    # a cópia ordenada e as somas prefixadas (prepare_sorted) são montadas
+    # uma vez e herdadas pelos processos, e cada K custa O(K log N) por
+    # iteração (kmeans_1d_sorted). Os K (maiores primeiro) são distribuídos
+    # entre `processes` processos.
+    #
+    # Gap: `references` conjuntos uniformes em [min X, max X], de
+    # min(N, reference_size) pontos, varridos com os mesmos K. Como as
+    # referências podem ser menores que X, a dispersão comparada é o SSE por
+    # ponto: Gap(K) = média log(W*/n*) - log(W/N).
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    k_values = sorted(set(int(k) for k in k_values))
+    if len(X) == 0 or not k_values or k_values[0] <= 0:
+        raise ValueError("X não pode ser vazio e os K devem ser positivos")
+    if max_iter <= 0 or eps <= 0.0 or references < 0 or reference_size <= 0:
+        raise ValueError("Parâmetros inválidos: max_iter>0, eps>0, referencias>=0 e tamanho>0")
+
+    datasets = [_prepare(X)]
+    Xs = datasets[0][1][0]
+    rng = np.random.default_rng(seed)
+    n_ref = min(len(X), reference_size)
+    for _ in range(references):
+        datasets.append(_prepare(rng.uniform(Xs[0], Xs[-1], n_ref)))
+
+    jobs = [(d, k, max_iter, eps, silhouette and d == 0)
+            for k in reversed(k_values) for d in range(len(datasets))]
+    processes = max(1, min(processes or os.cpu_count() or 1, len(jobs)))
+    if processes == 1:
+        _init_worker(datasets)
+        results = [_solve(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(processes, mp_context=mp.get_context(),
+                                 initializer=_init_worker, initargs=(datasets,)) as pool:
+            results = list(pool.map(_solve, jobs))
+
+    pos = {k: j for j, k in enumerate(k_values)}
+    n = len(k_values)
+    sse = np.empty(n)
+    iterations = np.empty(n, dtype=np.int64)
+    sil = np.full(n, np.nan)
+    log_ref = np.empty((references, n))
+    centroids = [None] * n
+    for d, k, s, it, sl, C in results:
+        j = pos[k]
+        if d == 0:
+            sse[j], iterations[j], centroids[j] = s, it, C
+            if sl is not None:
+                sil[j] = sl
+        else:
+            log_ref[d - 1, j] = np.log(max(s, 1e-300) / n_ref)
+
+    best = {'elbow': elbow_k(k_values, sse)}
+    gap = gap_sd = None
+    if references > 0:
+        log_w = np.log(np.maximum(sse, 1e-300) / len(X))
+        gap = log_ref.mean(axis=0) - log_w
+        gap_sd = log_ref.std(axis=0) * np.sqrt(1.0 + 1.0 / references)
+        best['gap'] = gap_k(k_values, gap, gap_sd)
+    if silhouette and not np.all(np.isnan(sil)):
+        best['silhouette'] = int(k_values[int(np.nanargmax(sil))])
+    return SweepReport(np.array(k_values), sse, iterations, sil if silhouette else None,
+                       gap, gap_sd, centroids, best)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python3 -m kmeans1d sweep',
+        description="Varredura de K: lê e prepara X uma vez (ordenação e somas prefixadas) e "
+                    "resolve K_min..K_max em paralelo, com SSE, silhueta e gap por K.")
+    parser.add_argument('dados')
+    parser.add_argument('k_min', type=int)
+    parser.add_argument('k_max', type=int)
+    parser.add_argument('max_iter', nargs='?', type=int, default=50)
+    parser.add_argument('eps', nargs='?', type=float, default=1e-4)
+    parser.add_argument('--processos', type=int, help="processos da varredura (padrão: todos os núcleos)")
+    parser.add_argument('--referencias', type=int, default=5,
+                        help="conjuntos uniformes de referência do gap (0 desliga)")
+    parser.add_argument('--tamanho-referencia', type=int, default=200_000,
+                        help="pontos por referência (no máximo N)")
+    parser.add_argument('--seed', type=int, default=0, help="semente das referências")
+    parser.add_argument('--sem-silhueta', action='store_true', help="não calcula a silhueta (O(N) por K)")
+    parser.add_argument('--json', action='store_true',
+                        help="imprime uma única linha JSON com o relatório")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    # Chamado por `python3 -m kmeans1d sweep ...` (ver __main__.py).
+    args = parse_args(argv)
+    if args.k_min <= 0 or args.k_max < args.k_min:
+        print("Parâmetros inválidos: 0 < k_min <= k_max", file=sys.stderr)
+        return 1
+    if args.processos is not None and args.processos <= 0:
+        print("Parâmetro inválido: --processos>0", file=sys.stderr)
+        return 1
+
+    t0 = time.perf_counter()
+    X = load_1col(args.dados)
+    t_load = time.perf_counter()
+    try:
+        report = sweep_k(X, range(args.k_min, args.k_max + 1), args.max_iter, args.eps, args.processos,
+                         args.referencias, args.tamanho_referencia, args.seed, not args.sem_silhueta)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    t_sweep = time.perf_counter()
+    load_ms = (t_load - t0) * 1000.0
+    sweep_ms = (t_sweep - t_load) * 1000.0
+
+    def column(values, j):
+        return None if values is None or np.isnan(values[j]) else float(values[j])
+
+    if args.json:
+        rows = [{'k': int(k), 'sse': float(report.sse[j]), 'iterations': int(report.iterations[j]),
+                 'silhouette': column(report.silhouette, j), 'gap': column(report.gap, j),
+                 'gap_sd': column(report.gap_sd, j)}
+                for j, k in enumerate(report.k)]
+        record = {'backend': 'python', 'solver': 'sweep', 'n': len(X), 'k_min': args.k_min,
+                  'k_max': args.k_max, 'max_iter': args.max_iter, 'eps': args.eps,
+                  'references': args.referencias, 'load_ms': load_ms, 'time_ms': sweep_ms,
+                  'best': report.best, 'results': rows}
+        print(json.dumps(record), flush=True)
+        return 0
+
+    print("Varredura de K (Python/NumPy, ordenado + somas prefixadas)")
+    print(f"N={len(X)} K={args.k_min}..{args.k_max} max_iter={args.max_iter} eps={args.eps:g} "
+          f"referencias={args.referencias}")
+    print(f"Leitura: {load_ms:.1f} ms | Varredura: {sweep_ms:.1f} ms")
+    print(f"{'K':>4} {'SSE':>18} {'iter':>5} {'silhueta':>9} {'gap':>8}")
+    for j, k in enumerate(report.k):
+        sil = column(report.silhouette, j)
+        gap = column(report.gap, j)
+        print(f"{k:>4} {report.sse[j]:>18.6f} {report.iterations[j]:>5} "
+              f"{'-' if sil is None else f'{sil:.4f}':>9} {'-' if gap is None else f'{gap:.4f}':>8}")
+    names = {'elbow': 'cotovelo', 'gap': 'gap', 'silhouette': 'silhueta'}
+    print("Melhor K: " + " | ".join(f"{names[name]}={k}" for name, k in report.best.items()))
+    return 0
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .engine import KMeansResult, _boundaries, _sorted_centroids
+
+# Pontos por bloco: X, rótulos e distâncias de um bloco (~800 KB) cabem no L2.
+DEFAULT_CHUNK = 1 << 15
+
+# Até este número de fronteiras a atribuição usa uma comparação vetorizada
+# por fronteira (sem alocação); acima, np.searchsorted.
+COMPARE_MAX = 32
+
+
+def parse_schedule(text):
+    # "static", "static,32768", "dynamic,8192": mesmo formato do OMP_SCHEDULE
+    # de kmeans_schedule, com o tamanho do bloco em pontos.
+    kind, _, chunk = text.partition(',')
+    kind = kind.strip().lower()
+    try:
+        chunk = int(chunk) if chunk.strip() else DEFAULT_CHUNK
+    except ValueError:
+        chunk = 0
+    if kind not in ('static', 'dynamic') or chunk <= 0:
+        raise ValueError(f"Schedule inválido: {text!r} (use static[,pontos] ou dynamic[,pontos])")
+    return kind, chunk
+
+
+class _Scratch:
+    # Buffers de uma thread, alocados uma vez e reutilizados em todas as
+    # iterações. label guarda os rótulos do bloco em intp, o tipo de índice
+    # que np.add.at usa sem conversão.
+
+    def __init__(self, m):
+        self.best = np.empty(m, dtype=np.intp)
+        self.label = np.empty(m, dtype=np.intp)
+        self.mask = np.empty(m, dtype=bool)
+        self.d = np.empty(m, dtype=np.float64)
+
+
+class ThreadedKMeans:
+    # Lloyd com threads: X é dividido em blocos do tamanho do cache e cada
+    # bloco é processado (atribuição, SSE, somas e contagens) por uma thread
+    # de um ThreadPoolExecutor; os kernels do NumPy liberam o GIL. Cada bloco
+    # escreve o seu parcial numa linha própria e a redução segue a ordem dos
+    # blocos, então o resultado só depende do tamanho do bloco, não do
+    # número de threads nem de static/dynamic.
+    #
+    # threads e schedule vêm de KMEANS_NUM_THREADS e KMEANS_SCHEDULE quando
+    # não informados, como OMP_NUM_THREADS e OMP_SCHEDULE em kmeans_schedule.
+    # static: cada thread recebe uma faixa contígua de blocos; dynamic: os
+    # blocos vão para a fila do pool e são pegos por quem estiver livre.
+
+    def __init__(self, X, threads=None, schedule=None):
+        self.X = np.ascontiguousarray(X, dtype=np.float64)
+        n = len(self.X)
+        if n == 0:
+            raise ValueError("X não pode ser vazio")
+        threads = threads or int(os.environ.get('KMEANS_NUM_THREADS') or 0) or os.cpu_count() or 1
+        if threads <= 0:
+            raise ValueError("Parâmetro inválido: threads>0")
+        self.schedule = schedule or os.environ.get('KMEANS_SCHEDULE') or 'static'
+        self.kind, self.chunk = parse_schedule(self.schedule)
+
+        self.bounds = [(lo, min(lo + self.chunk, n)) for lo in range(0, n, self.chunk)]
+        self.threads = min(threads, len(self.bounds))
+        self.groups = [g.tolist() for g in np.array_split(np.arange(len(self.bounds)), self.threads)]
+        self.assign = np.empty(n, dtype=np.int32)
+        self.partial = None
+        self.pool = ThreadPoolExecutor(max_workers=self.threads)
+        self._local = threading.local()
+
+    def _scratch(self):
+        scratch = getattr(self._local, 'scratch', None)
+        if scratch is None:
+            scratch = self._local.scratch = _Scratch(self.chunk)
+        return scratch
+
+    def _chunk(self, i, T, Cu, idx):
+        lo, hi = self.bounds[i]
+        x = self.X[lo:hi]
+        n = hi - lo
+        K = len(idx)
+        s = self._scratch()
+
+        best = s.best[:n]
+        if len(T) <= COMPARE_MAX:
+            # best = número de fronteiras <= x (= searchsorted(T, x, 'right')).
+            mask = s.mask[:n]
+            best.fill(0)
+            for t in T:
+                np.greater_equal(x, t, out=mask)
+                np.add(best, mask, out=best)
+        else:
+            best[:] = np.searchsorted(T, x, side='right')
+
+        d = s.d[:n]
+        np.take(Cu, best, out=d)
+        np.subtract(x, d, out=d)
+        np.square(d, out=d)
+        label = s.label[:n]
+        np.take(idx, best, out=label)
+        self.assign[lo:hi] = label
+
+        # Somas e contagens acumuladas direto na linha do bloco (np.add.at
+        # soma na ordem dos pontos, como o bincount, sem vetores novos).
+        row = self.partial[i]
+        row[0] = d.sum()
+        row[1:] = 0.0
+        np.add.at(row[1:K + 1], label, x)
+        np.add.at(row[K + 1:], label, 1.0)
+
+    def _chunks(self, indices, T, Cu, idx):
+        for i in indices:
+            self._chunk(i, T, Cu, idx)
+
+    def step(self, C):
+        # Uma atribuição com os centróides C; devolve o SSE e as somas e
+        # contagens por cluster. Os rótulos ficam em self.assign.
+        K = len(C)
+        Cu, idx = _sorted_centroids(C)
+        T = _boundaries(Cu, idx)
+        if self.partial is None or self.partial.shape[1] != 2 * K + 1:
+            self.partial = np.empty((len(self.bounds), 2 * K + 1))
+
+        if self.kind == 'static':
+            futures = [self.pool.submit(self._chunks, g, T, Cu, idx) for g in self.groups]
+        else:
+            futures = [self.pool.submit(self._chunk, i, T, Cu, idx) for i in range(len(self.bounds))]
+        for f in futures:
+            f.result()
+        total = self.partial.sum(axis=0)
+        return float(total[0]), total[1:K + 1], total[K + 1:]
+
+    def run(self, C, max_iter=50, eps=1e-4):
+        # Lloyd com o critério de parada da versão serial; pode ser chamado
+        # várias vezes com o mesmo pool.
+        C = np.array(C, dtype=np.float64)
+        if len(C) == 0:
+            raise ValueError("C não pode ser vazio")
+        if max_iter <= 0 or eps <= 0.0:
+            raise ValueError("Parâmetros inválidos: max_iter>0 e eps>0")
+
+        prev_sse = 1e300
+        sse = 0.0
+        it = 0
+        while it < max_iter:
+            sse, sums, cnt = self.step(C)
+            rel = abs(sse - prev_sse) / (prev_sse if prev_sse > 0.0 else 1.0)
+            if rel < eps:
+                it += 1
+                break
+            empty = cnt == 0
+            C[:] = sums / np.where(empty, 1, cnt)
+            C[empty] = self.X[0]
+            prev_sse = sse
+            it += 1
+
+        return KMeansResult(C, self.assign.copy(), it, sse)
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def kmeans_1d_threaded(X, C, max_iter=50, eps=1e-4, threads=None, schedule=None):
+    # Atalho para uma única execução; para várias, reutilize ThreadedKMeans.
+    with ThreadedKMeans(X, threads, schedule) as engine:
+        return engine.run(C, max_iter, eps)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import sys
+import time
+from collections import namedtuple
+
+# Rastreamento por fase e por iteração, no mesmo formato dos backends em C
+# (common/kmeans_trace.h): JSON Lines ou, com sufixo .json, Chrome
+# trace-event. `python3 -m kmeans1d trace ARQUIVO` resume um trace de
+# qualquer backend em tabelas e, com --timeline, numa linha do tempo.
+
+# Ordem das fases nas tabelas e a categoria de cada uma.
+PHASES = ('load', 'scatter', 'assign', 'reduce', 'update', 'bcast', 'final', 'gather', 'write')
+CATEGORIES = {
+    'load': 'E/S', 'write': 'E/S',
+    'assign': 'computação', 'update': 'computação', 'final': 'computação',
+    'scatter': 'comunicação', 'reduce': 'comunicação', 'bcast': 'comunicação', 'gather': 'comunicação',
+}
+
+# meta: {'backend', 'n', 'k', 'ranks', 'threads'}; spans: [(phase, rank, iter,
+# start_ms, dur_ms)]; iterations: [(rank, iter, t_ms, sse, changed)], com
+# iter = -1 fora do laço e None onde o valor não foi calculado.
+Trace = namedtuple('Trace', ['meta', 'spans', 'iterations'])
+
+
+class Tracer:
+    # Coletor em memória, com a mesma interface de kmeans_trace.h:
+    #     t = tracer.mark(); ...; t = tracer.span('assign', it, t)
+    # Nada é escrito até save().
+    def __init__(self, rank=0):
+        self.rank = rank
+        self.t0 = time.perf_counter()
+        self.spans = []
+        self.iterations = []
+
+    def mark(self):
+        return time.perf_counter()
+
+    def span(self, phase, it, start, end=None):
+        end = time.perf_counter() if end is None else end
+        self.spans.append((phase, self.rank, it, (start - self.t0) * 1e3, (end - start) * 1e3))
+        return end
+
+    def iteration(self, it, sse, changed):
+        t_ms = (time.perf_counter() - self.t0) * 1e3
+        self.iterations.append((self.rank, it, t_ms, None if sse is None else float(sse),
+                                None if changed is None else int(changed)))
+
+    def save(self, path, backend, n, k, ranks=1, threads=1):
+        meta = {'backend': backend, 'n': int(n), 'k': int(k), 'ranks': ranks, 'threads': threads}
+        write_trace(path, Trace(meta, self.spans, self.iterations))
+
+
+def write_trace(path, trace):
+    with open(path, 'w') as f:
+        if path.endswith('.json'):
+            events = [{'name': 'process_name', 'ph': 'M', 'pid': r, 'args': {'name': f'rank {r}'}}
+                      for r in range(trace.meta.get('ranks', 1))]
+            for phase, rank, it, start, dur in trace.spans:
+                events.append({'name': phase, 'cat': 'kmeans', 'ph': 'X', 'pid': rank, 'tid': 0,
+                               'ts': start * 1e3, 'dur': dur * 1e3, 'args': {'iter': it}})
+            for rank, it, t_ms, sse, changed in trace.iterations:
+                events.append({'name': 'iter', 'ph': 'C', 'pid': rank, 'tid': 0, 'ts': t_ms * 1e3,
+                               'args': {'iter': it, 'sse': sse, 'changed': changed}})
+            json.dump({'displayTimeUnit': 'ms', 'otherData': trace.meta, 'traceEvents': events}, f)
+            f.write('\n')
+            return
+        f.write(json.dumps(dict(type='meta', **trace.meta)) + '\n')
+        for phase, rank, it, start, dur in trace.spans:
+            f.write(json.dumps({'type': 'span', 'phase': phase, 'rank': rank, 'iter': it,
+                                'start_ms': start, 'dur_ms': dur}) + '\n')
+        for rank, it, t_ms, sse, changed in trace.iterations:
+            f.write(json.dumps({'type': 'iter', 'rank': rank, 'iter': it, 't_ms': t_ms,
+                                'sse': sse, 'changed': changed}) + '\n')
+
+
+def read_trace(path):
+    # Aceita os dois formatos: um documento Chrome com traceEvents ou uma
+    # linha JSON por evento.
+    with open(path) as f:
+        text = f.read()
+    try:
+        doc = json.loads(text)
+    except json.JSONDecodeError:
+        doc = None
+    spans, iterations = [], []
+    if isinstance(doc, dict) and 'traceEvents' in doc:
+        meta = dict(doc.get('otherData', {}))
+        for e in doc['traceEvents']:
+            args = e.get('args', {})
+            if e.get('ph') == 'X':
+                spans.append((e['name'], e['pid'], args.get('iter', -1), e['ts'] / 1e3, e['dur'] / 1e3))
+            elif e.get('ph') == 'C' and e.get('name') == 'iter':
+                iterations.append((e['pid'], args['iter'], e['ts'] / 1e3, args.get('sse'), args.get('changed')))
+        return Trace(meta, spans, iterations)
+    meta = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        e = json.loads(line)
+        kind = e.pop('type')
+        if kind == 'meta':
+            meta = e
+        elif kind == 'span':
+            spans.append((e['phase'], e['rank'], e['iter'], e['start_ms'], e['dur_ms']))
+        elif kind == 'iter':
+            iterations.append((e['rank'], e['iter'], e['t_ms'], e['sse'], e['changed']))
+    return Trace(meta, spans, iterations)
+
+
+def _ranks(trace):
+    return sorted({s[1] for s in trace.spans} | {i[0] for i in trace.iterations}) or [0]
+
+
+def phase_breakdown(trace):
+    # {fase: (total médio por processo, mínimo, máximo)} em ms, na ordem de
+    # PHASES (fases desconhecidas no fim). Média, mínimo e máximo são sobre
+    # os processos; um processo que não passou pela fase conta como 0.
+    ranks = _ranks(trace)
+    totals = {}
+    for phase, rank, _, _, dur in trace.spans:
+        per_rank = totals.setdefault(phase, dict.fromkeys(ranks, 0.0))
+        per_rank[rank] += dur
+    order = [p for p in PHASES if p in totals] + sorted(p for p in totals if p not in PHASES)
+    return {p: (sum(totals[p].values()) / len(ranks), min(totals[p].values()), max(totals[p].values()))
+            for p in order}
+
+
+def rank_breakdown(trace):
+    # {rank: {categoria: ms}}: quanto de cada processo foi computação,
+    # comunicação (incluindo a espera nas coletivas) e E/S.
+    out = {r: {'computação': 0.0, 'comunicação': 0.0, 'E/S': 0.0} for r in _ranks(trace)}
+    for phase, rank, _, _, dur in trace.spans:
+        category = CATEGORIES.get(phase, 'computação')
+        out[rank][category] += dur
+    return out
+
+
+def iteration_table(trace):
+    # Uma linha por iteração: ms médio por processo de cada fase do laço,
+    # e o SSE e as trocas registrados (rank 0).
+    ranks = _ranks(trace)
+    rows = {}
+    for phase, _, it, _, dur in trace.spans:
+        if it < 0:
+            continue
+        row = rows.setdefault(it, {'sse': None, 'changed': None})
+        row[phase] = row.get(phase, 0.0) + dur / len(ranks)
+    for rank, it, _, sse, changed in trace.iterations:
+        row = rows.setdefault(it, {'sse': None, 'changed': None})
+        if rank == ranks[0]:
+            row.update(sse=sse, changed=changed)
+    return [dict(iter=it, **rows[it]) for it in sorted(rows)]
+
+
+def plot_timeline(trace, path):
+    # Linha do tempo: uma faixa por processo com as fases coloridas e, embaixo,
+    # SSE e trocas por iteração. Gravada em `path` (PNG, PDF, SVG...).
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    ranks = _ranks(trace)
+    phases = list(phase_breakdown(trace))
+    colors = {p: plt.get_cmap('tab10')(j % 10) for j, p in enumerate(phases)}
+    fig, (ax, ax_sse) = plt.subplots(2, 1, figsize=(12, 2.0 + 0.5 * len(ranks) + 3.0),
+                                     gridspec_kw={'height_ratios': [1.0 + 0.3 * len(ranks), 1.5]})
+    for y, rank in enumerate(ranks):
+        for phase in phases:
+            bars = [(s[3], s[4]) for s in trace.spans if s[1] == rank and s[0] == phase]
+            if bars:
+                ax.broken_barh(bars, (y - 0.4, 0.8), facecolors=colors[phase], label=phase)
+    ax.set_yticks(range(len(ranks)))
+    ax.set_yticklabels([f'rank {r}' for r in ranks])
+    ax.set_xlabel('tempo (ms)')
+    handles, labels = ax.get_legend_handles_labels()
+    unique = dict(zip(labels, handles))
+    ax.legend(unique.values(), unique.keys(), ncol=len(unique), fontsize=8, loc='lower center',
+              bbox_to_anchor=(0.5, 1.0))
+    meta = trace.meta
+    fig.suptitle(f"{meta.get('backend', '?')}: N={meta.get('n', '?')} K={meta.get('k', '?')} "
+                 f"processos={meta.get('ranks', len(ranks))}")
+
+    rows = [r for r in iteration_table(trace) if r['sse'] is not None or r['changed'] is not None]
+    its = [r['iter'] for r in rows]
+    sse = [r['sse'] for r in rows]
+    if any(v is not None for v in sse):
+        ax_sse.plot(its, [float('nan') if v is None else v for v in sse], 'o-', ms=3, color='C0')
+    ax_sse.set_xlabel('iteração')
+    ax_sse.set_ylabel('SSE', color='C0')
+    changed = [r['changed'] for r in rows]
+    if any(v is not None for v in changed):
+        ax_changed = ax_sse.twinx()
+        ax_changed.plot(its, [float('nan') if v is None else max(v, 0.5) for v in changed], 's-', ms=3, color='C3')
+        ax_changed.set_yscale('log')
+        ax_changed.set_ylabel('rótulos alterados', color='C3')
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python3 -m kmeans1d trace',
+        description="Resume um trace gravado com --trace (serial, OpenMP, MPI ou Python): "
+                    "tempo por fase, computação x comunicação por processo e, opcionalmente, "
+                    "a tabela por iteração e a linha do tempo.")
+    parser.add_argument('arquivo', help="trace em JSON Lines ou Chrome trace-event (.json)")
+    parser.add_argument('--iteracoes', action='store_true', help="imprime também a tabela por iteração")
+    parser.add_argument('--timeline', metavar='FIGURA', help="grava a linha do tempo (requer matplotlib)")
+    parser.add_argument('--json', action='store_true', help="imprime o resumo como uma linha JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    # Chamado por `python3 -m kmeans1d trace ...` (ver __main__.py).
+    args = parse_args(argv)
+    try:
+        trace = read_trace(args.arquivo)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Trace inválido: {args.arquivo}: {e}", file=sys.stderr)
+        return 1
+    phases = phase_breakdown(trace)
+    ranks = rank_breakdown(trace)
+    rows = iteration_table(trace)
+    loop = [r for r in rows if any(p in r for p in PHASES)]
+    total = sum(mean for mean, _, _ in phases.values())
+
+    if args.json:
+        record = dict(trace.meta, iterations=len(loop), total_ms=total,
+                      phases={p: {'mean_ms': m, 'min_ms': lo, 'max_ms': hi} for p, (m, lo, hi) in phases.items()},
+                      per_rank={str(r): v for r, v in ranks.items()})
+        if args.iteracoes:
+            record['per_iteration'] = rows
+        print(json.dumps(record), flush=True)
+    else:
+        meta = trace.meta
+        print(f"Trace: {meta.get('backend', '?')} | N={meta.get('n', '?')} K={meta.get('k', '?')} "
+              f"processos={meta.get('ranks', len(ranks))} threads={meta.get('threads', 1)} "
+              f"| iterações: {len(loop)}")
+        print(f"{'fase':<8} {'categoria':<12} {'ms':>10} {'%':>6} {'ms/iter':>9} {'mín':>10} {'máx':>10}")
+        for phase, (mean, lo, hi) in phases.items():
+            per_iter = mean / len(loop) if loop and any(s[0] == phase and s[2] >= 0 for s in trace.spans) else None
+            print(f"{phase:<8} {CATEGORIES.get(phase, '-'):<12} {mean:>10.3f} "
+                  f"{100.0 * mean / total if total > 0 else 0.0:>6.1f} "
+                  f"{'-' if per_iter is None else f'{per_iter:.3f}':>9} {lo:>10.3f} {hi:>10.3f}")
+        print(f"{'total':<8} {'':<12} {total:>10.3f}")
+        if len(ranks) > 1:
+            print()
+            print(f"{'rank':>4} {'computação':>12} {'comunicação':>12} {'E/S':>10} {'% comunicação':>14}")
+            for r, v in ranks.items():
+                busy = sum(v.values())
+                print(f"{r:>4} {v['computação']:>12.3f} {v['comunicação']:>12.3f} {v['E/S']:>10.3f} "
+                      f"{100.0 * v['comunicação'] / busy if busy > 0 else 0.0:>14.1f}")
+        if args.iteracoes:
+            print()
+            cols = [p for p in PHASES if any(p in r for r in rows)]
+            print(f"{'iter':>5} " + " ".join(f"{p:>9}" for p in cols) + f" {'SSE':>18} {'trocas':>9}")
+            for r in loop:
+                sse = '-' if r['sse'] is None else f"{r['sse']:.6f}"
+                changed = '-' if r['changed'] is None else str(r['changed'])
+                print(f"{r['iter']:>5} " + " ".join(f"{r.get(p, 0.0):>9.3f}" for p in cols)
+                      + f" {sse:>18} {changed:>9}")
+
+    if args.timeline:
+        try:
+            plot_timeline(trace, args.timeline)
+        except ImportError:
+            print("--timeline requer matplotlib", file=sys.stderr)
+            return 1
+        if not args.json:
+            print(f"Linha do tempo: {args.timeline}")
+    return 0
@@ -1,63 +1,60 @@
 #!/usr/bin/env python3
 
-import matplotlib.pyplot as plt
-import numpy as np
-import subprocess
-import re
+import argparse
 import os
+import sys
 
-def parse_test_results():
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bench import (DATASET_LABELS, ResultStore, counter_fields, describe_counters, format_table,
+                   render_figures, roofline_report, run_matrix)
+
+PROCESSES = [1, 2, 4, 8]
+# Backends com eixo de processos comparados na mesma tabela: MPI e o pool
+# Python com memória compartilhada (kmeans1d.SharedKMeansPool).
+BACKENDS = {'mpi': 'MPI', 'python_shm': 'Python shm'}
+
+def config_processes(config):
+    return int(config.rsplit('_', 1)[1])
+
+def series(configs, backend):
+    # Configurações de um backend ordenadas pelo número de processos.
+    keys = [c for c in configs if c.rsplit('_', 1)[0] == backend]
+    return sorted(keys, key=config_processes)
+
+def parse_test_results(repetitions, warmup, mpirun, force, backends):
     print("Analisando resultados dos testes MPI...")
     print("=" * 60)
     
-    results = {
-        'Pequeno (N=10,000, K=4)': {},
-        'Médio (N=100,000, K=8)': {},
-        'Grande (N=1,000,000, K=16)': {}
+    matrix = {
+        'warmup': warmup,
+        'repetitions': repetitions,
+        'mpirun': mpirun,
+        'runs': [{'backend': 'serial'}] + [{'backend': b, 'processes': PROCESSES} for b in backends],
     }
+    with ResultStore() as store:
+        try:
+            records = run_matrix(matrix, store=store, force=force)
+        except (RuntimeError, FileNotFoundError) as e:
+            print(f"Erro ao analisar: {e}")
+            return None, None, None
     
-    try:
-        result = subprocess.run(['bash', 'run_tests.sh'], 
-                              capture_output=True, text=True, cwd='.')
-        
-        output = result.stdout + result.stderr
-        
-        current_dataset = None
-        current_processes = None
-        
-        for line in output.split('\n'):
-            if 'Dataset PEQUENO' in line:
-                current_dataset = 'Pequeno (N=10,000, K=4)'
-            elif 'Dataset MÉDIO' in line:
-                current_dataset = 'Médio (N=100,000, K=8)'
-            elif 'Dataset GRANDE' in line:
-                current_dataset = 'Grande (N=1,000,000, K=16)'
-            elif 'MPI com' in line:
-                match = re.search(r'(\d+)\s+processo', line)
-                if match:
-                    current_processes = int(match.group(1))
-            elif 'Tempo:' in line and current_dataset and current_processes:
-                match = re.search(r'Tempo:\s+([\d.]+)\s+ms', line)
-                if match:
-                    time = float(match.group(1))
-                    key = f'mpi_{current_processes}'
-                    if key not in results[current_dataset]:
-                        results[current_dataset][key] = {}
-                    results[current_dataset][key]['time'] = time
-                    
-                    sse_match = re.search(r'SSE final:\s+([\d.]+)', line)
-                    if sse_match:
-                        results[current_dataset][key]['sse'] = float(sse_match.group(1))
-                    
-                    iter_match = re.search(r'Iterações:\s+(\d+)', line)
-                    if iter_match:
-                        results[current_dataset][key]['iterations'] = int(iter_match.group(1))
-        
-        return results
-        
-    except Exception as e:
-        print(f"Erro ao analisar: {e}")
-        return None
+    print(format_table(records))
+    
+    # Baseline serial medido no mesmo host (ou reaproveitado do banco).
+    serial_times = {DATASET_LABELS[r['dataset']]: r['stats']['median']
+                    for r in records if r['backend'] == 'serial'}
+    results = {label: {} for label in DATASET_LABELS.values()}
+    for record in records:
+        if record['backend'] not in BACKENDS:
+            continue
+        results[DATASET_LABELS[record['dataset']]][f"{record['backend']}_{record['processes']}"] = {
+            'time': record['stats']['median'],
+            'iqr': record['stats']['iqr'],
+            'sse': record['sse'],
+            'iterations': record['iterations'],
+            **counter_fields(record),
+        }
+    return results, serial_times, records
 
 def calculate_speedup(results, serial_times):
     speedups = {}
@@ -71,108 +68,93 @@ def calculate_speedup(results, serial_times):
                 speedups[dataset][config] = serial_time / data['time']
     return speedups
 
-def plot_results(results, speedups):
-    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-    
-    datasets = ['Pequeno (N=10,000, K=4)', 'Médio (N=100,000, K=8)', 'Grande (N=1,000,000, K=16)']
-    colors = ['#2E86AB', '#A23B72', '#F18F01']
-    
-    for idx, dataset in enumerate(datasets):
-        if dataset not in results:
-            continue
-            
-        configs = results[dataset]
-        processes = []
-        times = []
-        spds = []
-        
-        for config in sorted(configs.keys(), key=lambda x: int(x.split('_')[1])):
-            p = int(config.split('_')[1])
-            processes.append(p)
-            times.append(configs[config]['time'])
-            if dataset in speedups and config in speedups[dataset]:
-                spds.append(speedups[dataset][config])
-            else:
-                spds.append(0)
-        
-        ax1 = axes[idx // 2, idx % 2]
-        ax1.plot(processes, times, marker='o', linewidth=2, markersize=8, 
-                label='Tempo (ms)', color=colors[idx])
-        ax1.set_xlabel('Número de Processos')
-        ax1.set_ylabel('Tempo (ms)')
-        ax1.set_title(f'{dataset}')
-        ax1.set_xticks(processes)
-        ax1.grid(True, alpha=0.3)
-        ax1.legend()
-        
-        if idx == 0:
-            ax2 = axes[1, 1]
-            ax2.plot(processes, spds, marker='s', linewidth=2, markersize=8,
-                    label=dataset, color=colors[idx])
-    
-    ax2 = axes[1, 1]
-    ax2.set_xlabel('Número de Processos')
-    ax2.set_ylabel('Speedup')
-    ax2.set_title('Speedup vs Processos')
-    ax2.set_xticks(processes)
-    ax2.grid(True, alpha=0.3)
-    ax2.legend()
-    ax2.axhline(y=1, color='black', linestyle='--', alpha=0.5)
-    
-    plt.tight_layout()
-    plt.savefig('performance_analysis_mpi.png', dpi=300, bbox_inches='tight')
-    print("Gráfico salvo: performance_analysis_mpi.png")
-    plt.close()
+def create_performance_charts(records, dpi):
+    # Desenhado pelo pipeline do relatório (bench/report.py): processo
+    # separado no backend Agg, e só quando os dados do gráfico mudaram.
+    print("Gerando gráficos...")
+    status = render_figures(records, names=['mpi'], dpi=dpi)
+    if status['mpi'] != 'gerada':
+        print(f"performance_analysis_mpi.png: {status['mpi']}")
+    return status['mpi'] in ('gerada', 'inalterada')
 
-def print_summary(results, speedups):
+def print_summary(results, speedups, serial_times):
     print("\n" + "=" * 60)
     print("RESUMO DOS RESULTADOS MPI")
     print("=" * 60)
     
-    serial_times = {
-        'Pequeno (N=10,000, K=4)': 1.6,
-        'Médio (N=100,000, K=8)': 96.2,
-        'Grande (N=1,000,000, K=16)': 1265.2
-    }
-    
     for dataset in ['Pequeno (N=10,000, K=4)', 'Médio (N=100,000, K=8)', 'Grande (N=1,000,000, K=16)']:
         if dataset not in results:
             continue
             
         print(f"\n{dataset}:")
-        print("-" * 60)
-        print(f"{'Processos':<12} {'Tempo (ms)':<15} {'Speedup':<12} {'SSE':<15}")
-        print("-" * 60)
+        print("-" * 72)
+        print(f"{'Processos':<12}" + ''.join(f"{name + ' (ms)':<17} {'Speedup':<10}" for name in BACKENDS.values())
+              + f" {'SSE (MPI)':<15}")
+        print("-" * 72)
         
         serial_time = serial_times.get(dataset, 0)
-        print(f"{'Serial':<12} {serial_time:<15.1f} {'1.00x':<12} {'---':<15}")
+        print(f"{'Serial':<12}{serial_time:<17.1f} {'1.00x':<10}")
         
-        for config in sorted(results[dataset].keys(), key=lambda x: int(x.split('_')[1])):
-            p = int(config.split('_')[1])
-            data = results[dataset][config]
-            time = data.get('time', 0)
-            sse = data.get('sse', 0)
-            spd = speedups.get(dataset, {}).get(config, 0)
-            
-            print(f"{p:<12} {time:<15.1f} {spd:<12.2f} {sse:<15.6f}")
+        configs = results[dataset]
+        for p in sorted({config_processes(c) for c in configs}):
+            line = f"{p:<12}"
+            for backend in BACKENDS:
+                data = configs.get(f"{backend}_{p}")
+                if data:
+                    spd = speedups.get(dataset, {}).get(f"{backend}_{p}", 0)
+                    line += f"{data['time']:<17.1f} {spd:<10.2f}"
+                else:
+                    line += f"{'---':<17} {'---':<10}"
+            mpi = configs.get(f"mpi_{p}")
+            line += f" {mpi['sse']:<15.6f}" if mpi else f" {'---':<15}"
+            print(line)
+            if mpi:
+                print(f"{'':<12}MPI: {describe_counters(mpi)}")
+
+def print_roofline(records, path, dpi):
+    print("\n" + "="*60)
+    print("ROOFLINE (banda e pico de FLOPs medidos nesta máquina)")
+    print("="*60)
+    with ResultStore() as store:
+        try:
+            roofline_report(records, store, path, dpi=dpi)
+        except RuntimeError as e:
+            print(f"Roofline indisponível: {e}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Análise de desempenho da versão MPI")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--forcar', action='store_true',
+                        help="executa de novo mesmo com resultados recentes no banco")
+    parser.add_argument('--mpirun', default='mpirun',
+                        help="comando do lançador, ex.: 'mpirun --oversubscribe'")
+    parser.add_argument('--sem-python', action='store_true',
+                        help="não mede o pool Python com memória compartilhada (python_shm)")
+    parser.add_argument('--sem-roofline', action='store_true',
+                        help="não sonda a máquina nem gera o gráfico roofline")
+    parser.add_argument('--sem-graficos', action='store_true',
+                        help="só as tabelas em texto; não importa o matplotlib")
+    parser.add_argument('--dpi', type=int, default=150, help="resolução dos gráficos")
+    return parser.parse_args()
 
 def main():
-    results = parse_test_results()
+    args = parse_args()
+    backends = ['mpi'] if args.sem_python else list(BACKENDS)
+    results, serial_times, records = parse_test_results(args.repeticoes, args.warmup,
+                                                        args.mpirun.split(), args.forcar, backends)
     
     if not results:
-        print("Nenhum resultado encontrado. Execute run_tests.sh primeiro.")
+        print("Nenhum resultado encontrado. Verifique o MPI e os datasets.")
         return
     
-    serial_times = {
-        'Pequeno (N=10,000, K=4)': 1.6,
-        'Médio (N=100,000, K=8)': 96.2,
-        'Grande (N=1,000,000, K=16)': 1265.2
-    }
-    
     speedups = calculate_speedup(results, serial_times)
     
-    print_summary(results, speedups)
-    plot_results(results, speedups)
+    print_summary(results, speedups, serial_times)
+    if not args.sem_graficos:
+        create_performance_charts(records, args.dpi)
+    if not args.sem_roofline:
+        print_roofline(records, None if args.sem_graficos else 'roofline_mpi.png', args.dpi)
     
     print("\nAnálise concluída!")
 
@@ -1,3 +1,4 @@
+#define _POSIX_C_SOURCE 200809L
 #include <stdio.h>
 #include <stdlib.h>
 #include <math.h>
@@ -5,51 +6,220 @@
 #include <sys/time.h>
 #include <mpi.h>
 
+#include "../common/kmeans_io.h"
+#include "../common/kmeans_cli.h"
+#include "../common/kmeans_trace.h"
+
 double get_time() {
     struct timeval tv;
     gettimeofday(&tv, NULL);
     return tv.tv_sec + tv.tv_usec * 1e-6;
 }
 
-int read_data(const char *filename, double **data, int *n) {
-    FILE *f = fopen(filename, "r");
-    if (!f) return 0;
-    
-    *n = 0;
-    int capacity = 1000;
-    *data = (double*)malloc(capacity * sizeof(double));
-    
-    while (fscanf(f, "%lf", &(*data)[*n]) == 1) {
-        (*n)++;
-        if (*n >= capacity) {
-            capacity *= 2;
-            *data = (double*)realloc(*data, capacity * sizeof(double));
+/* Passo local fundido: atribui cada ponto e, no mesmo laço, acumula somas e
+   contagens por cluster, o SSE e o número de rótulos alterados em
+   acc = [sum[k], cnt[k], sse, trocas] (um único buffer, reduzido com um só
+   MPI_Allreduce). assign só é atualizado quando não é NULL. */
+void lloyd_step_local(const double *data, int n, const double *centroids, int k,
+                      int *assign, double *acc) {
+    double *sum = acc;
+    double *cnt = acc + k;
+    double sse = 0.0;
+    double changed = 0.0;
+    memset(acc, 0, (size_t)(2 * k + 2) * sizeof(double));
+    for (int i = 0; i < n; i++) {
+        double x = data[i];
+        double min_dist = fabs(x - centroids[0]);
+        int best = 0;
+        for (int c = 1; c < k; c++) {
+            double dist = fabs(x - centroids[c]);
+            if (dist < min_dist) {
+                min_dist = dist;
+                best = c;
+            }
+        }
+        if (assign && assign[i] != best) {
+            assign[i] = best;
+            changed += 1.0;
+        }
+        sse += min_dist * min_dist;
+        sum[best] += x;
+        cnt[best] += 1.0;
+    }
+    acc[2 * k] = sse;
+    acc[2 * k + 1] = changed;
+}
+
+/* Passo local incremental: só os pontos que trocam de cluster geram delta
+   (-x/-1 no cluster antigo, +x/+1 no novo), acumulado em dsum/dcnt. Os
+   clusters tocados saem em entries como trincas {cluster, dsum, dcnt}, a
+   parte esparsa que vai para os outros processos. Retorna o número de
+   trincas; *changed recebe quantos rótulos mudaram. */
+int incremental_step_local(const double *data, int n, const double *centroids, int k,
+                           int *assign, double *dsum, double *dcnt, double *entries,
+                           long long *changed) {
+    long long moved = 0;
+    memset(dsum, 0, k * sizeof(double));
+    memset(dcnt, 0, k * sizeof(double));
+    for (int i = 0; i < n; i++) {
+        double x = data[i];
+        double min_dist = fabs(x - centroids[0]);
+        int best = 0;
+        for (int c = 1; c < k; c++) {
+            double dist = fabs(x - centroids[c]);
+            if (dist < min_dist) {
+                min_dist = dist;
+                best = c;
+            }
+        }
+        int a = assign[i];
+        if (a != best) {
+            dsum[a] -= x;
+            dcnt[a] -= 1.0;
+            dsum[best] += x;
+            dcnt[best] += 1.0;
+            assign[i] = best;
+            moved++;
+        }
+    }
+    /* Entradas e saídas que se cancelam na contagem ainda podem deixar
+       dsum != 0, então o cluster só fica de fora se os dois forem zero. */
+    int m = 0;
+    for (int c = 0; c < k; c++) {
+        if (dcnt[c] != 0.0 || dsum[c] != 0.0) {
+            entries[3 * m] = c;
+            entries[3 * m + 1] = dsum[c];
+            entries[3 * m + 2] = dcnt[c];
+            m++;
         }
     }
-    fclose(f);
-    return 1;
+    *changed = moved;
+    return m;
 }
 
-int read_centroids(const char *filename, double **centroids, int *k) {
-    return read_data(filename, centroids, k);
+/* Troca esparsa dos deltas: cada processo publica quantas trincas tem e
+   quantos rótulos mudou (MPI_Allgather de 2 inteiros) e, se alguma trinca
+   existir, todas são reunidas em todos os processos (MPI_Allgatherv) e
+   aplicadas em ordem de rank aos totais globais sum/cnt, iguais em todos.
+   Os clusters tocados ficam marcados em touched. Retorna o total de
+   rótulos alterados. */
+long long exchange_deltas(int m, long long changed, const double *entries, double *all_entries,
+                          long long *info, int *counts, int *displs, int size,
+                          double *sum, double *cnt, unsigned char *touched) {
+    long long mine[2] = {m, changed};
+    MPI_Allgather(mine, 2, MPI_LONG_LONG, info, 2, MPI_LONG_LONG, MPI_COMM_WORLD);
+    long long total_changed = 0;
+    int total = 0;
+    for (int r = 0; r < size; r++) {
+        counts[r] = 3 * (int)info[2 * r];
+        displs[r] = total;
+        total += counts[r];
+        total_changed += info[2 * r + 1];
+    }
+    if (total == 0) return total_changed;
+    MPI_Allgatherv(entries, 3 * m, MPI_DOUBLE, all_entries, counts, displs, MPI_DOUBLE, MPI_COMM_WORLD);
+    for (int j = 0; j < total; j += 3) {
+        int c = (int)all_entries[j];
+        sum[c] += all_entries[j + 1];
+        cnt[c] += all_entries[j + 2];
+        touched[c] = 1;
+    }
+    return total_changed;
 }
 
-void assign_clusters(double *data, int n, double *centroids, int k, 
-                     int *assign, double *sse) {
-    *sse = 0.0;
+/* SSE final local: cada ponto com o centróide atualizado do cluster que
+   recebeu na última atribuição (feita com `previous`). */
+double final_sse_local(const double *data, int n, const double *previous,
+                       const double *centroids, int k) {
+    double sse = 0.0;
     for (int i = 0; i < n; i++) {
-        double min_dist = fabs(data[i] - centroids[0]);
+        double min_dist = fabs(data[i] - previous[0]);
         int best = 0;
         for (int c = 1; c < k; c++) {
-            double dist = fabs(data[i] - centroids[c]);
+            double dist = fabs(data[i] - previous[c]);
             if (dist < min_dist) {
                 min_dist = dist;
                 best = c;
             }
         }
-        assign[i] = best;
-        *sse += min_dist * min_dist;
+        double dist = fabs(data[i] - centroids[best]);
+        sse += dist * dist;
+    }
+    return sse;
+}
+
+/* Rótulos em binário compacto (KM1L, assign.bin) escritos em paralelo com
+   MPI-IO: cada processo estreita os seus rótulos para km1d_label_bytes(k)
+   bytes e grava a sua fatia no deslocamento 32 + offset·largura, sem
+   MPI_Gatherv. O CRC de cada fatia vai para o rank 0, que os combina na
+   ordem (km1d_crc32_combine) e grava o cabeçalho. */
+void write_labels_mpi(const char *path, const int *local_assign, int local_n, int offset,
+                      int n, int k, int rank, int size) {
+    int width = km1d_label_bytes(k);
+    unsigned char *buf = (unsigned char*)malloc((size_t)local_n * width + 1);
+    for (int i = 0; i < local_n; i++) {
+        unsigned char *p = buf + (size_t)i * width;
+        if (width == 1) p[0] = (unsigned char)local_assign[i];
+        else if (width == 2) km1d_put_u16(p, (uint16_t)local_assign[i]);
+        else km1d_put_u32(p, (uint32_t)local_assign[i]);
+    }
+    unsigned int local_crc = km1d_crc32(buf, (size_t)local_n * width);
+    unsigned int *crcs = rank == 0 ? (unsigned int*)malloc(size * sizeof(unsigned int)) : NULL;
+    int *counts = rank == 0 ? (int*)malloc(size * sizeof(int)) : NULL;
+    MPI_Gather(&local_crc, 1, MPI_UNSIGNED, crcs, 1, MPI_UNSIGNED, 0, MPI_COMM_WORLD);
+    MPI_Gather(&local_n, 1, MPI_INT, counts, 1, MPI_INT, 0, MPI_COMM_WORLD);
+
+    MPI_File fh;
+    if (MPI_File_open(MPI_COMM_WORLD, path, MPI_MODE_CREATE | MPI_MODE_WRONLY,
+                      MPI_INFO_NULL, &fh) != MPI_SUCCESS) {
+        if (rank == 0) fprintf(stderr, "Erro ao abrir %s para escrita\n", path);
+        free(buf); free(crcs); free(counts);
+        return;
+    }
+    MPI_File_set_size(fh, 0);
+    MPI_Datatype type = width == 1 ? MPI_UINT8_T : width == 2 ? MPI_UINT16_T : MPI_UINT32_T;
+    MPI_File_write_at_all(fh, (MPI_Offset)KM1D_HEADER_SIZE + (MPI_Offset)offset * width,
+                          buf, local_n, type, MPI_STATUS_IGNORE);
+    if (rank == 0) {
+        uint32_t crc = 0;
+        for (int r = 0; r < size; r++) {
+            crc = km1d_crc32_combine(crc, crcs[r], (uint64_t)counts[r] * width);
+        }
+        unsigned char header[KM1D_HEADER_SIZE];
+        km1l_header(header, KM1L_PACKED, n, crc, k, 0);
+        MPI_File_write_at(fh, 0, header, KM1D_HEADER_SIZE, MPI_BYTE, MPI_STATUS_IGNORE);
+    }
+    MPI_File_close(&fh);
+    free(buf);
+    free(crcs);
+    free(counts);
+}
+
+/* Reúne no rank 0 os eventos de rastreamento de todos os processos (em
+   ordem de rank) e grava o arquivo. Retorna 0 se a escrita falhou. */
+int save_trace_mpi(kmeans_trace *tr, const char *backend, int n, int k, int rank, int size) {
+    int bytes = (int)(tr->n * sizeof(trace_event));
+    int *counts = rank == 0 ? (int*)malloc(size * sizeof(int)) : NULL;
+    int *displs = rank == 0 ? (int*)malloc(size * sizeof(int)) : NULL;
+    MPI_Gather(&bytes, 1, MPI_INT, counts, 1, MPI_INT, 0, MPI_COMM_WORLD);
+    trace_event *all = NULL;
+    int total = 0;
+    if (rank == 0) {
+        for (int r = 0; r < size; r++) {
+            displs[r] = total;
+            total += counts[r];
+        }
+        all = (trace_event*)malloc(total + 1);
+    }
+    MPI_Gatherv(tr->ev, bytes, MPI_BYTE, all, counts, displs, MPI_BYTE, 0, MPI_COMM_WORLD);
+    int ok = 1;
+    if (rank == 0) {
+        ok = trace_save(tr, all, total / sizeof(trace_event), backend, n, k, size, 1);
     }
+    free(all);
+    free(counts);
+    free(displs);
+    return ok;
 }
 
 int main(int argc, char **argv) {
@@ -58,10 +228,21 @@ int main(int argc, char **argv) {
     int rank, size;
     MPI_Comm_rank(MPI_COMM_WORLD, &rank);
     MPI_Comm_size(MPI_COMM_WORLD, &size);
+    int json = take_flag(&argc, argv, "--json");
+    int incremental = take_flag(&argc, argv, "--incremental");
+    int stop_on_labels = take_flag(&argc, argv, "--parar-sem-trocas");
+    int tracking = incremental || stop_on_labels;
+    const char *trace_path = take_option(&argc, argv, "--trace");
     
     if (argc < 5) {
         if (rank == 0) {
-            printf("Uso: %s <dados.csv> <centroides.csv> <max_iter> <epsilon> [assign.csv] [centroids.csv]\n", argv[0]);
+            printf("Uso: %s <dados.csv> <centroides.csv> <max_iter> <epsilon> [assign.csv] [centroids.csv] "
+                   "[--incremental] [--parar-sem-trocas] [--trace ARQUIVO] [--json]\n", argv[0]);
+            printf("     --incremental troca só os deltas esparsos dos clusters que mudaram.\n");
+            printf("     --parar-sem-trocas para quando nenhum rótulo muda (em vez do deslocamento < epsilon).\n");
+            printf("     assign.bin é gravado em paralelo (MPI-IO); .rle e CSV passam pelo rank 0.\n");
+            printf("     --trace grava o tempo de cada fase por processo (computação, MPI_Allreduce, MPI_Bcast...)\n"
+                   "     e o SSE/trocas por iteração (.json: formato Chrome; senão JSON Lines).\n");
         }
         MPI_Finalize();
         return 1;
@@ -77,16 +258,20 @@ int main(int argc, char **argv) {
     double *data = NULL, *centroids = NULL;
     int n = 0, k = 0;
     int *assign = NULL;
+    dataset_1d ds;
+    
+    /* Relógios de todos os processos partem juntos (barreira). */
+    kmeans_trace tr;
+    if (trace_path) MPI_Barrier(MPI_COMM_WORLD);
+    trace_open(&tr, trace_path, rank);
+    double tm = trace_mark(&tr);
     
     if (rank == 0) {
-        if (!read_data(data_file, &data, &n)) {
-            printf("Erro ao ler %s\n", data_file);
-            MPI_Abort(MPI_COMM_WORLD, 1);
-        }
-        if (!read_centroids(cent_file, &centroids, &k)) {
-            printf("Erro ao ler %s\n", cent_file);
-            MPI_Abort(MPI_COMM_WORLD, 1);
-        }
+        dataset_open(data_file, &ds);
+        data = ds.data;
+        n = ds.n;
+        centroids = dataset_read_copy(cent_file, &k);
+        tm = trace_span(&tr, TRACE_LOAD, -1, tm);
     }
     
     MPI_Bcast(&n, 1, MPI_INT, 0, MPI_COMM_WORLD);
@@ -110,39 +295,83 @@ int main(int argc, char **argv) {
     
     int local_n = sendcounts[rank];
     double *local_data = (double*)malloc(local_n * sizeof(double));
-    int *local_assign = (int*)malloc(local_n * sizeof(int));
+    /* Rótulos só existem quando pedidos ou quando as trocas são
+       acompanhadas (também pelo --trace); -1 = sem rótulo anterior (todos
+       "mudam" na primeira iteração). */
+    int *local_assign = (assign_out || tracking || trace_path) ? (int*)malloc(local_n * sizeof(int)) : NULL;
+    if (local_assign) {
+        for (int i = 0; i < local_n; i++) local_assign[i] = -1;
+    }
+    /* Acumuladores persistentes: [sum[k], cnt[k], sse, trocas] local e
+       global. No modo incremental, sum/cnt de acc_global são os totais
+       correntes, atualizados só pelos deltas. */
+    double *acc_local = (double*)malloc((2 * k + 2) * sizeof(double));
+    double *acc_global = (double*)malloc((2 * k + 2) * sizeof(double));
+    double *previous = (double*)malloc(k * sizeof(double));
+    double *changed_iter = tracking ? (double*)malloc(max_iter * sizeof(double)) : NULL;
+    /* Buffers da troca esparsa (modo incremental). */
+    double *dsum = NULL, *dcnt = NULL, *entries = NULL, *all_entries = NULL;
+    long long *info = NULL;
+    int *gather_counts = NULL, *gather_displs = NULL;
+    unsigned char *touched = NULL;
+    if (incremental) {
+        dsum = (double*)malloc(k * sizeof(double));
+        dcnt = (double*)malloc(k * sizeof(double));
+        entries = (double*)malloc(3 * k * sizeof(double));
+        all_entries = (double*)malloc((size_t)3 * k * size * sizeof(double));
+        info = (long long*)malloc(2 * size * sizeof(long long));
+        gather_counts = (int*)malloc(size * sizeof(int));
+        gather_displs = (int*)malloc(size * sizeof(int));
+        touched = (unsigned char*)calloc(k, 1);
+    }
     
     MPI_Scatterv(data, sendcounts, displs, MPI_DOUBLE,
                  local_data, local_n, MPI_DOUBLE,
                  0, MPI_COMM_WORLD);
+    trace_span(&tr, TRACE_SCATTER, -1, tm);
     
     double start_time = get_time();
     
+    /* Por iteração, cada processo registra a parte local (assign), a troca
+       (reduce: MPI_Allreduce ou a troca esparsa de deltas, incluindo a
+       espera pelos processos mais lentos), o update e o MPI_Bcast do teste
+       de convergência; o rank 0 registra o SSE e as trocas globais. */
     int iter;
     for (iter = 0; iter < max_iter; iter++) {
-        double local_sse = 0.0;
-        assign_clusters(local_data, local_n, centroids, k, local_assign, &local_sse);
-        
-        double global_sse = 0.0;
-        MPI_Reduce(&local_sse, &global_sse, 1, MPI_DOUBLE, MPI_SUM, 0, MPI_COMM_WORLD);
-        
-        double *sum_local = (double*)calloc(k, sizeof(double));
-        int *cnt_local = (int*)calloc(k, sizeof(int));
-        
-        for (int i = 0; i < local_n; i++) {
-            int c = local_assign[i];
-            sum_local[c] += local_data[i];
-            cnt_local[c]++;
+        memcpy(previous, centroids, k * sizeof(double));
+        double *sum_global = acc_global;
+        double *cnt_global = acc_global + k;
+        long long changed;
+        double iter_sse = NAN;
+        tm = trace_mark(&tr);
+        if (incremental && iter > 0) {
+            int m = incremental_step_local(local_data, local_n, centroids, k, local_assign,
+                                           dsum, dcnt, entries, &changed);
+            tm = trace_span(&tr, TRACE_ASSIGN, iter, tm);
+            changed = exchange_deltas(m, changed, entries, all_entries, info,
+                                      gather_counts, gather_displs, size,
+                                      sum_global, cnt_global, touched);
+        } else {
+            lloyd_step_local(local_data, local_n, centroids, k, local_assign, acc_local);
+            tm = trace_span(&tr, TRACE_ASSIGN, iter, tm);
+            MPI_Allreduce(acc_local, acc_global, 2 * k + 2, MPI_DOUBLE, MPI_SUM, MPI_COMM_WORLD);
+            changed = (long long)acc_global[2 * k + 1];
+            iter_sse = acc_global[2 * k];
+            if (touched) memset(touched, 1, k);
         }
-        
-        double *sum_global = (double*)malloc(k * sizeof(double));
-        int *cnt_global = (int*)malloc(k * sizeof(int));
-        
-        MPI_Allreduce(sum_local, sum_global, k, MPI_DOUBLE, MPI_SUM, MPI_COMM_WORLD);
-        MPI_Allreduce(cnt_local, cnt_global, k, MPI_INT, MPI_SUM, MPI_COMM_WORLD);
+        tm = trace_span(&tr, TRACE_REDUCE, iter, tm);
+        if (changed_iter) changed_iter[iter] = (double)changed;
+        if (rank == 0) trace_iter(&tr, iter, iter_sse, local_assign ? (double)changed : -1.0);
         
         double max_delta = 0.0;
         for (int c = 0; c < k; c++) {
+            if (touched) {
+                /* Clusters sem delta mantêm o centróide; um que esvaziou
+                   tem a soma zerada (resíduo de arredondamento). */
+                if (!touched[c]) continue;
+                touched[c] = 0;
+                if (cnt_global[c] == 0) sum_global[c] = 0.0;
+            }
             if (cnt_global[c] > 0) {
                 double new_cent = sum_global[c] / cnt_global[c];
                 double delta = fabs(new_cent - centroids[c]);
@@ -151,13 +380,10 @@ int main(int argc, char **argv) {
             }
         }
         
-        free(sum_local);
-        free(cnt_local);
-        free(sum_global);
-        free(cnt_global);
-        
-        int converged = (max_delta < epsilon) ? 1 : 0;
+        int converged = (stop_on_labels ? changed == 0 : max_delta < epsilon) ? 1 : 0;
+        tm = trace_span(&tr, TRACE_UPDATE, iter, tm);
         MPI_Bcast(&converged, 1, MPI_INT, 0, MPI_COMM_WORLD);
+        trace_span(&tr, TRACE_BCAST, iter, tm);
         
         if (converged) {
             iter++;
@@ -168,60 +394,89 @@ int main(int argc, char **argv) {
     double end_time = get_time();
     double elapsed = (end_time - start_time) * 1000.0;
     
-    if (rank == 0) {
-        assign = (int*)malloc(n * sizeof(int));
+    int parallel_labels = assign_out && km1d_output_mode(assign_out) == KM1L_PACKED;
+    tm = trace_mark(&tr);
+    if (parallel_labels) {
+        write_labels_mpi(assign_out, local_assign, local_n, displs[rank], n, k, rank, size);
+        tm = trace_span(&tr, TRACE_WRITE, -1, tm);
+    } else if (assign_out) {
+        if (rank == 0) {
+            assign = (int*)malloc(n * sizeof(int));
+        }
+        MPI_Gatherv(local_assign, local_n, MPI_INT,
+                    assign, sendcounts, displs, MPI_INT,
+                    0, MPI_COMM_WORLD);
+        tm = trace_span(&tr, TRACE_GATHER, -1, tm);
     }
     
-    MPI_Gatherv(local_assign, local_n, MPI_INT,
-                assign, sendcounts, displs, MPI_INT,
-                0, MPI_COMM_WORLD);
-    
+    /* Mesmo SSE final de antes (atribuição da última iteração contra os
+       centróides atualizados), calculado em paralelo sem o vetor assign. */
+    double local_final = (iter > 0) ? final_sse_local(local_data, local_n, previous, centroids, k) : 0.0;
+    tm = trace_span(&tr, TRACE_FINAL, -1, tm);
     double final_sse = 0.0;
-    if (rank == 0) {
-        for (int i = 0; i < n; i++) {
-            double dist = fabs(data[i] - centroids[assign[i]]);
-            final_sse += dist * dist;
-        }
-    }
+    MPI_Reduce(&local_final, &final_sse, 1, MPI_DOUBLE, MPI_SUM, 0, MPI_COMM_WORLD);
+    trace_span(&tr, TRACE_REDUCE, -1, tm);
     
     if (rank == 0) {
-        printf("\n");
-        printf("K-means 1D (MPI)\n");
-        printf("Processos: %d\n", size);
-        printf("N=%d K=%d max_iter=%d eps=%e\n", n, k, max_iter, epsilon);
-        printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iter, final_sse, elapsed);
-        printf("\n");
-        
-        if (assign_out) {
-            FILE *f = fopen(assign_out, "w");
-            if (f) {
-                for (int i = 0; i < n; i++) {
-                    fprintf(f, "%d\n", assign[i]);
-                }
-                fclose(f);
+        if (json) {
+            char *list = tracking ? json_list_field("changed", changed_iter, iter) : NULL;
+            char *extra = (char*)malloc(64 + (list ? strlen(list) : 0));
+            snprintf(extra, 64 + (list ? strlen(list) : 0), "\"processes\": %d%s%s%s", size,
+                     list ? ", " : "", list ? list : "",
+                     tracking ? (stop_on_labels ? ", \"stop\": \"labels\"" : ", \"stop\": \"delta\"") : "");
+            print_json_result(incremental ? "mpi_incremental" : "mpi", n, k, max_iter, epsilon, iter,
+                              final_sse, elapsed, extra);
+            free(list);
+            free(extra);
+        } else {
+            printf("\n");
+            printf(incremental ? "K-means 1D (MPI, incremental)\n" : "K-means 1D (MPI)\n");
+            printf("Processos: %d\n", size);
+            printf("N=%d K=%d max_iter=%d eps=%e\n", n, k, max_iter, epsilon);
+            printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iter, final_sse, elapsed);
+            if (tracking) {
+                printf("Rótulos alterados por iteração:");
+                for (int it = 0; it < iter; it++) printf(" %.0f", changed_iter[it]);
+                printf("\n");
             }
+            printf("\n");
         }
         
-        if (cent_out) {
-            FILE *f = fopen(cent_out, "w");
-            if (f) {
-                for (int c = 0; c < k; c++) {
-                    fprintf(f, "%.6f\n", centroids[c]);
-                }
-                fclose(f);
-            }
+        tm = trace_mark(&tr);
+        if (!parallel_labels) {
+            write_labels_file(assign_out, assign, sizeof(int), n, k);
         }
+        write_centroids_file(cent_out, centroids, k);
+        trace_span(&tr, TRACE_WRITE, -1, tm);
         
         free(assign);
-        free(data);
+        dataset_close(&ds);
     }
     
     free(local_data);
     free(local_assign);
+    free(acc_local);
+    free(acc_global);
+    free(previous);
+    free(changed_iter);
+    free(dsum);
+    free(dcnt);
+    free(entries);
+    free(all_entries);
+    free(info);
+    free(gather_counts);
+    free(gather_displs);
+    free(touched);
     free(centroids);
     free(sendcounts);
     free(displs);
     
+    int ok = 1;
+    if (trace_path) {
+        ok = save_trace_mpi(&tr, incremental ? "mpi_incremental" : "mpi", n, k, rank, size);
+    }
+    trace_close(&tr);
+    
     MPI_Finalize();
-    return 0;
+    return ok ? 0 : 1;
 }
@@ -84,13 +84,19 @@ if [ ! -f "dados_pequeno.csv" ] || [ ! -f "dados_medio.csv" ] || [ ! -f "dados_g
     exit 1
 fi
 
+EXT=csv
+if [ -f "dados_pequeno.bin" ] && [ -f "dados_medio.bin" ] && [ -f "dados_grande.bin" ]; then
+    EXT=bin
+fi
+echo "Formato dos dados: $EXT"
+
 echo "======================================"
 echo "Dataset PEQUENO (N=10,000, K=4)"
 echo "======================================"
 for P in 1 2 4; do
     echo ""
     echo "--- MPI com $P processo(s) ---"
-    $USE_ARCH mpirun -np $P ./kmeans_1d_mpi dados_pequeno.csv centroides_pequeno.csv 50 0.000001 assign_mpi${P}_pequeno.csv centroids_mpi${P}_pequeno.csv
+    $USE_ARCH mpirun -np $P ./kmeans_1d_mpi dados_pequeno.$EXT centroides_pequeno.$EXT 50 0.000001 assign_mpi${P}_pequeno.csv centroids_mpi${P}_pequeno.csv
 done
 echo ""
 
@@ -100,7 +106,7 @@ echo "======================================"
 for P in 1 2 4 8; do
     echo ""
     echo "--- MPI com $P processo(s) ---"
-    $USE_ARCH mpirun -np $P ./kmeans_1d_mpi dados_medio.csv centroides_medio.csv 50 0.000001 assign_mpi${P}_medio.csv centroids_mpi${P}_medio.csv
+    $USE_ARCH mpirun -np $P ./kmeans_1d_mpi dados_medio.$EXT centroides_medio.$EXT 50 0.000001 assign_mpi${P}_medio.csv centroids_mpi${P}_medio.csv
 done
 echo ""
 
@@ -111,7 +117,7 @@ for P in 1 2 4 8 16; do
     if [ $P -le $NUM_CORES ]; then
         echo ""
         echo "--- MPI com $P processo(s) ---"
-        $USE_ARCH mpirun -np $P ./kmeans_1d_mpi dados_grande.csv centroides_grande.csv 50 0.000001 assign_mpi${P}_grande.csv centroids_mpi${P}_grande.csv
+        $USE_ARCH mpirun -np $P ./kmeans_1d_mpi dados_grande.$EXT centroides_grande.$EXT 50 0.000001 assign_mpi${P}_grande.csv centroids_mpi${P}_grande.csv
     fi
 done
 echo ""
@@ -1,95 +1,52 @@
 #!/usr/bin/env python3
 
-import matplotlib.pyplot as plt
-import numpy as np
-import subprocess
-import re
+import argparse
 import os
 import sys
 
-def run_tests_and_capture_results():
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bench import (DATASET_LABELS, ResultStore, counter_fields, describe_counters, format_table,
+                   render_figures, roofline_report, run_matrix)
+
+THREADS = [1, 2, 4, 8, 16]
+
+def run_benchmarks(repetitions, warmup, force):
     print("Executando testes de desempenho...")
     print("=" * 60)
     
-    try:
-        result = subprocess.run(['bash', 'run_tests.sh'], 
-                              capture_output=True, text=True, cwd='.')
-        
-        if result.returncode != 0:
-            print(f"Erro ao executar testes: {result.stderr}")
-            return None
-            
-        print("Testes executados com sucesso!")
-        return result.stdout
-        
-    except Exception as e:
-        print(f"Erro: {e}")
-        return None
-
-def parse_test_results(output):
-    print("Analisando resultados...")
-    
-    patterns = {
-        'iterations': r'Iterações:\s+(\d+)',
-        'sse': r'SSE final:\s+([\d.]+)',
-        'time': r'Tempo:\s+([\d.]+)\s+ms'
+    matrix = {
+        'warmup': warmup,
+        'repetitions': repetitions,
+        'runs': [{'backend': 'openmp', 'threads': THREADS}],
     }
+    with ResultStore() as store:
+        try:
+            records = run_matrix(matrix, store=store, force=force)
+        except (RuntimeError, FileNotFoundError) as e:
+            print(f"Erro ao executar testes: {e}")
+            return None
     
-    results = {
-        'Pequeno (N=10,000, K=4)': {'omp_1': {}, 'omp_2': {}, 'omp_4': {}, 'omp_8': {}, 'omp_16': {}},
-        'Médio (N=100,000, K=8)': {'omp_1': {}, 'omp_2': {}, 'omp_4': {}, 'omp_8': {}, 'omp_16': {}},
-        'Grande (N=1,000,000, K=16)': {'omp_1': {}, 'omp_2': {}, 'omp_4': {}, 'omp_8': {}, 'omp_16': {}}
-    }
-    
-    section_mapping = {
-        'PEQUENO': 'Pequeno (N=10,000, K=4)',
-        'MÉDIO': 'Médio (N=100,000, K=8)', 
-        'GRANDE': 'Grande (N=1,000,000, K=16)'
-    }
-    
-    config_mapping = {
-        'OpenMP (1 thread)': 'omp_1',
-        'OpenMP (2 threads)': 'omp_2', 
-        'OpenMP (4 threads)': 'omp_4',
-        'OpenMP (8 threads)': 'omp_8',
-        'OpenMP (16 threads)': 'omp_16'
-    }
-    
-    current_dataset = None
-    current_config = None
-    
-    lines = output.split('\n')
-    for line in lines:
-        line = line.strip()
-        
-        if 'Testando Dataset' in line:
-            for key, dataset in section_mapping.items():
-                if key in line:
-                    current_dataset = dataset
-                    break
-        
-        elif '---' in line and '---' in line:
-            for config_name, config_key in config_mapping.items():
-                if config_name in line:
-                    current_config = config_key
-                    break
-        
-        elif current_dataset and current_config:
-            for key, pattern in patterns.items():
-                match = re.search(pattern, line)
-                if match:
-                    value = float(match.group(1))
-                    if key not in results[current_dataset][current_config]:
-                        results[current_dataset][current_config][key] = value
+    print("Testes executados com sucesso!")
+    print(format_table(records))
+    return records
+
+def collect_results(records):
+    results = {label: {} for label in DATASET_LABELS.values()}
+    
+    for record in records:
+        results[DATASET_LABELS[record['dataset']]][f"omp_{record['threads']}"] = {
+            'time': record['stats']['median'],
+            'iqr': record['stats']['iqr'],
+            'sse': record['sse'],
+            'iterations': record['iterations'],
+            **counter_fields(record),
+        }
     
     return results
 
-def create_performance_charts(results):
-    print("Gerando gráficos...")
-    
+def performance_data(results):
     datasets = list(results.keys())
-    threads = [1, 2, 4, 8, 16]
-    colors = ['#2E86AB', '#A23B72', '#F18F01']
+    threads = THREADS
     
     time_data = {}
     speedup_data = {}
@@ -116,53 +73,24 @@ def create_performance_charts(results):
                 time_data[dataset_name].append(baseline_time)
                 speedup_data[dataset_name].append(1.0)
     
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-    
-    for i, dataset_name in enumerate(datasets):
-        times = time_data[dataset_name]
-        ax1.plot(threads, times, marker='o', linewidth=2, markersize=8, 
-                label=dataset_name, color=colors[i])
-
-    ax1.set_xlabel('Número de Threads', fontsize=12, fontweight='bold')
-    ax1.set_ylabel('Tempo de Execução (ms)', fontsize=12, fontweight='bold')
-    ax1.set_title('Tempo de Execução vs. Número de Threads', fontsize=14, fontweight='bold')
-    ax1.set_xticks(threads)
-    ax1.legend(fontsize=10)
-    ax1.grid(True, alpha=0.3)
-    
-    all_times = []
-    for times in time_data.values():
-        all_times.extend(times)
-    if any(t > 0 for t in all_times):
-        ax1.set_yscale('log')
-    
-    for i, dataset_name in enumerate(datasets):
-        speedups = speedup_data[dataset_name]
-        ax2.plot(threads, speedups, marker='s', linewidth=2, markersize=8,
-                label=dataset_name, color=colors[i])
-
-    ax2.plot(threads, threads, 'k--', linewidth=2, label='Speedup Ideal (Linear)', alpha=0.5)
-
-    ax2.set_xlabel('Número de Threads', fontsize=12, fontweight='bold')
-    ax2.set_ylabel('Speedup', fontsize=12, fontweight='bold')
-    ax2.set_title('Speedup vs. Número de Threads', fontsize=14, fontweight='bold')
-    ax2.set_xticks(threads)
-    ax2.legend(fontsize=10)
-    ax2.grid(True, alpha=0.3)
-
-    plt.tight_layout()
-    plt.savefig('performance_analysis_openmp.png', dpi=300, bbox_inches='tight')
-    print("Gráfico salvo: performance_analysis_openmp.png")
-    
     return time_data, speedup_data
 
+def create_performance_charts(records, dpi):
+    # Desenhado pelo pipeline do relatório (bench/report.py): processo
+    # separado no backend Agg, e só quando os dados do gráfico mudaram.
+    print("Gerando gráficos...")
+    status = render_figures(records, names=['openmp'], dpi=dpi)
+    if status['openmp'] != 'gerada':
+        print(f"performance_analysis_openmp.png: {status['openmp']}")
+    return status['openmp'] in ('gerada', 'inalterada')
+
 def print_analysis_report(results, time_data, speedup_data):
     print("\n" + "="*60)
     print("ANÁLISE DE DESEMPENHO - K-MEANS COM OPENMP")
     print("="*60)
     
     datasets = list(results.keys())
-    threads = [1, 2, 4, 8, 16]
+    threads = THREADS
     
     for dataset_name in datasets:
         print(f"\n {dataset_name}")
@@ -177,7 +105,9 @@ def print_analysis_report(results, time_data, speedup_data):
                 omp_sse = dataset_results[config_key].get('sse', 0)
                 omp_iter = dataset_results[config_key].get('iterations', 0)
                 speedup = speedup_data[dataset_name][i]
-                print(f"  OpenMP ({thread_count:2d}t): {omp_time:8.1f} ms (SSE: {omp_sse:.2f}, Iter: {omp_iter}, Speedup: {speedup:.2f}x)")
+                omp_iqr = dataset_results[config_key].get('iqr', 0)
+                print(f"  OpenMP ({thread_count:2d}t): {omp_time:8.1f} ms ±{omp_iqr:.1f} IQR (SSE: {omp_sse:.2f}, Iter: {omp_iter}, Speedup: {speedup:.2f}x)")
+                print(f"               {describe_counters(dataset_results[config_key])}")
         
         best_speedup = max(speedup_data[dataset_name])
         best_thread_idx = speedup_data[dataset_name].index(best_speedup)
@@ -195,33 +125,55 @@ def print_analysis_report(results, time_data, speedup_data):
 5. Eficiência diminui com muitas threads devido a overhead
 """)
 
+def print_roofline(records, path, dpi):
+    print("\n" + "="*60)
+    print("ROOFLINE (banda e pico de FLOPs medidos nesta máquina)")
+    print("="*60)
+    with ResultStore() as store:
+        try:
+            roofline_report(records, store, path, dpi=dpi)
+        except RuntimeError as e:
+            print(f"Roofline indisponível: {e}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Análise de desempenho da versão OpenMP")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--forcar', action='store_true',
+                        help="executa de novo mesmo com resultados recentes no banco")
+    parser.add_argument('--sem-roofline', action='store_true',
+                        help="não sonda a máquina nem gera o gráfico roofline")
+    parser.add_argument('--sem-graficos', action='store_true',
+                        help="só as tabelas em texto; não importa o matplotlib")
+    parser.add_argument('--dpi', type=int, default=150, help="resolução dos gráficos")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
     print("K-means OpenMP - Análise de Desempenho")
     print("=" * 60)
     
-    if not os.path.exists('run_tests.sh'):
-        print("Erro: Script run_tests.sh não encontrado!")
-        print("Certifique-se de estar na pasta openmp/")
-        sys.exit(1)
-    
-    test_output = run_tests_and_capture_results()
-    if not test_output:
+    records = run_benchmarks(args.repeticoes, args.warmup, args.forcar)
+    if not records:
         print("Falha ao executar testes!")
         sys.exit(1)
     
-    results = parse_test_results(test_output)
-    if not results:
-        print("Falha ao analisar resultados!")
-        sys.exit(1)
+    results = collect_results(records)
     
-    time_data, speedup_data = create_performance_charts(results)
+    time_data, speedup_data = performance_data(results)
+    charts = not args.sem_graficos and create_performance_charts(records, args.dpi)
     print_analysis_report(results, time_data, speedup_data)
+    if not args.sem_roofline:
+        print_roofline(records, None if args.sem_graficos else 'roofline_openmp.png', args.dpi)
     
     print("\nAnálise concluída com sucesso!")
+    if args.sem_graficos:
+        return
     print("Arquivos gerados:")
-    print("   - performance_analysis_openmp.png (gráficos)")
-    print("   - assign_omp*_*.csv (resultados de clustering)")
-    print("   - centroids_omp*_*.csv (centróides finais)")
+    if charts:
+        print("   - performance_analysis_openmp.png (gráficos)")
+    if not args.sem_roofline:
+        print("   - roofline_openmp.png (roofline)")
 
 if __name__ == "__main__":
     main()
@@ -1,146 +1,548 @@
+#define _POSIX_C_SOURCE 200809L
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
 #include <math.h>
+#include <float.h>
 #include <time.h>
 #include <omp.h>
 
-static int count_rows(const char *path){
-    FILE *f = fopen(path, "r");
-    if(!f){ fprintf(stderr,"Erro ao abrir %s\n", path); exit(1); }
-    int rows=0; char line[8192];
-    while(fgets(line,sizeof(line),f)){
-        int only_ws=1;
-        for(char *p=line; *p; p++){
-            if(*p!=' ' && *p!='\t' && *p!='\n' && *p!='\r'){ only_ws=0; break; }
-        }
-        if(!only_ws) rows++;
+#include "../common/kmeans_io.h"
+#include "../common/kmeans_cli.h"
+#include "../common/kmeans_trace.h"
+
+/* Acumuladores por thread, alocados uma vez: cada thread tem uma linha
+   [SSE, somas[K], contagens[K]] alinhada a 64 bytes (sem falso
+   compartilhamento entre threads vizinhas). */
+typedef struct {
+    double *rows;
+    int stride;         /* doubles por linha, múltiplo de 8 */
+    int threads;
+    const kmeans_trace *trace;  /* com --trace: marca o fim da atribuição em split */
+    double split;
+} thread_acc;
+
+static void acc_init(thread_acc *acc, int K){
+    acc->threads = omp_get_max_threads();
+    acc->trace = NULL;
+    acc->split = 0.0;
+    acc->stride = (1 + 2*K + 7) / 8 * 8;
+    void *p = NULL;
+    if(posix_memalign(&p, 64, (size_t)acc->threads * acc->stride * sizeof(double)) != 0){
+        fprintf(stderr,"Sem memoria para os acumuladores\n"); exit(1);
     }
-    fclose(f);
-    return rows;
+    acc->rows = (double*)p;
 }
 
-static double *read_csv_1col(const char *path, int *n_out){
-    int R = count_rows(path);
-    if(R<=0){ fprintf(stderr,"Arquivo vazio: %s\n", path); exit(1); }
-    double *A = (double*)malloc((size_t)R * sizeof(double));
-    if(!A){ fprintf(stderr,"Sem memoria para %d linhas\n", R); exit(1); }
-
-    FILE *f = fopen(path, "r");
-    if(!f){ fprintf(stderr,"Erro ao abrir %s\n", path); free(A); exit(1); }
-
-    char line[8192];
-    int r=0;
-    while(fgets(line,sizeof(line),f)){
-        int only_ws=1;
-        for(char *p=line; *p; p++){
-            if(*p!=' ' && *p!='\t' && *p!='\n' && *p!='\r'){ only_ws=0; break; }
+/* Passo de Lloyd fundido: cada thread atribui a sua parte de X e, no mesmo
+   laço, acumula SSE, somas e contagens na sua linha (X é lido uma vez por
+   iteração). As linhas são somadas por redução em árvore (log2 T rodadas
+   de pares, em ordem fixa), então o resultado não depende da ordem de
+   chegada das threads. assign só é escrito quando não é NULL; nesse caso
+   *changed recebe quantos rótulos mudaram. O total fica na linha 0. Com
+   rastreamento, acc->split marca o fim da atribuição (depois da barreira
+   do laço, antes da redução). */
+static double lloyd_step_1d(const double *X, const double *C, int *assign, int N, int K,
+                            thread_acc *acc, long long *changed){
+    long long moved = 0;
+    #pragma omp parallel num_threads(acc->threads)
+    {
+        int tid = omp_get_thread_num();
+        int nt = omp_get_num_threads();
+        double *row = acc->rows + (size_t)tid * acc->stride;
+        double *sum = row + 1;
+        double *cnt = row + 1 + K;
+        memset(row, 0, (size_t)(1 + 2*K) * sizeof(double));
+
+        double sse = 0.0;
+        #pragma omp for reduction(+:moved)
+        for(int i=0;i<N;i++){
+            double x = X[i];
+            int best = -1;
+            double bestd = 1e300;
+            for(int c=0;c<K;c++){
+                double diff = x - C[c];
+                double d = diff*diff;
+                if(d < bestd){ bestd = d; best = c; }
+            }
+            if(assign && assign[i] != best){ assign[i] = best; moved++; }
+            sse += bestd;
+            cnt[best] += 1.0;
+            sum[best] += x;
         }
-        if(only_ws) continue;
-
-        const char *delim = ",; \t";
-        char *tok = strtok(line, delim);
-        if(!tok){ fprintf(stderr,"Linha %d sem valor em %s\n", r+1, path); free(A); fclose(f); exit(1); }
-        A[r] = atof(tok);
-        r++;
-        if(r>R) break;
-    }
-    fclose(f);
-    *n_out = R;
-    return A;
-}
+        row[0] = sse;
+        #pragma omp master
+        acc->split = trace_mark(acc->trace);
 
-static void write_assign_csv(const char *path, const int *assign, int N){
-    if(!path) return;
-    FILE *f = fopen(path, "w");
-    if(!f){ fprintf(stderr,"Erro ao abrir %s para escrita\n", path); return; }
-    for(int i=0;i<N;i++) fprintf(f, "%d\n", assign[i]);
-    fclose(f);
+        for(int step=1; step<nt; step*=2){
+            #pragma omp barrier
+            if(tid % (2*step) == 0 && tid + step < nt){
+                const double *other = acc->rows + (size_t)(tid + step) * acc->stride;
+                for(int j=0;j<1+2*K;j++) row[j] += other[j];
+            }
+        }
+    }
+    *changed = moved;
+    return acc->rows[0];
 }
 
-static void write_centroids_csv(const char *path, const double *C, int K){
-    if(!path) return;
-    FILE *f = fopen(path, "w");
-    if(!f){ fprintf(stderr,"Erro ao abrir %s para escrita\n", path); return; }
-    for(int c=0;c<K;c++) fprintf(f, "%.6f\n", C[c]);
-    fclose(f);
+static void update_step_1d(const thread_acc *acc, double *C, int K, double x0){
+    const double *sum = acc->rows + 1;
+    const double *cnt = acc->rows + 1 + K;
+    for(int c=0;c<K;c++){
+        if(cnt[c] > 0) C[c] = sum[c] / cnt[c];
+        else           C[c] = x0;
+    }
 }
 
-static double assignment_step_1d(const double *X, const double *C, int *assign, int N, int K){
+/* tr (ou NULL) recebe, por iteração, a atribuição, a redução entre
+   threads, o update e o SSE/trocas. */
+static void kmeans_1d(const double *X, double *C, int *assign,
+                      int N, int K, int max_iter, double eps, kmeans_trace *tr,
+                      int *iters_out, double *sse_out)
+{
+    thread_acc acc;
+    acc_init(&acc, K);
+    acc.trace = tr;
+    /* Sem rótulo anterior: na primeira iteração todos os pontos "mudam". */
+    if(assign){
+        #pragma omp parallel for
+        for(int i=0;i<N;i++) assign[i] = -1;
+    }
+
+    double prev_sse = 1e300;
     double sse = 0.0;
-    #pragma omp parallel for reduction(+:sse)
-    for(int i=0;i<N;i++){
-        int best = -1;
-        double bestd = 1e300;
-        for(int c=0;c<K;c++){
-            double diff = X[i] - C[c];
-            double d = diff*diff;
-            if(d < bestd){ bestd = d; best = c; }
+    int it;
+    for(it=0; it<max_iter; it++){
+        long long moved = 0;
+        double tm = trace_mark(tr);
+        sse = lloyd_step_1d(X, C, assign, N, K, &acc, &moved);
+        trace_span_at(tr, TRACE_ASSIGN, it, tm, acc.split);
+        tm = trace_span(tr, TRACE_REDUCE, it, acc.split);
+        trace_iter(tr, it, sse, assign ? (double)moved : -1.0);
+        double rel = fabs(sse - prev_sse) / (prev_sse > 0.0 ? prev_sse : 1.0);
+        if(rel < eps){ it++; break; }
+        update_step_1d(&acc, C, K, X[0]);
+        trace_span(tr, TRACE_UPDATE, it, tm);
+        prev_sse = sse;
+    }
+    free(acc.rows);
+    *iters_out = it;
+    *sse_out = sse;
+}
+
+/* Passo de Lloyd de --float32: X em float32 e rótulos compactos
+   (km1d_label_bytes); x é promovido a double e SSE, somas e contagens
+   acumulam em double, com a mesma redução em árvore de lloyd_step_1d. */
+static double lloyd_step_f32(const float *X, const double *C, void *labels, int label_bytes,
+                             int N, int K, thread_acc *acc){
+    #pragma omp parallel num_threads(acc->threads)
+    {
+        int tid = omp_get_thread_num();
+        int nt = omp_get_num_threads();
+        double *row = acc->rows + (size_t)tid * acc->stride;
+        double *sum = row + 1;
+        double *cnt = row + 1 + K;
+        memset(row, 0, (size_t)(1 + 2*K) * sizeof(double));
+
+        double sse = 0.0;
+        #pragma omp for
+        for(int i=0;i<N;i++){
+            double x = (double)X[i];
+            int best = -1;
+            double bestd = 1e300;
+            for(int c=0;c<K;c++){
+                double diff = x - C[c];
+                double d = diff*diff;
+                if(d < bestd){ bestd = d; best = c; }
+            }
+            if(labels) km1d_label_set(labels, label_bytes, i, best);
+            sse += bestd;
+            cnt[best] += 1.0;
+            sum[best] += x;
+        }
+        row[0] = sse;
+
+        for(int step=1; step<nt; step*=2){
+            #pragma omp barrier
+            if(tid % (2*step) == 0 && tid + step < nt){
+                const double *other = acc->rows + (size_t)(tid + step) * acc->stride;
+                for(int j=0;j<1+2*K;j++) row[j] += other[j];
+            }
         }
-        assign[i] = best;
-        sse += bestd;
     }
-    return sse;
+    return acc->rows[0];
 }
 
-static void update_step_1d(const double *X, double *C, const int *assign, int N, int K){
-    double *sum = (double*)calloc((size_t)K, sizeof(double));
-    int *cnt = (int*)calloc((size_t)K, sizeof(int));
-    if(!sum || !cnt){ fprintf(stderr,"Sem memoria no update\n"); exit(1); }
+static void kmeans_1d_f32(const float *X, double *C, void *labels, int label_bytes,
+                          int N, int K, int max_iter, double eps,
+                          int *iters_out, double *sse_out)
+{
+    thread_acc acc;
+    acc_init(&acc, K);
+
+    double prev_sse = 1e300;
+    double sse = 0.0;
+    int it;
+    for(it=0; it<max_iter; it++){
+        sse = lloyd_step_f32(X, C, labels, label_bytes, N, K, &acc);
+        double rel = fabs(sse - prev_sse) / (prev_sse > 0.0 ? prev_sse : 1.0);
+        if(rel < eps){ it++; break; }
+        update_step_1d(&acc, C, K, (double)X[0]);
+        prev_sse = sse;
+    }
+    free(acc.rows);
+    *iters_out = it;
+    *sse_out = sse;
+}
 
-    #pragma omp parallel
+/* Passo de Lloyd sobre os valores distintos U com pesos W (--dedup): o
+   mesmo de lloyd_step_1d, com w·d no SSE, w·u na soma e w na contagem.
+   Como em serial/, U é crescente e cada thread acumula o cluster corrente
+   em registradores, descarregando na sua linha quando o rótulo muda. */
+static double lloyd_step_weighted(const double *U, const int64_t *W, const double *C, int *assign_u,
+                                  int64_t M, int K, thread_acc *acc){
+    #pragma omp parallel num_threads(acc->threads)
     {
-        double *sum_thread = (double*)calloc((size_t)K, sizeof(double));
-        int *cnt_thread = (int*)calloc((size_t)K, sizeof(int));
-        if(!sum_thread || !cnt_thread){ fprintf(stderr,"Sem memoria no update (thread)\n"); exit(1); }
-        
+        int tid = omp_get_thread_num();
+        int nt = omp_get_num_threads();
+        double *row = acc->rows + (size_t)tid * acc->stride;
+        double *sum = row + 1;
+        double *cnt = row + 1 + K;
+        memset(row, 0, (size_t)(1 + 2*K) * sizeof(double));
+
+        double sse = 0.0;
+        int run = -1;
+        double run_sum = 0.0, run_cnt = 0.0;
         #pragma omp for
-        for(int i=0;i<N;i++){
-            int a = assign[i];
-            cnt_thread[a] += 1;
-            sum_thread[a] += X[i];
+        for(int64_t j=0;j<M;j++){
+            double u = U[j];
+            double w = (double)W[j];
+            int best = -1;
+            double bestd = 1e300;
+            for(int c=0;c<K;c++){
+                double diff = u - C[c];
+                double d = diff*diff;
+                if(d < bestd){ bestd = d; best = c; }
+            }
+            if(assign_u) assign_u[j] = best;
+            sse += w * bestd;
+            if(best != run){
+                if(run >= 0){ sum[run] += run_sum; cnt[run] += run_cnt; }
+                run = best; run_sum = 0.0; run_cnt = 0.0;
+            }
+            run_sum += w * u;
+            run_cnt += w;
         }
-        
-        #pragma omp critical
-        {
-            for(int c=0; c<K; c++){
-                sum[c] += sum_thread[c];
-                cnt[c] += cnt_thread[c];
+        if(run >= 0){ sum[run] += run_sum; cnt[run] += run_cnt; }
+        row[0] = sse;
+
+        for(int step=1; step<nt; step*=2){
+            #pragma omp barrier
+            if(tid % (2*step) == 0 && tid + step < nt){
+                const double *other = acc->rows + (size_t)(tid + step) * acc->stride;
+                for(int j=0;j<1+2*K;j++) row[j] += other[j];
             }
         }
-        free(sum_thread);
-        free(cnt_thread);
     }
+    return acc->rows[0];
+}
+
+/* Lloyd sobre os valores distintos de X: mesmos rótulos e iterações de
+   kmeans_1d, SSE e centróides iguais a menos de arredondamento. */
+static void kmeans_1d_weighted(const dataset_unique *u, double *C, int *assign_u,
+                               int K, int max_iter, double eps, double x0,
+                               int *iters_out, double *sse_out)
+{
+    thread_acc acc;
+    acc_init(&acc, K);
+
+    double prev_sse = 1e300;
+    double sse = 0.0;
+    int it;
+    for(it=0; it<max_iter; it++){
+        sse = lloyd_step_weighted(u->values, u->weights, C, assign_u, u->m, K, &acc);
+        double rel = fabs(sse - prev_sse) / (prev_sse > 0.0 ? prev_sse : 1.0);
+        if(rel < eps){ it++; break; }
+        update_step_1d(&acc, C, K, x0);
+        prev_sse = sse;
+    }
+    free(acc.rows);
+    *iters_out = it;
+    *sse_out = sse;
+}
+
+/* Atribuição acelerada (Hamerly, 2010), a mesma de serial/: limites
+   superior/inferior por ponto, deslocamento por centróide e metade da
+   distância ao vizinho mais próximo. Os limites levam a folga `tol` e a poda
+   exige margem de tol, então rótulos, SSE e centróides são os do caminho sem
+   poda. Cada ponto só lê e escreve os próprios limites: o laço paralelo não
+   precisa de sincronização além da redução de thread_acc. */
+typedef struct {
+    double *upper, *lower;
+    int *label;
+    double *prev, *move, *half;
+    double tol;
+} hamerly_state;
+
+static void hamerly_init(hamerly_state *h, const double *X, const double *C, int N, int K){
+    h->upper = (double*)malloc((size_t)N * sizeof(double));
+    h->lower = (double*)malloc((size_t)N * sizeof(double));
+    h->label = (int*)malloc((size_t)N * sizeof(int));
+    h->prev = (double*)malloc((size_t)K * sizeof(double));
+    h->move = (double*)malloc((size_t)K * sizeof(double));
+    h->half = (double*)malloc((size_t)K * sizeof(double));
+    if(!h->upper || !h->lower || !h->label || !h->prev || !h->move || !h->half){
+        fprintf(stderr,"Sem memoria para os limites de Hamerly\n"); exit(1);
+    }
+    double xmax = 0.0, cmax = 0.0;
+    #pragma omp parallel for reduction(max:xmax)
+    for(int i=0;i<N;i++) if(fabs(X[i]) > xmax) xmax = fabs(X[i]);
+    for(int c=0;c<K;c++) if(fabs(C[c]) > cmax) cmax = fabs(C[c]);
+    h->tol = 16.0 * DBL_EPSILON * (xmax + (cmax > xmax ? cmax : xmax));
+}
 
+static void hamerly_free(hamerly_state *h){
+    free(h->upper); free(h->lower); free(h->label);
+    free(h->prev); free(h->move); free(h->half);
+}
+
+/* lloyd_step_1d com poda; first=1 na primeira iteração. Rótulos ficam em
+   h->label; *pruned recebe quantos pontos foram podados. */
+static double hamerly_step_1d(const double *X, const double *C, int N, int K, int first,
+                              hamerly_state *h, thread_acc *acc, long long *pruned){
+    const double tol = h->tol;
+    double m1 = 0.0, m2 = 0.0;
+    int imax = -1;
     for(int c=0;c<K;c++){
-        if(cnt[c] > 0) C[c] = sum[c] / (double)cnt[c];
-        else           C[c] = X[0];
+        h->move[c] = first ? 0.0 : fabs(C[c] - h->prev[c]);
+        if(h->move[c] > m1){ m2 = m1; m1 = h->move[c]; imax = c; }
+        else if(h->move[c] > m2) m2 = h->move[c];
+        double near = 1e300;
+        for(int j=0;j<K;j++){
+            if(j != c && fabs(C[c] - C[j]) < near) near = fabs(C[c] - C[j]);
+        }
+        h->half[c] = 0.5 * near - tol;
     }
-    free(sum); free(cnt);
+
+    long long skipped = 0;
+    #pragma omp parallel num_threads(acc->threads)
+    {
+        int tid = omp_get_thread_num();
+        int nt = omp_get_num_threads();
+        double *row = acc->rows + (size_t)tid * acc->stride;
+        double *sum = row + 1;
+        double *cnt = row + 1 + K;
+        memset(row, 0, (size_t)(1 + 2*K) * sizeof(double));
+
+        double sse = 0.0;
+        #pragma omp for reduction(+:skipped)
+        for(int i=0;i<N;i++){
+            double x = X[i];
+            int best = -1;
+            double bestd = 0.0;
+            int scan = first;
+            if(!first){
+                best = h->label[i];
+                double u = h->upper[i] + h->move[best] + tol;
+                double l = h->lower[i] - (best == imax ? m2 : m1) - tol;
+                double z = l > h->half[best] ? l : h->half[best];
+                double diff = x - C[best];
+                h->lower[i] = l;
+                if(!(u + tol < z)) u = fabs(diff) + tol;
+                h->upper[i] = u;
+                if(u + tol < z){ bestd = diff*diff; skipped++; }
+                else scan = 1;
+            }
+            if(scan){
+                double a1 = 1e300, a2 = 1e300;
+                best = -1;
+                bestd = 1e300;
+                for(int c=0;c<K;c++){
+                    double diff = x - C[c];
+                    double d = diff*diff;
+                    if(d < bestd){ bestd = d; best = c; }
+                    double ad = fabs(diff);
+                    if(ad < a1){ a2 = a1; a1 = ad; }
+                    else if(ad < a2) a2 = ad;
+                }
+                double ab = fabs(x - C[best]);
+                h->label[i] = best;
+                h->upper[i] = ab + tol;
+                h->lower[i] = (ab == a1 ? a2 : a1) - tol;
+            }
+            sse += bestd;
+            cnt[best] += 1.0;
+            sum[best] += x;
+        }
+        row[0] = sse;
+
+        for(int step=1; step<nt; step*=2){
+            #pragma omp barrier
+            if(tid % (2*step) == 0 && tid + step < nt){
+                const double *other = acc->rows + (size_t)(tid + step) * acc->stride;
+                for(int j=0;j<1+2*K;j++) row[j] += other[j];
+            }
+        }
+    }
+    memcpy(h->prev, C, (size_t)K * sizeof(double));
+    *pruned = skipped;
+    return acc->rows[0];
 }
 
-static void kmeans_1d(const double *X, double *C, int *assign,
-                      int N, int K, int max_iter, double eps,
-                      int *iters_out, double *sse_out)
+/* kmeans_1d com atribuição por Hamerly; assign é obrigatório e pruned[it]
+   recebe a fração de pontos podados em cada iteração. */
+static void kmeans_1d_hamerly(const double *X, double *C, int *assign,
+                              int N, int K, int max_iter, double eps,
+                              int *iters_out, double *sse_out, double *pruned)
 {
+    thread_acc acc;
+    acc_init(&acc, K);
+    hamerly_state h;
+    hamerly_init(&h, X, C, N, K);
+
     double prev_sse = 1e300;
     double sse = 0.0;
     int it;
     for(it=0; it<max_iter; it++){
-        sse = assignment_step_1d(X, C, assign, N, K);
+        long long skipped = 0;
+        sse = hamerly_step_1d(X, C, N, K, it == 0, &h, &acc, &skipped);
+        pruned[it] = (double)skipped / (double)N;
         double rel = fabs(sse - prev_sse) / (prev_sse > 0.0 ? prev_sse : 1.0);
         if(rel < eps){ it++; break; }
-        update_step_1d(X, C, assign, N, K);
+        update_step_1d(&acc, C, K, X[0]);
         prev_sse = sse;
     }
+    memcpy(assign, h.label, (size_t)N * sizeof(int));
+    hamerly_free(&h);
+    free(acc.rows);
     *iters_out = it;
     *sse_out = sse;
 }
 
+/* --dedup: ordena X uma vez (serial), colapsa valores repetidos e itera em
+   paralelo sobre os M distintos com pesos. O tempo inclui a deduplicação
+   (também informada à parte); os rótulos por ponto só são expandidos se
+   assign.csv for pedido. */
+static int main_dedup(const char *pathX, const char *pathC, int max_iter, double eps,
+                      const char *outAssign, const char *outCentroid, int json)
+{
+    int N = 0, K = 0;
+    dataset_1d dsX;
+    dataset_open(pathX, &dsX);
+    const double *X = dsX.data;
+    N = dsX.n;
+    double *C = dataset_read_copy(pathC, &K);
+    int num_threads = omp_get_max_threads();
+
+    double t0 = omp_get_wtime();
+    dataset_unique u;
+    dataset_unique_build(X, N, &u);
+    double t1 = omp_get_wtime();
+    int *assign_u = NULL;
+    if(outAssign){
+        assign_u = (int*)malloc((size_t)u.m * sizeof(int));
+        if(!assign_u){ fprintf(stderr,"Sem memoria para assign\n"); return 1; }
+    }
+    int iters = 0; double sse = 0.0;
+    kmeans_1d_weighted(&u, C, assign_u, K, max_iter, eps, X[0], &iters, &sse);
+    double t2 = omp_get_wtime();
+    double dedup_ms = (t1 - t0) * 1000.0;
+    double ms = (t2 - t0) * 1000.0;
+    double ratio = (double)N / (double)u.m;
+
+    if(json){
+        char extra[160];
+        snprintf(extra, sizeof(extra), "\"threads\": %d, \"unique\": %lld, \"dup_ratio\": %.6f, \"dedup_ms\": %.3f",
+                 num_threads, (long long)u.m, ratio, dedup_ms);
+        print_json_result("openmp_dedup", N, K, max_iter, eps, iters, sse, ms, extra);
+    } else {
+        printf("K-means 1D (OpenMP, valores distintos com pesos)\n");
+        printf("Threads: %d\n", num_threads);
+        printf("N=%d K=%d max_iter=%d eps=%g\n", N, K, max_iter, eps);
+        printf("Valores distintos: %lld (N/M = %.3f) | Deduplicação: %.1f ms\n",
+               (long long)u.m, ratio, dedup_ms);
+        printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+    }
+
+    if(outAssign){
+        int *assign = (int*)malloc((size_t)N * sizeof(int));
+        if(!assign){ fprintf(stderr,"Sem memoria para assign\n"); return 1; }
+        #pragma omp parallel for
+        for(int i=0;i<N;i++) assign[i] = assign_u[dataset_unique_index(&u, X[i])];
+        write_labels_file(outAssign, assign, sizeof(int), N, K);
+        free(assign);
+    }
+    write_centroids_file(outCentroid, C, K);
+
+    free(assign_u); dataset_unique_free(&u); dataset_close(&dsX); free(C);
+    return 0;
+}
+
+/* --float32: X em float32 e rótulos compactos. Informa os bytes de X e dos
+   rótulos e a economia em relação a double + int. */
+static int main_float32(const char *pathX, const char *pathC, int max_iter, double eps,
+                        const char *outAssign, const char *outCentroid, int json)
+{
+    int N = 0, K = 0;
+    dataset_1d_f32 dsX;
+    dataset_open_f32(pathX, &dsX);
+    const float *X = dsX.data;
+    N = dsX.n;
+    double *C = dataset_read_copy(pathC, &K);
+    int num_threads = omp_get_max_threads();
+    int label_bytes = km1d_label_bytes(K);
+    void *labels = NULL;
+    if(outAssign){
+        labels = malloc((size_t)N * (size_t)label_bytes);
+        if(!labels){ fprintf(stderr,"Sem memoria para assign\n"); return 1; }
+    }
+
+    double t0 = omp_get_wtime();
+    int iters = 0; double sse = 0.0;
+    kmeans_1d_f32(X, C, labels, label_bytes, N, K, max_iter, eps, &iters, &sse);
+    double t1 = omp_get_wtime();
+    double ms = (t1 - t0) * 1000.0;
+
+    double bytes = (double)N * (sizeof(float) + (labels ? (size_t)label_bytes : 0));
+    double bytes_f64 = (double)N * (sizeof(double) + (labels ? sizeof(int) : 0));
+    if(json){
+        char extra[192];
+        snprintf(extra, sizeof(extra),
+                 "\"threads\": %d, \"precision\": \"float32\", \"label_bytes\": %d, \"bytes\": %.0f, \"bytes_f64\": %.0f",
+                 num_threads, label_bytes, bytes, bytes_f64);
+        print_json_result("openmp_f32", N, K, max_iter, eps, iters, sse, ms, extra);
+    } else {
+        printf("K-means 1D (OpenMP, float32)\n");
+        printf("Threads: %d\n", num_threads);
+        printf("N=%d K=%d max_iter=%d eps=%g\n", N, K, max_iter, eps);
+        printf("Memória de X%s: %.1f MB (float64: %.1f MB, -%.0f%%) | rótulos de %d byte(s)\n",
+               labels ? " e rótulos" : "", bytes / 1e6, bytes_f64 / 1e6,
+               100.0 * (1.0 - bytes / bytes_f64), label_bytes);
+        printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+    }
+
+    write_labels_file(outAssign, labels, label_bytes, N, K);
+    write_centroids_file(outCentroid, C, K);
+
+    free(labels); dataset_close_f32(&dsX); free(C);
+    return 0;
+}
+
 int main(int argc, char **argv){
+    int json = take_flag(&argc, argv, "--json");
+    int hamerly = take_flag(&argc, argv, "--hamerly");
+    int dedup = take_flag(&argc, argv, "--dedup");
+    int f32 = take_flag(&argc, argv, "--float32");
+    const char *opt_trace = take_option(&argc, argv, "--trace");
     if(argc < 3){
-        printf("Uso: %s dados.csv centroides_iniciais.csv [max_iter=50] [eps=1e-4] [assign.csv] [centroids.csv]\n", argv[0]);
+        printf("Uso: %s dados.csv centroides_iniciais.csv [max_iter=50] [eps=1e-4] [assign.csv] [centroids.csv] "
+               "[--hamerly] [--dedup] [--float32] [--trace ARQUIVO] [--json]\n", argv[0]);
         printf("Obs: arquivos CSV com 1 coluna (1 valor por linha), sem cabeçalho.\n");
+        printf("     --hamerly poda distâncias com limites por ponto (resultado idêntico).\n");
+        printf("     --dedup itera sobre os valores distintos de X, com pesos (mesmos rótulos).\n");
+        printf("     --float32 guarda X em float32 e rótulos em uint8/uint16 (somas e SSE em double).\n");
+        printf("     --trace grava tempo por fase, SSE e trocas por iteração (.json: formato Chrome; senão JSON Lines).\n");
         return 1;
     }
     const char *pathX = argv[1];
@@ -154,29 +556,75 @@ int main(int argc, char **argv){
         fprintf(stderr,"Parâmetros inválidos: max_iter>0 e eps>0\n");
         return 1;
     }
+    if(hamerly + dedup + f32 > 1){
+        fprintf(stderr,"--hamerly, --dedup e --float32 não podem ser combinados\n");
+        return 1;
+    }
+    if(opt_trace && (hamerly || dedup || f32)){
+        fprintf(stderr,"--trace não pode ser combinado com --hamerly, --dedup ou --float32\n");
+        return 1;
+    }
+    if(dedup) return main_dedup(pathX, pathC, max_iter, eps, outAssign, outCentroid, json);
+    if(f32) return main_float32(pathX, pathC, max_iter, eps, outAssign, outCentroid, json);
 
+    kmeans_trace tr;
+    trace_open(&tr, opt_trace, 0);
+    double tm = trace_mark(&tr);
     int N=0, K=0;
-    double *X = read_csv_1col(pathX, &N);
-    double *C = read_csv_1col(pathC, &K);
-    int *assign = (int*)malloc((size_t)N * sizeof(int));
-    if(!assign){ fprintf(stderr,"Sem memoria para assign\n"); free(X); free(C); return 1; }
+    dataset_1d dsX;
+    dataset_open(pathX, &dsX);
+    const double *X = dsX.data;
+    N = dsX.n;
+    double *C = dataset_read_copy(pathC, &K);
+    trace_span(&tr, TRACE_LOAD, -1, tm);
+    /* Rótulos só existem quando pedidos (Hamerly e o --trace, que conta
+       as trocas, precisam deles sempre). */
+    int *assign = NULL;
+    double *pruned = NULL;
+    if(outAssign || hamerly || opt_trace){
+        assign = (int*)malloc((size_t)N * sizeof(int));
+        if(!assign){ fprintf(stderr,"Sem memoria para assign\n"); dataset_close(&dsX); free(C); return 1; }
+    }
+    if(hamerly){
+        pruned = (double*)malloc((size_t)max_iter * sizeof(double));
+        if(!pruned){ fprintf(stderr,"Sem memoria\n"); return 1; }
+    }
 
     int num_threads = omp_get_max_threads();
     
     double t0 = omp_get_wtime();
     int iters = 0; double sse = 0.0;
-    kmeans_1d(X, C, assign, N, K, max_iter, eps, &iters, &sse);
+    if(hamerly) kmeans_1d_hamerly(X, C, assign, N, K, max_iter, eps, &iters, &sse, pruned);
+    else        kmeans_1d(X, C, assign, N, K, max_iter, eps, opt_trace ? &tr : NULL, &iters, &sse);
     double t1 = omp_get_wtime();
     double ms = (t1 - t0) * 1000.0;
 
-    printf("K-means 1D (OpenMP)\n");
-    printf("Threads: %d\n", num_threads);
-    printf("N=%d K=%d max_iter=%d eps=%g\n", N, K, max_iter, eps);
-    printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+    if(json){
+        char *list = hamerly ? json_list_field("pruned", pruned, iters) : NULL;
+        char *extra = (char*)malloc(64 + (list ? strlen(list) : 0));
+        if(!extra){ fprintf(stderr,"Sem memoria\n"); return 1; }
+        sprintf(extra, "\"threads\": %d%s%s", num_threads, list ? ", " : "", list ? list : "");
+        print_json_result(hamerly ? "openmp_hamerly" : "openmp", N, K, max_iter, eps, iters, sse, ms, extra);
+        free(list); free(extra);
+    } else {
+        printf(hamerly ? "K-means 1D (OpenMP, Hamerly)\n" : "K-means 1D (OpenMP)\n");
+        printf("Threads: %d\n", num_threads);
+        printf("N=%d K=%d max_iter=%d eps=%g\n", N, K, max_iter, eps);
+        printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+        if(hamerly){
+            printf("Pontos podados por iteração:");
+            for(int it=0; it<iters; it++) printf(" %.1f%%", 100.0 * pruned[it]);
+            printf("\n");
+        }
+    }
 
-    write_assign_csv(outAssign, assign, N);
-    write_centroids_csv(outCentroid, C, K);
+    tm = trace_mark(&tr);
+    write_labels_file(outAssign, assign, sizeof(int), N, K);
+    write_centroids_file(outCentroid, C, K);
+    trace_span(&tr, TRACE_WRITE, -1, tm);
+    int ok = trace_save(&tr, tr.ev, tr.n, "openmp", N, K, 1, num_threads);
+    trace_close(&tr);
 
-    free(assign); free(X); free(C);
-    return 0;
+    free(assign); free(pruned); dataset_close(&dsX); free(C);
+    return ok ? 0 : 1;
 }
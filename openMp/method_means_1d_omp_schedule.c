@@ -1,3 +1,4 @@
+#define _POSIX_C_SOURCE 200809L
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
@@ -5,141 +6,109 @@
 #include <time.h>
 #include <omp.h>
 
-static int count_rows(const char *path){
-    FILE *f = fopen(path, "r");
-    if(!f){ fprintf(stderr,"Erro ao abrir %s\n", path); exit(1); }
-    int rows=0; char line[8192];
-    while(fgets(line,sizeof(line),f)){
-        int only_ws=1;
-        for(char *p=line; *p; p++){
-            if(*p!=' ' && *p!='\t' && *p!='\n' && *p!='\r'){ only_ws=0; break; }
-        }
-        if(!only_ws) rows++;
-    }
-    fclose(f);
-    return rows;
-}
-
-static double *read_csv_1col(const char *path, int *n_out){
-    int R = count_rows(path);
-    if(R<=0){ fprintf(stderr,"Arquivo vazio: %s\n", path); exit(1); }
-    double *A = (double*)malloc((size_t)R * sizeof(double));
-    if(!A){ fprintf(stderr,"Sem memoria para %d linhas\n", R); exit(1); }
-
-    FILE *f = fopen(path, "r");
-    if(!f){ fprintf(stderr,"Erro ao abrir %s\n", path); free(A); exit(1); }
-
-    char line[8192];
-    int r=0;
-    while(fgets(line,sizeof(line),f)){
-        int only_ws=1;
-        for(char *p=line; *p; p++){
-            if(*p!=' ' && *p!='\t' && *p!='\n' && *p!='\r'){ only_ws=0; break; }
-        }
-        if(only_ws) continue;
-
-        const char *delim = ",; \t";
-        char *tok = strtok(line, delim);
-        if(!tok){ fprintf(stderr,"Linha %d sem valor em %s\n", r+1, path); free(A); fclose(f); exit(1); }
-        A[r] = atof(tok);
-        r++;
-        if(r>R) break;
+#include "../common/kmeans_io.h"
+#include "../common/kmeans_cli.h"
+
+/* Acumuladores por thread, alocados uma vez: cada thread tem uma linha
+   [SSE, somas[K], contagens[K]] alinhada a 64 bytes (sem falso
+   compartilhamento entre threads vizinhas). */
+typedef struct {
+    double *rows;
+    int stride;         /* doubles por linha, múltiplo de 8 */
+    int threads;
+} thread_acc;
+
+static void acc_init(thread_acc *acc, int K){
+    acc->threads = omp_get_max_threads();
+    acc->stride = (1 + 2*K + 7) / 8 * 8;
+    void *p = NULL;
+    if(posix_memalign(&p, 64, (size_t)acc->threads * acc->stride * sizeof(double)) != 0){
+        fprintf(stderr,"Sem memoria para os acumuladores\n"); exit(1);
     }
-    fclose(f);
-    *n_out = R;
-    return A;
+    acc->rows = (double*)p;
 }
 
-static void write_assign_csv(const char *path, const int *assign, int N){
-    if(!path) return;
-    FILE *f = fopen(path, "w");
-    if(!f){ fprintf(stderr,"Erro ao abrir %s para escrita\n", path); return; }
-    for(int i=0;i<N;i++) fprintf(f, "%d\n", assign[i]);
-    fclose(f);
-}
-
-static void write_centroids_csv(const char *path, const double *C, int K){
-    if(!path) return;
-    FILE *f = fopen(path, "w");
-    if(!f){ fprintf(stderr,"Erro ao abrir %s para escrita\n", path); return; }
-    for(int c=0;c<K;c++) fprintf(f, "%.6f\n", C[c]);
-    fclose(f);
-}
-
-static double assignment_step_1d_runtime(const double *X, const double *C, int *assign, int N, int K){
-    double sse = 0.0;
-    #pragma omp parallel for schedule(runtime) reduction(+:sse)
-    for(int i=0;i<N;i++){
-        int best = -1;
-        double bestd = 1e300;
-        for(int c=0;c<K;c++){
-            double diff = X[i] - C[c];
-            double d = diff*diff;
-            if(d < bestd){ bestd = d; best = c; }
-        }
-        assign[i] = best;
-        sse += bestd;
-    }
-    return sse;
-}
-
-static void update_step_1d(const double *X, double *C, const int *assign, int N, int K){
-    double *sum = (double*)calloc((size_t)K, sizeof(double));
-    int *cnt = (int*)calloc((size_t)K, sizeof(int));
-    if(!sum || !cnt){ fprintf(stderr,"Sem memoria no update\n"); exit(1); }
-
-    #pragma omp parallel
+/* Passo de Lloyd fundido: cada thread atribui a sua parte de X e, no mesmo
+   laço, acumula SSE, somas e contagens na sua linha (X é lido uma vez por
+   iteração). As linhas são somadas por redução em árvore (log2 T rodadas
+   de pares, em ordem fixa), então o resultado não depende da ordem de
+   chegada das threads. assign só é escrito quando não é NULL. O total
+   fica na linha 0. */
+static double lloyd_step_1d_runtime(const double *X, const double *C, int *assign, int N, int K,
+                                    thread_acc *acc){
+    #pragma omp parallel num_threads(acc->threads)
     {
-        double *sum_thread = (double*)calloc((size_t)K, sizeof(double));
-        int *cnt_thread = (int*)calloc((size_t)K, sizeof(int));
-        if(!sum_thread || !cnt_thread){ fprintf(stderr,"Sem memoria no update (thread)\n"); exit(1); }
-        
-        #pragma omp for
+        int tid = omp_get_thread_num();
+        int nt = omp_get_num_threads();
+        double *row = acc->rows + (size_t)tid * acc->stride;
+        double *sum = row + 1;
+        double *cnt = row + 1 + K;
+        memset(row, 0, (size_t)(1 + 2*K) * sizeof(double));
+
+        double sse = 0.0;
+        #pragma omp for schedule(runtime)
         for(int i=0;i<N;i++){
-            int a = assign[i];
-            cnt_thread[a] += 1;
-            sum_thread[a] += X[i];
+            double x = X[i];
+            int best = -1;
+            double bestd = 1e300;
+            for(int c=0;c<K;c++){
+                double diff = x - C[c];
+                double d = diff*diff;
+                if(d < bestd){ bestd = d; best = c; }
+            }
+            if(assign) assign[i] = best;
+            sse += bestd;
+            cnt[best] += 1.0;
+            sum[best] += x;
         }
-        
-        #pragma omp critical
-        {
-            for(int c=0; c<K; c++){
-                sum[c] += sum_thread[c];
-                cnt[c] += cnt_thread[c];
+        row[0] = sse;
+
+        for(int step=1; step<nt; step*=2){
+            #pragma omp barrier
+            if(tid % (2*step) == 0 && tid + step < nt){
+                const double *other = acc->rows + (size_t)(tid + step) * acc->stride;
+                for(int j=0;j<1+2*K;j++) row[j] += other[j];
             }
         }
-        free(sum_thread);
-        free(cnt_thread);
     }
+    return acc->rows[0];
+}
 
+static void update_step_1d(const thread_acc *acc, double *C, int K, double x0){
+    const double *sum = acc->rows + 1;
+    const double *cnt = acc->rows + 1 + K;
     for(int c=0;c<K;c++){
-        if(cnt[c] > 0) C[c] = sum[c] / (double)cnt[c];
-        else           C[c] = X[0];
+        if(cnt[c] > 0) C[c] = sum[c] / cnt[c];
+        else           C[c] = x0;
     }
-    free(sum); free(cnt);
 }
 
 static void kmeans_1d(const double *X, double *C, int *assign,
                       int N, int K, int max_iter, double eps,
                       int *iters_out, double *sse_out)
 {
+    thread_acc acc;
+    acc_init(&acc, K);
+
     double prev_sse = 1e300;
     double sse = 0.0;
     int it;
     for(it=0; it<max_iter; it++){
-        sse = assignment_step_1d_runtime(X, C, assign, N, K);
+        sse = lloyd_step_1d_runtime(X, C, assign, N, K, &acc);
         double rel = fabs(sse - prev_sse) / (prev_sse > 0.0 ? prev_sse : 1.0);
         if(rel < eps){ it++; break; }
-        update_step_1d(X, C, assign, N, K);
+        update_step_1d(&acc, C, K, X[0]);
         prev_sse = sse;
     }
+    free(acc.rows);
     *iters_out = it;
     *sse_out = sse;
 }
 
 int main(int argc, char **argv){
+    int json = take_flag(&argc, argv, "--json");
     if(argc < 3){
-        printf("Uso: %s dados.csv centroides_iniciais.csv [max_iter=50] [eps=1e-4] [assign.csv] [centroids.csv]\n", argv[0]);
+        printf("Uso: %s dados.csv centroides_iniciais.csv [max_iter=50] [eps=1e-4] [assign.csv] [centroids.csv] [--json]\n", argv[0]);
         printf("Obs: arquivos CSV com 1 coluna (1 valor por linha), sem cabeçalho.\n");
         return 1;
     }
@@ -156,10 +125,17 @@ int main(int argc, char **argv){
     }
 
     int N=0, K=0;
-    double *X = read_csv_1col(pathX, &N);
-    double *C = read_csv_1col(pathC, &K);
-    int *assign = (int*)malloc((size_t)N * sizeof(int));
-    if(!assign){ fprintf(stderr,"Sem memoria para assign\n"); free(X); free(C); return 1; }
+    dataset_1d dsX;
+    dataset_open(pathX, &dsX);
+    const double *X = dsX.data;
+    N = dsX.n;
+    double *C = dataset_read_copy(pathC, &K);
+    /* Rótulos só existem quando pedidos. */
+    int *assign = NULL;
+    if(outAssign){
+        assign = (int*)malloc((size_t)N * sizeof(int));
+        if(!assign){ fprintf(stderr,"Sem memoria para assign\n"); dataset_close(&dsX); free(C); return 1; }
+    }
 
     int num_threads = omp_get_max_threads();
     char *schedule_type = getenv("OMP_SCHEDULE");
@@ -170,15 +146,22 @@ int main(int argc, char **argv){
     double t1 = omp_get_wtime();
     double ms = (t1 - t0) * 1000.0;
 
-    printf("K-means 1D (OpenMP Schedule)\n");
-    printf("Threads: %d | Schedule: %s\n", num_threads, schedule_type ? schedule_type : "default");
-    printf("N=%d K=%d max_iter=%d eps=%g\n", N, K, max_iter, eps);
-    printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+    if(json){
+        char extra[160];
+        snprintf(extra, sizeof(extra), "\"threads\": %d, \"schedule\": \"%.100s\"",
+                 num_threads, schedule_type ? schedule_type : "default");
+        print_json_result("openmp_schedule", N, K, max_iter, eps, iters, sse, ms, extra);
+    } else {
+        printf("K-means 1D (OpenMP Schedule)\n");
+        printf("Threads: %d | Schedule: %s\n", num_threads, schedule_type ? schedule_type : "default");
+        printf("N=%d K=%d max_iter=%d eps=%g\n", N, K, max_iter, eps);
+        printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+    }
 
-    write_assign_csv(outAssign, assign, N);
-    write_centroids_csv(outCentroid, C, K);
+    write_labels_file(outAssign, assign, sizeof(int), N, K);
+    write_centroids_file(outCentroid, C, K);
 
-    free(assign); free(X); free(C);
+    free(assign); dataset_close(&dsX); free(C);
     return 0;
 }
 
@@ -92,6 +92,12 @@ if [ ! -f "dados_pequeno.csv" ] || [ ! -f "dados_medio.csv" ] || [ ! -f "dados_g
 fi
 echo "Datasets encontrados"
 
+EXT=csv
+if [ -f "dados_pequeno.bin" ] && [ -f "dados_medio.bin" ] && [ -f "dados_grande.bin" ]; then
+    EXT=bin
+fi
+echo "Formato dos dados: $EXT"
+
 echo ""
 echo "======================================"
 echo "Testando Dataset PEQUENO (N=10,000, K=4)"
@@ -100,27 +106,27 @@ echo "======================================"
 echo ""
 echo "--- OpenMP (1 thread) ---"
 export OMP_NUM_THREADS=1
-./kmeans_1d_omp dados_pequeno.csv centroides_pequeno.csv 50 0.000001 assign_omp1_pequeno.csv centroids_omp1_pequeno.csv
+./kmeans_1d_omp dados_pequeno.$EXT centroides_pequeno.$EXT 50 0.000001 assign_omp1_pequeno.csv centroids_omp1_pequeno.csv
 
 echo ""
 echo "--- OpenMP (2 threads) ---"
 export OMP_NUM_THREADS=2
-./kmeans_1d_omp dados_pequeno.csv centroides_pequeno.csv 50 0.000001 assign_omp2_pequeno.csv centroids_omp2_pequeno.csv
+./kmeans_1d_omp dados_pequeno.$EXT centroides_pequeno.$EXT 50 0.000001 assign_omp2_pequeno.csv centroids_omp2_pequeno.csv
 
 echo ""
 echo "--- OpenMP (4 threads) ---"
 export OMP_NUM_THREADS=4
-./kmeans_1d_omp dados_pequeno.csv centroides_pequeno.csv 50 0.000001 assign_omp4_pequeno.csv centroids_omp4_pequeno.csv
+./kmeans_1d_omp dados_pequeno.$EXT centroides_pequeno.$EXT 50 0.000001 assign_omp4_pequeno.csv centroids_omp4_pequeno.csv
 
 echo ""
 echo "--- OpenMP (8 threads) ---"
 export OMP_NUM_THREADS=8
-./kmeans_1d_omp dados_pequeno.csv centroides_pequeno.csv 50 0.000001 assign_omp8_pequeno.csv centroids_omp8_pequeno.csv
+./kmeans_1d_omp dados_pequeno.$EXT centroides_pequeno.$EXT 50 0.000001 assign_omp8_pequeno.csv centroids_omp8_pequeno.csv
 
 echo ""
 echo "--- OpenMP (16 threads) ---"
 export OMP_NUM_THREADS=16
-./kmeans_1d_omp dados_pequeno.csv centroides_pequeno.csv 50 0.000001 assign_omp16_pequeno.csv centroids_omp16_pequeno.csv
+./kmeans_1d_omp dados_pequeno.$EXT centroides_pequeno.$EXT 50 0.000001 assign_omp16_pequeno.csv centroids_omp16_pequeno.csv
 
 echo ""
 echo "======================================"
@@ -130,27 +136,27 @@ echo "======================================"
 echo ""
 echo "--- OpenMP (1 thread) ---"
 export OMP_NUM_THREADS=1
-./kmeans_1d_omp dados_medio.csv centroides_medio.csv 50 0.000001 assign_omp1_medio.csv centroids_omp1_medio.csv
+./kmeans_1d_omp dados_medio.$EXT centroides_medio.$EXT 50 0.000001 assign_omp1_medio.csv centroids_omp1_medio.csv
 
 echo ""
 echo "--- OpenMP (2 threads) ---"
 export OMP_NUM_THREADS=2
-./kmeans_1d_omp dados_medio.csv centroides_medio.csv 50 0.000001 assign_omp2_medio.csv centroids_omp2_medio.csv
+./kmeans_1d_omp dados_medio.$EXT centroides_medio.$EXT 50 0.000001 assign_omp2_medio.csv centroids_omp2_medio.csv
 
 echo ""
 echo "--- OpenMP (4 threads) ---"
 export OMP_NUM_THREADS=4
-./kmeans_1d_omp dados_medio.csv centroides_medio.csv 50 0.000001 assign_omp4_medio.csv centroids_omp4_medio.csv
+./kmeans_1d_omp dados_medio.$EXT centroides_medio.$EXT 50 0.000001 assign_omp4_medio.csv centroids_omp4_medio.csv
 
 echo ""
 echo "--- OpenMP (8 threads) ---"
 export OMP_NUM_THREADS=8
-./kmeans_1d_omp dados_medio.csv centroides_medio.csv 50 0.000001 assign_omp8_medio.csv centroids_omp8_medio.csv
+./kmeans_1d_omp dados_medio.$EXT centroides_medio.$EXT 50 0.000001 assign_omp8_medio.csv centroids_omp8_medio.csv
 
 echo ""
 echo "--- OpenMP (16 threads) ---"
 export OMP_NUM_THREADS=16
-./kmeans_1d_omp dados_medio.csv centroides_medio.csv 50 0.000001 assign_omp16_medio.csv centroids_omp16_medio.csv
+./kmeans_1d_omp dados_medio.$EXT centroides_medio.$EXT 50 0.000001 assign_omp16_medio.csv centroids_omp16_medio.csv
 
 echo ""
 echo "======================================"
@@ -160,27 +166,27 @@ echo "======================================"
 echo ""
 echo "--- OpenMP (1 thread) ---"
 export OMP_NUM_THREADS=1
-./kmeans_1d_omp dados_grande.csv centroides_grande.csv 50 0.000001 assign_omp1_grande.csv centroids_omp1_grande.csv
+./kmeans_1d_omp dados_grande.$EXT centroides_grande.$EXT 50 0.000001 assign_omp1_grande.csv centroids_omp1_grande.csv
 
 echo ""
 echo "--- OpenMP (2 threads) ---"
 export OMP_NUM_THREADS=2
-./kmeans_1d_omp dados_grande.csv centroides_grande.csv 50 0.000001 assign_omp2_grande.csv centroids_omp2_grande.csv
+./kmeans_1d_omp dados_grande.$EXT centroides_grande.$EXT 50 0.000001 assign_omp2_grande.csv centroids_omp2_grande.csv
 
 echo ""
 echo "--- OpenMP (4 threads) ---"
 export OMP_NUM_THREADS=4
-./kmeans_1d_omp dados_grande.csv centroides_grande.csv 50 0.000001 assign_omp4_grande.csv centroids_omp4_grande.csv
+./kmeans_1d_omp dados_grande.$EXT centroides_grande.$EXT 50 0.000001 assign_omp4_grande.csv centroids_omp4_grande.csv
 
 echo ""
 echo "--- OpenMP (8 threads) ---"
 export OMP_NUM_THREADS=8
-./kmeans_1d_omp dados_grande.csv centroides_grande.csv 50 0.000001 assign_omp8_grande.csv centroids_omp8_grande.csv
+./kmeans_1d_omp dados_grande.$EXT centroides_grande.$EXT 50 0.000001 assign_omp8_grande.csv centroids_omp8_grande.csv
 
 echo ""
 echo "--- OpenMP (16 threads) ---"
 export OMP_NUM_THREADS=16
-./kmeans_1d_omp dados_grande.csv centroides_grande.csv 50 0.000001 assign_omp16_grande.csv centroids_omp16_grande.csv
+./kmeans_1d_omp dados_grande.$EXT centroides_grande.$EXT 50 0.000001 assign_omp16_grande.csv centroids_omp16_grande.csv
 
 echo ""
 echo "======================================"
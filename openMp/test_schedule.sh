@@ -61,6 +61,11 @@ if [ ! -f "dados_grande.csv" ]; then
     exit 1
 fi
 
+EXT=csv
+if [ -f "dados_grande.bin" ]; then
+    EXT=bin
+fi
+
 for THREADS in 1 2 4 8 16; do
     export OMP_NUM_THREADS=$THREADS
     
@@ -72,22 +77,22 @@ for THREADS in 1 2 4 8 16; do
     
     echo "--- Schedule: static, chunk=1000 ---"
     export OMP_SCHEDULE="static,1000"
-    ./kmeans_schedule dados_grande.csv centroides_grande.csv 50 0.000001
+    ./kmeans_schedule dados_grande.$EXT centroides_grande.$EXT 50 0.000001
     echo ""
     
     echo "--- Schedule: static, chunk=10000 ---"
     export OMP_SCHEDULE="static,10000"
-    ./kmeans_schedule dados_grande.csv centroides_grande.csv 50 0.000001
+    ./kmeans_schedule dados_grande.$EXT centroides_grande.$EXT 50 0.000001
     echo ""
     
     echo "--- Schedule: dynamic, chunk=1000 ---"
     export OMP_SCHEDULE="dynamic,1000"
-    ./kmeans_schedule dados_grande.csv centroides_grande.csv 50 0.000001
+    ./kmeans_schedule dados_grande.$EXT centroides_grande.$EXT 50 0.000001
     echo ""
     
     echo "--- Schedule: guided ---"
     export OMP_SCHEDULE="guided"
-    ./kmeans_schedule dados_grande.csv centroides_grande.csv 50 0.000001
+    ./kmeans_schedule dados_grande.$EXT centroides_grande.$EXT 50 0.000001
     echo ""
 done
 
@@ -76,7 +76,7 @@ echo "======================================"
 echo "Criando links simbólicos..."
 echo "======================================"
 
-for dataset in dados_*.csv centroides_*.csv; do
+for dataset in dados_*.csv centroides_*.csv dados_*.bin centroides_*.bin; do
     if [ -f "$dataset" ]; then
         if [ ! -e "serial/$dataset" ]; then
             ln -sf "../$dataset" "serial/$dataset"
@@ -89,6 +89,12 @@ done
 
 echo "Links criados em serial/ e openmp/"
 
+EXT=csv
+if [ -f "dados_pequeno.bin" ] && [ -f "dados_medio.bin" ] && [ -f "dados_grande.bin" ]; then
+    EXT=bin
+fi
+echo "Formato dos dados: $EXT"
+
 echo ""
 echo "======================================"
 echo "Compilando versões..."
@@ -131,15 +137,15 @@ cd "$PROJECT_ROOT/serial"
 
 echo ""
 echo "Dataset PEQUENO (N=10,000, K=4)"
-./kmeans_1d_serial dados_pequeno.csv centroides_pequeno.csv 50 0.000001 assign_serial_pequeno.csv centroids_serial_pequeno.csv
+./kmeans_1d_serial dados_pequeno.$EXT centroides_pequeno.$EXT 50 0.000001 assign_serial_pequeno.csv centroids_serial_pequeno.csv
 
 echo ""
 echo "Dataset MÉDIO (N=100,000, K=8)"
-./kmeans_1d_serial dados_medio.csv centroides_medio.csv 50 0.000001 assign_serial_medio.csv centroids_serial_medio.csv
+./kmeans_1d_serial dados_medio.$EXT centroides_medio.$EXT 50 0.000001 assign_serial_medio.csv centroids_serial_medio.csv
 
 echo ""
 echo "Dataset GRANDE (N=1,000,000, K=16)"
-./kmeans_1d_serial dados_grande.csv centroides_grande.csv 50 0.000001 assign_serial_grande.csv centroids_serial_grande.csv
+./kmeans_1d_serial dados_grande.$EXT centroides_grande.$EXT 50 0.000001 assign_serial_grande.csv centroids_serial_grande.csv
 
 echo ""
 echo "======================================"
@@ -157,15 +163,15 @@ for THREADS in 1 2 4 8 16; do
     
     echo ""
     echo "Dataset PEQUENO (N=10,000, K=4)"
-    ./kmeans_1d_omp dados_pequeno.csv centroides_pequeno.csv 50 0.000001 assign_omp${THREADS}_pequeno.csv centroids_omp${THREADS}_pequeno.csv
+    ./kmeans_1d_omp dados_pequeno.$EXT centroides_pequeno.$EXT 50 0.000001 assign_omp${THREADS}_pequeno.csv centroids_omp${THREADS}_pequeno.csv
     
     echo ""
     echo "Dataset MÉDIO (N=100,000, K=8)"
-    ./kmeans_1d_omp dados_medio.csv centroides_medio.csv 50 0.000001 assign_omp${THREADS}_medio.csv centroids_omp${THREADS}_medio.csv
+    ./kmeans_1d_omp dados_medio.$EXT centroides_medio.$EXT 50 0.000001 assign_omp${THREADS}_medio.csv centroids_omp${THREADS}_medio.csv
     
     echo ""
     echo "Dataset GRANDE (N=1,000,000, K=16)"
-    ./kmeans_1d_omp dados_grande.csv centroides_grande.csv 50 0.000001 assign_omp${THREADS}_grande.csv centroids_omp${THREADS}_grande.csv
+    ./kmeans_1d_omp dados_grande.$EXT centroides_grande.$EXT 50 0.000001 assign_omp${THREADS}_grande.csv centroids_omp${THREADS}_grande.csv
 done
 
 cd "$PROJECT_ROOT"
@@ -180,5 +186,8 @@ echo "  - serial/assign_serial_*.csv"
 echo "  - serial/centroids_serial_*.csv"
 echo "  - openmp/assign_omp*_*.csv"
 echo "  - openmp/centroids_omp*_*.csv"
+echo ""
+echo "Escalabilidade forte e fraca (Amdahl/Gustafson) do OpenMP e do MPI:"
+echo "  python3 -m bench scaling --grafico escalabilidade.png"
 
 
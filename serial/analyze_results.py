@@ -1,129 +1,69 @@
 #!/usr/bin/env python3
 
-import matplotlib.pyplot as plt
-import numpy as np
-import subprocess
-import re
+import argparse
 import os
 import sys
 
-def run_tests_and_capture_results():
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bench import (DATASET_LABELS, ResultStore, counter_fields, describe_counters, format_table,
+                   render_figures, roofline_report, run_matrix)
+
+def run_benchmarks(repetitions, warmup, force):
     print("Executando testes de desempenho...")
     print("=" * 60)
     
-    try:
-        result = subprocess.run(['bash', 'run_tests.sh'], 
-                              capture_output=True, text=True, cwd='.')
-        
-        if result.returncode != 0:
-            print(f"Erro ao executar testes: {result.stderr}")
-            return None
-            
-        print("Testes executados com sucesso!")
-        return result.stdout
-        
-    except Exception as e:
-        print(f"Erro: {e}")
-        return None
-
-def parse_test_results(output):
-    print("Analisando resultados...")
-    
-    patterns = {
-        'iterations': r'Iterações:\s+(\d+)',
-        'sse': r'SSE final:\s+([\d.]+)',
-        'time': r'Tempo:\s+([\d.]+)\s+ms'
-    }
-    
-    results = {
-        'Pequeno (N=10,000, K=4)': {},
-        'Médio (N=100,000, K=8)': {},
-        'Grande (N=1,000,000, K=16)': {}
-    }
-    
-    section_mapping = {
-        'PEQUENO': 'Pequeno (N=10,000, K=4)',
-        'MÉDIO': 'Médio (N=100,000, K=8)', 
-        'GRANDE': 'Grande (N=1,000,000, K=16)'
+    matrix = {
+        'warmup': warmup,
+        'repetitions': repetitions,
+        'runs': [{'backend': 'serial'}],
     }
+    with ResultStore() as store:
+        try:
+            records = run_matrix(matrix, store=store, force=force)
+        except (RuntimeError, FileNotFoundError) as e:
+            print(f"Erro ao executar testes: {e}")
+            return None
     
-    current_dataset = None
-    
-    lines = output.split('\n')
-    for line in lines:
-        line = line.strip()
-        
-        if 'Testando Dataset' in line:
-            for key, dataset in section_mapping.items():
-                if key in line:
-                    current_dataset = dataset
-                    break
-        
-        elif current_dataset:
-            for key, pattern in patterns.items():
-                match = re.search(pattern, line)
-                if match:
-                    value = float(match.group(1))
-                    if key not in results[current_dataset]:
-                        results[current_dataset][key] = value
+    print("Testes executados com sucesso!")
+    print(format_table(records))
+    return records
+
+def collect_results(records):
+    results = {label: {} for label in DATASET_LABELS.values()}
+    
+    for record in records:
+        results[DATASET_LABELS[record['dataset']]] = {
+            'time': record['stats']['median'],
+            'iqr': record['stats']['iqr'],
+            'sse': record['sse'],
+            'iterations': record['iterations'],
+            **counter_fields(record),
+        }
     
     return results
 
-def create_performance_charts(results):
-    print("Gerando gráficos...")
-    
-    datasets = list(results.keys())
-    colors = ['#2E86AB', '#A23B72', '#F18F01']
-    
+def performance_data(results):
     times = []
     sses = []
     iters = []
     
-    for dataset_name in datasets:
+    for dataset_name in results:
         dataset_results = results[dataset_name]
         times.append(dataset_results.get('time', 0))
         sses.append(dataset_results.get('sse', 0))
         iters.append(dataset_results.get('iterations', 0))
     
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-    
-    dataset_labels = ['Pequeno\n(10K)', 'Médio\n(100K)', 'Grande\n(1M)']
-    x_pos = np.arange(len(dataset_labels))
-    
-    bars = ax1.bar(x_pos, times, color=colors, alpha=0.8, edgecolor='black', linewidth=1.5)
-    ax1.set_xlabel('Dataset', fontsize=12, fontweight='bold')
-    ax1.set_ylabel('Tempo de Execução (ms)', fontsize=12, fontweight='bold')
-    ax1.set_title('Tempo de Execução - Versão Serial', fontsize=14, fontweight='bold')
-    ax1.set_xticks(x_pos)
-    ax1.set_xticklabels(dataset_labels)
-    ax1.grid(True, alpha=0.3, axis='y')
-    
-    for bar, time in zip(bars, times):
-        height = bar.get_height()
-        ax1.text(bar.get_x() + bar.get_width()/2., height,
-                f'{time:.1f} ms',
-                ha='center', va='bottom', fontweight='bold')
-    
-    bars2 = ax2.bar(x_pos, iters, color=colors, alpha=0.8, edgecolor='black', linewidth=1.5)
-    ax2.set_xlabel('Dataset', fontsize=12, fontweight='bold')
-    ax2.set_ylabel('Número de Iterações', fontsize=12, fontweight='bold')
-    ax2.set_title('Iterações até Convergência', fontsize=14, fontweight='bold')
-    ax2.set_xticks(x_pos)
-    ax2.set_xticklabels(dataset_labels)
-    ax2.grid(True, alpha=0.3, axis='y')
-    
-    for bar, iter_val in zip(bars2, iters):
-        height = bar.get_height()
-        ax2.text(bar.get_x() + bar.get_width()/2., height,
-                f'{int(iter_val)}',
-                ha='center', va='bottom', fontweight='bold')
-
-    plt.tight_layout()
-    plt.savefig('performance_analysis_serial.png', dpi=300, bbox_inches='tight')
-    print("Gráfico salvo: performance_analysis_serial.png")
-    
     return times, sses, iters
 
+def create_performance_charts(records, dpi):
+    # Desenhado pelo pipeline do relatório (bench/report.py): processo
+    # separado no backend Agg, e só quando os dados do gráfico mudaram.
+    print("Gerando gráficos...")
+    status = render_figures(records, names=['serial'], dpi=dpi)
+    if status['serial'] != 'gerada':
+        print(f"performance_analysis_serial.png: {status['serial']}")
+    return status['serial'] in ('gerada', 'inalterada')
+
 def print_analysis_report(results, times, sses, iters):
     print("\n" + "="*60)
     print("ANÁLISE DE DESEMPENHO - K-MEANS SERIAL")
@@ -134,9 +74,10 @@ def print_analysis_report(results, times, sses, iters):
     for i, dataset_name in enumerate(datasets):
         print(f"\n {dataset_name}")
         print("-" * 60)
-        print(f"  Tempo:      {times[i]:8.1f} ms")
+        print(f"  Tempo:      {times[i]:8.1f} ms (mediana, IQR {results[dataset_name].get('iqr', 0):.1f} ms)")
         print(f"  SSE final:  {sses[i]:8.2f}")
         print(f"  Iterações:  {int(iters[i])}")
+        print(f"  Contadores: {describe_counters(results[dataset_name])}")
     
     print("\n" + "="*60)
     print("OBSERVAÇÕES")
@@ -148,33 +89,55 @@ def print_analysis_report(results, times, sses, iters):
 4. Use estes valores para calcular speedup das versões paralelas
 """)
 
+def print_roofline(records, path, dpi):
+    print("\n" + "="*60)
+    print("ROOFLINE (banda e pico de FLOPs medidos nesta máquina)")
+    print("="*60)
+    with ResultStore() as store:
+        try:
+            roofline_report(records, store, path, dpi=dpi)
+        except RuntimeError as e:
+            print(f"Roofline indisponível: {e}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Análise de desempenho da versão serial")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--forcar', action='store_true',
+                        help="executa de novo mesmo com resultados recentes no banco")
+    parser.add_argument('--sem-roofline', action='store_true',
+                        help="não sonda a máquina nem gera o gráfico roofline")
+    parser.add_argument('--sem-graficos', action='store_true',
+                        help="só as tabelas em texto; não importa o matplotlib")
+    parser.add_argument('--dpi', type=int, default=150, help="resolução dos gráficos")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
     print("K-means Serial - Análise de Desempenho")
     print("=" * 60)
     
-    if not os.path.exists('run_tests.sh'):
-        print("Erro: Script run_tests.sh não encontrado!")
-        print("Certifique-se de estar na pasta serial/")
-        sys.exit(1)
-    
-    test_output = run_tests_and_capture_results()
-    if not test_output:
+    records = run_benchmarks(args.repeticoes, args.warmup, args.forcar)
+    if not records:
         print("Falha ao executar testes!")
         sys.exit(1)
     
-    results = parse_test_results(test_output)
-    if not results:
-        print("Falha ao analisar resultados!")
-        sys.exit(1)
+    results = collect_results(records)
     
-    times, sses, iters = create_performance_charts(results)
+    times, sses, iters = performance_data(results)
+    charts = not args.sem_graficos and create_performance_charts(records, args.dpi)
     print_analysis_report(results, times, sses, iters)
+    if not args.sem_roofline:
+        print_roofline(records, None if args.sem_graficos else 'roofline_serial.png', args.dpi)
     
     print("\nAnálise concluída com sucesso!")
+    if args.sem_graficos:
+        return
     print("Arquivos gerados:")
-    print("   - performance_analysis_serial.png (gráficos)")
-    print("   - assign_serial_*.csv (resultados de clustering)")
-    print("   - centroids_serial_*.csv (centróides finais)")
+    if charts:
+        print("   - performance_analysis_serial.png (gráficos)")
+    if not args.sem_roofline:
+        print("   - roofline_serial.png (roofline)")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,302 @@
+#define _POSIX_C_SOURCE 200809L
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdint.h>
+#include <string.h>
+#include <math.h>
+#include <time.h>
+
+#include "../common/kmeans_io.h"
+#include "../common/kmeans_cli.h"
+
+static int nearest_1d(double x, const double *C, int K, double *dist){
+    int best = -1;
+    double bestd = 1e300;
+    for(int c=0;c<K;c++){
+        double diff = x - C[c];
+        double d = diff*diff;
+        if(d < bestd){ bestd = d; best = c; }
+    }
+    *dist = bestd;
+    return best;
+}
+
+/* Histograma de X em B faixas de mesma largura sobre [min, max]. Só as
+   faixas não vazias são guardadas, em ordem crescente: peso (pontos), média
+   e dispersão interna Σ(x - média)² (Welford, numa única passada). */
+typedef struct {
+    int bins;           /* B pedido */
+    int used;           /* faixas não vazias */
+    double lo, width;   /* faixa j cobre [lo + j*width, lo + (j+1)*width) */
+    double *mean, *weight, *scatter;
+    int *index;         /* faixa original (0..B-1) de cada faixa guardada */
+} histogram_1d;
+
+static int bin_of(const histogram_1d *H, double x){
+    int j = (int)((x - H->lo) / H->width);
+    if(j < 0) j = 0;
+    if(j >= H->bins) j = H->bins - 1;
+    return j;
+}
+
+static void histogram_build(const dataset_view *X, int bins, histogram_1d *H){
+    dataset_advise(X, 1);
+    double lo = dataset_at(X, 0), hi = lo;
+    for(int64_t i=1;i<X->n;i++){
+        double x = dataset_at(X, i);
+        if(x < lo) lo = x;
+        if(x > hi) hi = x;
+    }
+    H->bins = bins;
+    H->lo = lo;
+    H->width = hi > lo ? (hi - lo) / bins : 1.0;
+
+    double *mean = (double*)calloc((size_t)bins, sizeof(double));
+    double *weight = (double*)calloc((size_t)bins, sizeof(double));
+    double *scatter = (double*)calloc((size_t)bins, sizeof(double));
+    if(!mean || !weight || !scatter){ fprintf(stderr,"Sem memoria para o histograma\n"); exit(1); }
+    for(int64_t i=0;i<X->n;i++){
+        double x = dataset_at(X, i);
+        int j = bin_of(H, x);
+        weight[j] += 1.0;
+        double delta = x - mean[j];
+        mean[j] += delta / weight[j];
+        scatter[j] += delta * (x - mean[j]);
+    }
+
+    /* Compacta as faixas não vazias no começo dos próprios vetores. */
+    H->index = (int*)malloc((size_t)bins * sizeof(int));
+    if(!H->index){ fprintf(stderr,"Sem memoria para o histograma\n"); exit(1); }
+    int used = 0;
+    for(int j=0;j<bins;j++){
+        if(weight[j] == 0.0) continue;
+        mean[used] = mean[j];
+        weight[used] = weight[j];
+        scatter[used] = scatter[j];
+        H->index[used] = j;
+        used++;
+    }
+    H->used = used;
+    H->mean = mean;
+    H->weight = weight;
+    H->scatter = scatter;
+}
+
+static void histogram_free(histogram_1d *H){
+    free(H->mean); free(H->weight); free(H->scatter); free(H->index);
+}
+
+/* Centróides em ordem crescente (desempate pelo índice), sem repetidos:
+   o de menor índice fica, como no laço `d < bestd`. */
+static int sorted_centroids(const double *C, int K, int *order){
+    for(int c=0;c<K;c++) order[c] = c;
+    for(int c=1;c<K;c++){
+        int v = order[c], j = c - 1;
+        while(j >= 0 && (C[order[j]] > C[v] || (C[order[j]] == C[v] && order[j] > v))){
+            order[j+1] = order[j];
+            j--;
+        }
+        order[j+1] = v;
+    }
+    int u = 0;
+    for(int c=0;c<K;c++){
+        if(u > 0 && C[order[u-1]] == C[order[c]]) continue;
+        order[u++] = order[c];
+    }
+    return u;
+}
+
+/* Passo de Lloyd sobre as faixas: cada faixa vai inteira para o centróide
+   mais próximo da sua média. As médias já estão em ordem crescente, então o
+   centróide mais próximo só anda para a direita: uma varredura conjunta de
+   faixas e centróides ordenados custa O(B + K) em vez de O(B·K). O SSE
+   devolvido é o exato dessa atribuição (todos os pontos da faixa no mesmo
+   cluster): Σ dispersão + peso·(média - c)². sum/cnt recebem peso·média e
+   peso por cluster. */
+static double histogram_step(const histogram_1d *H, const double *C, int K, int *order,
+                             double *sum, double *cnt){
+    if(sum){
+        memset(sum, 0, (size_t)K * sizeof(double));
+        memset(cnt, 0, (size_t)K * sizeof(double));
+    }
+    int u = sorted_centroids(C, K, order);
+    int p = 0;
+    double sse = 0.0;
+    for(int b=0;b<H->used;b++){
+        double m = H->mean[b];
+        double diff = m - C[order[p]];
+        double d = diff*diff;
+        while(p + 1 < u){
+            double next = m - C[order[p+1]];
+            if(!(next*next < d)) break;
+            d = next*next;
+            p++;
+        }
+        int a = order[p];
+        sse += H->scatter[b] + H->weight[b] * d;
+        if(sum){
+            sum[a] += H->weight[b] * m;
+            cnt[a] += H->weight[b];
+        }
+    }
+    return sse;
+}
+
+static void kmeans_1d_histogram(const histogram_1d *H, double *C, int K, double x0,
+                                int max_iter, double eps, int *iters_out, double *sse_out)
+{
+    double *sum = (double*)malloc((size_t)K * sizeof(double));
+    double *cnt = (double*)malloc((size_t)K * sizeof(double));
+    int *order = (int*)malloc((size_t)K * sizeof(int));
+    if(!sum || !cnt || !order){ fprintf(stderr,"Sem memoria no update\n"); exit(1); }
+
+    double prev_sse = 1e300;
+    double sse = 0.0;
+    int it;
+    for(it=0; it<max_iter; it++){
+        sse = histogram_step(H, C, K, order, sum, cnt);
+        double rel = fabs(sse - prev_sse) / (prev_sse > 0.0 ? prev_sse : 1.0);
+        if(rel < eps){ it++; break; }
+        for(int c=0;c<K;c++){
+            if(cnt[c] > 0) C[c] = sum[c] / cnt[c];
+            else           C[c] = x0;
+        }
+        prev_sse = sse;
+    }
+    free(sum); free(cnt); free(order);
+    *iters_out = it;
+    *sse_out = sse;
+}
+
+static int compare_double(const void *a, const void *b){
+    double x = *(const double*)a, y = *(const double*)b;
+    return (x > y) - (x < y);
+}
+
+/* Pontos em faixas que contêm uma fronteira de decisão (ponto médio entre
+   centróides vizinhos): só eles podem receber, na passada exata, um rótulo
+   diferente do da sua faixa. Fora delas a aproximação não muda rótulo
+   nenhum. */
+static double histogram_uncertain(const histogram_1d *H, const double *C, int K){
+    double *S = (double*)malloc((size_t)K * sizeof(double));
+    if(!S){ fprintf(stderr,"Sem memoria\n"); exit(1); }
+    memcpy(S, C, (size_t)K * sizeof(double));
+    qsort(S, (size_t)K, sizeof(double), compare_double);
+    double total = 0.0;
+    int last = -1;
+    for(int c=0;c+1<K;c++){
+        if(S[c] == S[c+1]) continue;
+        int j = bin_of(H, 0.5 * (S[c] + S[c+1]));
+        if(j == last) continue;
+        last = j;
+        /* Busca binária da faixa j entre as não vazias. */
+        int lo = 0, hi = H->used - 1;
+        while(lo <= hi){
+            int mid = (lo + hi) / 2;
+            if(H->index[mid] < j) lo = mid + 1;
+            else if(H->index[mid] > j) hi = mid - 1;
+            else { total += H->weight[mid]; break; }
+        }
+    }
+    free(S);
+    return total;
+}
+
+/* Passada final exata sobre todos os pontos: SSE verdadeiro com os
+   centróides finais e rótulos escritos em fluxo. */
+static double final_pass_1d(const dataset_view *X, const double *C, int K, const char *outAssign){
+    label_writer *f = outAssign ? (label_writer*)malloc(sizeof(label_writer)) : NULL;
+    if(f && !label_writer_open(f, outAssign, K)){ free(f); f = NULL; }
+    dataset_advise(X, 1);
+    double sse = 0.0;
+    for(int64_t i=0;i<X->n;i++){
+        double d;
+        int a = nearest_1d(dataset_at(X, i), C, K, &d);
+        sse += d;
+        if(f) label_writer_put(f, a);
+    }
+    if(f){ label_writer_close(f); free(f); }
+    return sse;
+}
+
+static double elapsed_ms(const struct timespec *a, const struct timespec *b){
+    return 1000.0*(b->tv_sec - a->tv_sec) + 1e-6*(b->tv_nsec - a->tv_nsec);
+}
+
+int main(int argc, char **argv){
+    int json = take_flag(&argc, argv, "--json");
+    const char *opt_bins = take_option(&argc, argv, "--bins");
+    if(argc < 3){
+        printf("Uso: %s dados.bin centroides_iniciais.csv [max_iter=50] [eps=1e-4] [assign.csv] [centroids.csv] "
+               "[--bins 65536] [--json]\n", argv[0]);
+        printf("Obs: as iterações rodam sobre um histograma de B faixas (O(B·K) cada); uma passada\n");
+        printf("     exata final calcula os rótulos e o SSE verdadeiro.\n");
+        return 1;
+    }
+    const char *pathX = argv[1];
+    const char *pathC = argv[2];
+    int max_iter = (argc>3)? atoi(argv[3]) : 50;
+    double eps   = (argc>4)? atof(argv[4]) : 1e-4;
+    const char *outAssign   = (argc>5)? argv[5] : NULL;
+    const char *outCentroid = (argc>6)? argv[6] : NULL;
+    int bins = opt_bins ? atoi(opt_bins) : 65536;
+
+    if(max_iter <= 0 || eps <= 0.0 || bins <= 0){
+        fprintf(stderr,"Parâmetros inválidos: max_iter>0, eps>0 e bins>0\n");
+        return 1;
+    }
+
+    int K = 0;
+    dataset_view X;
+    dataset_open_view(pathX, &X);
+    double *C = dataset_read_copy(pathC, &K);
+    if(X.n == 0){ fprintf(stderr,"Dataset vazio\n"); return 1; }
+
+    struct timespec t0, t1, t2, t3;
+    clock_gettime(CLOCK_MONOTONIC, &t0);
+    histogram_1d H;
+    histogram_build(&X, bins, &H);
+    clock_gettime(CLOCK_MONOTONIC, &t1);
+    int iters = 0; double sse_iter = 0.0;
+    kmeans_1d_histogram(&H, C, K, dataset_at(&X, 0), max_iter, eps, &iters, &sse_iter);
+    /* SSE aproximado nos centróides finais (a última iteração pode ter
+       movido C depois de medir). */
+    int *order = (int*)malloc((size_t)K * sizeof(int));
+    if(!order){ fprintf(stderr,"Sem memoria\n"); return 1; }
+    double approx = histogram_step(&H, C, K, order, NULL, NULL);
+    free(order);
+    double uncertain = histogram_uncertain(&H, C, K);
+    clock_gettime(CLOCK_MONOTONIC, &t2);
+    double sse = final_pass_1d(&X, C, K, outAssign);
+    clock_gettime(CLOCK_MONOTONIC, &t3);
+
+    double ms_hist = elapsed_ms(&t0, &t1), ms_iter = elapsed_ms(&t1, &t2), ms_final = elapsed_ms(&t2, &t3);
+    double ms = elapsed_ms(&t0, &t3);
+    /* approx >= sse: a passada exata escolhe o melhor centróide para cada
+       ponto, a aproximação força a faixa inteira num só. */
+    double gap = 100.0 * (approx - sse) / (sse > 0.0 ? sse : 1.0);
+    double uncertain_pct = 100.0 * uncertain / (double)X.n;
+
+    if(json){
+        char extra[320];
+        snprintf(extra, sizeof(extra),
+                 "\"bins\": %d, \"bins_used\": %d, \"bin_width\": %.17g, \"approx_sse\": %.17g, "
+                 "\"gap_pct\": %.17g, \"uncertain\": %.0f, \"hist_ms\": %.6f, \"iter_ms\": %.6f, \"final_ms\": %.6f",
+                 bins, H.used, H.width, approx, gap, uncertain, ms_hist, ms_iter, ms_final);
+        print_json_result("histogram", (long long)X.n, K, max_iter, eps, iters, sse, ms, extra);
+    } else {
+        printf("K-means 1D (SERIAL, histograma)\n");
+        printf("N=%lld K=%d max_iter=%d eps=%g bins=%d (%d não vazias, largura %g)\n",
+               (long long)X.n, K, max_iter, eps, bins, H.used, H.width);
+        printf("Histograma: %.1f ms | Iterações: %.1f ms | Passada exata: %.1f ms\n", ms_hist, ms_iter, ms_final);
+        printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+        printf("SSE aproximado: %.6f | Diferença: %.3g%% | Pontos em faixas de fronteira: %.0f (%.3f%%)\n",
+               approx, gap, uncertain, uncertain_pct);
+    }
+
+    write_centroids_file(outCentroid, C, K);
+
+    histogram_free(&H);
+    dataset_close_view(&X); free(C);
+    return 0;
+}
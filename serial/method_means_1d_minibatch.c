@@ -0,0 +1,158 @@
+#define _POSIX_C_SOURCE 200809L
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdint.h>
+#include <string.h>
+#include <math.h>
+#include <time.h>
+
+#include "../common/kmeans_io.h"
+#include "../common/kmeans_cli.h"
+
+/* splitmix64: gerador pequeno e rápido, suficiente para amostrar índices. */
+static uint64_t next_random(uint64_t *state){
+    uint64_t z = (*state += 0x9E3779B97F4A7C15ULL);
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+    return z ^ (z >> 31);
+}
+
+static int nearest_1d(double x, const double *C, int K, double *dist){
+    int best = -1;
+    double bestd = 1e300;
+    for(int c=0;c<K;c++){
+        double diff = x - C[c];
+        double d = diff*diff;
+        if(d < bestd){ bestd = d; best = c; }
+    }
+    *dist = bestd;
+    return best;
+}
+
+/* Mini-batch K-means (Sculley, 2010): a cada passo, `batch` pontos sorteados
+   (com reposição) são atribuídos aos centróides atuais e cada centróide anda
+   em direção à média do seu lote com taxa de aprendizado 1/v[c], onde v[c]
+   conta os pontos que ele já recebeu. Memória O(batch + K), independente de N.
+   Para quando o maior deslocamento de centróide no passo fica abaixo de tol. */
+static void kmeans_1d_minibatch(const dataset_view *X, double *C, int K,
+                                int batch, int max_iter, double tol, uint64_t seed,
+                                int *iters_out, int64_t *sampled_out)
+{
+    double *sum = (double*)malloc((size_t)K * sizeof(double));
+    int64_t *cnt = (int64_t*)malloc((size_t)K * sizeof(int64_t));
+    int64_t *seen = (int64_t*)calloc((size_t)K, sizeof(int64_t));
+    if(!sum || !cnt || !seen){ fprintf(stderr,"Sem memoria no mini-batch\n"); exit(1); }
+
+    uint64_t state = seed;
+    int64_t sampled = 0;
+    int it;
+    dataset_advise(X, 0);
+    for(it=0; it<max_iter; it++){
+        memset(sum, 0, (size_t)K * sizeof(double));
+        memset(cnt, 0, (size_t)K * sizeof(int64_t));
+        for(int j=0;j<batch;j++){
+            double x = dataset_at(X, (int64_t)(next_random(&state) % (uint64_t)X->n));
+            double d;
+            int a = nearest_1d(x, C, K, &d);
+            cnt[a] += 1;
+            sum[a] += x;
+        }
+        sampled += batch;
+
+        double move = 0.0;
+        for(int c=0;c<K;c++){
+            if(cnt[c] == 0) continue;
+            seen[c] += cnt[c];
+            double next = C[c] + (sum[c] - (double)cnt[c] * C[c]) / (double)seen[c];
+            double m = fabs(next - C[c]);
+            if(m > move) move = m;
+            C[c] = next;
+        }
+        if(move < tol){ it++; break; }
+    }
+    free(sum); free(cnt); free(seen);
+    *iters_out = it;
+    *sampled_out = sampled;
+}
+
+/* Passada final completa e sequencial: SSE exato com os centróides finais
+   e rótulos escritos em fluxo (nenhum vetor de tamanho N). */
+static double final_pass_1d(const dataset_view *X, const double *C, int K, const char *outAssign){
+    label_writer *f = outAssign ? (label_writer*)malloc(sizeof(label_writer)) : NULL;
+    if(f && !label_writer_open(f, outAssign, K)){ free(f); f = NULL; }
+    dataset_advise(X, 1);
+    double sse = 0.0;
+    for(int64_t i=0;i<X->n;i++){
+        double d;
+        int a = nearest_1d(dataset_at(X, i), C, K, &d);
+        sse += d;
+        if(f) label_writer_put(f, a);
+    }
+    if(f){ label_writer_close(f); free(f); }
+    return sse;
+}
+
+int main(int argc, char **argv){
+    int json = take_flag(&argc, argv, "--json");
+    int final_pass = !take_flag(&argc, argv, "--sem-passo-final");
+    const char *opt_batch = take_option(&argc, argv, "--batch");
+    const char *opt_seed = take_option(&argc, argv, "--seed");
+    if(argc < 3){
+        printf("Uso: %s dados.bin centroides_iniciais.csv [max_iter=100] [tol=1e-4] [assign.csv] [centroids.csv] "
+               "[--batch 1024] [--seed 0] [--sem-passo-final] [--json]\n", argv[0]);
+        printf("Obs: max_iter conta mini-batches; tol é o deslocamento máximo de centróide para parar.\n");
+        printf("     Binários KM1D são amostrados direto do mmap; CSV é carregado inteiro.\n");
+        return 1;
+    }
+    const char *pathX = argv[1];
+    const char *pathC = argv[2];
+    int max_iter = (argc>3)? atoi(argv[3]) : 100;
+    double tol   = (argc>4)? atof(argv[4]) : 1e-4;
+    const char *outAssign   = (argc>5)? argv[5] : NULL;
+    const char *outCentroid = (argc>6)? argv[6] : NULL;
+    int batch = opt_batch ? atoi(opt_batch) : 1024;
+    uint64_t seed = opt_seed ? strtoull(opt_seed, NULL, 10) : 0;
+
+    if(max_iter <= 0 || tol <= 0.0 || batch <= 0){
+        fprintf(stderr,"Parâmetros inválidos: max_iter>0, tol>0 e batch>0\n");
+        return 1;
+    }
+    if(outAssign && !final_pass){
+        fprintf(stderr,"Aviso: %s não será escrito sem o passo final\n", outAssign);
+    }
+
+    int K = 0;
+    dataset_view X;
+    dataset_open_view(pathX, &X);
+    double *C = dataset_read_copy(pathC, &K);
+
+    struct timespec t0, t1, t2;
+    clock_gettime(CLOCK_MONOTONIC, &t0);
+    int iters = 0; int64_t sampled = 0;
+    kmeans_1d_minibatch(&X, C, K, batch, max_iter, tol, seed, &iters, &sampled);
+    clock_gettime(CLOCK_MONOTONIC, &t1);
+    double sse = final_pass ? final_pass_1d(&X, C, K, outAssign) : NAN;
+    clock_gettime(CLOCK_MONOTONIC, &t2);
+
+    double ms_batch = 1000.0*(t1.tv_sec - t0.tv_sec) + 1e-6*(t1.tv_nsec - t0.tv_nsec);
+    double ms = 1000.0*(t2.tv_sec - t0.tv_sec) + 1e-6*(t2.tv_nsec - t0.tv_nsec);
+
+    if(json){
+        char extra[160];
+        snprintf(extra, sizeof(extra), "\"batch\": %d, \"sampled\": %lld, \"batch_ms\": %.6f, \"final_ms\": %.6f",
+                 batch, (long long)sampled, ms_batch, ms - ms_batch);
+        print_json_result("minibatch", (long long)X.n, K, max_iter, tol, iters, sse, ms, extra);
+    } else {
+        printf("K-means 1D (SERIAL, mini-batch)\n");
+        printf("N=%lld K=%d max_iter=%d tol=%g batch=%d\n", (long long)X.n, K, max_iter, tol, batch);
+        printf("Mini-batches: %.1f ms (%lld pontos amostrados) | Passo final: %.1f ms\n",
+               ms_batch, (long long)sampled, ms - ms_batch);
+        if(final_pass) printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+        else           printf("Iterações: %d | SSE final: - (sem passo final) | Tempo: %.1f ms\n", iters, ms);
+    }
+
+    write_centroids_file(outCentroid, C, K);
+
+    dataset_close_view(&X); free(C);
+    return 0;
+}
@@ -0,0 +1,256 @@
+#define _POSIX_C_SOURCE 200809L
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <math.h>
+#include <time.h>
+
+#include "../common/kmeans_io.h"
+#include "../common/kmeans_cli.h"
+
+/* Radix sort LSD (8 passadas de 8 bits) sobre a representação dos doubles
+   mapeada para inteiros sem sinal com a mesma ordem. */
+static void radix_sort_doubles(double *A, int N){
+    unsigned long long *a = (unsigned long long*)malloc((size_t)N * sizeof(unsigned long long));
+    unsigned long long *b = (unsigned long long*)malloc((size_t)N * sizeof(unsigned long long));
+    if(!a || !b){ fprintf(stderr,"Sem memoria na ordenacao\n"); exit(1); }
+    for(int i=0;i<N;i++){
+        unsigned long long u; memcpy(&u, &A[i], sizeof(u));
+        a[i] = (u >> 63) ? ~u : (u | 0x8000000000000000ULL);
+    }
+    for(int shift=0; shift<64; shift+=8){
+        size_t cnt[257] = {0};
+        for(int i=0;i<N;i++) cnt[((a[i] >> shift) & 0xFF) + 1]++;
+        if(cnt[((a[0] >> shift) & 0xFF) + 1] == (size_t)N) continue;
+        for(int d=0; d<256; d++) cnt[d+1] += cnt[d];
+        for(int i=0;i<N;i++) b[cnt[(a[i] >> shift) & 0xFF]++] = a[i];
+        unsigned long long *t = a; a = b; b = t;
+    }
+    for(int i=0;i<N;i++){
+        unsigned long long u = (a[i] >> 63) ? (a[i] & 0x7FFFFFFFFFFFFFFFULL) : ~a[i];
+        memcpy(&A[i], &u, sizeof(u));
+    }
+    free(a); free(b);
+}
+
+/* Ordem total dos doubles como inteiros (para busca binária entre a e b). */
+static double assignment_step_1d(const double *X, const double *C, int *assign, int N, int K){
+    double sse = 0.0;
+    for(int i=0;i<N;i++){
+        int best = -1;
+        double bestd = 1e300;
+        for(int c=0;c<K;c++){
+            double diff = X[i] - C[c];
+            double d = diff*diff;
+            if(d < bestd){ bestd = d; best = c; }
+        }
+        assign[i] = best;
+        sse += bestd;
+    }
+    return sse;
+}
+
+static void update_step_1d(const double *X, double *C, const int *assign, int N, int K){
+    double *sum = (double*)calloc((size_t)K, sizeof(double));
+    int *cnt = (int*)calloc((size_t)K, sizeof(int));
+    if(!sum || !cnt){ fprintf(stderr,"Sem memoria no update\n"); exit(1); }
+
+    for(int i=0;i<N;i++){
+        int a = assign[i];
+        cnt[a] += 1;
+        sum[a] += X[i];
+    }
+    for(int c=0;c<K;c++){
+        if(cnt[c] > 0) C[c] = sum[c] / (double)cnt[c];
+        else           C[c] = X[0];
+    }
+    free(sum); free(cnt);
+}
+
+static void kmeans_1d(const double *X, double *C, int *assign,
+                      int N, int K, int max_iter, double eps,
+                      int *iters_out, double *sse_out)
+{
+    double prev_sse = 1e300;
+    double sse = 0.0;
+    int it;
+    for(it=0; it<max_iter; it++){
+        sse = assignment_step_1d(X, C, assign, N, K);
+        double rel = fabs(sse - prev_sse) / (prev_sse > 0.0 ? prev_sse : 1.0);
+        if(rel < eps){ it++; break; }
+        update_step_1d(X, C, assign, N, K);
+        prev_sse = sse;
+    }
+    *iters_out = it;
+    *sse_out = sse;
+}
+
+/* Programação dinâmica exata (Bellman) sobre X ordenado:
+     D_k[i] = min_{k-1 <= j < i} D_{k-1}[j] + custo(j, i)
+   com custo(j, i) = SSE de Xs[j..i-1] em O(1) pelas somas prefixadas. O argmin
+   é monotônico em i (custo de Monge), então cada camada é resolvida pela
+   otimização dividir-e-conquistar em O(N log N). */
+typedef struct {
+    const double *S, *Q;
+    const double *Dprev;
+    double *D;
+    int *arg;
+    int k;
+} dp_layer_t;
+
+static inline double segment_cost(const double *S, const double *Q, int j, int i){
+    double s = S[i] - S[j];
+    return (Q[i] - Q[j]) - s*s/(double)(i - j);
+}
+
+static void dp_solve(const dp_layer_t *L, int ilo, int ihi, int jlo, int jhi){
+    while(ilo <= ihi){
+        int mid = ilo + (ihi - ilo)/2;
+        int jl = jlo > L->k - 1 ? jlo : L->k - 1;
+        int jh = jhi < mid - 1 ? jhi : mid - 1;
+        double best = INFINITY; int opt = jl;
+        for(int j=jl;j<=jh;j++){
+            double v = L->Dprev[j] + segment_cost(L->S, L->Q, j, mid);
+            if(v < best){ best = v; opt = j; }
+        }
+        L->D[mid] = best;
+        L->arg[mid] = opt;
+        /* recursão só no lado menor; o maior continua no laço */
+        if(mid - ilo < ihi - mid){
+            dp_solve(L, ilo, mid - 1, jlo, opt);
+            ilo = mid + 1; jlo = opt;
+        } else {
+            dp_solve(L, mid + 1, ihi, opt, jhi);
+            ihi = mid - 1; jhi = opt;
+        }
+    }
+}
+
+/* Preenche bounds[0..K] com os limites (índices em Xs) da partição ótima. */
+static void optimal_partition(const double *Xs, int N, int K, int *bounds){
+    double mean = 0.0;
+    for(int i=0;i<N;i++) mean += Xs[i];
+    mean /= (double)N;
+
+    /* Dados centrados: o SSE não muda e o cancelamento em Q[i]-Q[j] diminui. */
+    double *S = (double*)malloc((size_t)(N+1) * sizeof(double));
+    double *Q = (double*)malloc((size_t)(N+1) * sizeof(double));
+    double *Dprev = (double*)malloc((size_t)(N+1) * sizeof(double));
+    double *D = (double*)malloc((size_t)(N+1) * sizeof(double));
+    int *arg = (int*)malloc((size_t)(K+1) * (size_t)(N+1) * sizeof(int));
+    if(!S || !Q || !Dprev || !D || !arg){ fprintf(stderr,"Sem memoria para a programacao dinamica\n"); exit(1); }
+
+    S[0] = 0.0; Q[0] = 0.0;
+    for(int i=0;i<N;i++){
+        double z = Xs[i] - mean;
+        S[i+1] = S[i] + z;
+        Q[i+1] = Q[i] + z*z;
+    }
+    Dprev[0] = INFINITY;
+    for(int i=1;i<=N;i++) Dprev[i] = segment_cost(S, Q, 0, i);
+
+    for(int k=2;k<=K;k++){
+        for(int i=0;i<k;i++) D[i] = INFINITY;
+        dp_layer_t L = { S, Q, Dprev, D, arg + (size_t)k * (size_t)(N+1), k };
+        dp_solve(&L, k, N, k - 1, N - 1);
+        double *t = Dprev; Dprev = D; D = t;
+    }
+
+    bounds[K] = N;
+    for(int k=K;k>=2;k--) bounds[k-1] = arg[(size_t)k * (size_t)(N+1) + bounds[k]];
+    bounds[0] = 0;
+
+    free(arg); free(D); free(Dprev); free(Q); free(S);
+}
+
+int main(int argc, char **argv){
+    int json = take_flag(&argc, argv, "--json");
+    if(argc < 3){
+        printf("Uso: %s dados.csv centroides_iniciais.csv [max_iter=50] [eps=1e-4] [assign.csv] [centroids.csv] [--json]\n", argv[0]);
+        printf("Obs: arquivos CSV com 1 coluna (1 valor por linha), sem cabeçalho.\n");
+        printf("     K vem do arquivo de centróides; max_iter e eps valem para o Lloyd de comparação.\n");
+        return 1;
+    }
+    const char *pathX = argv[1];
+    const char *pathC = argv[2];
+    int max_iter = (argc>3)? atoi(argv[3]) : 50;
+    double eps   = (argc>4)? atof(argv[4]) : 1e-4;
+    const char *outAssign   = (argc>5)? argv[5] : NULL;
+    const char *outCentroid = (argc>6)? argv[6] : NULL;
+
+    if(max_iter <= 0 || eps <= 0.0){
+        fprintf(stderr,"Parâmetros inválidos: max_iter>0 e eps>0\n");
+        return 1;
+    }
+
+    int N=0, K=0;
+    dataset_1d dsX;
+    dataset_open(pathX, &dsX);
+    const double *X = dsX.data;
+    N = dsX.n;
+    double *C = dataset_read_copy(pathC, &K);
+    if(K > N){ fprintf(stderr,"K=%d maior que N=%d\n", K, N); return 1; }
+    double *Xs = (double*)malloc((size_t)N * sizeof(double));
+    int *assign = (int*)malloc((size_t)N * sizeof(int));
+    int *bounds = (int*)malloc((size_t)(K+1) * sizeof(int));
+    double *Copt = (double*)malloc((size_t)K * sizeof(double));
+    if(!Xs || !assign || !bounds || !Copt){ fprintf(stderr,"Sem memoria\n"); return 1; }
+
+    struct timespec t0, t1, t2;
+    clock_gettime(CLOCK_MONOTONIC, &t0);
+    memcpy(Xs, X, (size_t)N * sizeof(double));
+    radix_sort_doubles(Xs, N);
+    optimal_partition(Xs, N, K, bounds);
+
+    double sse_opt = 0.0;
+    for(int c=0;c<K;c++){
+        long double s = 0.0L;
+        for(int i=bounds[c];i<bounds[c+1];i++) s += Xs[i];
+        Copt[c] = (double)(s / (long double)(bounds[c+1] - bounds[c]));
+        for(int i=bounds[c];i<bounds[c+1];i++){
+            double diff = Xs[i] - Copt[c];
+            sse_opt += diff*diff;
+        }
+    }
+    for(int i=0;i<N;i++){
+        int lo = 0, hi = K - 1;
+        while(lo < hi){
+            int mid = (lo + hi)/2;
+            if(X[i] >= Xs[bounds[mid+1]]) lo = mid + 1;
+            else hi = mid;
+        }
+        assign[i] = lo;
+    }
+    clock_gettime(CLOCK_MONOTONIC, &t1);
+
+    int iters = 0; double sse_lloyd = 0.0;
+    int *assign_lloyd = (int*)malloc((size_t)N * sizeof(int));
+    if(!assign_lloyd){ fprintf(stderr,"Sem memoria para assign\n"); return 1; }
+    kmeans_1d(X, C, assign_lloyd, N, K, max_iter, eps, &iters, &sse_lloyd);
+    clock_gettime(CLOCK_MONOTONIC, &t2);
+    free(assign_lloyd);
+
+    double ms_opt = 1000.0*(t1.tv_sec - t0.tv_sec) + 1e-6*(t1.tv_nsec - t0.tv_nsec);
+    double ms_lloyd = 1000.0*(t2.tv_sec - t1.tv_sec) + 1e-6*(t2.tv_nsec - t1.tv_nsec);
+
+    double gap = 100.0 * (sse_lloyd - sse_opt) / (sse_opt > 0.0 ? sse_opt : 1.0);
+    if(json){
+        /* "iterations" = camadas da programação dinâmica, como no Python. */
+        char extra[160];
+        snprintf(extra, sizeof(extra), "\"lloyd_sse\": %.17g, \"lloyd_iterations\": %d, \"lloyd_ms\": %.6f",
+                 sse_lloyd, iters, ms_lloyd);
+        print_json_result("optimal", N, K, max_iter, eps, K, sse_opt, ms_opt, extra);
+    } else {
+        printf("K-means 1D (SERIAL, ótimo por programação dinâmica)\n");
+        printf("N=%d K=%d max_iter=%d eps=%g\n", N, K, max_iter, eps);
+        printf("SSE ótimo: %.6f | Tempo: %.1f ms\n", sse_opt, ms_opt);
+        printf("SSE Lloyd: %.6f | Iterações: %d | Tempo: %.1f ms | Diferença: %.4f%%\n",
+               sse_lloyd, iters, ms_lloyd, gap);
+    }
+
+    write_labels_file(outAssign, assign, sizeof(int), N, K);
+    write_centroids_file(outCentroid, Copt, K);
+
+    free(Copt); free(bounds); free(assign); free(Xs); dataset_close(&dsX); free(C);
+    return 0;
+}
@@ -1,125 +1,651 @@
+#define _POSIX_C_SOURCE 200809L
 #include <stdio.h>
 #include <stdlib.h>
+#include <stdint.h>
 #include <string.h>
 #include <math.h>
+#include <float.h>
 #include <time.h>
 
-static int count_rows(const char *path){
-    FILE *f = fopen(path, "r");
-    if(!f){ fprintf(stderr,"Erro ao abrir %s\n", path); exit(1); }
-    int rows=0; char line[8192];
-    while(fgets(line,sizeof(line),f)){
-        int only_ws=1;
-        for(char *p=line; *p; p++){
-            if(*p!=' ' && *p!='\t' && *p!='\n' && *p!='\r'){ only_ws=0; break; }
+#include "../common/kmeans_io.h"
+#include "../common/kmeans_cli.h"
+#include "../common/kmeans_trace.h"
+
+/* Passo de Lloyd fundido: atribui cada ponto e, no mesmo laço, acumula SSE,
+   somas e contagens por cluster em sum/cnt (zerados aqui, alocados uma vez
+   por quem chama). X é lido uma única vez por iteração e assign só é
+   atualizado quando não é NULL (rótulos pedidos); nesse caso *changed
+   recebe quantos rótulos mudaram. Cada acumulador recebe os termos na mesma
+   ordem (i crescente) da versão em dois passos, então o resultado é
+   idêntico bit a bit. */
+static double lloyd_step_1d(const double *X, const double *C, int *assign, int N, int K,
+                            double *sum, int64_t *cnt, int64_t *changed){
+    memset(sum, 0, (size_t)K * sizeof(double));
+    memset(cnt, 0, (size_t)K * sizeof(int64_t));
+    double sse = 0.0;
+    int64_t moved = 0;
+    for(int i=0;i<N;i++){
+        double x = X[i];
+        int best = -1;
+        double bestd = 1e300;
+        for(int c=0;c<K;c++){
+            double diff = x - C[c];
+            double d = diff*diff;
+            if(d < bestd){ bestd = d; best = c; }
+        }
+        if(assign && assign[i] != best){ assign[i] = best; moved++; }
+        sse += bestd;
+        cnt[best] += 1;
+        sum[best] += x;
+    }
+    *changed = moved;
+    return sse;
+}
+
+/* Passo incremental: sum/cnt são os totais correntes da iteração anterior e
+   só os pontos que trocam de cluster mexem neles (-x/-1 no cluster antigo,
+   +x/+1 no novo), marcando os dois em touched. assign é obrigatório. */
+static double incremental_step_1d(const double *X, const double *C, int *assign, int N, int K,
+                                  double *sum, int64_t *cnt, unsigned char *touched, int64_t *changed){
+    double sse = 0.0;
+    int64_t moved = 0;
+    for(int i=0;i<N;i++){
+        double x = X[i];
+        int best = -1;
+        double bestd = 1e300;
+        for(int c=0;c<K;c++){
+            double diff = x - C[c];
+            double d = diff*diff;
+            if(d < bestd){ bestd = d; best = c; }
+        }
+        sse += bestd;
+        int a = assign[i];
+        if(a != best){
+            sum[a] -= x; cnt[a] -= 1;
+            sum[best] += x; cnt[best] += 1;
+            touched[a] = touched[best] = 1;
+            assign[i] = best;
+            moved++;
         }
-        if(!only_ws) rows++;
     }
-    fclose(f);
-    return rows;
+    *changed = moved;
+    return sse;
 }
 
-static double *read_csv_1col(const char *path, int *n_out){
-    int R = count_rows(path);
-    if(R<=0){ fprintf(stderr,"Arquivo vazio: %s\n", path); exit(1); }
-    double *A = (double*)malloc((size_t)R * sizeof(double));
-    if(!A){ fprintf(stderr,"Sem memoria para %d linhas\n", R); exit(1); }
+static void update_step_1d(const double *sum, const int64_t *cnt, double *C, int K, double x0){
+    for(int c=0;c<K;c++){
+        if(cnt[c] > 0) C[c] = sum[c] / (double)cnt[c];
+        else           C[c] = x0;
+    }
+}
 
-    FILE *f = fopen(path, "r");
-    if(!f){ fprintf(stderr,"Erro ao abrir %s\n", path); free(A); exit(1); }
+/* Update só dos clusters tocados no passo incremental; os outros mantêm o
+   centróide (soma e contagem não mudaram). Um cluster que esvazia tem a soma
+   zerada, descartando o resíduo de arredondamento das subtrações. */
+static void update_touched_1d(double *sum, const int64_t *cnt, unsigned char *touched,
+                              double *C, int K, double x0){
+    for(int c=0;c<K;c++){
+        if(!touched[c]) continue;
+        touched[c] = 0;
+        if(cnt[c] > 0) C[c] = sum[c] / (double)cnt[c];
+        else { sum[c] = 0.0; C[c] = x0; }
+    }
+}
 
-    char line[8192];
-    int r=0;
-    while(fgets(line,sizeof(line),f)){
-        int only_ws=1;
-        for(char *p=line; *p; p++){
-            if(*p!=' ' && *p!='\t' && *p!='\n' && *p!='\r'){ only_ws=0; break; }
-        }
-        if(only_ws) continue;
+/* Variantes do laço de Lloyd. */
+typedef struct {
+    int incremental;      /* somas e contagens mantidas por deltas (exige assign) */
+    int stop_on_labels;   /* para quando nenhum rótulo muda, em vez do teste do SSE (exige assign) */
+    double *changed;      /* rótulos alterados em cada iteração (max_iter posições) ou NULL */
+    kmeans_trace *trace;  /* fases e SSE/trocas por iteração (--trace) ou NULL */
+} lloyd_options;
 
-        const char *delim = ",; \t";
-        char *tok = strtok(line, delim);
-        if(!tok){ fprintf(stderr,"Linha %d sem valor em %s\n", r+1, path); free(A); fclose(f); exit(1); }
-        A[r] = atof(tok);
-        r++;
-        if(r>R) break;
+static void kmeans_1d(const double *X, double *C, int *assign,
+                      int N, int K, int max_iter, double eps, const lloyd_options *opt,
+                      int *iters_out, double *sse_out)
+{
+    double *sum = (double*)malloc((size_t)K * sizeof(double));
+    int64_t *cnt = (int64_t*)malloc((size_t)K * sizeof(int64_t));
+    unsigned char *touched = (unsigned char*)calloc((size_t)K, 1);
+    if(!sum || !cnt || !touched){ fprintf(stderr,"Sem memoria no update\n"); exit(1); }
+    /* Sem rótulo anterior: na primeira iteração todos os pontos "mudam". */
+    if(assign) for(int i=0;i<N;i++) assign[i] = -1;
+
+    kmeans_trace *tr = opt ? opt->trace : NULL;
+    double prev_sse = 1e300;
+    double sse = 0.0;
+    int it;
+    for(it=0; it<max_iter; it++){
+        int64_t moved = 0;
+        int incremental = opt && opt->incremental && it > 0;
+        double tm = trace_mark(tr);
+        if(incremental) sse = incremental_step_1d(X, C, assign, N, K, sum, cnt, touched, &moved);
+        else            sse = lloyd_step_1d(X, C, assign, N, K, sum, cnt, &moved);
+        tm = trace_span(tr, TRACE_ASSIGN, it, tm);
+        trace_iter(tr, it, sse, assign ? (double)moved : -1.0);
+        if(opt && opt->changed) opt->changed[it] = (double)moved;
+        double rel = fabs(sse - prev_sse) / (prev_sse > 0.0 ? prev_sse : 1.0);
+        if(opt && opt->stop_on_labels ? moved == 0 : rel < eps){ it++; break; }
+        if(incremental) update_touched_1d(sum, cnt, touched, C, K, X[0]);
+        else            update_step_1d(sum, cnt, C, K, X[0]);
+        trace_span(tr, TRACE_UPDATE, it, tm);
+        prev_sse = sse;
     }
-    fclose(f);
-    *n_out = R;
-    return A;
+    free(sum); free(cnt); free(touched);
+    *iters_out = it;
+    *sse_out = sse;
 }
 
-static void write_assign_csv(const char *path, const int *assign, int N){
-    if(!path) return;
-    FILE *f = fopen(path, "w");
-    if(!f){ fprintf(stderr,"Erro ao abrir %s para escrita\n", path); return; }
-    for(int i=0;i<N;i++) fprintf(f, "%d\n", assign[i]);
-    fclose(f);
+/* Passo de Lloyd sobre os valores distintos U com pesos W: um valor que
+   aparece w vezes entra uma vez, com w·d no SSE, w·u na soma e w na
+   contagem. Os rótulos dos M valores vão para assign_u (se não NULL).
+   U é crescente, então valores vizinhos caem quase sempre no mesmo cluster:
+   soma e contagem do cluster corrente ficam em registradores e só vão para
+   sum/cnt quando o rótulo muda (somar direto em sum[best] encadeia cada
+   iteração na anterior pela memória). */
+static double lloyd_step_weighted(const double *U, const int64_t *W, const double *C, int *assign_u,
+                                  int64_t M, int K, double *sum, int64_t *cnt){
+    memset(sum, 0, (size_t)K * sizeof(double));
+    memset(cnt, 0, (size_t)K * sizeof(int64_t));
+    double sse = 0.0;
+    int run = -1;
+    double run_sum = 0.0;
+    int64_t run_cnt = 0;
+    for(int64_t j=0;j<M;j++){
+        double u = U[j];
+        double w = (double)W[j];
+        int best = -1;
+        double bestd = 1e300;
+        for(int c=0;c<K;c++){
+            double diff = u - C[c];
+            double d = diff*diff;
+            if(d < bestd){ bestd = d; best = c; }
+        }
+        if(assign_u) assign_u[j] = best;
+        sse += w * bestd;
+        if(best != run){
+            if(run >= 0){ sum[run] += run_sum; cnt[run] += run_cnt; }
+            run = best; run_sum = 0.0; run_cnt = 0;
+        }
+        run_sum += w * u;
+        run_cnt += W[j];
+    }
+    if(run >= 0){ sum[run] += run_sum; cnt[run] += run_cnt; }
+    return sse;
 }
 
-static void write_centroids_csv(const char *path, const double *C, int K){
-    if(!path) return;
-    FILE *f = fopen(path, "w");
-    if(!f){ fprintf(stderr,"Erro ao abrir %s para escrita\n", path); return; }
-    for(int c=0;c<K;c++) fprintf(f, "%.6f\n", C[c]);
-    fclose(f);
+/* Lloyd sobre os valores distintos de X (--dedup). Mesmos rótulos e
+   iterações de kmeans_1d; SSE e centróides diferem só no arredondamento
+   (w·u em vez de w somas de u). x0 é X[0], o valor dos clusters vazios. */
+static void kmeans_1d_weighted(const dataset_unique *u, double *C, int *assign_u,
+                               int K, int max_iter, double eps, double x0,
+                               int *iters_out, double *sse_out)
+{
+    double *sum = (double*)malloc((size_t)K * sizeof(double));
+    int64_t *cnt = (int64_t*)malloc((size_t)K * sizeof(int64_t));
+    if(!sum || !cnt){ fprintf(stderr,"Sem memoria no update\n"); exit(1); }
+
+    double prev_sse = 1e300;
+    double sse = 0.0;
+    int it;
+    for(it=0; it<max_iter; it++){
+        sse = lloyd_step_weighted(u->values, u->weights, C, assign_u, u->m, K, sum, cnt);
+        double rel = fabs(sse - prev_sse) / (prev_sse > 0.0 ? prev_sse : 1.0);
+        if(rel < eps){ it++; break; }
+        update_step_1d(sum, cnt, C, K, x0);
+        prev_sse = sse;
+    }
+    free(sum); free(cnt);
+    *iters_out = it;
+    *sse_out = sse;
 }
 
-static double assignment_step_1d(const double *X, const double *C, int *assign, int N, int K){
+/* Passo de Lloyd de --float32: X em float32 e rótulos com label_bytes bytes
+   (km1d_label_bytes); cada x é promovido a double antes da distância, então
+   SSE, somas e contagens acumulam em double como em lloyd_step_1d. A
+   diferença para o caminho float64 é só o arredondamento de X para float. */
+static double lloyd_step_f32(const float *X, const double *C, void *labels, int label_bytes,
+                             int N, int K, double *sum, int64_t *cnt){
+    memset(sum, 0, (size_t)K * sizeof(double));
+    memset(cnt, 0, (size_t)K * sizeof(int64_t));
     double sse = 0.0;
     for(int i=0;i<N;i++){
+        double x = (double)X[i];
         int best = -1;
         double bestd = 1e300;
         for(int c=0;c<K;c++){
-            double diff = X[i] - C[c];
+            double diff = x - C[c];
             double d = diff*diff;
             if(d < bestd){ bestd = d; best = c; }
         }
-        assign[i] = best;
+        if(labels) km1d_label_set(labels, label_bytes, i, best);
         sse += bestd;
+        cnt[best] += 1;
+        sum[best] += x;
     }
     return sse;
+}
 
-
-static void update_step_1d(const double *X, ßdouble *C, const int *assign, int N, int K){
-    double *sum = (double*)calloc((size_t)K, sizeof(double));
-    int *cnt = (int*)calloc((size_t)K, sizeof(int));
+static void kmeans_1d_f32(const float *X, double *C, void *labels, int label_bytes,
+                          int N, int K, int max_iter, double eps,
+                          int *iters_out, double *sse_out)
+{
+    double *sum = (double*)malloc((size_t)K * sizeof(double));
+    int64_t *cnt = (int64_t*)malloc((size_t)K * sizeof(int64_t));
     if(!sum || !cnt){ fprintf(stderr,"Sem memoria no update\n"); exit(1); }
 
-    for(int i=0;i<N;i++){
-        int a = assign[i];
-        cnt[a] += 1;
-        sum[a] += X[i];
+    double prev_sse = 1e300;
+    double sse = 0.0;
+    int it;
+    for(it=0; it<max_iter; it++){
+        sse = lloyd_step_f32(X, C, labels, label_bytes, N, K, sum, cnt);
+        double rel = fabs(sse - prev_sse) / (prev_sse > 0.0 ? prev_sse : 1.0);
+        if(rel < eps){ it++; break; }
+        update_step_1d(sum, cnt, C, K, (double)X[0]);
+        prev_sse = sse;
     }
+    free(sum); free(cnt);
+    *iters_out = it;
+    *sse_out = sse;
+}
+
+/* Atribuição acelerada (Hamerly, 2010) em 1D. Cada ponto guarda um limite
+   superior da distância ao seu centróide (upper) e um inferior da distância
+   ao segundo mais próximo (lower); a cada iteração os limites crescem/caem
+   pelo deslocamento dos centróides. Se upper < max(lower, s[a]), onde s[a] é
+   metade da distância de a ao centróide vizinho mais próximo, o rótulo não
+   pode mudar e as outras K-1 distâncias não são calculadas.
+
+   Os limites carregam uma folga `tol` (16 ulps da escala dos dados) e a poda
+   exige margem de tol: perto de empates, onde o arredondamento de diff*diff e
+   o desempate por índice decidem, o ponto é sempre recalculado. Por isso os
+   rótulos são os mesmos do caminho sem poda; o ponto podado ainda calcula a
+   distância ao próprio centróide e acumula SSE, somas e contagens na mesma
+   ordem, então o resultado é idêntico bit a bit. */
+typedef struct {
+    double *upper, *lower;
+    int *label;
+    double *prev, *move, *half;
+    double tol;
+} hamerly_state;
+
+static void hamerly_init(hamerly_state *h, const double *X, const double *C, int N, int K){
+    h->upper = (double*)malloc((size_t)N * sizeof(double));
+    h->lower = (double*)malloc((size_t)N * sizeof(double));
+    h->label = (int*)malloc((size_t)N * sizeof(int));
+    h->prev = (double*)malloc((size_t)K * sizeof(double));
+    h->move = (double*)malloc((size_t)K * sizeof(double));
+    h->half = (double*)malloc((size_t)K * sizeof(double));
+    if(!h->upper || !h->lower || !h->label || !h->prev || !h->move || !h->half){
+        fprintf(stderr,"Sem memoria para os limites de Hamerly\n"); exit(1);
+    }
+    /* Centróides ficam dentro de [min X, max X] (ou nos valores iniciais),
+       então |x| + |c| <= scale para todo par. */
+    double xmax = 0.0, cmax = 0.0;
+    for(int i=0;i<N;i++) if(fabs(X[i]) > xmax) xmax = fabs(X[i]);
+    for(int c=0;c<K;c++) if(fabs(C[c]) > cmax) cmax = fabs(C[c]);
+    h->tol = 16.0 * DBL_EPSILON * (xmax + (cmax > xmax ? cmax : xmax));
+}
+
+static void hamerly_free(hamerly_state *h){
+    free(h->upper); free(h->lower); free(h->label);
+    free(h->prev); free(h->move); free(h->half);
+}
+
+/* Como lloyd_step_1d, mas com poda; first=1 na primeira iteração (todos os
+   pontos são calculados). Rótulos ficam em h->label; devolve o SSE e, em
+   *pruned, quantos pontos foram podados. */
+static double hamerly_step_1d(const double *X, const double *C, int N, int K, int first,
+                              hamerly_state *h, double *sum, int64_t *cnt, int64_t *pruned){
+    const double tol = h->tol;
+    double m1 = 0.0, m2 = 0.0;
+    int imax = -1;
     for(int c=0;c<K;c++){
-        if(cnt[c] > 0) C[c] = sum[c] / (double)cnt[c];
-        else           C[c] = X[0];
+        h->move[c] = first ? 0.0 : fabs(C[c] - h->prev[c]);
+        if(h->move[c] > m1){ m2 = m1; m1 = h->move[c]; imax = c; }
+        else if(h->move[c] > m2) m2 = h->move[c];
+        double near = 1e300;
+        for(int j=0;j<K;j++){
+            if(j != c && fabs(C[c] - C[j]) < near) near = fabs(C[c] - C[j]);
+        }
+        h->half[c] = 0.5 * near - tol;
     }
+
+    memset(sum, 0, (size_t)K * sizeof(double));
+    memset(cnt, 0, (size_t)K * sizeof(int64_t));
+    double sse = 0.0;
+    int64_t skipped = 0;
+    for(int i=0;i<N;i++){
+        double x = X[i];
+        int best = -1;
+        double bestd = 0.0;
+        int scan = first;
+        if(!first){
+            best = h->label[i];
+            double u = h->upper[i] + h->move[best] + tol;
+            double l = h->lower[i] - (best == imax ? m2 : m1) - tol;
+            double z = l > h->half[best] ? l : h->half[best];
+            double diff = x - C[best];
+            h->lower[i] = l;
+            /* Se não podar de cara, aperta o limite superior com a distância
+               exata e tenta de novo. */
+            if(!(u + tol < z)) u = fabs(diff) + tol;
+            h->upper[i] = u;
+            if(u + tol < z){ bestd = diff*diff; skipped++; }
+            else scan = 1;
+        }
+        if(scan){
+            /* Varredura completa, igual a lloyd_step_1d, guardando as duas
+               menores distâncias para os novos limites. */
+            double a1 = 1e300, a2 = 1e300;
+            best = -1;
+            bestd = 1e300;
+            for(int c=0;c<K;c++){
+                double diff = x - C[c];
+                double d = diff*diff;
+                if(d < bestd){ bestd = d; best = c; }
+                double ad = fabs(diff);
+                if(ad < a1){ a2 = a1; a1 = ad; }
+                else if(ad < a2) a2 = ad;
+            }
+            double ab = fabs(x - C[best]);
+            h->label[i] = best;
+            h->upper[i] = ab + tol;
+            h->lower[i] = (ab == a1 ? a2 : a1) - tol;
+        }
+        sse += bestd;
+        cnt[best] += 1;
+        sum[best] += x;
+    }
+    memcpy(h->prev, C, (size_t)K * sizeof(double));
+    *pruned = skipped;
+    return sse;
+}
+
+/* kmeans_1d com atribuição por Hamerly: mesmas iterações, SSE, centróides e
+   rótulos (assign, obrigatório aqui). pruned[it] recebe a fração de pontos
+   podados em cada iteração. */
+static void kmeans_1d_hamerly(const double *X, double *C, int *assign,
+                              int N, int K, int max_iter, double eps,
+                              int *iters_out, double *sse_out, double *pruned)
+{
+    double *sum = (double*)malloc((size_t)K * sizeof(double));
+    int64_t *cnt = (int64_t*)malloc((size_t)K * sizeof(int64_t));
+    if(!sum || !cnt){ fprintf(stderr,"Sem memoria no update\n"); exit(1); }
+    hamerly_state h;
+    hamerly_init(&h, X, C, N, K);
+
+    double prev_sse = 1e300;
+    double sse = 0.0;
+    int it;
+    for(it=0; it<max_iter; it++){
+        int64_t skipped = 0;
+        sse = hamerly_step_1d(X, C, N, K, it == 0, &h, sum, cnt, &skipped);
+        pruned[it] = (double)skipped / (double)N;
+        double rel = fabs(sse - prev_sse) / (prev_sse > 0.0 ? prev_sse : 1.0);
+        if(rel < eps){ it++; break; }
+        update_step_1d(sum, cnt, C, K, X[0]);
+        prev_sse = sse;
+    }
+    memcpy(assign, h.label, (size_t)N * sizeof(int));
+    hamerly_free(&h);
     free(sum); free(cnt);
+    *iters_out = it;
+    *sse_out = sse;
 }
 
-static void kmeans_1d(const double *X, double *C, int *assign,
-                      int N, int K, int max_iter, double eps,
-                      int *iters_out, double *sse_out)
+/* Uma passada sobre o arquivo em blocos: atribuição, SSE e somas/contagens
+   por cluster acumuladas na mesma ordem (i crescente) que lloyd_step_1d
+   usa, então o resultado é idêntico bit a bit ao da versão em memória. `buf` (chunk doubles) recebe blocos float32 convertidos
+   e `assign` (chunk ints) os rótulos do bloco. Com `labels`, grava os
+   rótulos em fluxo; com `crc`, confere o CRC-32 durante a leitura. */
+static double outofcore_pass_1d(const dataset_stream *S, const double *C, int K,
+                                double *buf, int *assign, double *sum, int64_t *cnt,
+                                label_writer *labels, uint32_t *crc)
+{
+    double sse = 0.0;
+    if(sum){
+        memset(sum, 0, (size_t)K * sizeof(double));
+        memset(cnt, 0, (size_t)K * sizeof(int64_t));
+    }
+    dataset_window cur, next;
+    dataset_window_map(S, 0, &cur);
+    for(int64_t start=0; start<S->n; start+=S->chunk){
+        /* Mapeia o próximo bloco antes de processar o atual: o kernel lê
+           adiante enquanto este laço roda. */
+        if(start + S->chunk < S->n) dataset_window_map(S, start + S->chunk, &next);
+        if(crc) *crc = dataset_window_crc(S, &cur, *crc);
+
+        const double *X = (const double*)(const void*)cur.values;
+        if(S->dtype != KM1D_FLOAT64){
+            for(int64_t i=0;i<cur.count;i++) buf[i] = dataset_window_at(S, &cur, i);
+            X = buf;
+        }
+        for(int64_t i=0;i<cur.count;i++){
+            int best = -1;
+            double bestd = 1e300;
+            for(int c=0;c<K;c++){
+                double diff = X[i] - C[c];
+                double d = diff*diff;
+                if(d < bestd){ bestd = d; best = c; }
+            }
+            assign[i] = best;
+            sse += bestd;
+        }
+        if(sum){
+            for(int64_t i=0;i<cur.count;i++){
+                int a = assign[i];
+                cnt[a] += 1;
+                sum[a] += X[i];
+            }
+        }
+        if(labels) for(int64_t i=0;i<cur.count;i++) label_writer_put(labels, assign[i]);
+
+        dataset_window_unmap(&cur);
+        cur = next;
+    }
+    return sse;
+}
+
+/* Lloyd exato fora da memória: X nunca é carregado inteiro nem existe
+   vetor assign de tamanho N; a memória fica em O(chunk + K) qualquer que
+   seja N.
+   Iterações e SSE iguais aos de kmeans_1d. Os rótulos saem de uma passada
+   extra com os centróides da última atribuição (os mesmos que kmeans_1d
+   deixa em assign). */
+static void kmeans_1d_outofcore(const dataset_stream *S, double *C, int K,
+                                int max_iter, double eps, const char *outAssign,
+                                int *iters_out, double *sse_out)
 {
+    double *sum = (double*)malloc((size_t)K * sizeof(double));
+    int64_t *cnt = (int64_t*)malloc((size_t)K * sizeof(int64_t));
+    double *C_last = (double*)malloc((size_t)K * sizeof(double));
+    double *buf = S->dtype == KM1D_FLOAT64 ? NULL : (double*)malloc((size_t)S->chunk * sizeof(double));
+    int *assign = (int*)malloc((size_t)S->chunk * sizeof(int));
+    if(!sum || !cnt || !C_last || !assign || (S->dtype != KM1D_FLOAT64 && !buf)){ fprintf(stderr,"Sem memoria no modo em blocos\n"); exit(1); }
+
     double prev_sse = 1e300;
     double sse = 0.0;
     int it;
     for(it=0; it<max_iter; it++){
-        sse = assignment_step_1d(X, C, assign, N, K);
+        uint32_t crc = 0;
+        memcpy(C_last, C, (size_t)K * sizeof(double));
+        sse = outofcore_pass_1d(S, C, K, buf, assign, sum, cnt, NULL, it == 0 ? &crc : NULL);
+        if(it == 0 && crc != S->crc){ fprintf(stderr,"Checksum inválido no arquivo de dados\n"); exit(1); }
         double rel = fabs(sse - prev_sse) / (prev_sse > 0.0 ? prev_sse : 1.0);
         if(rel < eps){ it++; break; }
-        update_step_1d(X, C, assign, N, K);
+        update_step_1d(sum, cnt, C, K, S->first);
         prev_sse = sse;
     }
+
+    label_writer *w = outAssign ? (label_writer*)malloc(sizeof(label_writer)) : NULL;
+    if(w && label_writer_open(w, outAssign, K)){
+        outofcore_pass_1d(S, C_last, K, buf, assign, NULL, NULL, w, NULL);
+        label_writer_close(w);
+    }
+    free(w);
+    free(sum); free(cnt); free(C_last); free(buf); free(assign);
     *iters_out = it;
     *sse_out = sse;
 }
 
+static int main_outofcore(const char *pathX, const char *pathC, int64_t chunk, int max_iter, double eps,
+                          const char *outAssign, const char *outCentroid, int json)
+{
+    int K = 0;
+    dataset_stream S;
+    dataset_stream_open(pathX, chunk, &S);
+    double *C = dataset_read_copy(pathC, &K);
+
+    struct timespec t0, t1;
+    clock_gettime(CLOCK_MONOTONIC, &t0);
+    int iters = 0; double sse = 0.0;
+    kmeans_1d_outofcore(&S, C, K, max_iter, eps, outAssign, &iters, &sse);
+    clock_gettime(CLOCK_MONOTONIC, &t1);
+    double ms = 1000.0*(t1.tv_sec - t0.tv_sec) + 1e-6*(t1.tv_nsec - t0.tv_nsec);
+
+    if(json){
+        char extra[64];
+        snprintf(extra, sizeof(extra), "\"chunk\": %lld", (long long)S.chunk);
+        print_json_result("serial_ooc", (long long)S.n, K, max_iter, eps, iters, sse, ms, extra);
+    } else {
+        printf("K-means 1D (SERIAL, fora da memória, blocos de %lld pontos)\n", (long long)S.chunk);
+        printf("N=%lld K=%d max_iter=%d eps=%g\n", (long long)S.n, K, max_iter, eps);
+        printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+    }
+
+    write_centroids_file(outCentroid, C, K);
+    dataset_stream_close(&S); free(C);
+    return 0;
+}
+
+/* --dedup: ordena X uma vez, colapsa valores repetidos e itera sobre os M
+   distintos com pesos. O tempo inclui a deduplicação (também informada à
+   parte); os rótulos por ponto só são expandidos se assign.csv for pedido. */
+static int main_dedup(const char *pathX, const char *pathC, int max_iter, double eps,
+                      const char *outAssign, const char *outCentroid, int json)
+{
+    int N = 0, K = 0;
+    dataset_1d dsX;
+    dataset_open(pathX, &dsX);
+    const double *X = dsX.data;
+    N = dsX.n;
+    double *C = dataset_read_copy(pathC, &K);
+
+    struct timespec t0, t1, t2;
+    clock_gettime(CLOCK_MONOTONIC, &t0);
+    dataset_unique u;
+    dataset_unique_build(X, N, &u);
+    clock_gettime(CLOCK_MONOTONIC, &t1);
+    int *assign_u = NULL;
+    if(outAssign){
+        assign_u = (int*)malloc((size_t)u.m * sizeof(int));
+        if(!assign_u){ fprintf(stderr,"Sem memoria para assign\n"); return 1; }
+    }
+    int iters = 0; double sse = 0.0;
+    kmeans_1d_weighted(&u, C, assign_u, K, max_iter, eps, X[0], &iters, &sse);
+    clock_gettime(CLOCK_MONOTONIC, &t2);
+    double dedup_ms = 1000.0*(t1.tv_sec - t0.tv_sec) + 1e-6*(t1.tv_nsec - t0.tv_nsec);
+    double ms = 1000.0*(t2.tv_sec - t0.tv_sec) + 1e-6*(t2.tv_nsec - t0.tv_nsec);
+    double ratio = (double)N / (double)u.m;
+
+    if(json){
+        char extra[128];
+        snprintf(extra, sizeof(extra), "\"unique\": %lld, \"dup_ratio\": %.6f, \"dedup_ms\": %.3f",
+                 (long long)u.m, ratio, dedup_ms);
+        print_json_result("serial_dedup", N, K, max_iter, eps, iters, sse, ms, extra);
+    } else {
+        printf("K-means 1D (SERIAL, valores distintos com pesos)\n");
+        printf("N=%d K=%d max_iter=%d eps=%g\n", N, K, max_iter, eps);
+        printf("Valores distintos: %lld (N/M = %.3f) | Deduplicação: %.1f ms\n",
+               (long long)u.m, ratio, dedup_ms);
+        printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+    }
+
+    if(outAssign){
+        int *assign = (int*)malloc((size_t)N * sizeof(int));
+        if(!assign){ fprintf(stderr,"Sem memoria para assign\n"); return 1; }
+        for(int i=0;i<N;i++) assign[i] = assign_u[dataset_unique_index(&u, X[i])];
+        write_labels_file(outAssign, assign, sizeof(int), N, K);
+        free(assign);
+    }
+    write_centroids_file(outCentroid, C, K);
+
+    free(assign_u); dataset_unique_free(&u); dataset_close(&dsX); free(C);
+    return 0;
+}
+
+/* --float32: X em float32 e rótulos compactos. Informa os bytes de X e dos
+   rótulos e a economia em relação a double + int. */
+static int main_float32(const char *pathX, const char *pathC, int max_iter, double eps,
+                        const char *outAssign, const char *outCentroid, int json)
+{
+    int N = 0, K = 0;
+    dataset_1d_f32 dsX;
+    dataset_open_f32(pathX, &dsX);
+    const float *X = dsX.data;
+    N = dsX.n;
+    double *C = dataset_read_copy(pathC, &K);
+    int label_bytes = km1d_label_bytes(K);
+    void *labels = NULL;
+    if(outAssign){
+        labels = malloc((size_t)N * (size_t)label_bytes);
+        if(!labels){ fprintf(stderr,"Sem memoria para assign\n"); return 1; }
+    }
+
+    struct timespec t0, t1;
+    clock_gettime(CLOCK_MONOTONIC, &t0);
+    int iters = 0; double sse = 0.0;
+    kmeans_1d_f32(X, C, labels, label_bytes, N, K, max_iter, eps, &iters, &sse);
+    clock_gettime(CLOCK_MONOTONIC, &t1);
+    double ms = 1000.0*(t1.tv_sec - t0.tv_sec) + 1e-6*(t1.tv_nsec - t0.tv_nsec);
+
+    double bytes = (double)N * (sizeof(float) + (labels ? (size_t)label_bytes : 0));
+    double bytes_f64 = (double)N * (sizeof(double) + (labels ? sizeof(int) : 0));
+    if(json){
+        char extra[160];
+        snprintf(extra, sizeof(extra),
+                 "\"precision\": \"float32\", \"label_bytes\": %d, \"bytes\": %.0f, \"bytes_f64\": %.0f",
+                 label_bytes, bytes, bytes_f64);
+        print_json_result("serial_f32", N, K, max_iter, eps, iters, sse, ms, extra);
+    } else {
+        printf("K-means 1D (SERIAL, float32)\n");
+        printf("N=%d K=%d max_iter=%d eps=%g\n", N, K, max_iter, eps);
+        printf("Memória de X%s: %.1f MB (float64: %.1f MB, -%.0f%%) | rótulos de %d byte(s)\n",
+               labels ? " e rótulos" : "", bytes / 1e6, bytes_f64 / 1e6,
+               100.0 * (1.0 - bytes / bytes_f64), label_bytes);
+        printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+    }
+
+    write_labels_file(outAssign, labels, label_bytes, N, K);
+    write_centroids_file(outCentroid, C, K);
+
+    free(labels); dataset_close_f32(&dsX); free(C);
+    return 0;
+}
+
 int main(int argc, char **argv){
+    int json = take_flag(&argc, argv, "--json");
+    int hamerly = take_flag(&argc, argv, "--hamerly");
+    int dedup = take_flag(&argc, argv, "--dedup");
+    int f32 = take_flag(&argc, argv, "--float32");
+    lloyd_options opt = {0, 0, NULL, NULL};
+    opt.incremental = take_flag(&argc, argv, "--incremental");
+    opt.stop_on_labels = take_flag(&argc, argv, "--parar-sem-trocas");
+    const char *opt_chunk = take_option(&argc, argv, "--chunk");
+    const char *opt_trace = take_option(&argc, argv, "--trace");
     if(argc < 3){
-        printf("Uso: %s dados.csv centroides_iniciais.csv [max_iter=50] [eps=1e-4] [assign.csv] [centroids.csv]\n", argv[0]);
+        printf("Uso: %s dados.csv centroides_iniciais.csv [max_iter=50] [eps=1e-4] [assign.csv] [centroids.csv] "
+               "[--chunk PONTOS] [--hamerly] [--incremental] [--parar-sem-trocas] [--dedup] [--float32] [--trace ARQUIVO] [--json]\n", argv[0]);
         printf("Obs: arquivos CSV com 1 coluna (1 valor por linh), sem cabeçalho.\n");
+        printf("     assign/centroids terminados em .bin saem em binário (.rle: rótulos em sequências).\n");
+        printf("     --chunk lê um binário KM1D em blocos, com memória fixa (resultado idêntico).\n");
+        printf("     --hamerly poda distâncias com limites por ponto (resultado idêntico).\n");
+        printf("     --incremental atualiza somas e contagens só com os pontos que trocaram de cluster.\n");
+        printf("     --parar-sem-trocas para quando nenhum rótulo muda (em vez do teste do SSE).\n");
+        printf("     --dedup itera sobre os valores distintos de X, com pesos (mesmos rótulos).\n");
+        printf("     --float32 guarda X em float32 e rótulos em uint8/uint16 (somas e SSE em double).\n");
+        printf("     --trace grava tempo por fase, SSE e trocas por iteração (.json: formato Chrome; senão JSON Lines).\n");
         return 1;
     }
     const char *pathX = argv[1];
@@ -133,26 +659,97 @@ int main(int argc, char **argv){
         fprintf(stderr,"Parâmetros inválidos: max_iter>0 e eps>0\n");
         return 1;
     }
+    int tracking = opt.incremental || opt.stop_on_labels;
+    if((opt_chunk != NULL) + hamerly + (tracking != 0) + dedup + f32 > 1){
+        fprintf(stderr,"--chunk, --hamerly, --dedup, --float32 e --incremental/--parar-sem-trocas não podem ser combinados\n");
+        return 1;
+    }
+    if(opt_trace && (opt_chunk || hamerly || dedup || f32)){
+        fprintf(stderr,"--trace não pode ser combinado com --chunk, --hamerly, --dedup ou --float32\n");
+        return 1;
+    }
+    if(dedup) return main_dedup(pathX, pathC, max_iter, eps, outAssign, outCentroid, json);
+    if(f32) return main_float32(pathX, pathC, max_iter, eps, outAssign, outCentroid, json);
+    if(opt_chunk){
+        long long chunk = atoll(opt_chunk);
+        if(chunk <= 0){ fprintf(stderr,"Parâmetro inválido: --chunk>0\n"); return 1; }
+        return main_outofcore(pathX, pathC, chunk, max_iter, eps, outAssign, outCentroid, json);
+    }
 
+    kmeans_trace tr;
+    trace_open(&tr, opt_trace, 0);
+    double tm = trace_mark(&tr);
     int N=0, K=0;
-    double *X = read_csv_1col(pathX, &N);
-    double *C = read_csv_1col(pathC, &K);
-    int *assign = (int*)malloc((size_t)N * sizeof(int));
-    if(!assign){ fprintf(stderr,"Sem memoria para assign\n"); free(X); free(C); return 1; }
+    dataset_1d dsX;
+    dataset_open(pathX, &dsX);
+    const double *X = dsX.data;
+    N = dsX.n;
+    double *C = dataset_read_copy(pathC, &K);
+    trace_span(&tr, TRACE_LOAD, -1, tm);
+    if(opt_trace) opt.trace = &tr;
+    /* Rótulos só existem quando pedidos (Hamerly, o acompanhamento de
+       trocas e o --trace precisam deles sempre). */
+    int *assign = NULL;
+    double *per_iter = NULL;   /* podados (Hamerly) ou trocas por iteração */
+    if(outAssign || hamerly || tracking || opt_trace){
+        assign = (int*)malloc((size_t)N * sizeof(int));
+        if(!assign){ fprintf(stderr,"Sem memoria para assign\n"); dataset_close(&dsX); free(C); return 1; }
+    }
+    if(hamerly || tracking){
+        per_iter = (double*)malloc((size_t)max_iter * sizeof(double));
+        if(!per_iter){ fprintf(stderr,"Sem memoria\n"); return 1; }
+        if(tracking) opt.changed = per_iter;
+    }
 
-    clock_t t0 = clock();
+    /* Tempo de parede (CLOCK_MONOTONIC), como nos outros backends; clock()
+       mede tempo de CPU e diverge dele quando o processo espera pela CPU
+       ou por E/S. */
+    struct timespec t0, t1;
+    clock_gettime(CLOCK_MONOTONIC, &t0);
     int iters = 0; double sse = 0.0;
-    kmeans_1d(X, C, assign, N, K, max_iter, eps, &iters, &sse);
-    clock_t t1 = clock();
-    double ms = 1000.0 * (double)(t1 - t0) / (double)CLOCKS_PER_SEC;
+    if(hamerly) kmeans_1d_hamerly(X, C, assign, N, K, max_iter, eps, &iters, &sse, per_iter);
+    else        kmeans_1d(X, C, assign, N, K, max_iter, eps, &opt, &iters, &sse);
+    clock_gettime(CLOCK_MONOTONIC, &t1);
+    double ms = 1000.0*(t1.tv_sec - t0.tv_sec) + 1e-6*(t1.tv_nsec - t0.tv_nsec);
 
-    printf("K-means 1D (SERIAL)\n");
-    printf("N=%d K=%d max_iter=%d eps=%g\n", N, K, max_iter, eps);
-    printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+    if(json){
+        const char *backend = hamerly ? "serial_hamerly" : opt.incremental ? "serial_incremental" : "serial";
+        char *extra = NULL;
+        if(hamerly) extra = json_list_field("pruned", per_iter, iters);
+        if(tracking){
+            char *list = json_list_field("changed", opt.changed, iters);
+            extra = (char*)malloc(strlen(list) + 32);
+            if(!extra){ fprintf(stderr,"Sem memoria\n"); return 1; }
+            sprintf(extra, "%s, \"stop\": \"%s\"", list, opt.stop_on_labels ? "labels" : "sse");
+            free(list);
+        }
+        print_json_result(backend, N, K, max_iter, eps, iters, sse, ms, extra);
+        free(extra);
+    } else {
+        printf(hamerly ? "K-means 1D (SERIAL, Hamerly)\n" :
+               opt.incremental ? "K-means 1D (SERIAL, incremental)\n" : "K-means 1D (SERIAL)\n");
+        printf("N=%d K=%d max_iter=%d eps=%g\n", N, K, max_iter, eps);
+        printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+        if(hamerly){
+            printf("Pontos podados por iteração:");
+            for(int it=0; it<iters; it++) printf(" %.1f%%", 100.0 * per_iter[it]);
+            printf("\n");
+        }
+        if(tracking){
+            printf("Rótulos alterados por iteração:");
+            for(int it=0; it<iters; it++) printf(" %.0f", opt.changed[it]);
+            printf("\n");
+        }
+    }
 
-    write_assign_csv(outAssign, assign, N);
-    write_centroids_csv(outCentroid, C, K);
+    tm = trace_mark(&tr);
+    write_labels_file(outAssign, assign, sizeof(int), N, K);
+    write_centroids_file(outCentroid, C, K);
+    trace_span(&tr, TRACE_WRITE, -1, tm);
+    const char *backend = opt.incremental ? "serial_incremental" : "serial";
+    int ok = trace_save(&tr, tr.ev, tr.n, backend, N, K, 1, 1);
+    trace_close(&tr);
 
-    free(assign); free(X); free(C);
-    return 0;
+    free(assign); free(per_iter); dataset_close(&dsX); free(C);
+    return ok ? 0 : 1;
 }
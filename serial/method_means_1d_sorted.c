@@ -0,0 +1,222 @@
+#define _POSIX_C_SOURCE 200809L
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <math.h>
+#include <time.h>
+
+#include "../common/kmeans_io.h"
+#include "../common/kmeans_cli.h"
+
+/* Radix sort LSD (8 passadas de 8 bits) sobre a representação dos doubles
+   mapeada para inteiros sem sinal com a mesma ordem. */
+static void radix_sort_doubles(double *A, int N){
+    unsigned long long *a = (unsigned long long*)malloc((size_t)N * sizeof(unsigned long long));
+    unsigned long long *b = (unsigned long long*)malloc((size_t)N * sizeof(unsigned long long));
+    if(!a || !b){ fprintf(stderr,"Sem memoria na ordenacao\n"); exit(1); }
+    for(int i=0;i<N;i++){
+        unsigned long long u; memcpy(&u, &A[i], sizeof(u));
+        a[i] = (u >> 63) ? ~u : (u | 0x8000000000000000ULL);
+    }
+    for(int shift=0; shift<64; shift+=8){
+        size_t cnt[257] = {0};
+        for(int i=0;i<N;i++) cnt[((a[i] >> shift) & 0xFF) + 1]++;
+        if(cnt[((a[0] >> shift) & 0xFF) + 1] == (size_t)N) continue;
+        for(int d=0; d<256; d++) cnt[d+1] += cnt[d];
+        for(int i=0;i<N;i++) b[cnt[(a[i] >> shift) & 0xFF]++] = a[i];
+        unsigned long long *t = a; a = b; b = t;
+    }
+    for(int i=0;i<N;i++){
+        unsigned long long u = (a[i] >> 63) ? (a[i] & 0x7FFFFFFFFFFFFFFFULL) : ~a[i];
+        memcpy(&A[i], &u, sizeof(u));
+    }
+    free(a); free(b);
+}
+
+/* Ordem total dos doubles como inteiros (para busca binária entre a e b). */
+static long long float_key(double x){
+    long long i; memcpy(&i, &x, sizeof(i));
+    return i >= 0 ? i : -(i & 0x7FFFFFFFFFFFFFFFLL);
+}
+
+static double key_float(long long k){
+    long long i = k >= 0 ? k : ((-k) | (long long)0x8000000000000000ULL);
+    double x; memcpy(&x, &i, sizeof(x));
+    return x;
+}
+
+static int prefers_right(double x, double a, double b, int ia, int ib){
+    double da = (x - a)*(x - a);
+    double db = (x - b)*(x - b);
+    return db < da || (db == da && ib < ia);
+}
+
+/* Ordena os centróides (estável, sem repetidos) e calcula, para cada par
+   vizinho, o menor x em que o laço `d < bestd` da versão serial escolheria
+   o centróide da direita. Retorna U (centróides distintos). */
+static int boundaries_1d(const double *C, int K, int *order, double *T){
+    for(int c=0;c<K;c++) order[c] = c;
+    for(int i=1;i<K;i++){
+        int o = order[i], j = i;
+        while(j>0 && C[order[j-1]] > C[o]){ order[j] = order[j-1]; j--; }
+        order[j] = o;
+    }
+    int U = 0;
+    for(int i=0;i<K;i++){
+        if(U>0 && C[order[i]] == C[order[U-1]]) continue;
+        order[U++] = order[i];
+    }
+    for(int j=0;j<U-1;j++){
+        double a = C[order[j]], b = C[order[j+1]];
+        long long lo = float_key(a), hi = float_key(b);
+        while(lo < hi - 1){
+            long long mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1);
+            if(prefers_right(key_float(mid), a, b, order[j], order[j+1])) hi = mid;
+            else lo = mid;
+        }
+        T[j] = key_float(hi);
+    }
+    return U;
+}
+
+/* Primeiro índice i em [0,N) com Xs[i] >= t. */
+static int lower_bound(const double *Xs, int N, double t){
+    int lo = 0, hi = N;
+    while(lo < hi){
+        int mid = lo + (hi - lo)/2;
+        if(Xs[mid] < t) lo = mid + 1;
+        else hi = mid;
+    }
+    return lo;
+}
+
+/* Lloyd sobre X ordenado: cada cluster é um intervalo contínuo de Xs, então
+   contagens, somas e SSE saem das somas prefixadas S (x) e Q (x^2) com K-1
+   buscas binárias por iteração. */
+static void kmeans_1d_sorted(const double *Xs, const long double *S, const long double *Q,
+                             double x0, double *C, double *C_last, int N, int K, int max_iter,
+                             double eps, int *order, double *T, int *iters_out, double *sse_out)
+{
+    double prev_sse = 1e300;
+    double sse = 0.0;
+    int it;
+    for(it=0; it<max_iter; it++){
+        int U = boundaries_1d(C, K, order, T);
+        double newC[K];
+        for(int c=0;c<K;c++) newC[c] = x0;
+
+        long double acc = 0.0L;
+        int l = 0;
+        for(int j=0;j<U;j++){
+            int r = (j < U-1) ? lower_bound(Xs, N, T[j]) : N;
+            if(r > l){
+                long double c = C[order[j]];
+                long double s = S[r] - S[l];
+                long double q = Q[r] - Q[l];
+                long double n = (long double)(r - l);
+                acc += q - 2.0L*c*s + n*c*c;
+                newC[order[j]] = (double)(s / n);
+            }
+            l = r;
+        }
+        sse = (double)acc;
+
+        for(int c=0;c<K;c++) C_last[c] = C[c];
+
+        double rel = fabs(sse - prev_sse) / (prev_sse > 0.0 ? prev_sse : 1.0);
+        if(rel < eps){ it++; break; }
+        for(int c=0;c<K;c++) C[c] = newC[c];
+        prev_sse = sse;
+    }
+    *iters_out = it;
+    *sse_out = sse;
+}
+
+static void assign_labels_1d(const double *X, const double *C, int *assign, int N, int K,
+                             int *order, double *T){
+    int U = boundaries_1d(C, K, order, T);
+    for(int i=0;i<N;i++){
+        int lo = 0, hi = U - 1;
+        while(lo < hi){
+            int mid = (lo + hi)/2;
+            if(X[i] >= T[mid]) lo = mid + 1;
+            else hi = mid;
+        }
+        assign[i] = order[lo];
+    }
+}
+
+int main(int argc, char **argv){
+    int json = take_flag(&argc, argv, "--json");
+    if(argc < 3){
+        printf("Uso: %s dados.csv centroides_iniciais.csv [max_iter=50] [eps=1e-4] [assign.csv] [centroids.csv] [--json]\n", argv[0]);
+        printf("Obs: arquivos CSV com 1 coluna (1 valor por linha), sem cabeçalho.\n");
+        return 1;
+    }
+    const char *pathX = argv[1];
+    const char *pathC = argv[2];
+    int max_iter = (argc>3)? atoi(argv[3]) : 50;
+    double eps   = (argc>4)? atof(argv[4]) : 1e-4;
+    const char *outAssign   = (argc>5)? argv[5] : NULL;
+    const char *outCentroid = (argc>6)? argv[6] : NULL;
+
+    if(max_iter <= 0 || eps <= 0.0){
+        fprintf(stderr,"Parâmetros inválidos: max_iter>0 e eps>0\n");
+        return 1;
+    }
+
+    int N=0, K=0;
+    dataset_1d dsX;
+    dataset_open(pathX, &dsX);
+    const double *X = dsX.data;
+    N = dsX.n;
+    double *C = dataset_read_copy(pathC, &K);
+    double *Xs = (double*)malloc((size_t)N * sizeof(double));
+    long double *S = (long double*)malloc((size_t)(N+1) * sizeof(long double));
+    long double *Q = (long double*)malloc((size_t)(N+1) * sizeof(long double));
+    int *order = (int*)malloc((size_t)K * sizeof(int));
+    double *T = (double*)malloc((size_t)K * sizeof(double));
+    double *C_last = (double*)malloc((size_t)K * sizeof(double));
+    if(!Xs || !S || !Q || !order || !T || !C_last){ fprintf(stderr,"Sem memoria para dados ordenados\n"); return 1; }
+
+    struct timespec t0, t1, t2;
+    clock_gettime(CLOCK_MONOTONIC, &t0);
+    memcpy(Xs, X, (size_t)N * sizeof(double));
+    radix_sort_doubles(Xs, N);
+    S[0] = 0.0L; Q[0] = 0.0L;
+    for(int i=0;i<N;i++){
+        S[i+1] = S[i] + Xs[i];
+        Q[i+1] = Q[i] + (long double)Xs[i]*Xs[i];
+    }
+    clock_gettime(CLOCK_MONOTONIC, &t1);
+
+    int iters = 0; double sse = 0.0;
+    kmeans_1d_sorted(Xs, S, Q, X[0], C, C_last, N, K, max_iter, eps, order, T, &iters, &sse);
+    clock_gettime(CLOCK_MONOTONIC, &t2);
+    double ms_sort = 1000.0*(t1.tv_sec - t0.tv_sec) + 1e-6*(t1.tv_nsec - t0.tv_nsec);
+    double ms = 1000.0*(t2.tv_sec - t0.tv_sec) + 1e-6*(t2.tv_nsec - t0.tv_nsec);
+
+    if(json){
+        char extra[64];
+        snprintf(extra, sizeof(extra), "\"sort_ms\": %.6f", ms_sort);
+        print_json_result("sorted", N, K, max_iter, eps, iters, sse, ms, extra);
+    } else {
+        printf("K-means 1D (SERIAL, ordenado + somas prefixadas)\n");
+        printf("N=%d K=%d max_iter=%d eps=%g\n", N, K, max_iter, eps);
+        printf("Ordenação: %.1f ms | Iterações: %.3f ms\n", ms_sort, ms - ms_sort);
+        printf("Iterações: %d | SSE final: %.6f | Tempo: %.1f ms\n", iters, sse, ms);
+    }
+
+    if(outAssign){
+        int *assign = (int*)malloc((size_t)N * sizeof(int));
+        if(!assign){ fprintf(stderr,"Sem memoria para assign\n"); return 1; }
+        /* Mesmos rótulos da versão serial: os do último assignment. */
+        assign_labels_1d(X, C_last, assign, N, K, order, T);
+        write_labels_file(outAssign, assign, sizeof(int), N, K);
+        free(assign);
+    }
+    write_centroids_file(outCentroid, C, K);
+
+    free(C_last); free(T); free(order); free(Q); free(S); free(Xs); dataset_close(&dsX); free(C);
+    return 0;
+}
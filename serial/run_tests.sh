@@ -74,23 +74,29 @@ if [ ! -f "dados_pequeno.csv" ] || [ ! -f "dados_medio.csv" ] || [ ! -f "dados_g
 fi
 echo "Datasets encontrados"
 
+EXT=csv
+if [ -f "dados_pequeno.bin" ] && [ -f "dados_medio.bin" ] && [ -f "dados_grande.bin" ]; then
+    EXT=bin
+fi
+echo "Formato dos dados: $EXT"
+
 echo ""
 echo "======================================"
 echo "Testando Dataset PEQUENO (N=10,000, K=4)"
 echo "======================================"
-./kmeans_1d_serial dados_pequeno.csv centroides_pequeno.csv 50 0.000001 assign_serial_pequeno.csv centroids_serial_pequeno.csv
+./kmeans_1d_serial dados_pequeno.$EXT centroides_pequeno.$EXT 50 0.000001 assign_serial_pequeno.csv centroids_serial_pequeno.csv
 
 echo ""
 echo "======================================"
 echo "Testando Dataset MÉDIO (N=100,000, K=8)"
 echo "======================================"
-./kmeans_1d_serial dados_medio.csv centroides_medio.csv 50 0.000001 assign_serial_medio.csv centroids_serial_medio.csv
+./kmeans_1d_serial dados_medio.$EXT centroides_medio.$EXT 50 0.000001 assign_serial_medio.csv centroids_serial_medio.csv
 
 echo ""
 echo "======================================"
 echo "Testando Dataset GRANDE (N=1,000,000, K=16)"
 echo "======================================"
-./kmeans_1d_serial dados_grande.csv centroides_grande.csv 50 0.000001 assign_serial_grande.csv centroids_serial_grande.csv
+./kmeans_1d_serial dados_grande.$EXT centroides_grande.$EXT 50 0.000001 assign_serial_grande.csv centroids_serial_grande.csv
 
 echo ""
 echo "======================================"